@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Benchmark Chunker: Throughput and memory benchmarks for the normalize path.
+
+Builds synthetic Readwise book exports (shaped like tests/fixtures) with
+10 to 5,000 highlights and measures the stages every book goes through in
+the normalize Cloud Function:
+
+  1. transformer.json_to_markdown
+  2. DocumentChunker.split_into_chunks (tiktoken and 4 chars/token fallback)
+  3. DocumentChunker.chunk_to_markdown for every chunk
+
+For each case it reports throughput (docs/s, tokens/s), peak traced memory
+and the number of allocated blocks still held by the stage's result. Results
+can be saved as a JSON baseline and later compared against it; the run exits
+non-zero if any case slows down (or grows in peak memory) beyond a threshold.
+
+Usage:
+    # Run all cases and print the report
+    python scripts/benchmark_chunker.py
+
+    # Save a baseline (e.g., before a chunker change)
+    python scripts/benchmark_chunker.py --save-baseline /tmp/chunker-baseline.json
+
+    # Compare against the baseline, fail on >15% slowdown
+    python scripts/benchmark_chunker.py --compare /tmp/chunker-baseline.json
+
+    # Quick run on small documents only
+    python scripts/benchmark_chunker.py --sizes 10 100 --repeat 3
+
+Baselines are machine-specific; compare runs from the same host.
+"""
+
+import argparse
+import copy
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add src to path (normalize imports its own chunker copy)
+_src = os.path.join(os.path.dirname(__file__), "../src")
+sys.path.insert(0, _src)
+
+from normalize.common import chunker as chunker_module
+from normalize.common.chunker import ChunkConfig, DocumentChunker
+from normalize.transformer import json_to_markdown
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "../tests/fixtures")
+FIXTURE_FILES = ["sample-book.json", "large-book.json", "small-book.json"]
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.15  # 15% slowdown
+DEFAULT_MEMORY_THRESHOLD = 0.25  # 25% peak memory growth
+
+BASELINE_VERSION = 1
+
+
+# ============================================================================
+# Synthetic documents
+# ============================================================================
+
+
+def load_fixture_books() -> List[Dict[str, Any]]:
+    """Load the Readwise book fixtures used as templates."""
+    books = []
+    for name in FIXTURE_FILES:
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            books.append(json.load(f))
+    return books
+
+
+def synthetic_book(num_highlights: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Build a synthetic Readwise book export with num_highlights highlights.
+
+    Book metadata is taken from sample-book.json; highlights are sampled from
+    all fixtures with fresh ids, locations, timestamps and occasional notes,
+    so documents of any size have realistic text and boundary density.
+
+    Args:
+        num_highlights: Number of highlights to generate
+        seed: Random seed (same seed and size give the same document)
+
+    Returns:
+        Book dictionary in Readwise export format
+    """
+    rng = random.Random(seed + num_highlights)
+    fixtures = load_fixture_books()
+
+    book = copy.deepcopy(fixtures[0])
+    book["user_book_id"] = 900000000 + num_highlights
+    book["title"] = f"Synthetic Book ({num_highlights} highlights)"
+
+    templates = [h for fixture in fixtures for h in fixture.get("highlights", [])]
+    notes = [h["note"] for h in templates if h.get("note")]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    highlights = []
+    for i in range(num_highlights):
+        highlight = copy.deepcopy(rng.choice(templates))
+        highlighted_at = (start + timedelta(minutes=7 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        highlight.update({
+            "id": book["user_book_id"] * 10000 + i,
+            "location": i * 12 + 1,
+            "highlighted_at": highlighted_at,
+            "updated_at": highlighted_at,
+            "book_id": book["user_book_id"],
+            "note": rng.choice(notes) if notes and rng.random() < 0.3 else "",
+        })
+        highlights.append(highlight)
+
+    book["highlights"] = highlights
+    book["num_highlights"] = num_highlights
+    return book
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+
+def _tiktoken_available() -> bool:
+    """Check whether tiktoken and its cl100k_base encoding can be loaded."""
+    if not chunker_module._HAS_TIKTOKEN:
+        return False
+    try:
+        DocumentChunker()
+        return True
+    except Exception as e:
+        logger.warning(f"tiktoken installed but unusable, skipping tiktoken cases: {e}")
+        return False
+
+
+def make_chunker(use_tiktoken: bool) -> DocumentChunker:
+    """Create a chunker with production config, optionally forcing the fallback."""
+    if use_tiktoken:
+        return DocumentChunker(config=ChunkConfig())
+
+    # Bypass encoder loading entirely for the fallback path
+    saved = chunker_module._HAS_TIKTOKEN
+    chunker_module._HAS_TIKTOKEN = False
+    try:
+        return DocumentChunker(config=ChunkConfig())
+    finally:
+        chunker_module._HAS_TIKTOKEN = saved
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Time func (best of repeat runs) and trace its memory in a separate run.
+
+    Memory is traced separately because tracemalloc slows allocation-heavy
+    code down considerably and would distort the timings.
+
+    Args:
+        func: Zero-argument callable running one benchmark iteration
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with seconds, peak_bytes and allocated_blocks
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated_blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    del result
+
+    return {
+        "seconds": min(timings),
+        "peak_bytes": peak_bytes,
+        "allocated_blocks": allocated_blocks,
+    }
+
+
+def run_benchmarks(sizes: List[int], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every benchmark case for every document size.
+
+    Args:
+        sizes: Highlight counts of the synthetic documents
+        repeat: Number of timed runs per case
+
+    Returns:
+        Mapping of "case/size" to metrics
+    """
+    modes = [("fallback", False)]
+    if _tiktoken_available():
+        modes.insert(0, ("tiktoken", True))
+    else:
+        logger.warning("tiktoken not available, running fallback cases only")
+
+    chunkers = {name: make_chunker(use_tiktoken) for name, use_tiktoken in modes}
+    results = {}
+
+    for size in sizes:
+        book = synthetic_book(size)
+        markdown = json_to_markdown(book)
+        doc_id = str(book["user_book_id"])
+
+        cases: List[Tuple[str, Callable[[], Any], int]] = []
+        # Token volume is reported in the accurate tokenizer when available
+        reference = chunkers[modes[0][0]]
+        _, content = reference.parse_frontmatter(markdown)
+        doc_tokens = len(reference.token_offsets(content))
+
+        cases.append(("json_to_markdown", lambda: json_to_markdown(book), doc_tokens))
+
+        for name, chunker in chunkers.items():
+            tokens = len(chunker.token_offsets(content))
+            cases.append((
+                f"split_into_chunks[{name}]",
+                lambda c=chunker: c.split_into_chunks(markdown, parent_doc_id=doc_id),
+                tokens,
+            ))
+
+        chunks = reference.split_into_chunks(markdown, parent_doc_id=doc_id)
+        cases.append((
+            "chunk_to_markdown",
+            lambda: [reference.chunk_to_markdown(chunk) for chunk in chunks],
+            sum(chunk.token_count for chunk in chunks),
+        ))
+
+        for case_name, func, tokens in cases:
+            metrics = measure(func, repeat)
+            seconds = metrics["seconds"] or 1e-9
+            metrics.update({
+                "highlights": size,
+                "markdown_bytes": len(markdown.encode("utf-8")),
+                "tokens": tokens,
+                "chunks": len(chunks),
+                "docs_per_sec": 1.0 / seconds,
+                "tokens_per_sec": tokens / seconds,
+            })
+            key = f"{case_name}/{size}"
+            results[key] = metrics
+            logger.info(
+                f"{key}: {metrics['seconds'] * 1000:.2f} ms, "
+                f"{metrics['tokens_per_sec']:,.0f} tokens/s, "
+                f"peak {metrics['peak_bytes'] / 1024:,.0f} KiB"
+            )
+
+    return results
+
+
+# ============================================================================
+# Baselines
+# ============================================================================
+
+
+def build_report(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap results with environment details for a JSON baseline."""
+    return {
+        "version": BASELINE_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tiktoken": any(key.startswith("split_into_chunks[tiktoken]") for key in results),
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    memory_threshold: float = DEFAULT_MEMORY_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Compare current results against a baseline.
+
+    Only cases present in both runs are compared.
+
+    Args:
+        baseline: Baseline "results" mapping
+        current: Current "results" mapping
+        threshold: Allowed relative slowdown (0.15 = 15%)
+        memory_threshold: Allowed relative peak memory growth
+
+    Returns:
+        List of comparison rows with a "regression" flag
+    """
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        base, cur = baseline[key], current[key]
+        time_ratio = cur["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        memory_ratio = (
+            cur["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else 1.0
+        )
+        rows.append({
+            "case": key,
+            "baseline_seconds": base["seconds"],
+            "seconds": cur["seconds"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": (
+                time_ratio > 1.0 + threshold or memory_ratio > 1.0 + memory_threshold
+            ),
+        })
+    return rows
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    """Print a results table."""
+    print()
+    print(f"{'case':<38} {'ms':>10} {'docs/s':>10} {'tokens/s':>14} {'peak KiB':>10} {'blocks':>10}")
+    print("-" * 97)
+    for key, m in results.items():
+        print(
+            f"{key:<38} {m['seconds'] * 1000:>10.2f} {m['docs_per_sec']:>10.1f} "
+            f"{m['tokens_per_sec']:>14,.0f} {m['peak_bytes'] / 1024:>10,.0f} "
+            f"{m['allocated_blocks']:>10,}"
+        )
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    """Print a baseline comparison table."""
+    print()
+    print(f"{'case':<38} {'base ms':>10} {'ms':>10} {'time':>8} {'memory':>8}")
+    print("-" * 78)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['case']:<38} {row['baseline_seconds'] * 1000:>10.2f} "
+            f"{row['seconds'] * 1000:>10.2f} {row['time_ratio']:>7.2f}x "
+            f"{row['memory_ratio']:>7.2f}x{flag}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark json_to_markdown and DocumentChunker on synthetic books"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help=f"Highlight counts per synthetic book (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help=f"Timed runs per case, best is reported (default: {DEFAULT_REPEAT})",
+    )
+    parser.add_argument(
+        "--save-baseline", metavar="PATH",
+        help="Write results as a JSON baseline",
+    )
+    parser.add_argument(
+        "--compare", metavar="PATH",
+        help="Compare against a JSON baseline and exit 1 on regression",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help=f"Allowed relative slowdown (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD,
+        help=f"Allowed relative peak memory growth (default: {DEFAULT_MEMORY_THRESHOLD})",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat)
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(build_report(results), f, indent=2)
+        logger.info(f"Saved baseline to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("version") != BASELINE_VERSION:
+            logger.error(f"Unsupported baseline version: {baseline.get('version')}")
+            return 2
+
+        rows = compare_results(
+            baseline["results"], results, args.threshold, args.memory_threshold
+        )
+        print_comparison(rows)
+
+        regressions = [row["case"] for row in rows if row["regression"]]
+        if regressions:
+            logger.error(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        logger.info(f"No regressions across {len(rows)} cases")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML Text: Throughput and memory of the HTML extraction engines.
+
+Builds synthetic Reader documents of realistic sizes and compares every
+available engine in src/common/html_text.py against the BeautifulSoup
+reference (the original html_to_clean_text / date extraction code path):
+
+  1. to_text: visible text extraction (ReadwiseReaderClient.html_to_clean_text)
+  2. first_jsonld: scan until the first JSON-LD block
+     (date_extractor.extract_date_from_html fast path)
+
+Two document shapes are generated:
+  - article: web article with head metadata, navigation, scripts and prose
+  - pdf: PDF-derived HTML with thousands of absolutely positioned spans,
+    the shape that made Reader ingestion slow
+
+For each case it reports throughput (MB/s), the speedup over bs4 and peak
+traced Python memory. tracemalloc does not see libxml2's C allocations, so
+lxml's peak is a lower bound; its parser target builds no tree, so the
+untraced part stays small.
+
+Usage:
+    # Run all engines on all sizes
+    python scripts/benchmark_html.py
+
+    # Quick run on small documents, save results
+    python scripts/benchmark_html.py --sizes 50 500 --repeat 3 --json /tmp/html.json
+
+    # Compare selected engines only
+    python scripts/benchmark_html.py --engines bs4 lxml
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Add repo root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.common.html_text import create_engine, lxml_available
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [50, 500, 5000]  # KB
+DEFAULT_REPEAT = 5
+DEFAULT_ENGINES = ["bs4", "stdlib", "lxml"]
+REFERENCE_ENGINE = "bs4"
+
+WORDS = (
+    "feature flags decouple deployment from release and let teams ship small "
+    "changes safely while observing production behaviour with real users "
+    "rollback becomes a configuration change instead of a redeploy"
+).split()
+
+
+# ============================================================================
+# Synthetic documents
+# ============================================================================
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 24))]
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_article(size_kb: int, seed: int = 42) -> str:
+    """Build a web article of roughly size_kb kilobytes."""
+    rng = random.Random(seed)
+    head = (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+        "<title>Feature Flags in Practice</title>"
+        "<meta property=\"og:title\" content=\"Feature Flags in Practice\">"
+        "<meta property=\"article:published_time\" content=\"2024-03-01T08:00:00Z\">"
+        "<script type=\"application/ld+json\">"
+        "{\"@context\": \"https://schema.org\", \"@type\": \"Article\", "
+        "\"datePublished\": \"2024-03-01\"}</script>"
+        "<style>" + "body{font-family:serif} " * 50 + "</style>"
+        "<script>" + "window.dataLayer=window.dataLayer||[];" * 50 + "</script>"
+        "</head><body><header><a href=\"/\">Blog</a></header>"
+        "<nav><ul>" + "".join(f"<li><a href=\"/p/{i}\">Post {i}</a></li>" for i in range(30)) + "</ul></nav>"
+        "<article><h1>Feature Flags in Practice</h1>"
+    )
+    tail = "</article><aside>Related posts</aside><footer>&copy; 2024</footer></body></html>"
+
+    parts = [head]
+    size = len(head) + len(tail)
+    target = size_kb * 1024
+    while size < target:
+        paragraph = (
+            f"<p>{_sentence(rng)} <b>{rng.choice(WORDS)}</b> "
+            f"<a href=\"https://example.com/{rng.randint(0, 9999)}\">{_sentence(rng)}</a> "
+            f"{_sentence(rng)} &amp; {_sentence(rng)}</p>\n"
+        )
+        if rng.random() < 0.1:
+            paragraph = f"<h2>{_sentence(rng)}</h2>\n" + paragraph
+        parts.append(paragraph)
+        size += len(paragraph)
+    parts.append(tail)
+    return "".join(parts)
+
+
+def synthetic_pdf(size_kb: int, seed: int = 42) -> str:
+    """Build PDF-derived HTML (positioned spans per word) of roughly size_kb KB."""
+    rng = random.Random(seed)
+    head = "<html><head><title>Report.pdf</title></head><body>"
+    tail = "</body></html>"
+
+    parts = [head]
+    size = len(head) + len(tail)
+    target = size_kb * 1024
+    page = 0
+    while size < target:
+        page += 1
+        lines = []
+        for line in range(40):
+            spans = "".join(
+                f"<span style=\"left:{x * 9}px;font-size:10px\">{rng.choice(WORDS)} </span>"
+                for x in range(rng.randint(6, 12))
+            )
+            lines.append(f"<div class=\"l\" style=\"top:{line * 14}px\">{spans}</div>")
+        block = f"<div class=\"page\" id=\"p{page}\">{''.join(lines)}</div>\n"
+        parts.append(block)
+        size += len(block)
+    parts.append(tail)
+    return "".join(parts)
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Time func (best of repeat runs) and trace its memory in a separate run.
+
+    Args:
+        func: Zero-argument callable running one benchmark iteration
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with seconds and peak_bytes
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(timings), "peak_bytes": peak_bytes}
+
+
+def _first_jsonld(engine, html: str) -> Optional[str]:
+    for kind, value in engine.iter_date_hints(html):
+        if kind == "jsonld":
+            return value
+    return None
+
+
+def run_benchmarks(
+    sizes: List[int], repeat: int, engine_names: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every case for every engine, document shape and size.
+
+    Args:
+        sizes: Document sizes in KB
+        repeat: Number of timed runs per case
+        engine_names: Engines to compare
+
+    Returns:
+        Mapping of "case[engine]/shape/size" to metrics
+    """
+    if "lxml" in engine_names and not lxml_available():
+        logger.warning("lxml not installed, skipping lxml engine")
+        engine_names = [name for name in engine_names if name != "lxml"]
+    engines = {name: create_engine(name) for name in engine_names}
+
+    shapes = {"article": synthetic_article, "pdf": synthetic_pdf}
+    cases = {
+        "to_text": lambda engine, html: engine.to_text(html),
+        "first_jsonld": _first_jsonld,
+    }
+
+    results = {}
+    for size in sizes:
+        for shape, build in shapes.items():
+            # PDF documents carry no JSON-LD, so first_jsonld scans to the end
+            html = build(size)
+            for case_name, case in cases.items():
+                reference_seconds = None
+                reference_peak = None
+                for name, engine in engines.items():
+                    metrics = measure(lambda e=engine: case(e, html), repeat)
+                    seconds = metrics["seconds"] or 1e-9
+                    if name == REFERENCE_ENGINE:
+                        reference_seconds, reference_peak = seconds, metrics["peak_bytes"]
+                    metrics.update({
+                        "engine": name,
+                        "shape": shape,
+                        "html_bytes": len(html.encode("utf-8")),
+                        "mb_per_sec": len(html) / seconds / 1e6,
+                        "speedup": (reference_seconds / seconds) if reference_seconds else None,
+                        "memory_ratio": (
+                            metrics["peak_bytes"] / reference_peak if reference_peak else None
+                        ),
+                    })
+                    key = f"{case_name}[{name}]/{shape}/{size}KB"
+                    results[key] = metrics
+                    logger.info(
+                        f"{key}: {metrics['seconds'] * 1000:.1f} ms, "
+                        f"{metrics['mb_per_sec']:.1f} MB/s, "
+                        f"peak {metrics['peak_bytes'] / 1024:,.0f} KiB"
+                    )
+
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    """Print a results table."""
+    print()
+    print(f"{'case':<36} {'ms':>10} {'MB/s':>8} {'vs bs4':>8} {'peak KiB':>10} {'mem vs bs4':>11}")
+    print("-" * 88)
+    for key, m in results.items():
+        speedup = f"{m['speedup']:.1f}x" if m["speedup"] else "-"
+        memory = f"{m['memory_ratio']:.2f}x" if m["memory_ratio"] else "-"
+        print(
+            f"{key:<36} {m['seconds'] * 1000:>10.1f} {m['mb_per_sec']:>8.1f} "
+            f"{speedup:>8} {m['peak_bytes'] / 1024:>10,.0f} {memory:>11}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark HTML-to-text engines on synthetic Reader documents"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help=f"Document sizes in KB (default: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help=f"Timed runs per case, best is reported (default: {DEFAULT_REPEAT})",
+    )
+    parser.add_argument(
+        "--engines", nargs="+", default=DEFAULT_ENGINES, choices=DEFAULT_ENGINES,
+        help=f"Engines to compare; bs4 is the reference (default: {DEFAULT_ENGINES})",
+    )
+    parser.add_argument(
+        "--json", metavar="PATH",
+        help="Write results as JSON",
+    )
+    args = parser.parse_args(argv)
+
+    # Reference first so speedups can be computed
+    engine_names = sorted(args.engines, key=lambda name: name != REFERENCE_ENGINE)
+    results = run_benchmarks(args.sizes, args.repeat, engine_names)
+    print_results(results)
+
+    if args.json:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Saved results to {args.json}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
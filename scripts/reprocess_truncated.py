@@ -23,6 +23,9 @@ Usage:
     # Reset tags only (don't run pipeline, let nightly job handle it)
     python scripts/reprocess_truncated.py --execute --reset-only
 
+    # Reuse embeddings from a local shard cache instead of Firestore
+    python scripts/reprocess_truncated.py --execute --embedding-store local
+
 Cost: LLM calls (Gemini Flash) + Readwise API + Firestore writes per article.
 """
 
@@ -179,8 +182,17 @@ def main():
         default=0,
         help="Max articles to process (0 = all)",
     )
+    parser.add_argument(
+        "--embedding-store",
+        choices=["firestore", "local", "off"],
+        default=os.environ.get("EMBEDDING_STORE", "firestore"),
+        help="Embedding store consulted before calling Vertex AI (default: firestore)",
+    )
     args = parser.parse_args()
 
+    # Read lazily by embedding_store on the first embedding call
+    os.environ["EMBEDDING_STORE"] = args.embedding_store
+
     if not args.execute:
         logger.info("DRY RUN — pass --execute to actually reprocess")
 
@@ -22,11 +22,17 @@ cp "$SCRIPT_DIR/requirements.txt" "$BUILD_DIR/"
 # Copy shared modules (flat structure for Cloud Functions)
 cp "$SRC_DIR/ingest/reader_client.py" "$BUILD_DIR/"
 cp "$SRC_DIR/ingest/readwise_writer.py" "$BUILD_DIR/"
+cp "$SRC_DIR/common/http_client.py" "$BUILD_DIR/"
+cp "$SRC_DIR/common/rate_limiter.py" "$BUILD_DIR/"
+cp "$SRC_DIR/common/html_text.py" "$BUILD_DIR/"
 cp "$SRC_DIR/knowledge_cards/snippet_extractor.py" "$BUILD_DIR/"
 cp "$SRC_DIR/knowledge_cards/generator.py" "$BUILD_DIR/"
+cp "$SRC_DIR/knowledge_cards/concurrency.py" "$BUILD_DIR/"
 cp "$SRC_DIR/knowledge_cards/prompt_manager.py" "$BUILD_DIR/"
 cp "$SRC_DIR/knowledge_cards/schema.py" "$BUILD_DIR/"
 cp "$SRC_DIR/embed/main.py" "$BUILD_DIR/embed_main.py"  # Renamed to avoid conflict
+cp "$SRC_DIR/embed/embedding_store.py" "$BUILD_DIR/"
+cp "$SRC_DIR/embed/governor.py" "$BUILD_DIR/"
 cp "$SRC_DIR/embed/problem_matcher.py" "$BUILD_DIR/"
 
 # Copy prompt template
@@ -3,17 +3,22 @@ Nightly Auto-Snippets Cloud Function (Epic 13, Story 13.4).
 
 Processes Reader articles tagged 'kx-auto':
 1. Fetches tagged documents from Readwise Reader API
-2. Checks idempotency (skip already-processed documents)
+2. Checks idempotency (one batched prefetch; skip already-processed documents)
 3. Runs snippet extraction + embedding pipeline (Story 13.2/13.3)
 4. Updates Reader tags: removes ingest tag, adds processed tag
 5. Stores job report in Firestore batch_jobs
+
+Steps 3-4 run per document on a bounded thread pool (max_concurrency).
+Reader calls share the process-wide Readwise rate limiter, and the pool
+size caps the number of in-flight LLM requests.
 """
 
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from google.cloud import firestore, secretmanager
 
@@ -45,6 +50,8 @@ logger = logging.getLogger(__name__)
 
 # Environment variables
 PROJECT_ID = os.environ.get("GCP_PROJECT")
+PREFETCH_BATCH_SIZE = 100  # Firestore get_all refs per call
+AUTO_SNIPPETS_CONCURRENCY = int(os.environ.get("AUTO_SNIPPETS_CONCURRENCY", "4"))
 
 # Lazy-init clients
 _firestore_client = None
@@ -82,7 +89,8 @@ def load_config(db: firestore.Client) -> Dict[str, Any]:
         "tag": "kx-auto",
         "processed_tag": "kx-processed",
         "write_to_readwise": True,
-        "max_documents_per_run": 20,
+        "max_documents_per_run": 50,
+        "max_concurrency": AUTO_SNIPPETS_CONCURRENCY,
     }
 
     doc = db.collection("config").document("auto_snippets").get()
@@ -91,25 +99,68 @@ def load_config(db: firestore.Client) -> Dict[str, Any]:
     return defaults
 
 
-def is_already_processed(db: firestore.Client, document_id: str) -> bool:
+def _first_chunk_id(document_id: str) -> str:
+    """kb_items ID of the first chunk created by embed_snippets()."""
+    return f"auto_snippet_{document_id}_0"
+
+
+def is_already_processed(
+    db: firestore.Client,
+    document_id: str,
+    processed_ids: Optional[Set[str]] = None,
+) -> bool:
     """
     Check if a document has already been processed (idempotency).
 
     Checks for existence of kb_items/auto_snippet_{doc_id}_0 — the first
-    chunk created by embed_snippets(). O(1) Firestore read.
+    chunk created by embed_snippets(). With a prefetched set (see
+    prefetch_processed_ids) this is an in-memory lookup; otherwise an
+    O(1) Firestore read.
 
     Args:
         db: Firestore client
         document_id: Reader document ID
+        processed_ids: Optional prefetched set of processed document IDs
 
     Returns:
         True if already processed
     """
-    chunk_id = f"auto_snippet_{document_id}_0"
-    doc = db.collection("kb_items").document(chunk_id).get()
+    if processed_ids is not None:
+        return document_id in processed_ids
+
+    doc = db.collection("kb_items").document(_first_chunk_id(document_id)).get()
     return doc.exists
 
 
+def prefetch_processed_ids(db: firestore.Client, document_ids: List[str]) -> Set[str]:
+    """
+    Fetch which documents were already processed in batched reads.
+
+    Uses get_all() on the deterministic first-chunk IDs (100 refs per
+    call) instead of one round trip per document. Only the small chunk_id
+    field is requested so embedding vectors are not transferred.
+
+    Args:
+        db: Firestore client
+        document_ids: Reader document IDs for this run
+
+    Returns:
+        Set of document IDs that already have kb_items
+    """
+    doc_id_by_chunk = {_first_chunk_id(doc_id): doc_id for doc_id in document_ids}
+    chunk_ids = list(doc_id_by_chunk)
+    processed: Set[str] = set()
+
+    for i in range(0, len(chunk_ids), PREFETCH_BATCH_SIZE):
+        batch = chunk_ids[i : i + PREFETCH_BATCH_SIZE]
+        refs = [db.collection("kb_items").document(cid) for cid in batch]
+        for snapshot in db.get_all(refs, field_paths=["chunk_id"]):
+            if snapshot.exists:
+                processed.add(doc_id_by_chunk[snapshot.id])
+
+    return processed
+
+
 def update_tags(
     reader: ReadwiseReaderClient,
     document_id: str,
@@ -146,6 +197,87 @@ def update_tags(
         return False
 
 
+def process_tagged_document(
+    db: firestore.Client,
+    reader: ReadwiseReaderClient,
+    raw_doc: Dict[str, Any],
+    api_key: str,
+    config: Dict[str, Any],
+    processed_ids: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the full pipeline for one tagged Reader document.
+
+    Safe to call from worker threads: never raises, so one document's
+    failure cannot affect the others.
+
+    Args:
+        db: Firestore client
+        reader: Reader API client
+        raw_doc: Raw document from fetch_tagged_documents()
+        api_key: Readwise API token
+        config: Loaded auto_snippets config
+        processed_ids: Prefetched processed document IDs (None = query
+            Firestore for this document)
+
+    Returns:
+        Dict with doc_id, status ("processed", "skipped" or "failed"),
+        snippets and embedded counts
+    """
+    doc_id = raw_doc.get("id", "unknown")
+    doc_title = raw_doc.get("title", "Untitled")
+    outcome = {"doc_id": doc_id, "status": "skipped", "snippets": 0, "embedded": 0}
+
+    try:
+        # Idempotency check
+        if is_already_processed(db, doc_id, processed_ids):
+            logger.info(f"Skipping already-processed document: {doc_title}")
+            return outcome
+
+        # Extract content and run pipeline
+        reader_doc = reader.extract_document_content(raw_doc)
+
+        is_overflow = len(reader_doc.clean_text) > OVERFLOW_THRESHOLD
+        if is_overflow:
+            logger.warning(
+                f"Overflow: '{doc_title}' is {len(reader_doc.clean_text):,} chars "
+                f"(>{OVERFLOW_THRESHOLD:,}) — segmented extraction, will tag 'kx-overflow'"
+            )
+
+        result = process_document(
+            reader_doc,
+            api_key=api_key,
+            write_to_readwise=config["write_to_readwise"],
+        )
+
+        outcome["snippets"] = result.get("snippets_extracted", 0)
+        outcome["embedded"] = result.get("chunks_embedded", 0)
+
+        # Update tags on success with snippets
+        if outcome["snippets"] > 0:
+            current_tags = raw_doc.get("tags", [])
+            extra_tags = ["kx-overflow"] if is_overflow else None
+            update_tags(
+                reader, doc_id, current_tags, config["tag"], config["processed_tag"],
+                extra_tags=extra_tags,
+            )
+            outcome["status"] = "processed"
+            logger.info(
+                f"Processed '{doc_title}': "
+                f"{outcome['snippets']} snippets, {outcome['embedded']} embedded"
+            )
+        else:
+            # No snippets extracted — skip tag update, count as skipped
+            logger.info(f"No snippets for '{doc_title}', skipping tag update")
+
+    except Exception as e:
+        # Failure — retain tags for retry
+        logger.error(f"Failed to process '{doc_title}': {e}")
+        outcome["status"] = "failed"
+
+    return outcome
+
+
 def store_job_report(
     db: firestore.Client,
     config: Dict[str, Any],
@@ -190,12 +322,14 @@ def auto_snippets(event, context):
     Processes Reader articles tagged for auto-ingestion:
     1. Load config from Firestore
     2. Fetch tagged documents from Reader API
-    3. For each document (up to max_documents_per_run):
+    3. Prefetch which documents were already processed (batched read)
+    4. For each document (up to max_documents_per_run, max_concurrency
+       at a time):
        a. Check idempotency (skip if already processed)
        b. Run process_document pipeline
        c. On success with snippets: update tags
        d. On failure: retain tags for retry next night
-    4. Store job report
+    5. Store job report
 
     Args:
         event: Pub/Sub event data
@@ -212,9 +346,8 @@ def auto_snippets(event, context):
             return
 
         tag = config["tag"]
-        processed_tag = config["processed_tag"]
-        write_to_readwise = config["write_to_readwise"]
         max_docs = config["max_documents_per_run"]
+        max_concurrency = max(1, config.get("max_concurrency", AUTO_SNIPPETS_CONCURRENCY))
 
         logger.info(f"Starting auto-snippets with config: {config}")
 
@@ -227,66 +360,35 @@ def auto_snippets(event, context):
 
         logger.info(f"Found {len(raw_documents)} documents tagged '{tag}'")
 
-        # 3. Process each document
-        processed_list = []
-        skipped_list = []
-        failed_list = []
-        total_snippets = 0
-        total_embedded = 0
-
-        for raw_doc in raw_documents[:max_docs]:
-            doc_id = raw_doc.get("id", "unknown")
-            doc_title = raw_doc.get("title", "Untitled")
-
-            # 3a. Idempotency check
-            if is_already_processed(db, doc_id):
-                logger.info(f"Skipping already-processed document: {doc_title}")
-                skipped_list.append(doc_id)
-                continue
-
-            # 3b. Extract content and run pipeline
-            try:
-                reader_doc = reader.extract_document_content(raw_doc)
-
-                is_overflow = len(reader_doc.clean_text) > OVERFLOW_THRESHOLD
-                if is_overflow:
-                    logger.warning(
-                        f"Overflow: '{doc_title}' is {len(reader_doc.clean_text):,} chars "
-                        f"(>{OVERFLOW_THRESHOLD:,}) — will tag 'kx-overflow'"
-                    )
-
-                result = process_document(
-                    reader_doc,
-                    api_key=api_key,
-                    write_to_readwise=write_to_readwise,
+        batch = raw_documents[:max_docs]
+
+        # 3. Prefetch idempotency state in one batched read
+        try:
+            processed_ids = prefetch_processed_ids(
+                db, [raw_doc.get("id", "unknown") for raw_doc in batch]
+            )
+            logger.info(f"{len(processed_ids)}/{len(batch)} documents already processed")
+        except Exception as e:
+            logger.warning(f"Idempotency prefetch failed, checking per document: {e}")
+            processed_ids = None
+
+        # 4. Process documents concurrently (results kept in document order)
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = [
+                executor.submit(
+                    process_tagged_document, db, reader, raw_doc, api_key, config, processed_ids
                 )
+                for raw_doc in batch
+            ]
+            outcomes = [future.result() for future in futures]
+
+        processed_list = [o["doc_id"] for o in outcomes if o["status"] == "processed"]
+        skipped_list = [o["doc_id"] for o in outcomes if o["status"] == "skipped"]
+        failed_list = [o["doc_id"] for o in outcomes if o["status"] == "failed"]
+        total_snippets = sum(o["snippets"] for o in outcomes)
+        total_embedded = sum(o["embedded"] for o in outcomes)
 
-                snippets_count = result.get("snippets_extracted", 0)
-                embedded_count = result.get("chunks_embedded", 0)
-                total_snippets += snippets_count
-                total_embedded += embedded_count
-
-                # 3c. Update tags on success with snippets
-                if snippets_count > 0:
-                    current_tags = raw_doc.get("tags", [])
-                    extra_tags = ["kx-overflow"] if is_overflow else None
-                    update_tags(reader, doc_id, current_tags, tag, processed_tag, extra_tags=extra_tags)
-                    processed_list.append(doc_id)
-                    logger.info(
-                        f"Processed '{doc_title}': "
-                        f"{snippets_count} snippets, {embedded_count} embedded"
-                    )
-                else:
-                    # No snippets extracted — skip tag update, count as skipped
-                    skipped_list.append(doc_id)
-                    logger.info(f"No snippets for '{doc_title}', skipping tag update")
-
-            except Exception as e:
-                # 3d. Failure — retain tags for retry
-                logger.error(f"Failed to process '{doc_title}': {e}")
-                failed_list.append(doc_id)
-
-        # 4. Store job report
+        # 5. Store job report
         execution_time = time.time() - start_time
         metrics = {
             "documents_found": len(raw_documents),
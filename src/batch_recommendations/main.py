@@ -21,6 +21,11 @@ from typing import Dict, List, Any, Optional
 from google.cloud import firestore, secretmanager
 from reader_client import ReadwiseReaderClient
 
+try:
+    from src.common import http_client
+except ImportError:
+    import http_client
+
 logger = logging.getLogger(__name__)
 
 # Environment variables
@@ -91,10 +96,11 @@ def start_recommendations_job(config: Dict[str, Any]) -> Dict[str, Any]:
         f"Starting recommendations job via MCP Server: {mcp_url}/recommendations"
     )
 
-    response = requests.post(
+    response = http_client.post(
         f"{mcp_url}/recommendations",
         json=payload,
         timeout=120,  # Allow time for cold start
+        max_retries=1,  # Starting a job is not idempotent
     )
     response.raise_for_status()
 
@@ -129,7 +135,7 @@ def poll_job_until_complete(
             raise TimeoutError(f"Job {job_id} did not complete within {timeout}s")
 
         # Poll job status via MCP endpoint
-        response = requests.post(
+        response = http_client.post(
             f"{mcp_url}/recommendations",
             json={"job_id": job_id},
             timeout=120,  # Allow time for cold start
@@ -451,6 +457,7 @@ def batch_recommendations(event, context):
             f"Batch complete: {len(saved_items)} articles saved "
             f"(report: {report_id}, time: {execution_time:.1f}s)"
         )
+        http_client.log_metrics("Batch HTTP")
 
     except Exception as e:
         logger.error(f"Batch failed: {e}", exc_info=True)
@@ -5,9 +5,15 @@ API Docs: https://readwise.io/reader_api
 """
 
 import logging
-import requests
 from typing import List, Dict, Any, Optional
 
+try:
+    from src.common import http_client
+    from src.common.rate_limiter import RateLimiter, get_limiter
+except ImportError:
+    import http_client
+    from rate_limiter import RateLimiter, get_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,21 +22,24 @@ class ReadwiseReaderClient:
 
     BASE_URL = "https://readwise.io/api/v3"
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize Reader client.
 
         Args:
             api_key: Readwise API token
+            rate_limiter: Limiter to draw from (default: the process-wide
+                "readwise" limiter)
         """
         self.api_key = api_key
-        self.session = requests.Session()
-        self.session.headers.update(
+        # Pooled keep-alive connections shared with other API clients
+        self.session = http_client.create_session(
             {
                 "Authorization": f"Token {api_key}",
                 "Content-Type": "application/json",
             }
         )
+        self.rate_limiter = rate_limiter or get_limiter("readwise")
 
     def save_url(
         self,
@@ -58,10 +67,14 @@ class ReadwiseReaderClient:
         if title:
             payload["title"] = title
 
-        response = self.session.post(
+        response = http_client.request(
+            "POST",
             f"{self.BASE_URL}/save/",
+            session=self.session,
             json=payload,
             timeout=10,
+            max_retries=1,  # Callers own the save retry policy (409 = duplicate)
+            before_attempt=lambda: self.rate_limiter.acquire("general"),
         )
         response.raise_for_status()
 
@@ -89,10 +102,13 @@ class ReadwiseReaderClient:
             if page_cursor:
                 params["page_cursor"] = page_cursor
 
-            response = self.session.get(
+            response = http_client.request(
+                "GET",
                 f"{self.BASE_URL}/list/",
+                session=self.session,
                 params=params,
                 timeout=10,
+                before_attempt=lambda: self.rate_limiter.acquire("list"),
             )
             response.raise_for_status()
 
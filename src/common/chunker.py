@@ -5,10 +5,14 @@ This module implements hierarchical chunking with overlap for optimal vector emb
 """
 
 import hashlib
+import heapq
 import re
 import yaml
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime, timezone
 
 try:
@@ -18,6 +22,12 @@ except ImportError:
     _HAS_TIKTOKEN = False
     tiktoken = None
 
+# Approximate chars per token when tiktoken is not available
+FALLBACK_CHARS_PER_TOKEN = 4
+
+# UTF-8 continuation bytes (0b10xxxxxx) never start a character
+_UTF8_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
 
 @dataclass
 class ChunkConfig:
@@ -54,6 +64,55 @@ class Chunk:
     content_hash: str
 
 
+class BoundaryCursor:
+    """
+    Forward-only cursor over a position-sorted boundary stream.
+
+    Chunk targets only ever move forward, so each boundary is pulled from the
+    stream once and only the closest boundary behind the target plus one
+    lookahead boundary are kept in memory.
+    """
+
+    def __init__(self, boundaries: Iterator[ChunkBoundary]):
+        """
+        Initialize the cursor.
+
+        Args:
+            boundaries: Boundaries sorted by (position, priority)
+        """
+        self._boundaries = iter(boundaries)
+        self._last: Optional[ChunkBoundary] = None
+        self._next: Optional[ChunkBoundary] = next(self._boundaries, None)
+
+    def around(
+        self,
+        char_start: int,
+        target_char: int
+    ) -> Tuple[Optional[ChunkBoundary], Optional[ChunkBoundary]]:
+        """
+        Find the boundaries surrounding a split target.
+
+        Args:
+            char_start: Start of the current chunk (must not decrease)
+            target_char: Target split position (must not decrease)
+
+        Returns:
+            Tuple of (closest boundary in (char_start, target_char],
+            first boundary after target_char); either may be None.
+            At a shared position the highest-priority boundary is returned.
+        """
+        while self._next is not None and self._next.position <= target_char:
+            if self._last is None or self._next.position != self._last.position:
+                self._last = self._next
+            self._next = next(self._boundaries, None)
+
+        before = self._last
+        if before is not None and before.position <= char_start:
+            before = None
+
+        return before, self._next
+
+
 class DocumentChunker:
     """Handles document chunking with semantic awareness and overlap."""
 
@@ -133,93 +192,142 @@ class DocumentChunker:
         Returns:
             List of ChunkBoundary objects sorted by position
         """
-        boundaries = []
+        return list(self.iter_semantic_boundaries(text))
+
+    def iter_semantic_boundaries(self, text: str) -> Iterator[ChunkBoundary]:
+        """
+        Lazily yield semantic boundaries sorted by position, then priority.
+
+        Each boundary type is scanned by its own regex iterator and the
+        streams are merged, so boundaries are produced on demand without
+        building (or sorting) the full list.
+
+        Args:
+            text: Content to analyze
+
+        Returns:
+            Iterator of ChunkBoundary objects in (position, priority) order
+        """
+        streams = []
 
         # Priority 1: Highlight boundaries (blockquote pattern)
         if self.config.enable_highlight_boundary:
-            for match in re.finditer(r'^> ', text, re.MULTILINE):
-                boundaries.append(ChunkBoundary(
-                    position=match.start(),
-                    boundary_type='highlight',
-                    priority=1
-                ))
+            streams.append(
+                ChunkBoundary(position=match.start(), boundary_type='highlight', priority=1)
+                for match in re.finditer(r'^> ', text, re.MULTILINE)
+            )
 
         # Priority 2: Paragraph boundaries
         if self.config.enable_paragraph_boundary:
-            for match in re.finditer(r'\n\n+', text):
-                boundaries.append(ChunkBoundary(
-                    position=match.end(),
-                    boundary_type='paragraph',
-                    priority=2
-                ))
+            streams.append(
+                ChunkBoundary(position=match.end(), boundary_type='paragraph', priority=2)
+                for match in re.finditer(r'\n\n+', text)
+            )
 
         # Priority 3: Sentence boundaries
         if self.config.enable_sentence_boundary:
             # Match ". " followed by uppercase letter (sentence end)
-            for match in re.finditer(r'\.\s+(?=[A-Z])', text):
-                boundaries.append(ChunkBoundary(
-                    position=match.end(),
-                    boundary_type='sentence',
-                    priority=3
-                ))
+            streams.append(
+                ChunkBoundary(position=match.end(), boundary_type='sentence', priority=3)
+                for match in re.finditer(r'\.\s+(?=[A-Z])', text)
+            )
+
+        return heapq.merge(*streams, key=lambda b: (b.position, b.priority))
+
+    def token_offsets(self, text: str) -> Sequence[int]:
+        """
+        Encode text once and map every token to its starting character.
 
-        # Sort by position, then by priority
-        boundaries.sort(key=lambda b: (b.position, b.priority))
+        Args:
+            text: Input text
+
+        Returns:
+            Ascending character offsets, one per token (approximated at
+            4 chars/token if tiktoken not available)
+        """
+        if not text:
+            return []
+
+        if not self.encoder:
+            return range(0, len(text), FALLBACK_CHARS_PER_TOKEN)
+
+        token_bytes = self.encoder.decode_tokens_bytes(self.encoder.encode(text))
+        # Characters per token = bytes that start a UTF-8 character
+        char_lengths = [
+            len(chunk.translate(None, _UTF8_CONTINUATION_BYTES))
+            for chunk in token_bytes[:-1]
+        ]
+        # Compact int64 array: 8 bytes per token for multi-megabyte documents
+        return array('q', accumulate(char_lengths, initial=0))
+
+    @staticmethod
+    def count_tokens_between(offsets: Sequence[int], char_start: int, char_end: int) -> int:
+        """
+        Count tokens starting within [char_start, char_end) by offset arithmetic.
+
+        Args:
+            offsets: Token start offsets from token_offsets()
+            char_start: Span start (inclusive)
+            char_end: Span end (exclusive)
 
-        return boundaries
+        Returns:
+            Token count of the span
+        """
+        return bisect_left(offsets, char_end) - bisect_left(offsets, char_start)
 
     def find_split_point(
         self,
-        text: str,
-        target_position: int,
-        boundaries: List[ChunkBoundary]
+        offsets: Sequence[int],
+        cursor: BoundaryCursor,
+        char_start: int,
+        start_token: int
     ) -> Tuple[int, str]:
         """
-        Find the best split point near target position using semantic boundaries.
+        Find the best split point for a chunk starting at start_token.
+
+        All distances are measured in tokens: a boundary shortly before the
+        target size is preferred, then one shortly after it (never exceeding
+        max_tokens), then any earlier boundary that still yields min_tokens.
+        Otherwise the chunk is cut at exactly target_tokens.
 
         Args:
-            text: Text to split
-            target_position: Desired character position
-            boundaries: List of semantic boundaries
+            offsets: Token start offsets for the content
+            cursor: Boundary cursor positioned at or before this chunk
+            char_start: Character position where the chunk starts
+            start_token: Token index where the chunk starts
 
         Returns:
             Tuple of (split_position, boundary_type)
         """
-        if not boundaries:
-            # Fallback: split at target position
-            return min(target_position, len(text)), 'token_limit'
+        target_token = start_token + self.config.target_tokens
+        target_char = offsets[target_token]
 
-        # Find boundaries before and after target
-        before = [b for b in boundaries if b.position <= target_position]
-        after = [b for b in boundaries if b.position > target_position]
+        # Closest boundary at or before target (must make progress) and
+        # the first boundary after it
+        before, after = cursor.around(char_start, target_char)
 
-        # Prefer boundary before target (within reason)
         if before:
-            best_before = before[-1]
-            distance_before = target_position - best_before.position
+            before_token = bisect_left(offsets, before.position)
 
             # If very close, use the boundary before
-            if distance_before < self.config.overlap_tokens * 4:
-                return best_before.position, best_before.boundary_type
+            if target_token - before_token < self.config.overlap_tokens:
+                return before.position, before.boundary_type
 
-        # Otherwise use boundary after target
+        # Otherwise use boundary after target if reasonably close
         if after:
-            best_after = after[0]
-            distance_after = best_after.position - target_position
+            after_token = bisect_left(offsets, after.position)
+            if (
+                after_token - target_token < self.config.max_tokens * 0.3
+                and after_token - start_token <= self.config.max_tokens
+            ):
+                return after.position, after.boundary_type
 
-            # If reasonably close, use boundary after
-            if distance_after < self.config.max_tokens * 0.3:
-                return best_after.position, best_after.boundary_type
+        # Fallback: earlier boundary if the chunk keeps a useful size
+        if before and before_token - start_token >= self.config.min_tokens:
+            return before.position, before.boundary_type
 
-        # Fallback: use closest boundary
-        if before:
-            return before[-1].position, before[-1].boundary_type
-
-        if after:
-            return after[0].position, after[0].boundary_type
-
-        # Ultimate fallback: split at target
-        return min(target_position, len(text)), 'token_limit'
+        # Ultimate fallback: split at exactly target tokens
+        return target_char, 'token_limit'
 
     def split_into_chunks(
         self,
@@ -229,6 +337,10 @@ class DocumentChunker:
         """
         Split document into chunks with semantic awareness and overlap.
 
+        The content is encoded once; split points, overlaps and token counts
+        are all derived from the token offsets, so chunk sizes follow the
+        configured token budgets exactly.
+
         Args:
             markdown: Full markdown document with frontmatter
             parent_doc_id: ID of parent document
@@ -236,121 +348,138 @@ class DocumentChunker:
         Returns:
             List of Chunk objects
         """
+        return list(self.iter_chunks(markdown, parent_doc_id))
+
+    def iter_chunks(
+        self,
+        markdown: str,
+        parent_doc_id: str
+    ) -> Iterator[Chunk]:
+        """
+        Lazily yield chunks for a document, one at a time.
+
+        Split planning scans boundaries with a forward-only cursor and only
+        keeps integer spans (needed up front for total_chunks). Chunk content,
+        overlaps, hashes and frontmatter are built as each chunk is yielded,
+        so callers that process chunks one by one never hold more than one
+        chunk's text besides the source document.
+
+        Args:
+            markdown: Full markdown document with frontmatter
+            parent_doc_id: ID of parent document
+
+        Yields:
+            Chunk objects in document order (same as split_into_chunks)
+        """
         # Parse frontmatter
         frontmatter, content = self.parse_frontmatter(markdown)
 
         if not content.strip():
             # Empty content - create single minimal chunk
-            return self._create_single_chunk(
+            yield from self._create_single_chunk(
                 content="",
                 parent_doc_id=parent_doc_id,
                 frontmatter=frontmatter,
                 chunk_index=0
             )
+            return
 
-        # Calculate total tokens
-        total_tokens = self.calculate_tokens(content)
+        # Encode once: token index -> character offset
+        offsets = self.token_offsets(content)
 
         # If content is small enough, return single chunk
-        if total_tokens <= self.config.target_tokens:
-            return self._create_single_chunk(
+        if len(offsets) <= self.config.target_tokens:
+            yield from self._create_single_chunk(
                 content=content,
                 parent_doc_id=parent_doc_id,
                 frontmatter=frontmatter,
-                chunk_index=0
+                chunk_index=0,
+                token_count=len(offsets)
             )
-
-        # Detect all semantic boundaries
-        boundaries = self.detect_semantic_boundaries(content)
-
-        # Split into chunks
-        chunks = []
-        char_position = 0
-        chunk_index = 0
-
-        while char_position < len(content):
-            # Calculate target end position based on token count
-            remaining_content = content[char_position:]
-            target_tokens = self.config.target_tokens
-
-            # Estimate character position for target tokens
-            # Use inverse of token calculation (tokens * 4 chars/token)
-            estimated_chars = target_tokens * 4
-            target_char_end = min(
-                char_position + estimated_chars,
-                len(content)
+            return
+
+        spans = list(self._iter_spans(content, offsets))
+        total_chunks = len(spans)
+
+        for i, (core_start, core_end) in enumerate(spans):
+            # Add overlap with neighbouring chunks
+            char_start, char_end = self._overlap_span(
+                offsets=offsets,
+                content_length=len(content),
+                core_start=core_start,
+                core_end=core_end,
+                is_first=(i == 0),
+                is_last=(i == total_chunks - 1)
             )
+            chunk_content = content[char_start:char_end]
 
-            # Find best split point using semantic boundaries
-            split_pos, boundary_type = self.find_split_point(
-                text=content,
-                target_position=target_char_end,
-                boundaries=[b for b in boundaries if b.position > char_position]
+            yield Chunk(
+                content=chunk_content,
+                chunk_index=i,
+                total_chunks=total_chunks,
+                token_count=self.count_tokens_between(offsets, char_start, char_end),
+                char_start=char_start,
+                char_end=char_end,
+                overlap_start=core_start - char_start,
+                overlap_end=char_end - core_end,
+                frontmatter=self._create_chunk_frontmatter(
+                    parent_frontmatter=frontmatter,
+                    parent_doc_id=parent_doc_id,
+                    chunk_index=i,
+                    total_chunks=total_chunks
+                ),
+                content_hash=self._calculate_content_hash(chunk_content)
             )
 
-            # Extract chunk content
-            chunk_content = content[char_position:split_pos]
-
-            # Calculate token count for this chunk
-            chunk_tokens = self.calculate_tokens(chunk_content)
-
-            # Store chunk (overlap will be added in next pass)
-            chunks.append({
-                'content': chunk_content,
-                'char_start': char_position,
-                'char_end': split_pos,
-                'token_count': chunk_tokens,
-                'boundary_type': boundary_type,
-                'chunk_index': chunk_index
-            })
-
-            # Move position forward
-            char_position = split_pos
-            chunk_index += 1
+    def _iter_spans(
+        self,
+        content: str,
+        offsets: Sequence[int]
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Yield contiguous (char_start, char_end) chunk spans without overlap.
 
-            # Safety check: prevent infinite loops
-            if char_position == split_pos and split_pos < len(content):
-                # Force progress if stuck
-                char_position += 1
+        Args:
+            content: Document content without frontmatter
+            offsets: Token start offsets for content
 
-        # Apply overlaps between chunks
-        chunks_with_overlap = self._apply_overlaps(chunks, content)
+        Yields:
+            Character spans covering content in order
+        """
+        cursor = BoundaryCursor(self.iter_semantic_boundaries(content))
+        total_tokens = len(offsets)
+        char_position = 0
 
-        # Create final Chunk objects with frontmatter
-        total_chunks = len(chunks_with_overlap)
-        final_chunks = []
+        while char_position < len(content):
+            start_token = bisect_left(offsets, char_position)
 
-        for i, chunk_data in enumerate(chunks_with_overlap):
-            chunk_frontmatter = self._create_chunk_frontmatter(
-                parent_frontmatter=frontmatter,
-                parent_doc_id=parent_doc_id,
-                chunk_index=i,
-                total_chunks=total_chunks
-            )
+            if total_tokens - start_token <= self.config.target_tokens:
+                # Remainder fits into one chunk
+                split_pos = len(content)
+            else:
+                split_pos, _ = self.find_split_point(
+                    offsets=offsets,
+                    cursor=cursor,
+                    char_start=char_position,
+                    start_token=start_token
+                )
 
-            chunk_obj = Chunk(
-                content=chunk_data['content'],
-                chunk_index=i,
-                total_chunks=total_chunks,
-                token_count=chunk_data['token_count'],
-                char_start=chunk_data['char_start'],
-                char_end=chunk_data['char_end'],
-                overlap_start=chunk_data['overlap_start'],
-                overlap_end=chunk_data['overlap_end'],
-                frontmatter=chunk_frontmatter,
-                content_hash=self._calculate_content_hash(chunk_data['content'])
-            )
+            # Safety check: always make progress
+            if split_pos <= char_position:
+                split_pos = char_position + 1
 
-            final_chunks.append(chunk_obj)
+            yield char_position, split_pos
 
-        return final_chunks
+            # Move position forward
+            char_position = split_pos
 
     def _create_single_chunk(
         self,
         content: str,
         parent_doc_id: str,
         frontmatter: Dict,
-        chunk_index: int
+        chunk_index: int,
+        token_count: Optional[int] = None
     ) -> List[Chunk]:
         """Create a single chunk (used when document is small)."""
         chunk_frontmatter = self._create_chunk_frontmatter(
@@ -360,11 +489,14 @@ class DocumentChunker:
             total_chunks=1
         )
 
+        if token_count is None:
+            token_count = self.calculate_tokens(content)
+
         chunk = Chunk(
             content=content,
             chunk_index=chunk_index,
             total_chunks=1,
-            token_count=self.calculate_tokens(content),
+            token_count=token_count,
             char_start=0,
             char_end=len(content),
             overlap_start=0,
@@ -375,83 +507,48 @@ class DocumentChunker:
 
         return [chunk]
 
-    def _apply_overlaps(
+    def _overlap_span(
         self,
-        chunks: List[Dict],
-        full_content: str
-    ) -> List[Dict]:
+        offsets: Sequence[int],
+        content_length: int,
+        core_start: int,
+        core_end: int,
+        is_first: bool,
+        is_last: bool
+    ) -> Tuple[int, int]:
         """
-        Apply sliding window overlap between chunks.
+        Extend a chunk span with sliding window overlap.
+
+        Overlaps span overlap_tokens tokens on each side of a split.
 
         Args:
-            chunks: List of chunk dictionaries
-            full_content: Original full content
+            offsets: Token start offsets for the content
+            content_length: Length of the content in characters
+            core_start: Chunk start without overlap
+            core_end: Chunk end without overlap
+            is_first: Whether this is the first chunk
+            is_last: Whether this is the last chunk
 
         Returns:
-            Updated chunks with overlap applied
-        """
-        if len(chunks) <= 1:
-            # No overlap needed for single chunk
-            for chunk in chunks:
-                chunk['overlap_start'] = 0
-                chunk['overlap_end'] = 0
-            return chunks
-
-        # Calculate overlap character count (approximate)
-        overlap_chars = self.config.overlap_tokens * 4
-
-        updated_chunks = []
-
-        for i, chunk in enumerate(chunks):
-            overlap_start = 0
-            overlap_end = 0
-            new_content = chunk['content']
-            new_char_start = chunk['char_start']
-            new_char_end = chunk['char_end']
-
-            # Add overlap from previous chunk
-            if i > 0:
-                prev_chunk = chunks[i - 1]
-                prev_end = prev_chunk['char_end']
-
-                # Take last N chars from previous chunk
-                overlap_start_pos = max(0, prev_end - overlap_chars)
-                overlap_text = full_content[overlap_start_pos:prev_end]
-
-                if overlap_text:
-                    new_content = overlap_text + new_content
-                    new_char_start = overlap_start_pos
-                    overlap_start = len(overlap_text)
-
-            # Add overlap to next chunk
-            if i < len(chunks) - 1:
-                next_chunk = chunks[i + 1]
-                next_start = next_chunk['char_start']
-
-                # Take first N chars from next chunk
-                overlap_end_pos = min(len(full_content), next_start + overlap_chars)
-                overlap_text = full_content[new_char_end:overlap_end_pos]
-
-                if overlap_text:
-                    new_content = new_content + overlap_text
-                    new_char_end = overlap_end_pos
-                    overlap_end = len(overlap_text)
-
-            # Recalculate token count with overlap
-            new_token_count = self.calculate_tokens(new_content)
-
-            updated_chunks.append({
-                'content': new_content,
-                'char_start': new_char_start,
-                'char_end': new_char_end,
-                'token_count': new_token_count,
-                'overlap_start': overlap_start,
-                'overlap_end': overlap_end,
-                'chunk_index': chunk['chunk_index'],
-                'boundary_type': chunk['boundary_type']
-            })
-
-        return updated_chunks
+            Tuple of (char_start, char_end) including overlap
+        """
+        overlap_tokens = self.config.overlap_tokens
+        char_start, char_end = core_start, core_end
+
+        # Add overlap from previous chunk: last N tokens before the split
+        if not is_first and overlap_tokens:
+            start_token = bisect_left(offsets, core_start)
+            char_start = offsets[max(0, start_token - overlap_tokens)]
+
+        # Add overlap to next chunk: first N tokens after the split
+        if not is_last and overlap_tokens:
+            end_token = bisect_left(offsets, core_end) + overlap_tokens
+            if end_token < len(offsets):
+                char_end = offsets[end_token]
+            else:
+                char_end = content_length
+
+        return char_start, char_end
 
     def _create_chunk_frontmatter(
         self,
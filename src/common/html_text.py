@@ -0,0 +1,385 @@
+"""
+Pluggable HTML-to-text extraction with size guards.
+
+Reader documents (especially PDF-derived HTML) can be tens of megabytes.
+Building a BeautifulSoup tree for them costs seconds of CPU and many times
+the document size in memory, although callers only need the visible text or
+a handful of date hints. The streaming engines below never build a tree:
+they turn parser events into text as they arrive, and date-hint scans stop
+as soon as the caller has what it needs.
+
+Engines:
+- LxmlEngine ("lxml"): libxml2 HTML parser fed in chunks with a SAX-style
+  target (C speed, flat memory)
+- StreamingEngine ("stdlib"): html.parser.HTMLParser event stream, no tree
+- SoupEngine ("bs4"): BeautifulSoup tree (the original implementation, kept
+  as the reference)
+
+All engines produce the same text for well-formed markup: every string
+outside script, style, nav, header, footer, aside and iframe elements,
+joined with single spaces. The stdlib engine mirrors BeautifulSoup's
+html.parser tree building exactly; lxml follows libxml2 error recovery, so
+spacing can differ on badly nested markup.
+
+Configuration (read lazily on first use):
+    HTML_TEXT_ENGINE: "auto" (lxml if installed, else stdlib), "lxml",
+        "stdlib" or "bs4" (default: auto)
+    HTML_MAX_CHARS: Input cap in characters; longer documents are truncated
+        before parsing (default: 5,000,000)
+
+Usage:
+    from src.common.html_text import html_to_text
+
+    text = html_to_text(raw_html)
+
+Deployed via src/auto_snippets/build.sh and the MCP server Dockerfile.
+"""
+
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Elements whose content is boilerplate or code, never article text
+STRIP_TAGS = frozenset({"script", "style", "nav", "header", "footer", "aside", "iframe"})
+JSONLD_TYPE = "application/ld+json"
+# Elements that never have content (no end tag expected)
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+DEFAULT_MAX_CHARS = 5_000_000
+FEED_CHUNK_CHARS = 64 * 1024  # Granularity of streaming feeds and early stops
+
+_WHITESPACE = re.compile(r"\s+")
+
+_engine: Optional["HTMLTextEngine"] = None
+_engine_lock = threading.Lock()
+
+# A date hint is ("jsonld", script text), ("meta", attributes) or
+# ("time", datetime attribute value), yielded in document order
+DateHint = Tuple[str, Any]
+
+
+def guard_html_size(html: str, max_chars: Optional[int] = None) -> str:
+    """
+    Truncate oversized HTML before parsing.
+
+    Args:
+        html: Raw HTML
+        max_chars: Cap in characters (default: HTML_MAX_CHARS)
+
+    Returns:
+        html, or its first max_chars characters
+    """
+    if max_chars is None:
+        max_chars = int(os.environ.get("HTML_MAX_CHARS", DEFAULT_MAX_CHARS))
+    if len(html) > max_chars:
+        logger.warning(
+            f"HTML is {len(html):,} chars, truncating to {max_chars:,} before parsing"
+        )
+        return html[:max_chars]
+    return html
+
+
+def _join_text(parts: List[str]) -> str:
+    return _WHITESPACE.sub(" ", " ".join(parts)).strip()
+
+
+def _chunks(html: str) -> Iterator[str]:
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        yield html[start : start + FEED_CHUNK_CHARS]
+
+
+class _TextSink:
+    """
+    Parser event handler collecting visible text (lxml target interface).
+
+    Consecutive data events are merged until the next tag or comment, so a
+    text node split across feed chunks stays one string.
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self._buffer: List[str] = []
+        self._open: List[str] = []  # Open non-void elements
+        self._strip_depth = 0  # How many of them are in STRIP_TAGS
+
+    def _flush(self) -> None:
+        if self._buffer:
+            text = "".join(self._buffer).strip()
+            if text:
+                self.parts.append(text)
+            self._buffer = []
+
+    def start(self, tag: str, attrib: Dict[str, Optional[str]]) -> None:
+        self._flush()
+        if tag in VOID_TAGS:
+            return
+        self._open.append(tag)
+        if tag in STRIP_TAGS:
+            self._strip_depth += 1
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        # Like BeautifulSoup, closing an element also closes any unclosed
+        # elements inside it; stray end tags are ignored
+        if tag not in self._open:
+            return
+        while True:
+            closed = self._open.pop()
+            if closed in STRIP_TAGS:
+                self._strip_depth -= 1
+            if closed == tag:
+                break
+
+    def data(self, data: str) -> None:
+        if not self._strip_depth:
+            self._buffer.append(data)
+
+    def comment(self, text: str) -> None:
+        self._flush()
+
+    def close(self) -> List[str]:
+        self._flush()
+        return self.parts
+
+
+class _DateHintSink:
+    """Parser event handler collecting date hints (lxml target interface)."""
+
+    def __init__(self):
+        self.hints: List[DateHint] = []
+        self._jsonld: Optional[List[str]] = None
+
+    def start(self, tag: str, attrib: Dict[str, Optional[str]]) -> None:
+        if tag == "meta":
+            self.hints.append(("meta", dict(attrib)))
+        elif tag == "time" and attrib.get("datetime") is not None:
+            self.hints.append(("time", attrib["datetime"]))
+        elif tag == "script" and attrib.get("type") == JSONLD_TYPE:
+            self._jsonld = []
+
+    def end(self, tag: str) -> None:
+        if tag == "script" and self._jsonld is not None:
+            self.hints.append(("jsonld", "".join(self._jsonld)))
+            self._jsonld = None
+
+    def data(self, data: str) -> None:
+        if self._jsonld is not None:
+            self._jsonld.append(data)
+
+    def comment(self, text: str) -> None:
+        pass
+
+    def close(self) -> List[DateHint]:
+        return self.hints
+
+    def drain(self) -> List[DateHint]:
+        hints, self.hints = self.hints, []
+        return hints
+
+
+class HTMLTextEngine(ABC):
+    """Abstract HTML extraction engine."""
+
+    name = ""
+
+    @abstractmethod
+    def to_text(self, html: str) -> str:
+        """Return the visible text of a document, whitespace-normalized."""
+        pass
+
+    @abstractmethod
+    def iter_date_hints(self, html: str) -> Iterator[DateHint]:
+        """
+        Yield date hints in document order.
+
+        Streaming engines parse lazily, so a caller that stops iterating
+        (e.g., after the first JSON-LD date) stops the parse as well.
+        """
+        pass
+
+
+class _ForwardingHTMLParser(HTMLParser):
+    """html.parser front end forwarding events to a sink."""
+
+    def __init__(self, sink):
+        super().__init__(convert_charrefs=True)
+        self.sink = sink
+
+    def handle_starttag(self, tag, attrs):
+        self.sink.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags have no content; report as an empty element
+        self.sink.start(tag, dict(attrs))
+        self.sink.end(tag)
+
+    def handle_endtag(self, tag):
+        self.sink.end(tag)
+
+    def handle_data(self, data):
+        self.sink.data(data)
+
+    def handle_comment(self, data):
+        self.sink.comment(data)
+
+
+class StreamingEngine(HTMLTextEngine):
+    """Tree-less extraction on the stdlib html.parser tokenizer."""
+
+    name = "stdlib"
+
+    def _parser(self, sink):
+        return _ForwardingHTMLParser(sink)
+
+    def to_text(self, html: str) -> str:
+        if not html:
+            return ""
+        sink = _TextSink()
+        parser = self._parser(sink)
+        for chunk in _chunks(guard_html_size(html)):
+            parser.feed(chunk)
+        parser.close()
+        return _join_text(sink.close())
+
+    def iter_date_hints(self, html: str) -> Iterator[DateHint]:
+        if not html:
+            return
+        sink = _DateHintSink()
+        parser = self._parser(sink)
+        for chunk in _chunks(guard_html_size(html)):
+            parser.feed(chunk)
+            yield from sink.drain()
+        parser.close()
+        yield from sink.drain()
+
+
+class LxmlEngine(StreamingEngine):
+    """Tree-less extraction on libxml2 via lxml's parser target interface."""
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree  # Optional dependency
+
+        self._etree = etree
+
+    def _parser(self, sink):
+        # With a target, lxml builds no tree and forwards SAX-style events
+        return self._etree.HTMLParser(target=sink, recover=True, no_network=True)
+
+
+class SoupEngine(HTMLTextEngine):
+    """BeautifulSoup tree extraction (reference implementation)."""
+
+    name = "bs4"
+
+    def _soup(self, html: str):
+        from bs4 import BeautifulSoup
+
+        return BeautifulSoup(guard_html_size(html), "html.parser")
+
+    def to_text(self, html: str) -> str:
+        if not html:
+            return ""
+        soup = self._soup(html)
+        for element in soup.find_all(list(STRIP_TAGS)):
+            element.decompose()
+        return _WHITESPACE.sub(" ", soup.get_text(separator=" ", strip=True)).strip()
+
+    def iter_date_hints(self, html: str) -> Iterator[DateHint]:
+        if not html:
+            return
+        soup = self._soup(html)
+        for tag in soup.find_all(["meta", "time", "script"]):
+            if tag.name == "meta":
+                yield ("meta", dict(tag.attrs))
+            elif tag.name == "time" and tag.get("datetime") is not None:
+                yield ("time", tag["datetime"])
+            elif tag.name == "script" and tag.get("type") == JSONLD_TYPE:
+                yield ("jsonld", tag.string or "")
+
+
+def lxml_available() -> bool:
+    """Check whether the lxml engine can be used."""
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_engine(name: str = "auto") -> HTMLTextEngine:
+    """
+    Create an engine by name.
+
+    Args:
+        name: "auto", "lxml", "stdlib" or "bs4"
+
+    Returns:
+        HTMLTextEngine instance
+
+    Raises:
+        ValueError: Unknown engine name
+        ImportError: "lxml" requested but not installed
+    """
+    name = (name or "auto").strip().lower()
+    if name == "auto":
+        return LxmlEngine() if lxml_available() else StreamingEngine()
+    if name == "lxml":
+        return LxmlEngine()
+    if name == "stdlib":
+        return StreamingEngine()
+    if name == "bs4":
+        return SoupEngine()
+    raise ValueError(f"Unknown HTML_TEXT_ENGINE '{name}'")
+
+
+def get_engine() -> HTMLTextEngine:
+    """Get the process-wide engine configured via HTML_TEXT_ENGINE."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                requested = os.environ.get("HTML_TEXT_ENGINE", "auto")
+                try:
+                    _engine = create_engine(requested)
+                except (ValueError, ImportError) as e:
+                    logger.warning(f"HTML engine '{requested}' unavailable ({e}), using stdlib")
+                    _engine = StreamingEngine()
+                logger.info(f"Using HTML text engine: {_engine.name}")
+    return _engine
+
+
+def set_engine(engine: Optional[HTMLTextEngine]) -> None:
+    """Override the process-wide engine (None re-reads HTML_TEXT_ENGINE)."""
+    global _engine
+    with _engine_lock:
+        _engine = engine
+
+
+def html_to_text(html: str, engine: Optional[HTMLTextEngine] = None) -> str:
+    """
+    Convert HTML to clean, whitespace-normalized text.
+
+    Args:
+        html: Raw HTML
+        engine: Engine to use (default: get_engine())
+
+    Returns:
+        Visible text with boilerplate elements removed
+    """
+    return (engine or get_engine()).to_text(html)
+
+
+def iter_date_hints(html: str, engine: Optional[HTMLTextEngine] = None) -> Iterator[DateHint]:
+    """Yield date hints in document order (see HTMLTextEngine.iter_date_hints)."""
+    return (engine or get_engine()).iter_date_hints(html)
@@ -0,0 +1,235 @@
+"""
+Thread-safe sliding-window rate limiting for outbound API clients.
+
+Readwise enforces its limits per API token, not per client object, so every
+client in a process (Reader v3, v2 highlight writer, batch recommendations)
+draws from the same named limiter. Each endpoint class gets its own window.
+
+Features:
+- SlidingWindow: admits at most rate_per_minute requests in any rolling
+  60-second window, matching how Readwise counts requests
+- Non-blocking try_acquire() that returns the wait time instead of sleeping
+- Blocking acquire() for threads and acquire_async() for asyncio callers;
+  neither holds the lock while waiting
+- RateLimiter: named endpoint classes with a shared process-wide registry
+
+Usage:
+    from src.common.rate_limiter import get_limiter
+
+    limiter = get_limiter("readwise")
+    limiter.acquire("list")              # blocks until the window has room
+    await limiter.acquire_async("general")
+
+Deployment copies (keep in sync): src/ingest/rate_limiter.py,
+src/batch_recommendations/rate_limiter.py
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Readwise limits per token (requests per minute). Reader v3: 50/min for
+# LIST, 20/min for everything else. v2 highlights: 240/min base rate.
+READWISE_RATE_LIMITS: Dict[str, int] = {
+    "list": 50,
+    "general": 20,
+    "highlights": 240,
+}
+
+DEFAULT_LIMITS: Dict[str, Dict[str, int]] = {
+    "readwise": READWISE_RATE_LIMITS,
+}
+
+# Shared process-wide limiters, keyed by name
+_limiters: Dict[str, "RateLimiter"] = {}
+_registry_lock = threading.Lock()
+
+
+class SlidingWindow:
+    """Thread-safe sliding-window limiter over a rolling time window."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        window_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty window.
+
+        Args:
+            rate_per_minute: Maximum requests in any rolling window
+            window_seconds: Window length in seconds
+            clock: Monotonic time source (injectable for tests)
+        """
+        if rate_per_minute < 1:
+            raise ValueError(f"rate_per_minute must be at least 1, got {rate_per_minute}")
+
+        self.rate_per_minute = rate_per_minute
+        self.limit = int(rate_per_minute)
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._sent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        # A request at time t occupies the half-open window [t, t + window)
+        cutoff = now - self.window_seconds
+        while self._sent and self._sent[0] <= cutoff:
+            self._sent.popleft()
+
+    def try_acquire(self) -> float:
+        """
+        Record a request without waiting.
+
+        Returns:
+            0.0 if the request was recorded, otherwise seconds until the
+            oldest request leaves the window (nothing is recorded then)
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if len(self._sent) < self.limit:
+                self._sent.append(now)
+                return 0.0
+            return self._sent[0] + self.window_seconds - now
+
+    def acquire(self) -> float:
+        """
+        Record a request, sleeping the calling thread until the window has room.
+
+        Returns:
+            Total seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self) -> float:
+        """
+        Record a request, yielding to the event loop until the window has room.
+
+        Returns:
+            Total seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    @property
+    def available(self) -> int:
+        """Requests that may be sent right now."""
+        with self._lock:
+            self._expire(self._clock())
+            return self.limit - len(self._sent)
+
+
+class RateLimiter:
+    """Named endpoint classes, each backed by its own SlidingWindow."""
+
+    def __init__(
+        self,
+        limits: Dict[str, float],
+        default_class: str = "general",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            limits: Requests per minute per endpoint class
+            default_class: Class used for unknown endpoint types
+            clock: Monotonic time source (injectable for tests)
+        """
+        if default_class not in limits:
+            raise ValueError(f"default_class '{default_class}' missing from limits")
+
+        self.default_class = default_class
+        self.windows: Dict[str, SlidingWindow] = {
+            name: SlidingWindow(rate, clock=clock) for name, rate in limits.items()
+        }
+
+    def window(self, endpoint_type: str) -> SlidingWindow:
+        """Get the window for an endpoint class (falls back to the default)."""
+        return self.windows.get(endpoint_type) or self.windows[self.default_class]
+
+    def try_acquire(self, endpoint_type: str = "general") -> float:
+        """Non-blocking acquire; returns 0.0 or the seconds to wait."""
+        return self.window(endpoint_type).try_acquire()
+
+    def acquire(self, endpoint_type: str = "general") -> float:
+        """
+        Block until a request of this class may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        window = self.window(endpoint_type)
+        waited = window.acquire()
+        if waited > 0:
+            logger.info(
+                f"Rate limit reached ({window.rate_per_minute:g}/min {endpoint_type}). "
+                f"Waited {waited:.1f}s"
+            )
+        return waited
+
+    async def acquire_async(self, endpoint_type: str = "general") -> float:
+        """
+        Await until a request of this class may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        window = self.window(endpoint_type)
+        waited = await window.acquire_async()
+        if waited > 0:
+            logger.info(
+                f"Rate limit reached ({window.rate_per_minute:g}/min {endpoint_type}). "
+                f"Waited {waited:.1f}s"
+            )
+        return waited
+
+
+def get_limiter(name: str = "readwise", limits: Optional[Dict[str, float]] = None) -> RateLimiter:
+    """
+    Get or create a shared process-wide limiter.
+
+    Args:
+        name: Limiter name (e.g., "readwise")
+        limits: Requests per minute per class, used on first creation
+            (default: DEFAULT_LIMITS[name])
+
+    Returns:
+        RateLimiter shared by every caller using the same name
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _registry_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                if limits is None:
+                    if name not in DEFAULT_LIMITS:
+                        raise ValueError(f"No default rate limits for '{name}'")
+                    limits = DEFAULT_LIMITS[name]
+                limiter = RateLimiter(limits)
+                _limiters[name] = limiter
+    return limiter
+
+
+def reset_limiters() -> None:
+    """Drop all shared limiters (tests)."""
+    with _registry_lock:
+        _limiters.clear()
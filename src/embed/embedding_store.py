@@ -0,0 +1,392 @@
+"""
+Content-addressed embedding store shared across pipelines.
+
+Embeddings are keyed by sha256(model, dimensionality, text), so the same text
+embedded with the same model configuration is only ever sent to Vertex AI
+once - regardless of whether it comes from the embed Cloud Function, the
+auto-snippet writer, a re-chunking run or an MCP query.
+
+Backends:
+- FirestoreEmbeddingStore: one document per key in the `embedding_store`
+  collection, vector packed as little-endian float32 bytes (3 KB for 768 dims)
+- LocalEmbeddingStore: append-only on-disk shards for CLI tools
+
+Configuration (read lazily on first use):
+    EMBEDDING_STORE: "firestore", "local" or "off" (default: off)
+    EMBEDDING_STORE_COLLECTION: Firestore collection (default: embedding_store)
+    EMBEDDING_STORE_PATH: Shard directory for the local backend
+        (default: ~/.cache/kx-hub/embeddings)
+
+Usage:
+    from embedding_store import cached_embedding, cached_embeddings
+
+    vector = cached_embedding(
+        text, model="gemini-embedding-001", dimensionality=768,
+        compute=lambda t: model.get_embeddings([t])[0].values,
+    )
+
+    # Batched: one lookup, one compute call for the misses, one write
+    vectors = cached_embeddings(
+        texts, model="gemini-embedding-001", dimensionality=768,
+        compute_many=lambda ts: [e.values for e in model.get_embeddings(ts)],
+    )
+"""
+
+import hashlib
+import logging
+import os
+import struct
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTION = "embedding_store"
+DEFAULT_LOCAL_PATH = os.path.join("~", ".cache", "kx-hub", "embeddings")
+FIRESTORE_BATCH_LIMIT = 500  # Firestore max writes per batch
+
+# Local shard record header: 32-byte sha256 digest + uint16 dimensionality
+_RECORD_HEADER = struct.Struct("<32sH")
+
+_store: Optional["EmbeddingStore"] = None
+_store_configured = False
+_store_lock = threading.Lock()
+
+
+def embedding_key(text: str, model: str, dimensionality: int) -> str:
+    """
+    Compute the content address for an embedding.
+
+    Args:
+        text: Exact text sent to the embedding model
+        model: Embedding model name (e.g., "gemini-embedding-001")
+        dimensionality: Requested output dimensionality
+
+    Returns:
+        Hex sha256 digest
+    """
+    hasher = hashlib.sha256()
+    hasher.update(model.encode("utf-8"))
+    hasher.update(b"\x00")
+    hasher.update(str(dimensionality).encode("ascii"))
+    hasher.update(b"\x00")
+    hasher.update(text.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def pack_vector(vector: Iterable[float]) -> bytes:
+    """Pack an embedding vector as little-endian float32 bytes."""
+    values = [float(x) for x in vector]
+    return struct.pack(f"<{len(values)}f", *values)
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    """Unpack little-endian float32 bytes into a list of floats."""
+    return list(struct.unpack(f"<{len(data) // 4}f", data))
+
+
+class EmbeddingStore(ABC):
+    """
+    Abstract key/value store for embedding vectors.
+
+    Implementations must never raise on lookup or write failures - a broken
+    store degrades to a cache miss so embedding generation still proceeds.
+    """
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return vectors for the keys that are present."""
+        pass
+
+    @abstractmethod
+    def put_many(self, items: Dict[str, List[float]], model: str, dimensionality: int) -> None:
+        """Store vectors keyed by content address."""
+        pass
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the vector for a single key, or None on miss."""
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, vector: List[float], model: str, dimensionality: int) -> None:
+        """Store a single vector."""
+        self.put_many({key: vector}, model, dimensionality)
+
+
+class FirestoreEmbeddingStore(EmbeddingStore):
+    """Embedding store backed by a Firestore collection of packed vectors."""
+
+    def __init__(self, client=None, collection: str = DEFAULT_COLLECTION):
+        """
+        Initialize Firestore store.
+
+        Args:
+            client: Firestore client (created lazily from GCP_PROJECT if None)
+            collection: Collection name holding embedding documents
+        """
+        self._client = client
+        self.collection = collection
+
+    def _get_client(self):
+        if self._client is None:
+            from google.cloud import firestore
+
+            self._client = firestore.Client(project=os.environ.get("GCP_PROJECT"))
+        return self._client
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        try:
+            db = self._get_client()
+            refs = [db.collection(self.collection).document(key) for key in keys]
+            found = {}
+            for snapshot in db.get_all(refs):
+                if not snapshot.exists:
+                    continue
+                data = snapshot.to_dict() or {}
+                packed = data.get("vector")
+                if packed:
+                    found[snapshot.id] = unpack_vector(bytes(packed))
+            return found
+        except Exception as e:
+            logger.warning(f"Embedding store lookup failed: {e}")
+            return {}
+
+    def put_many(self, items: Dict[str, List[float]], model: str, dimensionality: int) -> None:
+        if not items:
+            return
+        try:
+            from google.cloud import firestore
+
+            db = self._get_client()
+            entries = list(items.items())
+            for start in range(0, len(entries), FIRESTORE_BATCH_LIMIT):
+                batch = db.batch()
+                for key, vector in entries[start : start + FIRESTORE_BATCH_LIMIT]:
+                    ref = db.collection(self.collection).document(key)
+                    batch.set(
+                        ref,
+                        {
+                            "model": model,
+                            "dimensionality": dimensionality,
+                            "vector": pack_vector(vector),
+                            "created_at": firestore.SERVER_TIMESTAMP,
+                        },
+                    )
+                batch.commit()
+        except Exception as e:
+            logger.warning(f"Embedding store write failed: {e}")
+
+
+class LocalEmbeddingStore(EmbeddingStore):
+    """
+    Embedding store backed by append-only shard files on local disk.
+
+    Keys are spread over 256 shards by their first byte. A shard is loaded into
+    memory on first access and new vectors are appended, so CLI re-runs only
+    pay one sequential read per touched shard.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCAL_PATH):
+        """
+        Initialize local store.
+
+        Args:
+            path: Directory holding the shard files (created if missing)
+        """
+        self.path = Path(os.path.expanduser(path))
+        self._shards: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _shard_file(self, shard: str) -> Path:
+        return self.path / f"{shard}.bin"
+
+    def _load_shard(self, shard: str) -> Dict[str, List[float]]:
+        if shard in self._shards:
+            return self._shards[shard]
+
+        entries: Dict[str, List[float]] = {}
+        shard_file = self._shard_file(shard)
+        if shard_file.exists():
+            data = shard_file.read_bytes()
+            offset = 0
+            while offset + _RECORD_HEADER.size <= len(data):
+                digest, dims = _RECORD_HEADER.unpack_from(data, offset)
+                offset += _RECORD_HEADER.size
+                end = offset + dims * 4
+                if end > len(data):
+                    logger.warning(f"Truncated record in {shard_file}, ignoring tail")
+                    break
+                entries[digest.hex()] = unpack_vector(data[offset:end])
+                offset = end
+
+        self._shards[shard] = entries
+        return entries
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        try:
+            with self._lock:
+                for key in keys:
+                    vector = self._load_shard(key[:2]).get(key)
+                    if vector is not None:
+                        found[key] = vector
+        except Exception as e:
+            logger.warning(f"Embedding store lookup failed: {e}")
+        return found
+
+    def put_many(self, items: Dict[str, List[float]], model: str, dimensionality: int) -> None:
+        try:
+            with self._lock:
+                self.path.mkdir(parents=True, exist_ok=True)
+                by_shard: Dict[str, List[bytes]] = {}
+                for key, vector in items.items():
+                    shard = key[:2]
+                    entries = self._load_shard(shard)
+                    if key in entries:
+                        continue
+                    values = [float(x) for x in vector]
+                    entries[key] = values
+                    by_shard.setdefault(shard, []).append(
+                        _RECORD_HEADER.pack(bytes.fromhex(key), len(values))
+                        + pack_vector(values)
+                    )
+                for shard, records in by_shard.items():
+                    with open(self._shard_file(shard), "ab") as f:
+                        f.write(b"".join(records))
+        except Exception as e:
+            logger.warning(f"Embedding store write failed: {e}")
+
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """
+    Get the process-wide embedding store configured via EMBEDDING_STORE.
+
+    Returns:
+        Configured store, or None if the store is disabled
+    """
+    global _store, _store_configured
+
+    if _store_configured:
+        return _store
+
+    with _store_lock:
+        if not _store_configured:
+            backend = os.environ.get("EMBEDDING_STORE", "off").strip().lower()
+            if backend == "firestore":
+                _store = FirestoreEmbeddingStore(
+                    collection=os.environ.get(
+                        "EMBEDDING_STORE_COLLECTION", DEFAULT_COLLECTION
+                    )
+                )
+            elif backend == "local":
+                _store = LocalEmbeddingStore(
+                    os.environ.get("EMBEDDING_STORE_PATH", DEFAULT_LOCAL_PATH)
+                )
+            elif backend not in ("", "off", "none"):
+                logger.warning(f"Unknown EMBEDDING_STORE backend '{backend}', disabled")
+            if _store is not None:
+                logger.info(f"Using embedding store: {_store.__class__.__name__}")
+            _store_configured = True
+
+    return _store
+
+
+def set_embedding_store(store: Optional[EmbeddingStore]) -> None:
+    """Override the process-wide embedding store (None disables it)."""
+    global _store, _store_configured
+    with _store_lock:
+        _store = store
+        _store_configured = True
+
+
+def reset_embedding_store() -> None:
+    """Forget the configured store so EMBEDDING_STORE is re-read on next use."""
+    global _store, _store_configured
+    with _store_lock:
+        _store = None
+        _store_configured = False
+
+
+def cached_embedding(
+    text: str,
+    model: str,
+    dimensionality: int,
+    compute: Callable[[str], List[float]],
+) -> List[float]:
+    """
+    Return the embedding for text, consulting the store before computing.
+
+    Args:
+        text: Text to embed
+        model: Embedding model name (part of the content address)
+        dimensionality: Output dimensionality (part of the content address)
+        compute: Function generating the embedding on a store miss
+
+    Returns:
+        Embedding vector as a list of floats
+    """
+    store = get_embedding_store()
+    if store is None:
+        return compute(text)
+
+    key = embedding_key(text, model, dimensionality)
+    cached = store.get(key)
+    if cached is not None:
+        logger.debug(f"Embedding store hit for {key[:12]}")
+        return cached
+
+    vector = list(compute(text))
+    store.put(key, vector, model, dimensionality)
+    return vector
+
+
+def cached_embeddings(
+    texts: List[str],
+    model: str,
+    dimensionality: int,
+    compute_many: Callable[[List[str]], List[Optional[List[float]]]],
+) -> List[Optional[List[float]]]:
+    """
+    Batched variant of cached_embedding.
+
+    Looks all texts up with one get_many call, computes the misses with a
+    single compute_many call (duplicate texts are computed once) and stores
+    the new vectors with one put_many call.
+
+    Args:
+        texts: Texts to embed
+        model: Embedding model name (part of the content address)
+        dimensionality: Output dimensionality (part of the content address)
+        compute_many: Function generating embeddings for a list of texts,
+            returning None in place of vectors that could not be generated
+
+    Returns:
+        Vectors aligned with texts, None where generation failed
+    """
+    if not texts:
+        return []
+
+    keys = [embedding_key(text, model, dimensionality) for text in texts]
+    unique = dict(zip(keys, texts))
+
+    store = get_embedding_store()
+    found = store.get_many(list(unique)) if store is not None else {}
+    if found:
+        logger.debug(f"Embedding store hits: {len(found)}/{len(unique)}")
+
+    missing = [key for key in unique if key not in found]
+    if missing:
+        computed = compute_many([unique[key] for key in missing])
+        new = {
+            key: list(vector)
+            for key, vector in zip(missing, computed)
+            if vector is not None
+        }
+        if store is not None and new:
+            store.put_many(new, model, dimensionality)
+        found.update(new)
+
+    return [found.get(key) for key in keys]
@@ -21,10 +21,12 @@ from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import yaml
 from google.api_core.exceptions import (
+    DeadlineExceeded,
     GoogleAPICallError,
     InternalServerError,
     NotFound,
     ResourceExhausted,
+    ServiceUnavailable,
 )
 
 _HAS_STORAGE_LIB = True
@@ -62,6 +64,18 @@ try:
 except ImportError:  # pragma: no cover - allows tests to run without deps
     Increment = None  # type: ignore[assignment]
 
+# Content-addressed embedding store - handle both relative and flat imports
+try:
+    from .embedding_store import cached_embedding, cached_embeddings
+except ImportError:
+    from embedding_store import cached_embedding, cached_embeddings
+
+# Process-wide quota governor shared by all embedding calls
+try:
+    from .governor import CircuitOpenError, get_governor
+except ImportError:
+    from governor import CircuitOpenError, get_governor
+
 if TYPE_CHECKING:  # pragma: no cover
     from google.cloud import aiplatform as aiplatform_mod
     from google.cloud import firestore as firestore_mod
@@ -119,11 +133,22 @@ try:
 except ValueError:
     EMBED_STALE_TIMEOUT_SECONDS = 900
 STALE_PROCESSING_DELTA = timedelta(seconds=EMBED_STALE_TIMEOUT_SECONDS)
+# Trust the content_hash recorded by normalize (verified against GCS object
+# metadata) so unchanged chunks are completed without downloading the blob.
+EMBED_TRUST_RECORDED_HASH = (
+    os.environ.get("EMBED_TRUST_RECORDED_HASH", "true").lower() == "true"
+)
 
-# Retry configuration
+# Embedding model configuration (part of the embedding store key)
+EMBEDDING_MODEL = "gemini-embedding-001"
+EMBEDDING_DIMENSIONALITY = 768
+# Texts per Vertex AI get_embeddings request in generate_embeddings()
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "250"))
+# Firestore caps a batched write at 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+
+# Retry configuration (backoff and admission are handled by the governor)
 MAX_RETRIES = 3
-INITIAL_BACKOFF = 1.0  # seconds
-MAX_BACKOFF = 30.0  # seconds
 
 
 def _parse_iso_datetime(value: Optional[str]) -> Optional[datetime]:
@@ -173,7 +198,7 @@ def get_vertex_ai_client():
                 "google-cloud-aiplatform and vertexai libraries are required for embeddings"
             )
         aiplatform.init(project=GCP_PROJECT, location=GCP_REGION)
-        _vertex_ai_model = TextEmbeddingModel.from_pretrained("gemini-embedding-001")
+        _vertex_ai_model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL)
         logger.info("Initialized Vertex AI embedding model")
     return _vertex_ai_model
 
@@ -232,6 +257,50 @@ def _compute_markdown_hash(markdown: str) -> str:
     return f"sha256:{hashlib.sha256(markdown.encode('utf-8')).hexdigest()}"
 
 
+def _recorded_hash_is_current(storage_client: Any, doc: Dict[str, Any]) -> bool:
+    """
+    Check whether a pipeline item can skip embedding without a blob download.
+
+    The item qualifies when the content_hash recorded by normalize equals the
+    hash that was last embedded, and the markdown object in GCS still matches
+    that record. The GCS check is a metadata-only request: either the recorded
+    generation number matches, or the object's ``content_hash`` metadata
+    (written by normalize on upload) matches.
+
+    Args:
+        storage_client: Cloud Storage client
+        doc: pipeline_items document data
+
+    Returns:
+        True if the recorded hash is verified and already embedded
+    """
+    declared_hash = doc.get("content_hash")
+    markdown_uri = doc.get("markdown_uri")
+    if not declared_hash or not markdown_uri:
+        return False
+    if declared_hash != doc.get("embedded_content_hash"):
+        return False
+
+    try:
+        bucket_name, blob_path = _parse_gcs_uri(markdown_uri)
+        blob = storage_client.bucket(bucket_name).get_blob(blob_path)
+    except Exception as exc:
+        logger.warning(f"Unable to read GCS metadata for {markdown_uri}: {exc}")
+        return False
+
+    if blob is None:
+        return False
+
+    recorded_generation = doc.get("markdown_generation")
+    if recorded_generation is not None and str(blob.generation) == str(
+        recorded_generation
+    ):
+        return True
+
+    blob_metadata = blob.metadata or {}
+    return blob_metadata.get("content_hash") == declared_hash
+
+
 def _generate_source_id(title: str) -> str:
     """
     Generate a normalized source_id from title.
@@ -263,29 +332,51 @@ def _ensure_source_exists(
         author: Source author
         chunk_id: Chunk ID to add to the source
     """
+    _ensure_source_has_chunks(source_id, title, author, [chunk_id])
+
+
+def _ensure_source_has_chunks(
+    source_id: str, title: str, author: str, chunk_ids: List[str]
+) -> None:
+    """
+    Ensure a source document exists and links all given chunks.
+
+    One read-modify-write however many chunks are added, so batched
+    writers upsert the source once instead of once per chunk.
+
+    Args:
+        source_id: Normalized source identifier
+        title: Source title
+        author: Source author
+        chunk_ids: Chunk IDs to add to the source
+    """
     try:
         db = get_firestore_client()
         source_ref = db.collection("sources").document(source_id)
         source_doc = source_ref.get()
 
         if source_doc.exists:
-            # Update existing source - add chunk_id if not present
+            # Update existing source - add chunk_ids not yet present
             existing = source_doc.to_dict()
-            chunk_ids = existing.get("chunk_ids", [])
-            if chunk_id not in chunk_ids:
-                chunk_ids.append(chunk_id)
+            linked = existing.get("chunk_ids", [])
+            added = [chunk_id for chunk_id in chunk_ids if chunk_id not in linked]
+            if added:
+                linked = linked + added
                 source_ref.update(
-                    {"chunk_ids": chunk_ids, "chunk_count": len(chunk_ids)}
+                    {"chunk_ids": linked, "chunk_count": len(linked)}
+                )
+                logger.debug(
+                    f"Added {len(added)} chunk(s) to existing source {source_id}"
                 )
-                logger.debug(f"Added chunk {chunk_id} to existing source {source_id}")
         else:
             # Create new source
+            linked = list(dict.fromkeys(chunk_ids))
             source_data = {
                 "title": title,
                 "author": author,
                 "type": "article",  # Default type
-                "chunk_ids": [chunk_id],
-                "chunk_count": 1,
+                "chunk_ids": linked,
+                "chunk_count": len(linked),
                 "created_at": getattr(firestore, "SERVER_TIMESTAMP", None),
                 "tags": [],
             }
@@ -390,6 +481,8 @@ def generate_embedding(text: str) -> List[float]:
     """
     Generate embedding vector using Vertex AI.
 
+    Consults the content-addressed embedding store first, so text that was
+    already embedded with the same model configuration costs no API call.
     Implements retry logic with exponential backoff for rate limiting and server errors.
 
     Args:
@@ -400,48 +493,124 @@ def generate_embedding(text: str) -> List[float]:
 
     Raises:
         ResourceExhausted: After max retries for rate limiting
-        InternalServerError: After max retries for server errors
+        InternalServerError, ServiceUnavailable, DeadlineExceeded: After max
+            retries for server errors
     """
+    return cached_embedding(
+        text,
+        model=EMBEDDING_MODEL,
+        dimensionality=EMBEDDING_DIMENSIONALITY,
+        compute=_generate_embedding_uncached,
+    )
+
+
+def _generate_embedding_uncached(text: str) -> List[float]:
+    """Call Vertex AI for a single embedding with retries."""
+    return _get_embeddings_with_retry([text])[0]
+
+
+def generate_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Generate embedding vectors for several texts in batched requests.
+
+    Store hits cost nothing; the misses are sent to Vertex AI in requests of
+    up to EMBEDDING_BATCH_SIZE texts. A batch rejected as a whole (e.g. one
+    oversized text, or a model that accepts a single text per request) is
+    retried text by text so one bad input only fails itself.
+
+    Args:
+        texts: Text contents to embed
+
+    Returns:
+        Vectors aligned with texts, None for texts that could not be embedded
+    """
+    return cached_embeddings(
+        texts,
+        model=EMBEDDING_MODEL,
+        dimensionality=EMBEDDING_DIMENSIONALITY,
+        compute_many=_generate_embeddings_uncached,
+    )
+
+
+def _generate_embeddings_uncached(texts: List[str]) -> List[Optional[List[float]]]:
+    """Embed texts in batches, isolating failures to the texts that caused them."""
+    vectors: List[Optional[List[float]]] = []
+    batch_size = max(1, EMBEDDING_BATCH_SIZE)
+
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start : start + batch_size]
+        try:
+            vectors.extend(_get_embeddings_with_retry(batch))
+            continue
+        except (
+            ResourceExhausted,
+            InternalServerError,
+            ServiceUnavailable,
+            DeadlineExceeded,
+            CircuitOpenError,
+        ) as e:
+            # Retries are exhausted or the circuit is open; splitting the
+            # batch would only add load (or fail fast once per text)
+            logger.error(f"Failed to embed batch of {len(batch)} texts: {e}")
+            vectors.extend([None] * len(batch))
+            continue
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Failed to embed text: {e}")
+                vectors.append(None)
+                continue
+            logger.warning(
+                f"Batch of {len(batch)} texts rejected ({e}), embedding individually"
+            )
+
+        for text in batch:
+            try:
+                vectors.append(_generate_embedding_uncached(text))
+            except Exception as e:
+                logger.error(f"Failed to embed text: {e}")
+                vectors.append(None)
+
+    return vectors
+
+
+def _get_embeddings_with_retry(texts: List[str]) -> List[List[float]]:
+    """Call Vertex AI for the embeddings of texts (one request) with retries."""
     model = get_vertex_ai_client()
-    backoff = INITIAL_BACKOFF
+    governor = get_governor("vertex", EMBEDDING_MODEL)
 
     for attempt in range(MAX_RETRIES):
         try:
+            governor.acquire()
             # Specify output_dimensionality=768 to stay within Firestore's 2048 limit
             # gemini-embedding-001 default is 3072 dimensions which exceeds Firestore limit
-            embeddings = model.get_embeddings([text], output_dimensionality=768)
-            embedding_vector = embeddings[0].values
+            embeddings = model.get_embeddings(
+                texts, output_dimensionality=EMBEDDING_DIMENSIONALITY
+            )
+            governor.record_success()
+            vectors = [embedding.values for embedding in embeddings]
             logger.info(
-                f"Generated embedding with {len(embedding_vector)} dimensions (type: {type(embedding_vector).__name__})"
+                f"Generated {len(vectors)} embedding(s) with {len(vectors[0])} dimensions (type: {type(vectors[0]).__name__})"
             )
-            return embedding_vector
+            return vectors
 
-        except ResourceExhausted as e:
-            if attempt < MAX_RETRIES - 1:
-                logger.warning(
-                    f"Rate limit exceeded (attempt {attempt + 1}/{MAX_RETRIES}), retrying after {backoff}s"
-                )
-                time.sleep(backoff)
-                backoff = min(backoff * 2, MAX_BACKOFF)
-            else:
-                logger.error(f"Rate limit exceeded after {MAX_RETRIES} attempts")
+        except Exception as e:
+            # Every outcome goes to the governor, so a failed half-open probe
+            # releases the circuit; it returns None for non-retriable errors
+            retry_in = governor.record_error(e, attempt)
+            if retry_in is None:
+                logger.error(f"Unexpected error generating embedding: {e}")
                 raise
-
-        except InternalServerError as e:
+            label = "Rate limit exceeded" if isinstance(e, ResourceExhausted) else "Server error"
             if attempt < MAX_RETRIES - 1:
                 logger.warning(
-                    f"Server error (attempt {attempt + 1}/{MAX_RETRIES}), retrying after {backoff}s"
+                    f"{label} (attempt {attempt + 1}/{MAX_RETRIES}), retrying after {retry_in:.1f}s"
                 )
-                time.sleep(backoff)
-                backoff = min(backoff * 2, MAX_BACKOFF)
+                if retry_in:
+                    time.sleep(retry_in)
             else:
-                logger.error(f"Server error after {MAX_RETRIES} attempts")
+                logger.error(f"{label} after {attempt + 1} attempts")
                 raise
 
-        except Exception as e:
-            logger.error(f"Unexpected error generating embedding: {e}")
-            raise
-
 
 # Removed: upsert_to_vector_search() - embeddings now stored directly in Firestore
 # Removed: upsert_batch_to_vector_search() - embeddings now stored directly in Firestore
@@ -473,96 +642,15 @@ def write_to_firestore(
     """
     try:
         db = get_firestore_client()
-
-        # Check if this is a chunk
+        doc_data = _build_kb_item(
+            metadata, content, content_hash, run_id, embedding_status, embedding_vector
+        )
         is_chunk = "chunk_id" in metadata
 
+        # Ensure source document exists and links this chunk
         if is_chunk:
-            # Chunk schema (Story 1.6)
-            doc_data = {
-                "chunk_id": metadata["chunk_id"],
-                "parent_doc_id": metadata.get("parent_doc_id", metadata.get("doc_id")),
-                "chunk_index": metadata.get("chunk_index", 0),
-                "total_chunks": metadata.get("total_chunks", 1),
-                "title": metadata["title"],
-                "author": metadata["author"],
-                "source": metadata.get("source", "unknown"),
-                "category": metadata.get("category", "unknown"),
-                "tags": metadata.get("tags", []),
-                # Story 2.7: URL Link Storage - add URL fields
-                "readwise_url": metadata.get("readwise_url"),
-                "source_url": metadata.get("source_url"),
-                "highlight_url": metadata.get("highlight_url"),
-                # Actual reading times (when highlights were made)
-                "first_highlighted_at": _parse_iso_datetime(metadata.get("first_highlighted_at")),
-                "last_highlighted_at": _parse_iso_datetime(metadata.get("last_highlighted_at")),
-                "content": content,  # NEW: Store full chunk content
-                "embedding_model": "gemini-embedding-001",
-                "content_hash": content_hash,
-                "embedding_status": embedding_status,
-                "last_embedded_at": getattr(firestore, "SERVER_TIMESTAMP", None),
-                "last_error": None,
-                "retry_count": 0,
-                "created_at": getattr(firestore, "SERVER_TIMESTAMP", None),
-                "updated_at": getattr(firestore, "SERVER_TIMESTAMP", None),
-            }
-
-            # Add chunk-specific fields if present
-            if "token_count" in metadata:
-                doc_data["token_count"] = metadata["token_count"]
-            if "overlap_start" in metadata:
-                doc_data["overlap_start"] = metadata["overlap_start"]
-            if "overlap_end" in metadata:
-                doc_data["overlap_end"] = metadata["overlap_end"]
-
-        else:
-            # Legacy document schema (backward compatibility)
-            created_at_value = _parse_iso_datetime(metadata.get("created_at"))
-            updated_at_value = _parse_iso_datetime(metadata.get("updated_at"))
-
-            doc_data = {
-                "title": metadata["title"],
-                "url": metadata.get("url"),
-                "tags": metadata.get("tags", []),
-                "authors": [metadata["author"]],
-                "created_at": created_at_value
-                if created_at_value
-                else getattr(firestore, "SERVER_TIMESTAMP", None),
-                "updated_at": updated_at_value
-                if updated_at_value
-                else getattr(firestore, "SERVER_TIMESTAMP", None),
-                "content_hash": content_hash,
-                "embedding_status": embedding_status,
-                "last_embedded_at": getattr(firestore, "SERVER_TIMESTAMP", None),
-                "last_error": None,
-                "last_run_id": run_id,
-                "cluster_id": [],
-                "similar_ids": [],
-                "scores": [],
-            }
-
-        # Add embedding vector if provided (using Firestore Vector type for vector search)
-        if embedding_vector is not None:
-            # Ensure embedding_vector is a list of floats (not numpy array or other type)
-            vector_list = [float(x) for x in embedding_vector]
-            logger.info(
-                f"Storing embedding vector with {len(vector_list)} dimensions for {metadata['id']}"
-            )
-
-            # Store as Firestore Vector for native vector search
-            if _HAS_MATCHING_ENGINE_LIB and Vector is not None:
-                doc_data["embedding"] = Vector(vector_list)
-            else:
-                # Fallback: store as raw list
-                doc_data["embedding"] = vector_list
-
-        # Generate source_id and ensure source exists (for chunks)
-        if is_chunk:
-            source_id = _generate_source_id(metadata["title"])
-            doc_data["source_id"] = source_id
-            # Ensure source document exists and links this chunk
             _ensure_source_exists(
-                source_id=source_id,
+                source_id=doc_data["source_id"],
                 title=metadata["title"],
                 author=metadata["author"],
                 chunk_id=metadata["chunk_id"],
@@ -582,6 +670,192 @@ def write_to_firestore(
         return False
 
 
+def write_batch_to_firestore(
+    items: List[Dict[str, Any]],
+    run_id: str,
+    embedding_status: str,
+) -> List[bool]:
+    """
+    Write several chunks to kb_items with batched commits.
+
+    The batched counterpart of write_to_firestore(): chunks are committed in
+    Firestore batches of up to FIRESTORE_BATCH_LIMIT writes and every source
+    is upserted once with all of its committed chunks, instead of one write
+    and one source read-modify-write per chunk.
+
+    Args:
+        items: Dicts with metadata, content, content_hash and embedding_vector
+            (same meaning as the write_to_firestore() arguments)
+        run_id: Current pipeline run identifier
+        embedding_status: Embedding status to persist with metadata
+
+    Returns:
+        Per-item success flags aligned with items
+    """
+    results = [False] * len(items)
+    if not items:
+        return results
+
+    try:
+        db = get_firestore_client()
+    except Exception as e:
+        logger.error(f"Failed to write {len(items)} documents to Firestore: {e}")
+        return results
+
+    # Build documents first so a malformed item only fails itself
+    prepared = []
+    for index, item in enumerate(items):
+        metadata = item["metadata"]
+        try:
+            doc_data = _build_kb_item(
+                metadata,
+                item["content"],
+                item["content_hash"],
+                run_id,
+                embedding_status,
+                item.get("embedding_vector"),
+            )
+            prepared.append((index, metadata, doc_data))
+        except Exception as e:
+            logger.error(f"Failed to prepare document {metadata.get('id')} for Firestore: {e}")
+
+    # chunk_ids committed per source_id, with the title/author to create it
+    sources: Dict[str, Dict[str, Any]] = {}
+
+    for start in range(0, len(prepared), FIRESTORE_BATCH_LIMIT):
+        group = prepared[start : start + FIRESTORE_BATCH_LIMIT]
+        try:
+            batch = db.batch()
+            for _, metadata, doc_data in group:
+                doc_ref = db.collection("kb_items").document(metadata["id"])
+                batch.set(doc_ref, doc_data, merge=True)
+            batch.commit()
+        except Exception as e:
+            logger.error(f"Failed to commit batch of {len(group)} documents to Firestore: {e}")
+            continue
+
+        for index, metadata, doc_data in group:
+            results[index] = True
+            if "chunk_id" in metadata:
+                source = sources.setdefault(
+                    doc_data["source_id"],
+                    {"title": metadata["title"], "author": metadata["author"], "chunk_ids": []},
+                )
+                source["chunk_ids"].append(metadata["chunk_id"])
+
+    for source_id, source in sources.items():
+        _ensure_source_has_chunks(
+            source_id=source_id,
+            title=source["title"],
+            author=source["author"],
+            chunk_ids=source["chunk_ids"],
+        )
+
+    logger.info(
+        f"Wrote {sum(results)}/{len(items)} documents to Firestore in batches "
+        f"(sources upserted: {len(sources)})"
+    )
+    return results
+
+
+def _build_kb_item(
+    metadata: Dict[str, Any],
+    content: str,
+    content_hash: str,
+    run_id: str,
+    embedding_status: str,
+    embedding_vector: Optional[List[float]] = None,
+) -> Dict[str, Any]:
+    """Build the kb_items document for a chunk or legacy document."""
+    # Check if this is a chunk
+    is_chunk = "chunk_id" in metadata
+
+    if is_chunk:
+        # Chunk schema (Story 1.6)
+        doc_data = {
+            "chunk_id": metadata["chunk_id"],
+            "parent_doc_id": metadata.get("parent_doc_id", metadata.get("doc_id")),
+            "chunk_index": metadata.get("chunk_index", 0),
+            "total_chunks": metadata.get("total_chunks", 1),
+            "title": metadata["title"],
+            "author": metadata["author"],
+            "source": metadata.get("source", "unknown"),
+            "category": metadata.get("category", "unknown"),
+            "tags": metadata.get("tags", []),
+            # Story 2.7: URL Link Storage - add URL fields
+            "readwise_url": metadata.get("readwise_url"),
+            "source_url": metadata.get("source_url"),
+            "highlight_url": metadata.get("highlight_url"),
+            # Actual reading times (when highlights were made)
+            "first_highlighted_at": _parse_iso_datetime(metadata.get("first_highlighted_at")),
+            "last_highlighted_at": _parse_iso_datetime(metadata.get("last_highlighted_at")),
+            "content": content,  # NEW: Store full chunk content
+            "embedding_model": EMBEDDING_MODEL,
+            "content_hash": content_hash,
+            "embedding_status": embedding_status,
+            "last_embedded_at": getattr(firestore, "SERVER_TIMESTAMP", None),
+            "last_error": None,
+            "retry_count": 0,
+            "created_at": getattr(firestore, "SERVER_TIMESTAMP", None),
+            "updated_at": getattr(firestore, "SERVER_TIMESTAMP", None),
+        }
+
+        # Add chunk-specific fields if present
+        if "token_count" in metadata:
+            doc_data["token_count"] = metadata["token_count"]
+        if "overlap_start" in metadata:
+            doc_data["overlap_start"] = metadata["overlap_start"]
+        if "overlap_end" in metadata:
+            doc_data["overlap_end"] = metadata["overlap_end"]
+
+    else:
+        # Legacy document schema (backward compatibility)
+        created_at_value = _parse_iso_datetime(metadata.get("created_at"))
+        updated_at_value = _parse_iso_datetime(metadata.get("updated_at"))
+
+        doc_data = {
+            "title": metadata["title"],
+            "url": metadata.get("url"),
+            "tags": metadata.get("tags", []),
+            "authors": [metadata["author"]],
+            "created_at": created_at_value
+            if created_at_value
+            else getattr(firestore, "SERVER_TIMESTAMP", None),
+            "updated_at": updated_at_value
+            if updated_at_value
+            else getattr(firestore, "SERVER_TIMESTAMP", None),
+            "content_hash": content_hash,
+            "embedding_status": embedding_status,
+            "last_embedded_at": getattr(firestore, "SERVER_TIMESTAMP", None),
+            "last_error": None,
+            "last_run_id": run_id,
+            "cluster_id": [],
+            "similar_ids": [],
+            "scores": [],
+        }
+
+    # Add embedding vector if provided (using Firestore Vector type for vector search)
+    if embedding_vector is not None:
+        # Ensure embedding_vector is a list of floats (not numpy array or other type)
+        vector_list = [float(x) for x in embedding_vector]
+        logger.info(
+            f"Storing embedding vector with {len(vector_list)} dimensions for {metadata['id']}"
+        )
+
+        # Store as Firestore Vector for native vector search
+        if _HAS_MATCHING_ENGINE_LIB and Vector is not None:
+            doc_data["embedding"] = Vector(vector_list)
+        else:
+            # Fallback: store as raw list
+            doc_data["embedding"] = vector_list
+
+    # Link chunks to their source (the source upsert is the caller's job)
+    if is_chunk:
+        doc_data["source_id"] = _generate_source_id(metadata["title"])
+
+    return doc_data
+
+
 def embed(request):
     """
     Main Cloud Function handler.
@@ -634,6 +908,7 @@ def embed(request):
         "candidates": len(candidate_snapshots),
         "processed": 0,
         "skipped": 0,
+        "unchanged": 0,
         "failed": 0,
         "firestore_updates": 0,
         "stale_resets": 0,
@@ -686,6 +961,28 @@ def embed(request):
             doc["embedding_status"] = "pending"
             stats["stale_resets"] += 1
 
+        if EMBED_TRUST_RECORDED_HASH and _recorded_hash_is_current(
+            storage_client, doc
+        ):
+            # Fast path: content already embedded, only touch pipeline state
+            logger.info(
+                f"Skipping download for {item_id}; recorded content hash already embedded"
+            )
+            doc_ref.set(
+                {
+                    "embedding_status": "complete",
+                    "last_transition_at": getattr(firestore, "SERVER_TIMESTAMP", None),
+                    "last_error": None,
+                    "retry_count": 0,
+                    "manifest_run_id": run_id,
+                    "embedding_run_id": run_id,
+                },
+                merge=True,
+            )
+            stats["processed"] += 1
+            stats["unchanged"] += 1
+            continue
+
         try:
             # Mark item as processing for this run
             doc_ref.set(
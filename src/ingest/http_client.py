@@ -0,0 +1,268 @@
+"""
+Shared pooled HTTP session layer for outbound API calls.
+
+Every outbound caller (Readwise export/Reader/v2 writer, MCP server, URL
+checks) goes through the same keep-alive connection pools, so repeated calls
+to a host reuse TCP+TLS connections instead of reconnecting per request.
+
+Features:
+- Process-wide HTTPAdapter with per-host connection pools; sessions created
+  by create_session() share it while keeping their own default headers
+- Unified retry/backoff: transport errors and 429/5xx responses are retried,
+  honoring Retry-After (seconds or HTTP date) when present
+- Default timeouts and per-host request metrics
+
+Configuration:
+    HTTP_POOL_CONNECTIONS: Number of per-host pools to keep (default: 16)
+    HTTP_POOL_MAXSIZE: Connections kept alive per host (default: 32)
+
+Usage:
+    from src.common import http_client
+
+    session = http_client.create_session({"Authorization": f"Token {key}"})
+    response = http_client.request("GET", url, session=session, params=params)
+    response.raise_for_status()
+
+Deployment copies (keep in sync): src/ingest/http_client.py,
+src/batch_recommendations/http_client.py
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30  # seconds
+DEFAULT_MAX_RETRIES = 3
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+MAX_BACKOFF = 60  # seconds
+DEFAULT_RETRY_AFTER = 60  # seconds, when a 429 carries no usable header
+
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "16"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "32"))
+
+# Lazy initialization - shared across all sessions in the process
+_adapter: Optional[HTTPAdapter] = None
+_session: Optional[requests.Session] = None
+_lock = threading.RLock()
+
+_metrics: Dict[str, Dict[str, Any]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _get_adapter() -> HTTPAdapter:
+    """Get or create the process-wide pooled adapter."""
+    global _adapter
+    if _adapter is None:
+        with _lock:
+            if _adapter is None:
+                # Retries are handled in request() so they are uniform and counted
+                _adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    max_retries=0,
+                )
+    return _adapter
+
+
+def create_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Create a session with its own default headers on the shared pools.
+
+    Args:
+        headers: Default headers for every request (e.g., Authorization)
+
+    Returns:
+        requests.Session mounted on the process-wide adapter
+    """
+    session = requests.Session()
+    adapter = _get_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get the shared header-less session (cached)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def retry_after_seconds(response: requests.Response, default: float) -> float:
+    """
+    Parse the Retry-After header of a response.
+
+    Args:
+        response: HTTP response
+        default: Delay to use when the header is missing or invalid
+
+    Returns:
+        Delay in seconds, capped at MAX_BACKOFF
+    """
+    value = (response.headers or {}).get("Retry-After")
+    if value is None:
+        return default
+    try:
+        return min(max(0, int(value)), MAX_BACKOFF)
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+        return min(max(0.0, delay), MAX_BACKOFF)
+    except (TypeError, ValueError):
+        return default
+
+
+def _record(host: str, seconds: float, status: Optional[int] = None,
+            error: bool = False, retried: bool = False) -> None:
+    with _metrics_lock:
+        stats = _metrics.setdefault(host, {
+            "requests": 0,
+            "errors": 0,
+            "retries": 0,
+            "total_seconds": 0.0,
+            "status": {},
+        })
+        stats["requests"] += 1
+        stats["total_seconds"] += seconds
+        if error:
+            stats["errors"] += 1
+        if retried:
+            stats["retries"] += 1
+        if status is not None:
+            stats["status"][status] = stats["status"].get(status, 0) + 1
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    session: Optional[requests.Session] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    retry_statuses: Iterable[int] = RETRY_STATUS_CODES,
+    before_attempt: Optional[Callable[[], None]] = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Send an HTTP request with pooled connections and unified retries.
+
+    Timeouts and connection errors are retried with exponential backoff
+    (1s, 2s, 4s, ...). Responses with a retryable status are retried after
+    Retry-After (429 defaults to 60s) or the backoff delay. The last
+    response is returned as-is, so callers still decide via
+    raise_for_status().
+
+    Args:
+        method: HTTP method (GET, POST, HEAD, ...)
+        url: Absolute URL
+        session: Session to send with (default: shared session)
+        timeout: Per-attempt timeout in seconds
+        max_retries: Total attempts (1 disables retries)
+        retry_statuses: Status codes that trigger a retry
+        before_attempt: Optional hook run before every attempt (e.g., a
+            client-side rate limiter)
+        **kwargs: Passed to requests.Session.request
+
+    Returns:
+        Final requests.Response
+
+    Raises:
+        requests.exceptions.RequestException: Transport error after the
+            last attempt (other request errors are raised immediately)
+    """
+    session = session or get_session()
+    host = urlparse(url).netloc
+    retry_statuses = frozenset(retry_statuses)
+    attempts = max(1, max_retries)
+
+    for attempt in range(attempts):
+        if before_attempt:
+            before_attempt()
+
+        is_last = attempt == attempts - 1
+        backoff = min(2 ** attempt, MAX_BACKOFF)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            _record(host, time.perf_counter() - started, error=True, retried=not is_last)
+            logger.warning(f"{method} {host} failed: {e} (attempt {attempt + 1}/{attempts})")
+            if is_last:
+                raise
+            time.sleep(backoff)
+            continue
+        except requests.exceptions.RequestException:
+            _record(host, time.perf_counter() - started, error=True)
+            raise
+
+        status = response.status_code
+        retry = status in retry_statuses and not is_last
+        _record(host, time.perf_counter() - started, status=status, retried=retry)
+        if not retry:
+            return response
+
+        default = DEFAULT_RETRY_AFTER if status == 429 else backoff
+        delay = retry_after_seconds(response, default)
+        logger.warning(
+            f"{method} {host} returned {status}. Retrying after {delay}s "
+            f"(attempt {attempt + 1}/{attempts})"
+        )
+        time.sleep(delay)
+
+    # Unreachable: the last attempt always returns or raises
+    raise RuntimeError("HTTP request loop exited unexpectedly")
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send a GET request (see request())."""
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Send a POST request (see request())."""
+    return request("POST", url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    """Send a HEAD request (see request())."""
+    return request("HEAD", url, **kwargs)
+
+
+def get_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return a snapshot of per-host request metrics."""
+    with _metrics_lock:
+        return copy.deepcopy(_metrics)
+
+
+def reset_metrics() -> None:
+    """Clear per-host request metrics."""
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def log_metrics(prefix: str = "HTTP") -> None:
+    """Log a one-line summary per host."""
+    for host, stats in sorted(get_metrics().items()):
+        avg_ms = 1000 * stats["total_seconds"] / max(1, stats["requests"])
+        logger.info(
+            f"{prefix} {host}: {stats['requests']} requests, {stats['retries']} retries, "
+            f"{stats['errors']} errors, avg {avg_ms:.0f}ms, status {stats['status']}"
+        )
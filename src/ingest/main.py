@@ -1,14 +1,25 @@
+import base64
 import hashlib
 import json
 import logging
 import os
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from uuid import uuid4
 
 from google.cloud import secretmanager, storage, pubsub_v1
 
+try:
+    from src.common import http_client
+except ImportError:
+    import http_client
+
+try:  # pragma: no cover - optional dependency in local tests
+    from google.cloud import firestore
+except ImportError:  # pragma: no cover
+    firestore = None  # type: ignore[assignment]
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,10 +28,20 @@ PROJECT_ID = os.environ.get("GCP_PROJECT")
 PIPELINE_BUCKET = os.environ.get("PIPELINE_BUCKET")
 PIPELINE_MANIFEST_PREFIX = os.environ.get("PIPELINE_MANIFEST_PREFIX", "manifests")
 
+# Incremental export state (watermark + in-flight page cursor)
+INGEST_STATE_COLLECTION = os.environ.get("INGEST_STATE_COLLECTION", "pipeline_state")
+INGEST_STATE_DOC = "readwise_export"
+INGEST_BACKFILL_STATE_DOC = "readwise_export_backfill"
+INGEST_INITIAL_LOOKBACK_HOURS = int(os.environ.get("INGEST_INITIAL_LOOKBACK_HOURS", "24"))
+
+# Concurrent raw JSON uploads per export page
+INGEST_UPLOAD_WORKERS = int(os.environ.get("INGEST_UPLOAD_WORKERS", "8"))
+
 # Lazy initialization - clients created on first use to avoid auth errors during import
 secret_client = None
 storage_client = None
 pubsub_publisher = None
+firestore_client = None
 
 def _get_secret_client():
     global secret_client
@@ -40,6 +61,14 @@ def _get_pubsub_publisher():
         pubsub_publisher = pubsub_v1.PublisherClient()
     return pubsub_publisher
 
+def _get_firestore_client():
+    global firestore_client
+    if firestore_client is None:
+        if firestore is None:
+            raise ImportError("google-cloud-firestore is required for ingest state")
+        firestore_client = firestore.Client(project=PROJECT_ID)
+    return firestore_client
+
 # --- Configuration ---
 COMPLETED_TOPIC = "daily-ingest"
 
@@ -60,12 +89,13 @@ def get_pipeline_bucket():
     return PIPELINE_BUCKET
 
 
-def get_manifest_blob_path(run_id: str) -> str:
-    """Compute the object path for a run manifest."""
+def get_manifest_blob_path(run_id: str, partial: bool = False) -> str:
+    """Compute the object path for a run manifest (or its in-progress copy)."""
     prefix = (PIPELINE_MANIFEST_PREFIX or "manifests").strip("/")
+    name = f"{run_id}.partial.json" if partial else f"{run_id}.json"
     if prefix:
-        return f"{prefix}/{run_id}.json"
-    return f"{run_id}.json"
+        return f"{prefix}/{name}"
+    return name
 
 
 def generate_run_id() -> str:
@@ -81,82 +111,163 @@ def get_secret(secret_id, version_id="latest"):
     response = client.access_secret_version(request={"name": name})
     return response.payload.data.decode("UTF-8")
 
-def get_last_run_timestamp():
-    """Placeholder to get the last successful run timestamp. 
-       In a real implementation, this would read from Firestore or a state file."""
-    # For now, fetch highlights from the last 24 hours.
-    return (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Readwise ISO timestamp (e.g. 2024-06-01T13:22:09.640Z)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning(f"Ignoring unparseable timestamp: {value}")
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
 
+def _later_timestamp(current: Optional[str], candidate: Optional[str]) -> Optional[str]:
+    """Return whichever of two ISO timestamps is later (None-safe)."""
+    candidate_dt = _parse_timestamp(candidate)
+    if candidate_dt is None:
+        return current
+    current_dt = _parse_timestamp(current)
+    if current_dt is None or candidate_dt > current_dt:
+        return candidate
+    return current
 
-def fetch_readwise_highlights(api_key, last_fetch_date, max_retries=3, timeout=30):
-    """Fetch all new books/highlights from Readwise since the last fetch date.
+
+def _get_state_ref(state_doc: str):
+    """Return the Firestore reference holding ingest state."""
+    return _get_firestore_client().collection(INGEST_STATE_COLLECTION).document(state_doc)
+
+
+def load_ingest_state(state_doc: str = INGEST_STATE_DOC) -> Dict[str, Any]:
+    """Load the persisted ingest state (empty dict on first run)."""
+    snapshot = _get_state_ref(state_doc).get()
+    if snapshot.exists:
+        return snapshot.to_dict() or {}
+    return {}
+
+
+def save_ingest_state(state_doc: str, updates: Dict[str, Any]) -> None:
+    """Merge updates into the persisted ingest state."""
+    _get_state_ref(state_doc).set(updates, merge=True)
+
+
+def get_last_run_timestamp(state: Optional[Dict[str, Any]] = None) -> str:
+    """Get the watermark of the last successful run.
+
+    Args:
+        state: Persisted ingest state (loaded from Firestore if None)
+
+    Returns:
+        Latest `updated` timestamp already exported, or now minus
+        INGEST_INITIAL_LOOKBACK_HOURS when no run has completed yet
+    """
+    if state is None:
+        state = load_ingest_state()
+    watermark = state.get("last_updated_at")
+    if watermark:
+        return watermark
+    lookback = timedelta(hours=INGEST_INITIAL_LOOKBACK_HOURS)
+    return (datetime.now(timezone.utc) - lookback).isoformat()
+
+
+def parse_run_options(event) -> Dict[str, Any]:
+    """Extract optional backfill range from the Pub/Sub trigger payload.
+
+    The daily scheduler publishes a plain string; a JSON payload such as
+    {"since": "2024-01-01T00:00:00Z", "until": "2024-02-01T00:00:00Z"}
+    requests a backfill of that `updated` range instead.
+
+    Args:
+        event: Pub/Sub event dict (data is base64 encoded)
+
+    Returns:
+        Dict with "since" and "until" (both None for incremental runs)
+    """
+    options = {"since": None, "until": None}
+    data = event.get("data") if isinstance(event, dict) else None
+    if not data:
+        return options
+
+    try:
+        payload = json.loads(base64.b64decode(data).decode("utf-8"))
+    except (ValueError, TypeError):
+        return options
+
+    if isinstance(payload, dict):
+        for key in ("since", "until"):
+            if payload.get(key) and _parse_timestamp(payload[key]) is None:
+                raise ValueError(f"Invalid backfill '{key}' timestamp: {payload[key]}")
+            options[key] = payload.get(key) or None
+    return options
+
+
+def iter_readwise_pages(api_key, last_fetch_date=None, page_cursor=None, max_retries=3, timeout=30):
+    """Iterate over Readwise export pages, starting at an optional cursor.
 
     Args:
         api_key: Readwise API token
-        last_fetch_date: ISO timestamp to fetch updates since
+        last_fetch_date: ISO timestamp to fetch updates since (None = all)
+        page_cursor: pageCursor to resume an interrupted export from
         max_retries: Maximum retry attempts for rate limiting
         timeout: Request timeout in seconds
 
-    Returns:
-        List of book objects, each containing nested highlights
+    Yields:
+        Tuple of (books on the page, nextPageCursor or None)
     """
-    logger.info(f"Fetching Readwise books since {last_fetch_date}")
     headers = {"Authorization": f"Token {api_key}"}
-    full_data = []
-    next_page_cursor = None
+    next_page_cursor = page_cursor
 
     while True:
-        params = {
-            "updated__gt": last_fetch_date
-        }
+        params = {}
+        if last_fetch_date:
+            params["updated__gt"] = last_fetch_date
         if next_page_cursor:
             params["pageCursor"] = next_page_cursor
 
-        # Retry logic for rate limiting
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(
-                    url="https://readwise.io/api/v2/export/",
-                    headers=headers,
-                    params=params,
-                    timeout=timeout
-                )
-
-                # Handle rate limiting (429)
-                if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 60))
-                    logger.warning(f"Rate limited. Retrying after {retry_after}s (attempt {attempt + 1}/{max_retries})")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_after)
-                        continue
-                    else:
-                        response.raise_for_status()
-
-                response.raise_for_status()
-                data = response.json()
+        # Pooled session; 429/5xx and transport errors are retried with backoff
+        response = http_client.request(
+            "GET",
+            "https://readwise.io/api/v2/export/",
+            headers=headers,
+            params=params,
+            timeout=timeout,
+            max_retries=max_retries
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        # Validate response structure
+        if "results" not in data:
+            raise ValueError(f"Unexpected API response structure: {data.keys()}")
+
+        next_page_cursor = data.get("nextPageCursor")
+        yield data["results"], next_page_cursor
 
-                # Validate response structure
-                if "results" not in data:
-                    raise ValueError(f"Unexpected API response structure: {data.keys()}")
+        if not next_page_cursor:
+            break
 
-                full_data.extend(data["results"])
-                next_page_cursor = data.get("nextPageCursor")
-                break  # Success, exit retry loop
 
-            except requests.exceptions.Timeout:
-                logger.error(f"Request timeout (attempt {attempt + 1}/{max_retries})")
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(2 ** attempt)  # Exponential backoff
+def fetch_readwise_highlights(api_key, last_fetch_date, max_retries=3, timeout=30):
+    """Fetch all new books/highlights from Readwise since the last fetch date.
 
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request failed: {e} (attempt {attempt + 1}/{max_retries})")
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(2 ** attempt)  # Exponential backoff
+    Args:
+        api_key: Readwise API token
+        last_fetch_date: ISO timestamp to fetch updates since
+        max_retries: Maximum retry attempts for rate limiting
+        timeout: Request timeout in seconds
 
-        if not next_page_cursor:
-            break
+    Returns:
+        List of book objects, each containing nested highlights
+    """
+    logger.info(f"Fetching Readwise books since {last_fetch_date}")
+    full_data = []
+    for books, _ in iter_readwise_pages(
+        api_key, last_fetch_date, max_retries=max_retries, timeout=timeout
+    ):
+        full_data.extend(books)
 
     logger.info(f"Fetched {len(full_data)} books from Readwise")
     return full_data
@@ -184,16 +295,71 @@ def write_manifest(bucket_name: str, blob_path: str, manifest: dict) -> None:
     logger.info(f"Stored manifest {blob_path} in bucket {bucket_name}")
 
 
+def load_partial_manifest(bucket_name: str, run_id: str) -> Optional[Dict[str, Any]]:
+    """Load the manifest checkpointed by an interrupted run (None if missing)."""
+    client = _get_storage_client()
+    blob = client.bucket(bucket_name).blob(get_manifest_blob_path(run_id, partial=True))
+    if not blob.exists():
+        return None
+    return json.loads(blob.download_as_text())
+
+
+def load_manifest_checksums(manifest_uri: Optional[str]) -> Dict[str, str]:
+    """Map item id to raw_checksum for a previously written manifest.
+
+    Args:
+        manifest_uri: gs:// URI of the manifest (None returns an empty map)
+
+    Returns:
+        Dict of item id to "sha256:..." checksum (empty if unreadable)
+    """
+    if not manifest_uri or not manifest_uri.startswith("gs://"):
+        return {}
+    bucket_name, _, blob_path = manifest_uri[len("gs://"):].partition("/")
+    try:
+        client = _get_storage_client()
+        manifest = json.loads(client.bucket(bucket_name).blob(blob_path).download_as_text())
+    except Exception as e:
+        logger.warning(f"Could not load previous manifest {manifest_uri}, skipping checksum dedupe: {e}")
+        return {}
+    # Skipped books are listed separately so normalize never picks them up
+    items = manifest.get("unchanged_items", []) + manifest.get("items", [])
+    return {
+        item["id"]: item["raw_checksum"]
+        for item in items
+        if item.get("id") and item.get("raw_checksum")
+    }
+
+
+def delete_partial_manifest(bucket_name: str, run_id: str) -> None:
+    """Remove a run's checkpoint manifest once the final manifest exists."""
+    client = _get_storage_client()
+    blob = client.bucket(bucket_name).blob(get_manifest_blob_path(run_id, partial=True))
+    try:
+        blob.delete()
+    except Exception as e:  # pragma: no cover - best effort cleanup
+        logger.warning(f"Could not delete partial manifest for {run_id}: {e}")
+
+
 def publish_completion_message(topic_name, message_dict):
     """Publish a message to a Pub/Sub topic."""
     publisher = _get_pubsub_publisher()
     topic_path = publisher.topic_path(PROJECT_ID, topic_name)
     payload = json.dumps(message_dict).encode("utf-8")
     future = publisher.publish(topic_path, payload)
+    # Wait for delivery so the watermark never advances past an unannounced run
+    future.result()
     logger.info(f"Published message to {topic_path}")
 
 def handler(event, context):
-    """Main Cloud Function entry point."""
+    """Main Cloud Function entry point.
+
+    Exports books updated since the persisted watermark (or within an
+    explicit backfill range, see parse_run_options). Multi-page exports
+    checkpoint their manifest items and pageCursor after every page, so a
+    retried invocation resumes where the interrupted one stopped. The
+    watermark advances only after the manifest is written and announced.
+    """
     logger.info("Ingest function triggered")
 
     # Validate required environment variables
@@ -204,58 +370,169 @@ def handler(event, context):
         # 1. Get secrets
         readwise_api_key = get_secret(READWISE_API_KEY_SECRET)
 
-        # 2. Get last run timestamp
-        last_run = get_last_run_timestamp()
+        # 2. Resolve export window (watermark, backfill range or resumed run)
+        options = parse_run_options(event)
+        backfill = bool(options["since"] or options["until"])
+        state_doc = INGEST_BACKFILL_STATE_DOC if backfill else INGEST_STATE_DOC
+        state = load_ingest_state(state_doc)
 
-        # 3. Fetch data from Readwise
-        # Note: Reader API would be a separate function call here
-        books = fetch_readwise_highlights(readwise_api_key, last_run)
-
-        # 4. Store each book (with nested highlights) in GCS + build manifest
         raw_bucket = get_raw_json_bucket()
         pipeline_bucket = get_pipeline_bucket()
-        run_id = generate_run_id()
+
+        in_flight = state.get("in_flight") or {}
+        resumable = bool(in_flight.get("run_id")) and (
+            not backfill
+            or (in_flight.get("since"), in_flight.get("until")) == (options["since"], options["until"])
+        )
         manifest_items = []
-        count = 0
+        unchanged = []
+        page_cursor = None
+
+        if resumable:
+            run_id = in_flight["run_id"]
+            since = in_flight.get("since")
+            until = in_flight.get("until")
+            max_updated = in_flight.get("max_updated_at")
+            if in_flight.get("page_cursor"):
+                checkpoint = load_partial_manifest(pipeline_bucket, run_id)
+                if checkpoint is None:
+                    logger.warning(f"Checkpoint for run {run_id} missing, restarting its export")
+                else:
+                    manifest_items = checkpoint.get("items", [])
+                    unchanged = checkpoint.get("unchanged_items", [])
+                    page_cursor = in_flight["page_cursor"]
+            logger.info(
+                f"Resuming run {run_id} (since={since}, cursor={'yes' if page_cursor else 'no'}, "
+                f"{len(manifest_items)} items checkpointed)"
+            )
+        else:
+            run_id = generate_run_id()
+            since = options["since"] if backfill else get_last_run_timestamp(state)
+            until = options["until"]
+            max_updated = None
+
+        in_flight = {
+            "run_id": run_id,
+            "since": since,
+            "until": until,
+            "page_cursor": page_cursor,
+            "max_updated_at": max_updated,
+        }
+        save_ingest_state(state_doc, {"in_flight": in_flight})
 
-        for book in books:
-            # Validate book structure
-            if "user_book_id" not in book:
-                logger.warning(f"Skipping book without user_book_id: {book.keys()}")
-                continue
+        # Checksums of the previous run: unchanged books are not re-uploaded
+        # (and stay out of the manifest, so normalize/embed skip them too)
+        previous_checksums = load_manifest_checksums(state.get("last_manifest_uri"))
+        unchanged_items = {item["id"]: item for item in unchanged}
 
-            book_id = book["user_book_id"]
-            file_name = f"readwise-book-{book_id}.json"
-            raw_json_payload = json.dumps(book, indent=2, sort_keys=True)
-            raw_checksum = hashlib.sha256(raw_json_payload.encode("utf-8")).hexdigest()
+        # 3. Stream Readwise export pages; each page is uploaded before the next is fetched
+        # Note: Reader API would be a separate function call here
+        logger.info(f"Fetching Readwise books since {since}" + (f" until {until}" if until else ""))
+        until_dt = _parse_timestamp(until)
+        items_by_id = {item["id"]: item for item in manifest_items}
+        checkpointed = bool(page_cursor)
+
+        with ThreadPoolExecutor(max_workers=INGEST_UPLOAD_WORKERS) as upload_executor:
+            for books, next_page_cursor in iter_readwise_pages(readwise_api_key, since, page_cursor=page_cursor):
+                # 4. Store each changed book (with nested highlights) in GCS + build manifest
+                uploads = []
+                for book in books:
+                    # Validate book structure
+                    if "user_book_id" not in book:
+                        logger.warning(f"Skipping book without user_book_id: {book.keys()}")
+                        continue
+
+                    # Backfill upper bound is applied client-side
+                    updated_dt = _parse_timestamp(book.get("updated"))
+                    if until_dt and updated_dt and updated_dt > until_dt:
+                        continue
 
-            store_raw_json(raw_bucket, file_name, raw_json_payload)
-            count += 1
+                    max_updated = _later_timestamp(max_updated, book.get("updated"))
 
-            manifest_items.append({
-                "id": str(book_id),
-                "raw_uri": f"gs://{raw_bucket}/{file_name}",
-                "updated_at": book.get("updated"),
-                "raw_checksum": f"sha256:{raw_checksum}"
-            })
+                    book_id = str(book["user_book_id"])
+                    file_name = f"readwise-book-{book_id}.json"
+                    raw_json_payload = json.dumps(book, indent=2, sort_keys=True)
+                    raw_checksum = f"sha256:{hashlib.sha256(raw_json_payload.encode('utf-8')).hexdigest()}"
+
+                    if previous_checksums.get(book_id) == raw_checksum:
+                        unchanged_items[book_id] = {"id": book_id, "raw_checksum": raw_checksum}
+                        continue
+                    if items_by_id.get(book_id, {}).get("raw_checksum") == raw_checksum:
+                        # Already uploaded before this run was interrupted
+                        continue
+
+                    uploads.append(upload_executor.submit(
+                        store_raw_json, raw_bucket, file_name, raw_json_payload
+                    ))
+                    items_by_id[book_id] = {
+                        "id": book_id,
+                        "raw_uri": f"gs://{raw_bucket}/{file_name}",
+                        "updated_at": book.get("updated"),
+                        "raw_checksum": raw_checksum
+                    }
+
+                # Wait for this page's uploads (re-raises upload errors)
+                for future in uploads:
+                    future.result()
+
+                if next_page_cursor:
+                    # Checkpoint items before moving the cursor past this page
+                    write_manifest(pipeline_bucket, get_manifest_blob_path(run_id, partial=True), {
+                        "run_id": run_id,
+                        "items": list(items_by_id.values()),
+                        "unchanged_items": list(unchanged_items.values())
+                    })
+                    in_flight.update({"page_cursor": next_page_cursor, "max_updated_at": max_updated})
+                    save_ingest_state(state_doc, {"in_flight": in_flight})
+                    checkpointed = True
+
+        skipped = len(unchanged_items)
+        if skipped:
+            logger.info(f"Skipped {skipped} unchanged books (checksum matches previous manifest)")
+
+        manifest_items = list(items_by_id.values())
+        count = len(manifest_items)
 
         manifest_blob_path = get_manifest_blob_path(run_id)
         manifest_payload = {
             "run_id": run_id,
             "generated_at": datetime.now(timezone.utc).isoformat(),
+            "since": since,
+            "until": until,
             "item_count": count,
-            "items": manifest_items
+            "skipped_unchanged": skipped,
+            "items": manifest_items,
+            # Carried forward so later runs keep skipping these books
+            "unchanged_items": list(unchanged_items.values())
         }
         write_manifest(pipeline_bucket, manifest_blob_path, manifest_payload)
 
         # 5. Publish completion message with run metadata
+        manifest_uri = f"gs://{pipeline_bucket}/{manifest_blob_path}"
         completion_message = {
             "run_id": run_id,
             "item_count": count,
-            "manifest_uri": f"gs://{pipeline_bucket}/{manifest_blob_path}"
+            "manifest_uri": manifest_uri
         }
         publish_completion_message(COMPLETED_TOPIC, completion_message)
 
+        # 6. Advance watermark (incremental runs only) and clear in-flight state
+        completed_state = {
+            "in_flight": None,
+            "last_run_id": run_id,
+            "last_manifest_uri": manifest_uri,
+            "last_item_count": count,
+            "last_skipped_unchanged": skipped,
+            "last_completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if not backfill:
+            completed_state["last_updated_at"] = _later_timestamp(since, max_updated)
+        save_ingest_state(state_doc, completed_state)
+
+        if checkpointed:
+            delete_partial_manifest(pipeline_bucket, run_id)
+
+        http_client.log_metrics("Ingest HTTP")
         logger.info(f"Ingest function completed successfully - {count} books processed")
         return "OK"
 
@@ -15,13 +15,18 @@ Rate Limits: 20 req/min (general), 50 req/min (list endpoint)
 import hashlib
 import json
 import logging
-import re
-import time
 from typing import Dict, Any, List, Optional
-from bs4 import BeautifulSoup
-import requests
 from google.cloud import storage
 
+try:
+    from src.common import http_client
+    from src.common.html_text import html_to_text
+    from src.common.rate_limiter import READWISE_RATE_LIMITS, RateLimiter, get_limiter
+except ImportError:
+    import http_client
+    from html_text import html_to_text
+    from rate_limiter import READWISE_RATE_LIMITS, RateLimiter, get_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -75,66 +80,47 @@ class ReadwiseReaderClient:
 
     BASE_URL = "https://readwise.io/api/v3"
     # Rate limits: 20 req/min general, 50 req/min for list endpoint
-    RATE_LIMIT_LIST = 50  # requests per minute
-    RATE_LIMIT_GENERAL = 20  # requests per minute
+    RATE_LIMIT_LIST = READWISE_RATE_LIMITS["list"]  # requests per minute
+    RATE_LIMIT_GENERAL = READWISE_RATE_LIMITS["general"]  # requests per minute
 
-    def __init__(self, api_key: str, storage_client: Optional[storage.Client] = None):
+    def __init__(
+        self,
+        api_key: str,
+        storage_client: Optional[storage.Client] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
         """
         Initialize Reader client.
 
         Args:
             api_key: Readwise API token
             storage_client: Optional GCS client (for storing raw JSON)
+            rate_limiter: Limiter to draw from (default: the process-wide
+                "readwise" limiter, shared with the other Readwise clients)
         """
         self.api_key = api_key
         self.storage_client = storage_client
-        self.session = requests.Session()
-        self.session.headers.update(
+        # Pooled keep-alive connections shared with other API clients
+        self.session = http_client.create_session(
             {
                 "Authorization": f"Token {api_key}",
                 "Content-Type": "application/json",
             }
         )
 
-        # Track request times for rate limiting
-        self._list_request_times: List[float] = []
-        self._general_request_times: List[float] = []
+        # Readwise limits are per token, so all clients share one limiter
+        self.rate_limiter = rate_limiter or get_limiter("readwise")
 
     def _rate_limit(self, endpoint_type: str = "general") -> None:
         """
         Enforce rate limiting before making requests.
 
+        Thread-safe: concurrent callers draw from the same sliding window.
+
         Args:
             endpoint_type: "list" (50/min) or "general" (20/min)
         """
-        limit = self.RATE_LIMIT_LIST if endpoint_type == "list" else self.RATE_LIMIT_GENERAL
-        request_times = (
-            self._list_request_times
-            if endpoint_type == "list"
-            else self._general_request_times
-        )
-
-        # Clean up requests older than 1 minute
-        now = time.time()
-        cutoff = now - 60
-        request_times[:] = [t for t in request_times if t > cutoff]
-
-        # If at limit, wait until oldest request expires
-        if len(request_times) >= limit:
-            oldest = request_times[0]
-            wait_time = 60 - (now - oldest) + 0.1  # Add small buffer
-            if wait_time > 0:
-                logger.info(
-                    f"Rate limit reached ({limit}/min). Waiting {wait_time:.1f}s..."
-                )
-                time.sleep(wait_time)
-                # Clean up again after waiting
-                now = time.time()
-                cutoff = now - 60
-                request_times[:] = [t for t in request_times if t > cutoff]
-
-        # Record this request
-        request_times.append(time.time())
+        self.rate_limiter.acquire(endpoint_type)
 
     def _make_request(
         self,
@@ -164,44 +150,18 @@ class ReadwiseReaderClient:
         """
         url = f"{self.BASE_URL}{endpoint}"
 
-        for attempt in range(max_retries):
-            try:
-                # Rate limit before request
-                self._rate_limit(endpoint_type)
-
-                response = self.session.request(
-                    method, url, timeout=timeout, **kwargs
-                )
-
-                # Handle rate limiting (429)
-                if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 60))
-                    logger.warning(
-                        f"Rate limited. Retrying after {retry_after}s "
-                        f"(attempt {attempt + 1}/{max_retries})"
-                    )
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_after)
-                        continue
-                    else:
-                        response.raise_for_status()
-
-                response.raise_for_status()
-                return response.json()
-
-            except requests.exceptions.Timeout:
-                logger.error(f"Request timeout (attempt {attempt + 1}/{max_retries})")
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(2**attempt)  # Exponential backoff
-
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request failed: {e} (attempt {attempt + 1}/{max_retries})")
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(2**attempt)
-
-        raise Exception("Max retries exceeded")
+        # Rate limit before every attempt (retries count against the quota)
+        response = http_client.request(
+            method,
+            url,
+            session=self.session,
+            timeout=timeout,
+            max_retries=max_retries,
+            before_attempt=lambda: self._rate_limit(endpoint_type),
+            **kwargs,
+        )
+        response.raise_for_status()
+        return response.json()
 
     def update_document_tags(
         self,
@@ -305,7 +265,7 @@ class ReadwiseReaderClient:
             Clean text with boilerplate removed
 
         Process:
-            - Parse HTML with BeautifulSoup
+            - Stream-parse HTML (see html_text for engines and size caps)
             - Remove nav, ads, scripts, styles
             - Extract main content text
             - Normalize whitespace
@@ -313,22 +273,7 @@ class ReadwiseReaderClient:
         if not html:
             return ""
 
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Remove unwanted elements
-        for element in soup.find_all(
-            ["script", "style", "nav", "header", "footer", "aside", "iframe"]
-        ):
-            element.decompose()
-
-        # Extract text
-        text = soup.get_text(separator=" ", strip=True)
-
-        # Normalize whitespace
-        text = re.sub(r"\s+", " ", text)
-        text = text.strip()
-
-        return text
+        return html_to_text(html)
 
     def calculate_word_count(self, text: str) -> int:
         """
@@ -21,7 +21,12 @@ import time
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import requests
+try:
+    from src.common import http_client
+    from src.common.rate_limiter import RateLimiter, get_limiter
+except ImportError:
+    import http_client
+    from rate_limiter import RateLimiter, get_limiter
 
 try:
     from src.knowledge_cards.snippet_extractor import ExtractedSnippet, extract_snippets
@@ -33,25 +38,22 @@ except ImportError:
 
 try:
     from src.embed.main import (
-        generate_embedding,
-        write_to_firestore,
+        generate_embeddings,
+        write_batch_to_firestore,
         _generate_source_id,
-        _ensure_source_exists,
     )
 except ImportError:
     try:
         from embed.main import (
-            generate_embedding,
-            write_to_firestore,
+            generate_embeddings,
+            write_batch_to_firestore,
             _generate_source_id,
-            _ensure_source_exists,
         )
     except ImportError:
         from embed_main import (
-            generate_embedding,
-            write_to_firestore,
+            generate_embeddings,
+            write_batch_to_firestore,
             _generate_source_id,
-            _ensure_source_exists,
         )
 
 try:
@@ -90,21 +92,24 @@ class ReadwiseHighlightWriter:
     BATCH_SIZE = 100  # Readwise v2 max per request
     MAX_RETRIES = 3
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize highlight writer.
 
         Args:
             api_key: Readwise API token
+            rate_limiter: Limiter to draw from (default: the process-wide
+                "readwise" limiter)
         """
         self.api_key = api_key
-        self.session = requests.Session()
-        self.session.headers.update(
+        # Pooled keep-alive connections shared with other API clients
+        self.session = http_client.create_session(
             {
                 "Authorization": f"Token {api_key}",
                 "Content-Type": "application/json",
             }
         )
+        self.rate_limiter = rate_limiter or get_limiter("readwise")
 
     def create_highlights(
         self,
@@ -192,43 +197,17 @@ class ReadwiseHighlightWriter:
         """
         url = f"{self.BASE_URL}/highlights/"
 
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                response = self.session.post(url, json=payload, timeout=30)
-
-                if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 60))
-                    logger.warning(
-                        f"Rate limited. Retrying after {retry_after}s "
-                        f"(attempt {attempt + 1}/{self.MAX_RETRIES})"
-                    )
-                    if attempt < self.MAX_RETRIES - 1:
-                        time.sleep(retry_after)
-                        continue
-                    response.raise_for_status()
-
-                response.raise_for_status()
-                return response.json()
-
-            except requests.exceptions.Timeout:
-                logger.error(
-                    f"Request timeout (attempt {attempt + 1}/{self.MAX_RETRIES})"
-                )
-                if attempt == self.MAX_RETRIES - 1:
-                    raise
-                time.sleep(2**attempt)
-
-            except requests.exceptions.RequestException as e:
-                if isinstance(e, requests.exceptions.HTTPError):
-                    raise
-                logger.error(
-                    f"Request failed: {e} (attempt {attempt + 1}/{self.MAX_RETRIES})"
-                )
-                if attempt == self.MAX_RETRIES - 1:
-                    raise
-                time.sleep(2**attempt)
-
-        raise Exception("Max retries exceeded")
+        response = http_client.request(
+            "POST",
+            url,
+            session=self.session,
+            json=payload,
+            timeout=30,
+            max_retries=self.MAX_RETRIES,
+            before_attempt=lambda: self.rate_limiter.acquire("highlights"),
+        )
+        response.raise_for_status()
+        return response.json()
 
 
 # ============================================================================
@@ -236,6 +215,16 @@ class ReadwiseHighlightWriter:
 # ============================================================================
 
 
+def _snippet_content(snippet: ExtractedSnippet) -> str:
+    """Markdown content stored in kb_items for a snippet."""
+    return f"> {snippet.text}\n\n**Context:** {snippet.context}"
+
+
+def _content_hash(content: str) -> str:
+    """kb_items content_hash of snippet content."""
+    return f"sha256:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+
 def embed_snippets(
     snippets: List[ExtractedSnippet],
     title: str,
@@ -248,7 +237,9 @@ def embed_snippets(
     Embed extracted snippets directly to Firestore kb_items.
 
     Bypasses the GCS → pipeline_items → embed pipeline for simplicity.
-    Each snippet gets its own embedding and kb_item document.
+    Each snippet gets its own embedding and kb_item document, but all
+    snippets are embedded in one batched request and written with one
+    batched commit plus a single source upsert.
 
     Args:
         snippets: List of extracted snippets
@@ -269,16 +260,15 @@ def embed_snippets(
         all_tags.append("auto-snippet")
 
     source_id = _generate_source_id(title)
-    chunk_ids = []
-    embedded_count = 0
+    items = []
 
     for i, snippet in enumerate(snippets):
         chunk_id = f"auto_snippet_{reader_doc_id}_{i}"
 
         # Build content in markdown format
-        content = f"> {snippet.text}\n\n**Context:** {snippet.context}"
+        content = _snippet_content(snippet)
 
-        # Build metadata matching write_to_firestore() expectations
+        # Build metadata matching write_batch_to_firestore() expectations
         metadata = {
             "id": chunk_id,
             "chunk_id": chunk_id,
@@ -294,34 +284,45 @@ def embed_snippets(
             "source_type": "auto-snippet",
         }
 
-        try:
-            # Generate embedding from title + content
-            text_to_embed = f"{title}\n{content}"
-            embedding_vector = generate_embedding(text_to_embed)
-
-            # Compute content hash
-            content_hash = f"sha256:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
-
-            # Write to Firestore kb_items
-            success = write_to_firestore(
-                metadata=metadata,
-                content=content,
-                content_hash=content_hash,
-                run_id=f"auto_ingest_{reader_doc_id}",
-                embedding_status="complete",
-                embedding_vector=embedding_vector,
-            )
-
-            if success:
-                chunk_ids.append(chunk_id)
-                embedded_count += 1
-            else:
-                logger.error(f"Failed to write chunk {chunk_id} to Firestore")
+        items.append({
+            "metadata": metadata,
+            "content": content,
+            "content_hash": _content_hash(content),
+        })
 
-        except Exception as e:
-            logger.error(f"Failed to embed snippet {i} for '{title}': {e}")
-            # Continue with remaining snippets
+    # Generate embeddings from title + content in one batched request
+    try:
+        vectors = generate_embeddings([f"{title}\n{item['content']}" for item in items])
+    except Exception as e:
+        logger.error(f"Failed to embed snippets for '{title}': {e}")
+        vectors = [None] * len(items)
+
+    to_write = []
+    for i, (item, vector) in enumerate(zip(items, vectors)):
+        if vector is None:
+            logger.error(f"Failed to embed snippet {i} for '{title}'")
+            continue
+        item["embedding_vector"] = vector
+        to_write.append(item)
+
+    # Write to Firestore kb_items in one batched commit
+    results = []
+    if to_write:
+        results = write_batch_to_firestore(
+            to_write,
+            run_id=f"auto_ingest_{reader_doc_id}",
+            embedding_status="complete",
+        )
 
+    chunk_ids = []
+    for item, success in zip(to_write, results):
+        chunk_id = item["metadata"]["chunk_id"]
+        if success:
+            chunk_ids.append(chunk_id)
+        else:
+            logger.error(f"Failed to write chunk {chunk_id} to Firestore")
+
+    embedded_count = len(chunk_ids)
     logger.info(
         f"Embedded {embedded_count}/{len(snippets)} snippets "
         f"for '{title}' (source_id={source_id})"
@@ -432,6 +433,7 @@ def process_document(
                     title=reader_doc.title,
                     author=reader_doc.author or "Unknown",
                     content=snippet.text,
+                    content_hash=_content_hash(_snippet_content(snippet)),
                 )
                 _db.collection("kb_items").document(chunk_id).set(
                     {"knowledge_card": card.to_dict()}, merge=True
@@ -0,0 +1,211 @@
+"""
+Knowledge Card Batch Generation
+
+Generates knowledge cards with offline batch prediction instead of online
+calls (see llm/batch.py). Intended for full-KB runs, where latency does not
+matter but request quotas and cost do.
+
+Steps:
+1. Render one request per chunk (same prompt and config as the online path)
+2. Submit the sharded request files to a batch backend
+3. Stream-parse the results and validate each card
+4. Bulk-write valid cards to Firestore, one result file at a time
+
+The job lives in a work directory; re-running with the same directory
+resumes after the last fully written result file.
+
+Usage:
+    from src.knowledge_cards.batch import run_card_batch
+    from src.llm.batch import get_batch_backend
+
+    summary = run_card_batch(db, chunks, "/tmp/cards-2025-11", get_batch_backend())
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Support both package imports (local/tests) and flat imports (Cloud Functions)
+try:
+    from .generator import card_generation_config
+    from .prompt_manager import PromptManager
+    from .schema import validate_knowledge_card_response
+except ImportError:
+    from generator import card_generation_config
+    from prompt_manager import PromptManager
+    from schema import validate_knowledge_card_response
+
+try:
+    from kx_llm.base import parse_json_response
+    from kx_llm.batch import (
+        BatchBackend,
+        BatchRequest,
+        BatchResult,
+        run_batch_job,
+        write_request_shards,
+    )
+except ImportError:
+    from llm.base import parse_json_response
+    from llm.batch import (
+        BatchBackend,
+        BatchRequest,
+        BatchResult,
+        run_batch_job,
+        write_request_shards,
+    )
+
+logger = logging.getLogger(__name__)
+
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def build_card_requests(
+    chunks: Iterable[Dict[str, Any]],
+    prompt_manager: Optional[PromptManager] = None,
+) -> Iterator[BatchRequest]:
+    """
+    Render one batch request per chunk.
+
+    Args:
+        chunks: Chunk dictionaries (chunk_id or id, title, author, content,
+            optional content_hash)
+        prompt_manager: Optional PromptManager instance (creates default if None)
+
+    Yields:
+        BatchRequest keyed by chunk ID, with content_hash and the
+        prompt_version it was rendered with in its metadata
+    """
+    if prompt_manager is None:
+        prompt_manager = PromptManager()
+    config = card_generation_config()
+    prompt_version = prompt_manager.get_prompt_version()
+
+    for chunk in chunks:
+        chunk_id = chunk.get("chunk_id") or chunk.get("id")
+        if not chunk.get("content"):
+            logger.warning(f"Skipping chunk {chunk_id}: no content")
+            continue
+        yield BatchRequest(
+            key=chunk_id,
+            prompt=prompt_manager.format_prompt(
+                chunk.get("title", "Untitled"), chunk.get("author", "Unknown"), chunk["content"]
+            ),
+            config=config,
+            metadata={"content_hash": chunk.get("content_hash"), "prompt_version": prompt_version},
+        )
+
+
+def write_card_results(
+    db,
+    results: Iterable[BatchResult],
+    metadata_by_key: Dict[str, Dict[str, Any]],
+    collection: str = "kb_items",
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Validate batch results and bulk-write the cards.
+
+    Args:
+        db: Firestore client
+        results: Parsed results of one result file
+        metadata_by_key: Request metadata (content_hash, prompt_version) by
+            chunk ID; both are recorded on the cards
+        collection: Firestore collection
+        dry_run: Validate only, don't write
+
+    Returns:
+        Counters: written, invalid (bad JSON or card), failed (request
+        errors), unmatched (unknown key), input_tokens, output_tokens
+    """
+    stats = {"written": 0, "invalid": 0, "failed": 0, "unmatched": 0,
+             "input_tokens": 0, "output_tokens": 0}
+    collection_ref = db.collection(collection) if not dry_run else None
+    batch = db.batch() if not dry_run else None
+    pending = 0
+
+    for result in results:
+        stats["input_tokens"] += result.input_tokens or 0
+        stats["output_tokens"] += result.output_tokens or 0
+
+        if result.key is None or result.key not in metadata_by_key:
+            stats["unmatched"] += 1
+            continue
+        if not result.ok:
+            logger.warning(f"Batch request failed for chunk {result.key}: {result.error}")
+            stats["failed"] += 1
+            continue
+        try:
+            card = validate_knowledge_card_response(parse_json_response(result.text, "batch"))
+        except ValueError as e:
+            logger.warning(f"Invalid knowledge card for chunk {result.key}: {e}")
+            stats["invalid"] += 1
+            continue
+
+        # The version the request was rendered with, not the current one: a
+        # resumed job may predate a prompt change
+        metadata = metadata_by_key[result.key]
+        card.content_hash = metadata.get("content_hash")
+        card.prompt_version = metadata.get("prompt_version")
+        stats["written"] += 1
+        if dry_run:
+            continue
+
+        batch.set(collection_ref.document(result.key), {"knowledge_card": card.to_dict()}, merge=True)
+        pending += 1
+        if pending >= FIRESTORE_BATCH_LIMIT:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+
+    return stats
+
+
+def run_card_batch(
+    db,
+    chunks: List[Dict[str, Any]],
+    work_dir: str,
+    backend: BatchBackend,
+    collection: str = "kb_items",
+    dry_run: bool = False,
+    shard_size: Optional[int] = None,
+    poll_seconds: float = 60,
+) -> Dict[str, Any]:
+    """
+    Generate knowledge cards for chunks with a batch job (resumable).
+
+    Args:
+        db: Firestore client
+        chunks: Chunks to generate cards for (ignored when resuming a job
+            whose requests are already rendered)
+        work_dir: Job directory (manifest, request and result files)
+        backend: Batch backend
+        collection: Firestore collection
+        dry_run: Run the job and validate results without writing
+        shard_size: Requests per request file (default: LLM_BATCH_SHARD_SIZE)
+        poll_seconds: Job status polling interval
+
+    Returns:
+        Summary with job_id, state and the write_card_results counters
+    """
+    prompt_manager = PromptManager()
+
+    def render(requests_dir: str) -> List[str]:
+        return write_request_shards(
+            build_card_requests(chunks, prompt_manager), requests_dir, shard_size
+        )
+
+    def handle(results: Iterator[BatchResult], metadata_by_key: Dict[str, Dict[str, Any]]):
+        return write_card_results(db, results, metadata_by_key, collection, dry_run)
+
+    summary = run_batch_job(work_dir, render, backend, handle, poll_seconds=poll_seconds)
+    written = summary.get("written", 0)
+    summary["input_tokens_per_card"] = summary.get("input_tokens", 0) / written if written else 0
+
+    logger.info(
+        f"Knowledge card batch complete: {written} written, "
+        f"{summary.get('invalid', 0)} invalid, {summary.get('failed', 0)} failed "
+        f"(job {summary.get('job_id')}, state {summary.get('state')})"
+    )
+    return summary
@@ -30,6 +30,7 @@ except ImportError:
     firestore = None
 
 from .generator import process_chunks_batch, estimate_cost
+from .incremental import CHUNK_FIELDS, load_stale_chunks
 from .schema import KnowledgeCard
 
 # Configure logging
@@ -70,9 +71,15 @@ def get_firestore_client() -> firestore.Client:
     return _firestore_client
 
 
-def load_all_chunks() -> List[Dict[str, Any]]:
+def load_all_chunks(changed_only: bool = False) -> List[Dict[str, Any]]:
     """
-    Load all chunks from Firestore kb_items collection.
+    Load chunks from Firestore kb_items collection.
+
+    Only the fields card generation needs are read (no embedding vectors).
+
+    Args:
+        changed_only: If True, load only chunks whose knowledge card is
+            missing or was built from other content or another prompt version
 
     Returns:
         List of chunk dictionaries with required fields: chunk_id, title, author, content
@@ -80,13 +87,19 @@ def load_all_chunks() -> List[Dict[str, Any]]:
     Raises:
         Exception: If Firestore query fails
     """
-    logger.info(f"Loading all chunks from Firestore collection: {FIRESTORE_COLLECTION}")
-
     db = get_firestore_client()
+
+    if changed_only:
+        logger.info(f"Loading new or changed chunks from Firestore collection: {FIRESTORE_COLLECTION}")
+        chunks = load_stale_chunks(db, FIRESTORE_COLLECTION)
+        logger.info(f"Loaded {len(chunks)} chunks from Firestore")
+        return chunks
+
+    logger.info(f"Loading all chunks from Firestore collection: {FIRESTORE_COLLECTION}")
     collection_ref = db.collection(FIRESTORE_COLLECTION)
 
     # Query all documents (no limit for AC #1: 100% coverage)
-    docs = collection_ref.stream()
+    docs = collection_ref.select(CHUNK_FIELDS).stream()
 
     chunks = []
     for doc in docs:
@@ -177,7 +190,10 @@ def update_firestore_with_cards(
 def run_pipeline(
     batch_size: int = 100,
     dry_run: bool = False,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    packed: Optional[bool] = None,
+    changed_only: bool = False
 ) -> Dict[str, Any]:
     """
     Run the complete knowledge card generation pipeline (AC #1-6).
@@ -191,6 +207,10 @@ def run_pipeline(
         batch_size: Number of chunks to process per batch (default: 100)
         dry_run: If True, don't write to Firestore (default: False)
         limit: Optional limit on number of chunks to process (for testing)
+        max_concurrency: Upper bound for concurrent LLM requests
+            (default: CARD_MAX_CONCURRENCY)
+        packed: Send several chunks per LLM request (default: CARD_PACKED)
+        changed_only: Only process chunks whose card is missing or stale
 
     Returns:
         Dictionary with pipeline results:
@@ -212,7 +232,7 @@ def run_pipeline(
     logger.info("=" * 80)
 
     # Step 1: Load chunks from Firestore
-    chunks = load_all_chunks()
+    chunks = load_all_chunks(changed_only=changed_only)
 
     if limit:
         logger.info(f"Limiting to first {limit} chunks for testing")
@@ -239,7 +259,9 @@ def run_pipeline(
 
     # Step 2: Generate knowledge cards (batch processing)
     logger.info(f"\nGenerating knowledge cards for {total_chunks} chunks...")
-    generation_results = process_chunks_batch(chunks, batch_size=batch_size)
+    generation_results = process_chunks_batch(
+        chunks, batch_size=batch_size, max_concurrency=max_concurrency, packed=packed
+    )
 
     generated_cards = generation_results['cards']
     generation_failed = generation_results['failed']
@@ -249,6 +271,13 @@ def run_pipeline(
     logger.info(f"  Failed: {generation_failed}")
     logger.info(f"  Duration: {generation_results['duration']:.1f}s")
     logger.info(f"  Throughput: {generation_results['chunks_per_second']:.1f} chunks/sec")
+    logger.info(f"  Peak concurrency: {generation_results['concurrency']['peak_limit']}")
+    logger.info(f"  LLM requests: {generation_results['usage']['requests']}")
+    logger.info(f"  Input tokens/card: {generation_results['usage']['input_tokens_per_card']:.0f}")
+    llm = generation_results["llm"]
+    logger.info(f"  Tokens: {llm['input_tokens']:,} in / {llm['output_tokens']:,} out")
+    logger.info(f"  Cost: ${llm['cost_usd']:.4f} ({llm['retries']} retries, {llm['cache_hits']} cache hits)")
+    logger.info(f"  Latency p50/p95: {llm['latency_p50_ms']:.0f}/{llm['latency_p95_ms']:.0f}ms")
 
     # Step 3: Update Firestore with knowledge cards
     logger.info(f"\nUpdating Firestore with {len(generated_cards)} knowledge cards...")
@@ -289,6 +318,25 @@ def main():
         default=100,
         help='Number of chunks to process per batch (default: 100)'
     )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        help='Maximum concurrent LLM requests; the limit adapts to rate limits '
+             '(default: CARD_MAX_CONCURRENCY or 16)'
+    )
+    parser.add_argument(
+        '--packed',
+        action='store_true',
+        default=None,
+        help='Send several chunks per LLM request to share the instruction '
+             'tokens (default: CARD_PACKED)'
+    )
+    parser.add_argument(
+        '--changed-only',
+        action='store_true',
+        help='Only regenerate cards that are missing or whose chunk content '
+             'or prompt template changed'
+    )
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -314,7 +362,10 @@ def main():
         results = run_pipeline(
             batch_size=args.batch_size,
             dry_run=args.dry_run,
-            limit=args.limit
+            limit=args.limit,
+            max_concurrency=args.concurrency,
+            packed=args.packed,
+            changed_only=args.changed_only
         )
 
         # Exit with error code if any failures
@@ -0,0 +1,181 @@
+"""
+Adaptive (AIMD) concurrency control for bulk LLM work.
+
+Knowledge-card generation is almost entirely network wait, so it runs many
+requests in parallel. The right degree of parallelism depends on the
+provider quota, which is unknown and changes with the model. The controller
+below finds it the way TCP congestion control does:
+
+- Additive increase: after a full window of successful requests (as many
+  successes as the current limit), allow one more request in flight
+- Multiplicative decrease: on a rate-limit / quota error, halve the limit,
+  at most once per cooldown period so a burst of 429s from requests that
+  were already in flight counts as a single congestion event
+- Other failures (timeouts, 5xx, unparseable responses) leave the limit
+  unchanged: they say nothing about spare quota
+
+Errors are classified by the LLM governor (classify_error), so both layers
+agree on what counts as throttling.
+
+Usage:
+    controller = AdaptiveConcurrency(initial=4, maximum=32)
+
+    with controller.slot() as slot:
+        try:
+            result = call_llm()
+        except Exception as e:
+            slot.failed(e)
+            raise
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Error classification shared with the per-model LLM governor
+try:
+    from kx_llm.governor import THROTTLE, classify_error
+except ImportError:
+    try:
+        from llm.governor import THROTTLE, classify_error
+    except ImportError:
+        from src.llm.governor import THROTTLE, classify_error
+
+logger = logging.getLogger(__name__)
+
+
+class _Slot:
+    """Outcome reporter for one admitted request."""
+
+    def __init__(self):
+        self.error_class: Optional[str] = None
+
+    @property
+    def throttled(self) -> bool:
+        """True if the request failed with a rate-limit / quota error."""
+        return self.error_class == THROTTLE
+
+    def failed(self, error: BaseException) -> None:
+        """Report a failure; only rate-limit errors shrink the concurrency limit."""
+        self.error_class = classify_error(error)
+
+
+class AdaptiveConcurrency:
+    """Thread-safe AIMD limit on the number of requests in flight."""
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        decrease_factor: float = 0.5,
+        cooldown_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize controller.
+
+        Args:
+            initial: Starting limit
+            minimum: Lowest limit after decreases
+            maximum: Highest limit after increases
+            decrease_factor: Multiplier applied on a congestion event
+            cooldown_seconds: Minimum time between two decreases
+            clock: Monotonic time source (injectable for tests)
+        """
+        if not 1 <= minimum <= maximum:
+            raise ValueError("Require 1 <= minimum <= maximum")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._limit = max(minimum, min(initial, maximum))
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = None
+        self._stats = {
+            "initial_limit": self._limit,
+            "peak_limit": self._limit,
+            "increases": 0,
+            "decreases": 0,
+            "throttled": 0,
+        }
+
+    @property
+    def limit(self) -> int:
+        """Current maximum number of requests in flight."""
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        """Number of admitted requests not yet released."""
+        return self._in_flight
+
+    def acquire(self) -> None:
+        """Block until a request may start."""
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, error_class: Optional[str] = None) -> None:
+        """
+        Finish a request and adapt the limit.
+
+        Args:
+            error_class: None if the request succeeded, otherwise the
+                classify_error() class of its failure. THROTTLE shrinks the
+                limit; other failures leave it unchanged
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if error_class is None:
+                self._on_success()
+            elif error_class == THROTTLE:
+                self._on_throttled()
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[_Slot]:
+        """Admit one request; report failures through the yielded slot."""
+        self.acquire()
+        slot = _Slot()
+        try:
+            yield slot
+        except BaseException as e:
+            if slot.error_class is None:
+                slot.failed(e)
+            raise
+        finally:
+            self.release(slot.error_class)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return controller statistics (including the current limit)."""
+        with self._condition:
+            return {**self._stats, "limit": self._limit}
+
+    def _on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self._limit and self._limit < self.maximum:
+            self._limit += 1
+            self._successes = 0
+            self._stats["increases"] += 1
+            self._stats["peak_limit"] = max(self._stats["peak_limit"], self._limit)
+
+    def _on_throttled(self) -> None:
+        self._stats["throttled"] += 1
+        self._successes = 0
+        now = self._clock()
+        if self._last_decrease is not None and now - self._last_decrease < self.cooldown_seconds:
+            return
+        previous = self._limit
+        self._limit = max(self.minimum, int(self._limit * self.decrease_factor))
+        self._last_decrease = now
+        self._stats["decreases"] += 1
+        logger.warning(
+            f"Rate limited, reducing concurrency {previous} -> {self._limit}"
+        )
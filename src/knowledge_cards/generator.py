@@ -4,38 +4,57 @@ Knowledge Card Generator
 Batch processes chunks to generate AI-powered knowledge cards.
 Supports multiple LLM providers (Gemini, Claude) via abstraction layer.
 Story 2.1: Knowledge Card Generation (Epic 2)
+
+Chunks are generated concurrently; the number of requests in flight adapts
+to the provider quota (AIMD, see concurrency.py).
+
+Configuration:
+    CARD_INITIAL_CONCURRENCY: Requests in flight at start (default: 4)
+    CARD_MAX_CONCURRENCY: Upper bound for the adaptive limit (default: 16)
+    CARD_THROTTLE_RETRIES: Re-queues of a rate-limited chunk (default: 2)
+    CARD_PACKED: "true" packs several chunks into one request (default: false)
+    CARD_PACK_TOKEN_BUDGET: Estimated content tokens per packed request
+        (default: 6000)
+    CARD_PACK_MAX_CHUNKS: Maximum chunks per packed request (default: 8)
 """
 
+import contextvars
 import json
 import logging
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # Add parent directory to path for llm module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Support both package imports (local/tests) and flat imports (Cloud Functions)
 try:
+    from .concurrency import AdaptiveConcurrency
     from .prompt_manager import PromptManager, estimate_cost
     from .schema import KnowledgeCard, validate_knowledge_card_response
 except ImportError:
+    from concurrency import AdaptiveConcurrency
     from prompt_manager import PromptManager, estimate_cost
     from schema import KnowledgeCard, validate_knowledge_card_response
 
 # LLM abstraction layer (kx_llm package from Artifact Registry)
 try:
-    from kx_llm import BaseLLMClient, get_client
+    from kx_llm import BaseLLMClient, get_client, get_metrics_registry, llm_caller
     from kx_llm import GenerationConfig as LLMGenerationConfig
+    from kx_llm import schema_from_dataclass
 
     _HAS_LLM = True
 except ImportError:
     # Fallback to local llm module for development
     try:
-        from llm import BaseLLMClient, get_client
+        from llm import BaseLLMClient, get_client, get_metrics_registry, llm_caller
         from llm import GenerationConfig as LLMGenerationConfig
+        from llm import schema_from_dataclass
 
         _HAS_LLM = True
     except ImportError:
@@ -50,6 +69,16 @@ logger = logging.getLogger(__name__)
 
 # Configuration (from environment or defaults)
 DEFAULT_BATCH_SIZE = 100  # Process 100 chunks at a time (Firestore batch limit)
+INITIAL_CONCURRENCY = int(os.environ.get("CARD_INITIAL_CONCURRENCY", "4"))
+MAX_CONCURRENCY = int(os.environ.get("CARD_MAX_CONCURRENCY", "16"))
+THROTTLE_RETRIES = int(os.environ.get("CARD_THROTTLE_RETRIES", "2"))
+
+# Packed mode: several chunks per request share one copy of the instructions
+PACKED_MODE = os.environ.get("CARD_PACKED", "false").lower() == "true"
+PACK_TOKEN_BUDGET = int(os.environ.get("CARD_PACK_TOKEN_BUDGET", "6000"))
+PACK_MAX_CHUNKS = int(os.environ.get("CARD_PACK_MAX_CHUNKS", "8"))
+PACKED_OUTPUT_TOKENS_PER_CARD = 512
+PACKED_MAX_OUTPUT_TOKENS = 8192
 
 # Global LLM client instance (lazy initialization)
 _llm_client: Optional[BaseLLMClient] = None
@@ -95,12 +124,53 @@ def set_llm_client(client: BaseLLMClient) -> None:
     logger.info(f"LLM client set to: {client}")
 
 
+def card_response_schema() -> Dict[str, Any]:
+    """JSON Schema of one generated card, derived from KnowledgeCard."""
+    return schema_from_dataclass(
+        KnowledgeCard,
+        fields=["summary", "takeaways", "tags"],
+        overrides={
+            "takeaways": {"minItems": 3, "maxItems": 5},
+            "tags": {"minItems": 1, "maxItems": 4},
+        },
+    )
+
+
+def packed_response_schema() -> Dict[str, Any]:
+    """JSON Schema of a packed response: one card per chunk_id."""
+    card = card_response_schema()
+    item = {
+        "type": "object",
+        "properties": {"chunk_id": {"type": "string"}, **card["properties"]},
+        "required": ["chunk_id", *card["required"]],
+    }
+    return {
+        "type": "object",
+        "properties": {"cards": {"type": "array", "items": item}},
+        "required": ["cards"],
+    }
+
+
+def card_generation_config() -> LLMGenerationConfig:
+    """Generation config for single-chunk card requests (online and batch)."""
+    return LLMGenerationConfig(
+        temperature=0.7,  # Balanced creativity for summarization
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=2048,  # Ensure complete output
+        enable_thinking=False,  # Disabled to avoid $3.50/1M token costs
+        response_schema=card_response_schema(),  # Provider-enforced JSON structure
+    )
+
+
 def generate_knowledge_card(
     chunk_id: str,
     title: str,
     author: str,
     content: str,
     prompt_manager: Optional[PromptManager] = None,
+    client: Optional[BaseLLMClient] = None,
+    content_hash: Optional[str] = None,
 ) -> KnowledgeCard:
     """
     Generate knowledge card for a single chunk using configured LLM.
@@ -116,6 +186,9 @@ def generate_knowledge_card(
         author: Chunk author
         content: Full chunk content (text)
         prompt_manager: Optional PromptManager instance (creates default if None)
+        client: Optional LLM client (uses get_llm_client() if None)
+        content_hash: kb_items content_hash of the chunk, recorded on the card
+            with the prompt version for incremental regeneration
 
     Returns:
         Validated KnowledgeCard instance
@@ -130,16 +203,11 @@ def generate_knowledge_card(
     prompt = prompt_manager.format_prompt(title, author, content)
 
     # Get LLM client (model selected via env var or default)
-    client = get_llm_client()
+    if client is None:
+        client = get_llm_client()
 
     # Generation config for JSON output (thinking disabled for cost efficiency)
-    config = LLMGenerationConfig(
-        temperature=0.7,  # Balanced creativity for summarization
-        top_p=0.95,
-        top_k=40,
-        max_output_tokens=2048,  # Ensure complete output
-        enable_thinking=False,  # Disabled to avoid $3.50/1M token costs
-    )
+    config = card_generation_config()
 
     logger.debug(
         f"Generating knowledge card for chunk {chunk_id} using {client.model_id}"
@@ -151,6 +219,8 @@ def generate_knowledge_card(
 
         # Validate and create KnowledgeCard
         knowledge_card = validate_knowledge_card_response(response_data)
+        knowledge_card.content_hash = content_hash
+        knowledge_card.prompt_version = prompt_manager.get_prompt_version()
 
         logger.info(
             f"Generated knowledge card for chunk {chunk_id}: "
@@ -170,42 +240,309 @@ def generate_knowledge_card(
         raise
 
 
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars per token, as in PromptManager)."""
+    return len(text) // 4
+
+
+def pack_chunks(
+    chunks: List[Dict[str, Any]],
+    token_budget: Optional[int] = None,
+    max_chunks: Optional[int] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Group chunks into packs for multi-chunk card requests.
+
+    Chunks are packed greedily in order until the estimated content tokens
+    would exceed token_budget or the pack holds max_chunks. A chunk larger
+    than the budget gets a pack of its own.
+
+    Args:
+        chunks: Chunk dictionaries with content
+        token_budget: Estimated content tokens per pack
+            (default: CARD_PACK_TOKEN_BUDGET)
+        max_chunks: Maximum chunks per pack (default: CARD_PACK_MAX_CHUNKS)
+
+    Returns:
+        List of packs (lists of chunks), preserving input order
+    """
+    token_budget = token_budget or PACK_TOKEN_BUDGET
+    max_chunks = max_chunks or PACK_MAX_CHUNKS
+    packs: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk.get("content") or "")
+        if current and (
+            current_tokens + tokens > token_budget or len(current) >= max_chunks
+        ):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += tokens
+
+    if current:
+        packs.append(current)
+    return packs
+
+
+def generate_knowledge_cards_packed(
+    chunks: List[Dict[str, Any]],
+    prompt_manager: Optional[PromptManager] = None,
+    client: Optional[BaseLLMClient] = None,
+) -> Tuple[Dict[str, KnowledgeCard], Dict[str, str]]:
+    """
+    Generate knowledge cards for several chunks with one LLM request.
+
+    The card instructions are sent once for the whole pack. Every returned
+    card is validated with validate_knowledge_card_response; chunks without
+    a valid card are reported as errors so the caller can re-request them
+    individually.
+
+    Args:
+        chunks: Chunk dictionaries (must have: chunk_id, title, author, content;
+            content_hash is recorded on the card when present)
+        prompt_manager: Optional PromptManager instance (creates default if None)
+        client: Optional LLM client (uses get_llm_client() if None)
+
+    Returns:
+        Tuple of (cards by chunk_id, error messages by chunk_id)
+
+    Raises:
+        Exception: If the request itself fails (rate limit, invalid JSON, ...)
+    """
+    if prompt_manager is None:
+        prompt_manager = PromptManager()
+    if client is None:
+        client = get_llm_client()
+
+    prompt = prompt_manager.format_packed_prompt(chunks)
+    config = LLMGenerationConfig(
+        temperature=0.7,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=min(
+            PACKED_MAX_OUTPUT_TOKENS, PACKED_OUTPUT_TOKENS_PER_CARD * len(chunks)
+        ),
+        enable_thinking=False,
+        response_schema=packed_response_schema(),
+    )
+
+    response_data = client.generate_json(prompt, config)
+    returned = response_data.get("cards") if isinstance(response_data, dict) else None
+    if not isinstance(returned, list):
+        raise ValueError(f"Packed response has no 'cards' array: {str(response_data)[:200]}")
+
+    by_chunk_id = {
+        str(item.get("chunk_id")): item for item in returned if isinstance(item, dict)
+    }
+
+    prompt_version = prompt_manager.get_prompt_version()
+    cards: Dict[str, KnowledgeCard] = {}
+    errors: Dict[str, str] = {}
+    for chunk in chunks:
+        chunk_id = chunk["chunk_id"]
+        item = by_chunk_id.get(str(chunk_id))
+        if item is None:
+            errors[chunk_id] = "Missing from packed response"
+            continue
+        try:
+            card = validate_knowledge_card_response(item)
+        except ValueError as e:
+            errors[chunk_id] = str(e)
+            continue
+        card.content_hash = chunk.get("content_hash")
+        card.prompt_version = prompt_version
+        cards[chunk_id] = card
+
+    logger.info(
+        f"Generated {len(cards)}/{len(chunks)} knowledge cards in one packed request "
+        f"[model={client.model_id}]"
+    )
+    return cards, errors
+
+
+def _call_adaptive(controller: AdaptiveConcurrency, label: str, func: Callable[[], Any]) -> Any:
+    """Run one LLM request under the concurrency controller, re-queueing on 429."""
+    for attempt in range(THROTTLE_RETRIES + 1):
+        with controller.slot() as slot:
+            try:
+                return func()
+            except Exception as e:
+                slot.failed(e)
+                if not slot.throttled or attempt == THROTTLE_RETRIES:
+                    raise
+        # The controller has shrunk the limit, so the retry waits its turn
+        logger.info(f"Re-queueing rate-limited {label}")
+
+
+class _UsageCounter:
+    """Thread-safe request counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "packed_requests": 0, "pack_fallbacks": 0}
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+
+def _generate_single(
+    chunk: Dict[str, Any],
+    prompt_manager: PromptManager,
+    client: BaseLLMClient,
+    controller: AdaptiveConcurrency,
+    usage: _UsageCounter,
+) -> KnowledgeCard:
+    """Generate one card with a single-chunk request."""
+    chunk_id = chunk.get("chunk_id") or chunk.get("id")
+    title = chunk.get("title", "Untitled")
+    author = chunk.get("author", "Unknown")
+
+    def request() -> KnowledgeCard:
+        usage.add(requests=1)
+        return generate_knowledge_card(
+            chunk_id=chunk_id,
+            title=title,
+            author=author,
+            content=chunk["content"],
+            prompt_manager=prompt_manager,
+            client=client,
+            content_hash=chunk.get("content_hash"),
+        )
+
+    return _call_adaptive(controller, f"chunk {chunk_id}", request)
+
+
+def _run_unit(
+    unit: List[Tuple[int, Dict[str, Any]]],
+    prompt_manager: PromptManager,
+    client: BaseLLMClient,
+    controller: AdaptiveConcurrency,
+    usage: _UsageCounter,
+) -> List[Tuple[int, str, Optional[KnowledgeCard], Optional[str]]]:
+    """
+    Generate cards for one unit of work (a single chunk or a pack).
+
+    Returns:
+        (index, chunk_id, card, error) per chunk; exactly one of card and
+        error is set
+    """
+    outcomes = []
+    pending = unit
+
+    if len(unit) > 1:
+        chunks = [{**chunk, "chunk_id": chunk.get("chunk_id") or chunk.get("id")} for _, chunk in unit]
+
+        def request():
+            usage.add(requests=1, packed_requests=1)
+            return generate_knowledge_cards_packed(chunks, prompt_manager, client)
+
+        try:
+            cards, errors = _call_adaptive(controller, f"pack of {len(unit)} chunks", request)
+        except Exception as e:
+            logger.warning(f"Packed request for {len(unit)} chunks failed ({e}), generating individually")
+            cards, errors = {}, {}
+
+        pending = []
+        for (index, _), chunk in zip(unit, chunks):
+            chunk_id = chunk["chunk_id"]
+            if chunk_id in cards:
+                outcomes.append((index, chunk_id, cards[chunk_id], None))
+            else:
+                if chunk_id in errors:
+                    logger.warning(f"Packed card for chunk {chunk_id} invalid ({errors[chunk_id]}), re-requesting")
+                pending.append((index, chunk))
+        usage.add(pack_fallbacks=len(pending))
+
+    # Single-chunk requests: unpacked mode, or pack members without a valid card
+    for index, chunk in pending:
+        chunk_id = chunk.get("chunk_id") or chunk.get("id")
+        try:
+            card = _generate_single(chunk, prompt_manager, client, controller, usage)
+            outcomes.append((index, chunk_id, card, None))
+        except Exception as e:
+            outcomes.append((index, chunk_id, None, str(e)))
+
+    return outcomes
+
+
 def process_chunks_batch(
-    chunks: List[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE
+    chunks: List[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: Optional[int] = None,
+    initial_concurrency: Optional[int] = None,
+    client: Optional[BaseLLMClient] = None,
+    on_card: Optional[Callable[[str, KnowledgeCard], None]] = None,
+    packed: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """
-    Process chunks in batches to generate knowledge cards.
+    Generate knowledge cards for chunks concurrently.
+
+    Requests run on a thread pool behind an AdaptiveConcurrency controller:
+    the number in flight ramps up while requests succeed and halves when the
+    provider returns 429 / quota errors. Rate-limited chunks are re-queued
+    up to THROTTLE_RETRIES times.
+
+    In packed mode, chunks are grouped by pack_chunks() and each pack is sent
+    as one request, so the card instructions are paid for once per pack
+    instead of once per chunk. Chunks whose card is missing or fails
+    validation are re-requested individually.
 
     Args:
         chunks: List of chunk dictionaries from Firestore (must have: chunk_id, title, author, content)
-        batch_size: Number of chunks to process per batch (default: 100)
+        batch_size: Kept for API compatibility; parallelism is controlled by
+            the adaptive concurrency limit instead
+        max_concurrency: Upper bound for requests in flight (default: CARD_MAX_CONCURRENCY)
+        initial_concurrency: Starting limit (default: CARD_INITIAL_CONCURRENCY)
+        client: LLM client to use (default: get_llm_client())
+        on_card: Optional callback(chunk_id, card), called in the calling
+            thread as cards complete (e.g. to write them incrementally)
+        packed: Send several chunks per request (default: CARD_PACKED)
 
     Returns:
         Dictionary with processing results:
         - processed: Number of chunks successfully processed
         - failed: Number of chunks that failed
-        - cards: List of (chunk_id, KnowledgeCard) tuples
-        - errors: List of (chunk_id, error_message) tuples
+        - cards: List of (chunk_id, KnowledgeCard) tuples (input order)
+        - errors: List of (chunk_id, error_message) tuples (input order)
         - duration: Total processing time in seconds
         - cost_estimate: Estimated cost for this batch
+        - chunks_per_second: Throughput of successful chunks
+        - concurrency: Adaptive concurrency statistics
+        - usage: requests, packed_requests, pack_fallbacks, input_tokens
+          (measured prompt tokens, including prompt-cache reads and writes)
+          and input_tokens_per_card
+        - llm: Measured LLM calls (tokens, cost_usd, retries, cache_hits,
+          latency_p50_ms, latency_p95_ms; see llm.metrics)
 
     Example:
         >>> chunks = [...]  # From Firestore query
-        >>> results = process_chunks_batch(chunks, batch_size=100)
+        >>> results = process_chunks_batch(chunks, max_concurrency=32)
         >>> print(f"Processed {results['processed']}/{len(chunks)} chunks in {results['duration']}s")
     """
     start_time = time.time()
 
-    processed = 0
-    failed = 0
-    cards = []
-    errors = []
-
+    max_concurrency = max(1, max_concurrency or MAX_CONCURRENCY)
+    controller = AdaptiveConcurrency(
+        initial=initial_concurrency or INITIAL_CONCURRENCY,
+        maximum=max_concurrency,
+    )
     prompt_manager = PromptManager()
+    if client is None:
+        client = get_llm_client()
+    if packed is None:
+        packed = PACKED_MODE
+    usage = _UsageCounter()
+    metrics_mark = get_metrics_registry().mark()
 
     total_chunks = len(chunks)
     logger.info(
-        f"Starting batch processing: {total_chunks} chunks with batch_size={batch_size}"
+        f"Starting batch processing: {total_chunks} chunks with concurrency "
+        f"{controller.limit} (max {max_concurrency}){' in packed mode' if packed else ''}"
     )
 
     # Estimate cost upfront
@@ -214,52 +551,76 @@ def process_chunks_batch(
         f"Estimated cost: ${cost_estimate['total_cost']:.4f} for {total_chunks} chunks"
     )
 
-    for i, chunk in enumerate(chunks):
-        chunk_id = chunk.get("chunk_id") or chunk.get("id")
-        title = chunk.get("title", "Untitled")
-        author = chunk.get("author", "Unknown")
-        content = chunk.get("content", "")
+    cards_by_index: Dict[int, tuple] = {}
+    errors_by_index: Dict[int, tuple] = {}
+    completed = 0
 
-        if not content:
+    indexed = []
+    for index, chunk in enumerate(chunks):
+        if not chunk.get("content"):
+            chunk_id = chunk.get("chunk_id") or chunk.get("id")
             logger.warning(f"Skipping chunk {chunk_id}: no content")
-            failed += 1
-            errors.append((chunk_id, "No content available"))
+            errors_by_index[index] = (chunk_id, "No content available")
             continue
-
-        try:
-            # Generate knowledge card
-            knowledge_card = generate_knowledge_card(
-                chunk_id=chunk_id,
-                title=title,
-                author=author,
-                content=content,
-                prompt_manager=prompt_manager,
+        indexed.append((index, chunk))
+
+    # Units of work: one chunk each, or packs of chunks sharing one request
+    if packed:
+        by_id = {id(chunk): (index, chunk) for index, chunk in indexed}
+        units = [
+            [by_id[id(chunk)] for chunk in pack]
+            for pack in pack_chunks([chunk for _, chunk in indexed])
+        ]
+    else:
+        units = [[item] for item in indexed]
+    submitted = len(indexed)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        # Workers inherit the caller's context so LLM calls keep its tag
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _run_unit, unit, prompt_manager, client, controller, usage,
             )
-
-            cards.append((chunk_id, knowledge_card))
-            processed += 1
-
-            # Log progress every 10 chunks
-            if (i + 1) % 10 == 0:
+            for unit in units
+        ]
+
+        for future in as_completed(futures):
+            for index, chunk_id, knowledge_card, error in future.result():
+                completed += 1
+                if error is not None:
+                    logger.error(f"Failed to generate card for chunk {chunk_id}: {error}")
+                    errors_by_index[index] = (chunk_id, error)
+                else:
+                    cards_by_index[index] = (chunk_id, knowledge_card)
+                    if on_card is not None:
+                        on_card(chunk_id, knowledge_card)
+
+                # Log progress every 10 chunks
+                if completed % 10 != 0:
+                    continue
                 elapsed = time.time() - start_time
-                chunks_per_sec = (i + 1) / elapsed if elapsed > 0 else 0
+                chunks_per_sec = completed / elapsed if elapsed > 0 else 0
                 eta = (
-                    (total_chunks - (i + 1)) / chunks_per_sec
+                    (submitted - completed) / chunks_per_sec
                     if chunks_per_sec > 0
                     else 0
                 )
 
                 logger.info(
-                    f"Progress: {i + 1}/{total_chunks} chunks ({processed} succeeded, {failed} failed) | "
-                    f"{chunks_per_sec:.1f} chunks/sec | ETA: {eta:.0f}s"
+                    f"Progress: {completed}/{submitted} chunks "
+                    f"({len(cards_by_index)} succeeded, {len(errors_by_index)} failed) | "
+                    f"{chunks_per_sec:.1f} chunks/sec | concurrency {controller.limit} | "
+                    f"ETA: {eta:.0f}s"
                 )
 
-        except Exception as e:
-            logger.error(f"Failed to generate card for chunk {chunk_id}: {e}")
-            failed += 1
-            errors.append((chunk_id, str(e)))
-
     duration = time.time() - start_time
+    llm = get_metrics_registry().summary(since=metrics_mark)
+    input_tokens = llm["input_tokens"] + llm["cache_read_tokens"] + llm["cache_write_tokens"]
+    cards = [cards_by_index[i] for i in sorted(cards_by_index)]
+    errors = [errors_by_index[i] for i in sorted(errors_by_index)]
+    processed = len(cards)
+    failed = len(errors)
 
     results = {
         "processed": processed,
@@ -269,11 +630,22 @@ def process_chunks_batch(
         "duration": duration,
         "cost_estimate": cost_estimate,
         "chunks_per_second": processed / duration if duration > 0 else 0,
+        "concurrency": controller.stats(),
+        "usage": {
+            **usage.stats,
+            "input_tokens": input_tokens,
+            "input_tokens_per_card": input_tokens / processed if processed else 0,
+        },
+        "llm": llm,
     }
 
     logger.info(
         f"Batch processing complete: {processed}/{total_chunks} succeeded, {failed} failed | "
-        f"Duration: {duration:.1f}s | Cost estimate: ${cost_estimate['total_cost']:.4f}"
+        f"Duration: {duration:.1f}s | Peak concurrency: {results['concurrency']['peak_limit']} | "
+        f"Requests: {usage.stats['requests']} | "
+        f"Input tokens/card: {results['usage']['input_tokens_per_card']:.0f} | "
+        f"Cost: ${llm['cost_usd']:.4f} (estimate ${cost_estimate['total_cost']:.4f}) | "
+        f"Latency p50/p95: {llm['latency_p50_ms']:.0f}/{llm['latency_p95_ms']:.0f}ms"
     )
 
     return results
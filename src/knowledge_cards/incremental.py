@@ -0,0 +1,178 @@
+"""
+Incremental Knowledge Card Selection
+
+Finds the kb_items whose knowledge card is missing or stale, reading only the
+fields that are needed.
+
+A card is current when it records the same content_hash as its chunk and the
+prompt_version of the current card prompt template. With changed=False only
+missing cards are selected (cards from before hashes were recorded count as
+present), which is what the scheduled Cloud Function does by default. Selection runs in two
+steps so that embedding vectors and chunk text are never read for chunks
+that are up to date:
+
+1. A projected query over the collection returns only the hash fields
+2. The stale chunks are fetched with get_all(), projected to the fields
+   card generation uses
+
+Usage:
+    from src.knowledge_cards.incremental import load_stale_chunks
+
+    chunks = load_stale_chunks(db, "kb_items", limit=500)
+    results = process_chunks_batch(chunks)
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+# Support both package imports (local/tests) and flat imports (Cloud Functions)
+try:
+    from .prompt_manager import PromptManager
+except ImportError:
+    from prompt_manager import PromptManager
+
+logger = logging.getLogger(__name__)
+
+# Fields read to decide whether a card is stale (summary marks a present card,
+# including legacy cards without the hash fields)
+SELECTION_FIELDS = [
+    "content_hash",
+    "knowledge_card.summary",
+    "knowledge_card.content_hash",
+    "knowledge_card.prompt_version",
+]
+
+# Fields read for chunks that get a new card
+CHUNK_FIELDS = ["chunk_id", "title", "author", "content", "content_hash"]
+
+GET_ALL_BATCH_SIZE = 100
+
+
+def card_is_current(data: Dict[str, Any], prompt_version: str) -> bool:
+    """
+    Check whether a kb_items document has an up-to-date knowledge card.
+
+    Args:
+        data: Document data (at least the SELECTION_FIELDS)
+        prompt_version: Version of the current card prompt template
+
+    Returns:
+        True if the card was built from the chunk's current content_hash
+        with the current prompt template
+    """
+    card = data.get("knowledge_card")
+    if not card:
+        return False
+    return (
+        card.get("prompt_version") == prompt_version
+        and card.get("content_hash") == data.get("content_hash")
+    )
+
+
+def find_stale_chunk_ids(
+    db,
+    collection: str,
+    prompt_version: Optional[str] = None,
+    limit: Optional[int] = None,
+    order_by: Optional[str] = None,
+    changed: bool = True,
+) -> List[str]:
+    """
+    List the IDs of chunks whose knowledge card is missing or stale.
+
+    Args:
+        db: Firestore client
+        collection: Collection name (e.g. kb_items)
+        prompt_version: Current prompt version (default: PromptManager's)
+        limit: Stop after this many stale chunks
+        order_by: Optional field to scan newest-first (e.g. created_at)
+        changed: Also select cards built from other content or another
+            prompt version (False: missing cards only)
+
+    Returns:
+        Chunk IDs in scan order
+    """
+    if prompt_version is None:
+        prompt_version = PromptManager().get_prompt_version()
+
+    query = db.collection(collection).select(SELECTION_FIELDS)
+    if order_by:
+        from google.cloud.firestore import Query
+
+        query = query.order_by(order_by, direction=Query.DESCENDING)
+
+    stale = []
+    scanned = 0
+    for doc in query.stream():
+        scanned += 1
+        data = doc.to_dict() or {}
+        if changed:
+            needs_card = not card_is_current(data, prompt_version)
+        else:
+            needs_card = not data.get("knowledge_card")
+        if needs_card:
+            stale.append(doc.id)
+            if limit and len(stale) >= limit:
+                break
+
+    logger.info(
+        f"Found {len(stale)} chunks with {'missing or stale' if changed else 'missing'} "
+        f"knowledge cards (scanned {scanned}, prompt {prompt_version})"
+    )
+    return stale
+
+
+def load_chunks_by_id(db, collection: str, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetch chunks for card generation, projected to CHUNK_FIELDS.
+
+    Args:
+        db: Firestore client
+        collection: Collection name
+        chunk_ids: Document IDs to fetch
+
+    Returns:
+        Chunk dictionaries (with "id") that have content, in chunk_ids order
+    """
+    collection_ref = db.collection(collection)
+    by_id = {}
+
+    for i in range(0, len(chunk_ids), GET_ALL_BATCH_SIZE):
+        refs = [collection_ref.document(cid) for cid in chunk_ids[i : i + GET_ALL_BATCH_SIZE]]
+        for snapshot in db.get_all(refs, field_paths=CHUNK_FIELDS):
+            if not snapshot.exists:
+                continue
+            data = snapshot.to_dict() or {}
+            if not data.get("content"):
+                logger.warning(f"Skipping chunk {snapshot.id}: missing content")
+                continue
+            data["id"] = snapshot.id
+            by_id[snapshot.id] = data
+
+    return [by_id[cid] for cid in chunk_ids if cid in by_id]
+
+
+def load_stale_chunks(
+    db,
+    collection: str,
+    prompt_version: Optional[str] = None,
+    limit: Optional[int] = None,
+    order_by: Optional[str] = None,
+    changed: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Load the chunks whose knowledge card is missing or stale.
+
+    Args:
+        db: Firestore client
+        collection: Collection name
+        prompt_version: Current prompt version (default: PromptManager's)
+        limit: Maximum number of chunks
+        order_by: Optional field to scan newest-first (e.g. created_at)
+        changed: Also select stale cards (False: missing cards only)
+
+    Returns:
+        Chunk dictionaries with CHUNK_FIELDS and "id"
+    """
+    chunk_ids = find_stale_chunk_ids(db, collection, prompt_version, limit, order_by, changed)
+    return load_chunks_by_id(db, collection, chunk_ids)
@@ -11,9 +11,11 @@ import functions_framework
 # Support both package imports (local/tests) and flat imports (Cloud Functions)
 try:
     from .generator import process_chunks_batch
+    from .incremental import load_stale_chunks
     from .schema import KnowledgeCard
 except ImportError:
     from generator import process_chunks_batch
+    from incremental import load_stale_chunks
     from schema import KnowledgeCard
 
 # Configure logging
@@ -33,42 +35,22 @@ def get_firestore_client():
     return firestore.Client(project=GCP_PROJECT, database="(default)")
 
 
-def load_chunks_for_generation(limit=None):
-    """Load chunks from Firestore that need knowledge cards (missing or empty)"""
-    from google.cloud.firestore import Query
-
-    db = get_firestore_client()
-    collection_ref = db.collection(FIRESTORE_COLLECTION)
-
-    # Note: Firestore doesn't support querying for missing fields directly.
-    # We need to fetch chunks and filter client-side for missing knowledge_card.
+def load_chunks_for_generation(limit=None, changed=False):
+    """Load chunks whose knowledge card is missing (or stale, if changed is set)"""
+    # Firestore can't compare two fields in a query, so the hash fields are
+    # scanned with a projected query and only selected chunks are fetched.
     # Order by created_at DESC to prioritize newest chunks (most likely missing KC).
-    query = collection_ref.order_by("created_at", direction=Query.DESCENDING)
-
-    # Fetch more than limit to account for filtering
-    fetch_limit = limit * 3 if limit else None
-    if fetch_limit:
-        query = query.limit(fetch_limit)
-
-    chunks = []
-    total_scanned = 0
-
-    for doc in query.stream():
-        total_scanned += 1
-        data = doc.to_dict()
-
-        # Only include chunks that are missing knowledge_card
-        if not data.get("knowledge_card"):
-            data["id"] = doc.id
-            chunks.append(data)
-
-            # Stop if we've collected enough
-            if limit and len(chunks) >= limit:
-                break
-
-    logger.info(
-        f"Loaded {len(chunks)} chunks needing knowledge cards (scanned {total_scanned})"
+    # Stale selection is opt-in: cards created before content_hash/prompt_version
+    # were recorded would otherwise all be regenerated in one invocation.
+    chunks = load_stale_chunks(
+        get_firestore_client(),
+        FIRESTORE_COLLECTION,
+        limit=limit,
+        order_by="created_at",
+        changed=changed,
     )
+
+    logger.info(f"Loaded {len(chunks)} chunks needing knowledge cards")
     return chunks
 
 
@@ -118,7 +100,10 @@ def generate_cards_handler(request):
     {
         "run_id": "run-20231101-120000",  // Optional
         "limit": null,  // Optional: limit chunks for testing
-        "batch_size": 100  // Optional
+        "batch_size": 100,  // Optional
+        "max_concurrency": 16,  // Optional: upper bound for concurrent LLM calls
+        "packed": false,  // Optional: several chunks per LLM request
+        "changed": false  // Optional: also regenerate cards whose content or prompt changed
     }
     """
     try:
@@ -126,12 +111,18 @@ def generate_cards_handler(request):
         run_id = request_json.get("run_id", "unknown")
         limit = request_json.get("limit")
         batch_size = request_json.get("batch_size", 100)
+        max_concurrency = request_json.get("max_concurrency")
+        packed = request_json.get("packed")
+        changed = bool(request_json.get("changed", False))
 
         logger.info(f"Knowledge card generation triggered for run_id: {run_id}")
-        logger.info(f"Parameters: limit={limit}, batch_size={batch_size}")
+        logger.info(
+            f"Parameters: limit={limit}, batch_size={batch_size}, "
+            f"max_concurrency={max_concurrency}, packed={packed}, changed={changed}"
+        )
 
         # Load chunks
-        chunks = load_chunks_for_generation(limit=limit)
+        chunks = load_chunks_for_generation(limit=limit, changed=changed)
 
         if not chunks:
             return {
@@ -145,7 +136,9 @@ def generate_cards_handler(request):
             }
 
         # Process chunks
-        results = process_chunks_batch(chunks, batch_size=batch_size)
+        results = process_chunks_batch(
+            chunks, batch_size=batch_size, max_concurrency=max_concurrency, packed=packed
+        )
 
         # Update Firestore
         update_results = update_firestore_with_cards(results["cards"], dry_run=False)
@@ -159,6 +152,11 @@ def generate_cards_handler(request):
             "updated": update_results["updated"],
             "failed": results["failed"],
             "cost_estimate_usd": round(results["cost_estimate"]["total_cost"], 4),
+            "llm_requests": results["usage"]["requests"],
+            "input_tokens_per_card": round(results["usage"]["input_tokens_per_card"]),
+            "cost_usd": results["llm"]["cost_usd"],
+            "latency_p50_ms": results["llm"]["latency_p50_ms"],
+            "latency_p95_ms": results["llm"]["latency_p95_ms"],
         }
 
         logger.info(f"Knowledge card generation complete: {response}")
@@ -5,9 +5,19 @@ Handles loading, formatting, and managing LLM prompts.
 Story 2.1: Knowledge Card Generation (Epic 2)
 """
 
+import hashlib
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, List
+
+# Line separating the reusable instructions from the per-excerpt part of a
+# card prompt template
+EXCERPT_MARKER = '**Now analyze this excerpt:**'
+
+PACKED_OUTPUT_INSTRUCTIONS = """Output ONE JSON object with a "cards" array containing exactly one knowledge card per excerpt, in the JSON format specified above plus a "chunk_id" field copied from the excerpt tag:
+{"cards": [{"chunk_id": "...", "summary": "...", "takeaways": ["..."], "tags": ["..."]}]}
+
+Analyze every excerpt independently. Be concise, actionable, and insightful."""
 
 
 class PromptManager:
@@ -111,6 +121,87 @@ class PromptManager:
 
         return formatted_prompt
 
+    def get_prompt_version(self, prompt_template: str = None) -> str:
+        """
+        Return a short, stable version id for a card prompt template.
+
+        Cards record this value so that a template change marks every card
+        built from the old template as stale.
+
+        Args:
+            prompt_template: Optional custom template (loads default if None)
+
+        Returns:
+            Version string like "sha256:0123456789abcdef"
+        """
+        if prompt_template is None:
+            prompt_template = self.load_prompt()
+
+        digest = hashlib.sha256(prompt_template.encode('utf-8')).hexdigest()
+        return f'sha256:{digest[:16]}'
+
+    def get_instructions(self, prompt_template: str = None) -> str:
+        """
+        Return the instruction part of a card prompt template.
+
+        Everything before EXCERPT_MARKER (task description, output format
+        and examples) is identical for every chunk.
+
+        Args:
+            prompt_template: Optional custom template (loads default if None)
+
+        Returns:
+            Instruction text without the per-excerpt section
+
+        Raises:
+            ValueError: If the template has no EXCERPT_MARKER
+        """
+        if prompt_template is None:
+            prompt_template = self.load_prompt()
+
+        instructions, marker, _ = prompt_template.partition(EXCERPT_MARKER)
+        if not marker:
+            raise ValueError(f"Prompt template has no '{EXCERPT_MARKER}' section")
+        return instructions.rstrip()
+
+    def format_packed_prompt(
+        self,
+        chunks: List[Dict[str, Any]],
+        prompt_template: str = None
+    ) -> str:
+        """
+        Format one prompt asking for knowledge cards for several chunks.
+
+        The instructions are sent once, followed by every excerpt tagged with
+        its chunk_id. The model answers with {"cards": [...]}, one card per
+        chunk_id.
+
+        Args:
+            chunks: Chunk dictionaries (chunk_id, title, author, content)
+            prompt_template: Optional custom template (loads default if None)
+
+        Returns:
+            Formatted packed prompt
+        """
+        excerpts = []
+        for chunk in chunks:
+            title = chunk.get('title')
+            author = chunk.get('author')
+            excerpts.append(
+                f'<excerpt chunk_id="{chunk["chunk_id"]}">\n'
+                f'Title: {title if title is not None else "Unknown"}\n'
+                f'Author: {author if author is not None else "Unknown"}\n\n'
+                f'Excerpt:\n{chunk.get("content") or ""}\n'
+                f'</excerpt>'
+            )
+
+        return (
+            f'{self.get_instructions(prompt_template)}\n\n'
+            f'**Now analyze each of these {len(chunks)} excerpts:**\n\n'
+            + '\n\n'.join(excerpts)
+            + f'\n\n{PACKED_OUTPUT_INSTRUCTIONS}'
+        )
+
     def get_prompt_stats(self, prompt: str) -> Dict[str, Any]:
         """
         Get statistics about a formatted prompt.
@@ -12,7 +12,9 @@ Schema Design (AC #6):
     "summary": str,        # 1-2 sentences max, ≤200 characters
     "takeaways": list[str], # 3-5 distinct, actionable insights
     "tags": list[str],      # 2-4 themes/concepts
-    "generated_at": timestamp  # ISO 8601 or Firestore timestamp
+    "generated_at": timestamp,  # ISO 8601 or Firestore timestamp
+    "content_hash": str,    # kb_items content_hash the card was built from
+    "prompt_version": str   # Hash of the card prompt template
   }
 """
 
@@ -32,17 +34,23 @@ class KnowledgeCard:
         takeaways: List of 3-5 actionable takeaways
         tags: List of 2-4 thematic tags/concepts
         generated_at: Timestamp of generation (ISO 8601 format)
+        content_hash: content_hash of the chunk the card was generated from
+        prompt_version: Version (hash) of the prompt template used
 
     Constraints (from AC #2, #3, #6):
         - Summary length: 1-2 sentences, target ≤200 chars (max 400 chars for exceptional cases)
         - Takeaways count: 3-5 items
         - Tags count: 2-4 items (recommended)
-        - All fields required except generated_at (auto-set)
+        - All fields required except generated_at (auto-set), content_hash
+          and prompt_version (set by the generator, used for incremental
+          regeneration)
     """
     summary: str
     takeaways: List[str]
     tags: List[str]
     generated_at: Optional[str] = None
+    content_hash: Optional[str] = None
+    prompt_version: Optional[str] = None
 
     def __post_init__(self):
         """Validate knowledge card constraints after initialization."""
@@ -93,7 +101,9 @@ class KnowledgeCard:
             summary=data['summary'],
             takeaways=data['takeaways'],
             tags=data['tags'],
-            generated_at=data.get('generated_at')
+            generated_at=data.get('generated_at'),
+            content_hash=data.get('content_hash'),
+            prompt_version=data.get('prompt_version')
         )
 
     def to_json(self) -> str:
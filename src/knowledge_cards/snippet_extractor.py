@@ -5,6 +5,18 @@ Epic 13 Story 13.2: Extracts key passages from Reader articles as direct quotes.
 LLM decides how many snippets to extract based on article content, with emphasis
 on full-article coverage.
 
+Articles longer than OVERFLOW_THRESHOLD are extracted in segments: the text is
+split at paragraph boundaries into model-sized windows, the windows are
+extracted concurrently, and the results are merged, deduplicated and checked
+verbatim against the source text.
+
+Configuration:
+    SNIPPET_SEGMENTED_EXTRACTION: "false" falls back to truncating overflow
+        articles to a single window (default: true)
+    SNIPPET_WINDOW_CHARS: Maximum window size in chars; capped at
+        OVERFLOW_THRESHOLD (default: OVERFLOW_THRESHOLD)
+    SNIPPET_WINDOW_CONCURRENCY: Windows extracted in parallel (default: 4)
+
 Usage:
     from src.knowledge_cards.snippet_extractor import extract_snippets
     snippets = extract_snippets(
@@ -17,23 +29,30 @@ Usage:
 
 import json
 import logging
+import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 # LLM imports
 try:
     from src.llm import BaseLLMClient, GenerationConfig, get_client, get_model_info, get_default_model
+    from src.llm import schema_from_dataclass
 except ImportError:
     from llm import BaseLLMClient, GenerationConfig, get_client, get_model_info, get_default_model
+    from llm import schema_from_dataclass
 
 
 # ============================================================================
 # Context Window Overflow Threshold
 # ============================================================================
 # Computed from the default model's max_context. Text exceeding this is
-# truncated before being sent to the LLM, and the article is tagged kx-overflow.
+# extracted in segmented windows (or truncated when segmentation is disabled),
+# and the article is tagged kx-overflow.
 #
 # Formula: (max_context − overhead) × chars_per_token × safety_margin
 #   - overhead:      6 000 tokens (prompt template + max_output_tokens)
@@ -60,6 +79,17 @@ def _compute_overflow_threshold() -> int:
 
 OVERFLOW_THRESHOLD = _compute_overflow_threshold()
 
+# Segmented extraction for overflow articles
+SEGMENTED_EXTRACTION = (
+    os.environ.get("SNIPPET_SEGMENTED_EXTRACTION", "true").lower() == "true"
+)
+WINDOW_CHARS = int(os.environ.get("SNIPPET_WINDOW_CHARS", "0")) or None
+WINDOW_CONCURRENCY = int(os.environ.get("SNIPPET_WINDOW_CONCURRENCY", "4"))
+
+# Preferred window boundaries, strongest first
+_WINDOW_SEPARATORS = ("\n\n", "\n", ". ")
+_WHITESPACE = re.compile(r"\s+")
+
 
 # ============================================================================
 # Data Classes
@@ -75,6 +105,21 @@ class ExtractedSnippet:
     position: str  # "intro" | "middle" | "conclusion"
 
 
+# Provider-enforced response structure: {"snippets": [ExtractedSnippet, ...]}
+SNIPPETS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "snippets": {
+            "type": "array",
+            "items": schema_from_dataclass(
+                ExtractedSnippet, overrides={"position": {"enum": ["intro", "middle", "conclusion"]}}
+            ),
+        }
+    },
+    "required": ["snippets"],
+}
+
+
 class SnippetExtractionError(Exception):
     """Raised when snippet extraction fails after retries."""
 
@@ -125,7 +170,9 @@ def _extract_snippets_llm(
         SnippetExtractionError: If extraction fails after retry
     """
     client = _get_llm_client()
-    config = GenerationConfig(temperature=0.3, max_output_tokens=4096)
+    config = GenerationConfig(
+        temperature=0.3, max_output_tokens=4096, response_schema=SNIPPETS_RESPONSE_SCHEMA
+    )
 
     if len(text) > OVERFLOW_THRESHOLD:
         original_len = len(text)
@@ -139,9 +186,15 @@ def _extract_snippets_llm(
             f"(model limit ≈{OVERFLOW_THRESHOLD:,}) for '{title}'"
         )
 
-    prompt = f"""Extract the most important passages from this article as DIRECT QUOTES.
+    prompt = _build_prompt(text, title, author)
+    return _generate_snippets(client, prompt, config)
+
 
-Article: "{title}" by {author}
+def _build_prompt(text: str, title: str, author: str, part: str = "") -> str:
+    """Build the extraction prompt (part describes the window, if any)."""
+    return f"""Extract the most important passages from this article as DIRECT QUOTES.
+
+Article: "{title}" by {author}{part}
 
 <article>
 {text}
@@ -166,6 +219,19 @@ Return a JSON object with a "snippets" array:
   ]
 }}"""
 
+
+def _generate_snippets(
+    client: BaseLLMClient,
+    prompt: str,
+    config: GenerationConfig,
+) -> List[ExtractedSnippet]:
+    """
+    Run an extraction prompt and parse the snippets.
+
+    Output is schema-constrained, so invalid JSON is not retried (a retry
+    would double the cost for the same outcome). Empty results and
+    unexpected errors get one retry.
+    """
     for attempt in range(2):
         try:
             result = client.generate_json(prompt, config=config)
@@ -193,12 +259,7 @@ Return a JSON object with a "snippets" array:
             return snippets
 
         except (ValueError, json.JSONDecodeError) as e:
-            if attempt == 0:
-                logger.warning(f"JSON parse error, retrying: {e}")
-                continue
-            raise SnippetExtractionError(
-                f"JSON parse failed after retry: {e}"
-            ) from e
+            raise SnippetExtractionError(f"JSON parse failed: {e}") from e
         except SnippetExtractionError:
             raise
         except Exception as e:
@@ -212,6 +273,171 @@ Return a JSON object with a "snippets" array:
     raise SnippetExtractionError("Exhausted all retries")
 
 
+def _split_into_windows(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into contiguous windows of at most max_chars.
+
+    Windows are balanced in size and end at the strongest boundary found in
+    their second half: a paragraph break, else a line break, else a sentence
+    end. Text without any boundary is cut hard.
+
+    Args:
+        text: Full article text
+        max_chars: Maximum window size in chars
+
+    Returns:
+        List of window texts that concatenate back to text
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    target = math.ceil(len(text) / math.ceil(len(text) / max_chars))
+    windows = []
+    start = 0
+    while start < len(text):
+        end = start + target
+        if end >= len(text):
+            windows.append(text[start:])
+            break
+        cut = end
+        for separator in _WINDOW_SEPARATORS:
+            boundary = text.rfind(separator, start + target // 2, end)
+            if boundary != -1:
+                cut = boundary + len(separator)
+                break
+        windows.append(text[start:cut])
+        start = cut
+    return windows
+
+
+def _position_for_offset(offset: int, length: int) -> str:
+    """Map a character offset to the intro/middle/conclusion label."""
+    ratio = offset / max(length, 1)
+    if ratio < 0.2:
+        return "intro"
+    if ratio >= 0.8:
+        return "conclusion"
+    return "middle"
+
+
+def _merge_window_snippets(
+    window_snippets: List[List[ExtractedSnippet]],
+    text: str,
+) -> List[ExtractedSnippet]:
+    """
+    Merge per-window snippets into one article-level list.
+
+    Snippets that are not verbatim quotes of the source text (after
+    whitespace normalization) are dropped, as are duplicates and snippets
+    contained in a longer kept snippet. The result is ordered by position in
+    the article, with position labels recomputed from the article offset
+    (each window only saw part of the article).
+
+    Args:
+        window_snippets: Snippets per window, in window order
+        text: Full article text
+
+    Returns:
+        Merged list of ExtractedSnippet objects
+    """
+    source = _WHITESPACE.sub(" ", text)
+    located: Dict[str, Tuple[int, ExtractedSnippet]] = {}
+    dropped = 0
+
+    for snippets in window_snippets:
+        for snippet in snippets:
+            quote = _WHITESPACE.sub(" ", snippet.text).strip()
+            offset = source.find(quote) if quote else -1
+            if offset == -1:
+                dropped += 1
+                continue
+            if quote not in located:
+                located[quote] = (offset, snippet)
+
+    # Drop snippets fully contained in a longer kept quote
+    quotes = sorted(located, key=len, reverse=True)
+    kept: List[str] = []
+    for quote in quotes:
+        if any(quote in longer for longer in kept):
+            continue
+        kept.append(quote)
+
+    if dropped:
+        logger.warning(f"Dropped {dropped} non-verbatim snippets during merge")
+
+    merged = []
+    for quote in sorted(kept, key=lambda q: located[q][0]):
+        offset, snippet = located[quote]
+        merged.append(
+            ExtractedSnippet(
+                text=snippet.text,
+                context=snippet.context,
+                position=_position_for_offset(offset, len(source)),
+            )
+        )
+    return merged
+
+
+def _extract_snippets_segmented(
+    text: str,
+    title: str,
+    author: str,
+) -> List[ExtractedSnippet]:
+    """
+    Extract snippets from a long article window by window (map-reduce).
+
+    Windows are extracted concurrently, so latency is bounded by the
+    slowest window rather than the whole article. A failed window only
+    loses its own snippets.
+
+    Args:
+        text: Full article text
+        title: Article title
+        author: Article author
+
+    Returns:
+        List of ExtractedSnippet objects
+
+    Raises:
+        SnippetExtractionError: If every window fails
+    """
+    client = _get_llm_client()
+    config = GenerationConfig(
+        temperature=0.3, max_output_tokens=4096, response_schema=SNIPPETS_RESPONSE_SCHEMA
+    )
+
+    max_chars = min(WINDOW_CHARS or OVERFLOW_THRESHOLD, OVERFLOW_THRESHOLD)
+    windows = _split_into_windows(text, max_chars)
+    logger.info(
+        f"Segmented extraction for '{title}': {len(text):,} chars in "
+        f"{len(windows)} windows (≤{max_chars:,} chars each)"
+    )
+
+    def extract_window(index: int, window: str) -> Optional[List[ExtractedSnippet]]:
+        part = f" (part {index + 1} of {len(windows)}; extract from this part only)"
+        try:
+            return _generate_snippets(client, _build_prompt(window, title, author, part), config)
+        except SnippetExtractionError as e:
+            logger.warning(f"Window {index + 1}/{len(windows)} of '{title}' failed: {e}")
+            return None
+
+    workers = max(1, min(WINDOW_CONCURRENCY, len(windows)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(extract_window, range(len(windows)), windows)
+        )
+
+    succeeded = [r for r in results if r is not None]
+    if not succeeded:
+        raise SnippetExtractionError(f"All {len(windows)} windows failed")
+
+    snippets = _merge_window_snippets(succeeded, text)
+    logger.info(
+        f"Merged {len(snippets)} snippets from {len(succeeded)}/{len(windows)} windows"
+    )
+    return snippets
+
+
 # ============================================================================
 # Main Entry Point
 # ============================================================================
@@ -229,7 +455,8 @@ def extract_snippets(
 
     LLM extracts verbatim quotes proportionally distributed across the entire
     article. The number of snippets is determined by the LLM based on article
-    content and length.
+    content and length. Articles above OVERFLOW_THRESHOLD use segmented
+    extraction instead of truncation.
 
     Args:
         text: Full article text
@@ -252,7 +479,10 @@ def extract_snippets(
         f"Extracting snippets from '{title}' (words={word_count})"
     )
 
-    snippets = _extract_snippets_llm(text, title, author)
+    if SEGMENTED_EXTRACTION and len(text) > OVERFLOW_THRESHOLD:
+        snippets = _extract_snippets_segmented(text, title, author)
+    else:
+        snippets = _extract_snippets_llm(text, title, author)
 
     logger.info(
         f"Extraction complete: {len(snippets)} snippets from '{title}'"
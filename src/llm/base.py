@@ -5,10 +5,38 @@ Provides a unified interface for different LLM providers (Gemini, Claude, etc.)
 to enable easy model switching and A/B testing.
 """
 
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from .metrics import LLMCallRecord, emit, get_caller, record_parse
+from .structured import extract_json
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Max in-flight async requests per model on one event loop
+ASYNC_CONCURRENCY = int(os.environ.get("LLM_ASYNC_CONCURRENCY", "16"))
+
+# Event loop -> {model_id: Semaphore}; asyncio primitives are loop-bound
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+_semaphores_lock = threading.Lock()
+
+# Guards the per-loop caches of async SDK clients (see loop_local)
+_loop_local_lock = threading.Lock()
 
 
 class LLMProvider(str, Enum):
@@ -35,6 +63,16 @@ class GenerationConfig:
     # Costs $3.50/1M thinking tokens - use only for complex reasoning tasks
     enable_thinking: bool = False
 
+    # Structured output: JSON Schema the response must follow (see llm.structured).
+    # Gemini uses native JSON mode with this schema, Claude a forced tool call
+    response_schema: Optional[Dict[str, Any]] = None
+
+    # Prompt caching: system_prompt is a static prefix shared by many calls.
+    # Claude marks it with cache_control (cache reads cost 10% of input) if it
+    # reaches the model's minimum (llm.claude.min_cacheable_tokens, 1024-4096);
+    # Gemini caches repeated prefixes implicitly
+    cache_system_prompt: bool = False
+
     # Provider-specific overrides (optional)
     extra: Dict[str, Any] = field(default_factory=dict)
 
@@ -53,6 +91,11 @@ class LLMResponse:
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
 
+    # Prompt-cache usage (Claude): prefix tokens read from / written to the
+    # provider cache, billed separately from input_tokens
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+
     # Raw response for debugging
     raw_response: Optional[Any] = None
 
@@ -60,6 +103,110 @@ class LLMResponse:
     finish_reason: Optional[str] = None
 
 
+def parse_json_response(text: str, source: str = "LLM", structured: bool = False) -> Dict[str, Any]:
+    """
+    Parse a JSON object from model output text.
+
+    Handles markdown code blocks and extra text around the JSON object, and
+    counts the outcome in the parse statistics (llm.metrics.parse_stats).
+
+    Args:
+        text: Raw response text
+        source: Provider name for error messages
+        structured: Whether the response was schema-constrained
+
+    Returns:
+        Parsed JSON as dictionary
+
+    Raises:
+        ValueError: If text contains no valid JSON object
+    """
+    try:
+        data, repaired = extract_json(text)
+    except ValueError:
+        record_parse("failed", structured)
+        raise ValueError(f"Invalid JSON response from {source}: {text.strip()[:200]}")
+
+    record_parse("repaired" if repaired else "parsed", structured)
+    return data
+
+
+def _is_structured(config: Optional[GenerationConfig]) -> bool:
+    return bool(config and config.response_schema)
+
+
+def get_model_semaphore(model_id: str) -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding async requests to a model on the running loop.
+
+    All clients for the same model share it, so coroutines fanned out with
+    asyncio.gather() never exceed LLM_ASYNC_CONCURRENCY in-flight requests.
+
+    Args:
+        model_id: Provider model ID
+
+    Returns:
+        Semaphore bound to the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        per_loop = _semaphores.setdefault(loop, {})
+        if model_id not in per_loop:
+            per_loop[model_id] = asyncio.Semaphore(ASYNC_CONCURRENCY)
+        return per_loop[model_id]
+
+
+def loop_local(
+    cache: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, T]", factory: Callable[[], T]
+) -> T:
+    """
+    Get the object cached for the running event loop, creating it on first use.
+
+    Async SDK clients (httpx, gRPC aio channels) bind to the loop they are
+    first used on. run_sync() starts a new loop per call, so a client cached
+    on a long-lived LLM client would fail with "Event loop is closed" from
+    the second call on; keying the cache by loop gives each loop its own.
+
+    Args:
+        cache: Per-client WeakKeyDictionary (entries go away with their loop)
+        factory: Creates the object for a new loop
+
+    Returns:
+        Object bound to the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    with _loop_local_lock:
+        value = cache.get(loop)
+    if value is None:
+        created = factory()
+        with _loop_local_lock:
+            value = cache.setdefault(loop, created)
+    return value
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Uses asyncio.run() normally. When called from a thread that is already
+    running an event loop (sync tool code inside the async MCP server), the
+    coroutine runs on a fresh loop in a worker thread instead.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        Coroutine result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coro).result()
+
+
 class BaseLLMClient(ABC):
     """
     Abstract base class for LLM clients.
@@ -127,7 +274,8 @@ class BaseLLMClient(ABC):
         """
         Generate and parse JSON response.
 
-        Handles markdown code block stripping automatically.
+        Handles markdown code block stripping automatically. Set
+        config.response_schema to have the provider enforce the structure.
 
         Args:
             prompt: User prompt (should request JSON output)
@@ -140,45 +288,107 @@ class BaseLLMClient(ABC):
         Raises:
             ValueError: If response is not valid JSON
         """
-        import json
-
         response = self.generate(prompt, config, system_prompt)
-        text = response.text.strip()
-
-        # Strip markdown code blocks if present
-        if text.startswith("```"):
-            # Remove opening fence
-            text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-            # Remove closing fence
-            if text.endswith("```"):
-                text = text.rsplit("\n```", 1)[0]
-            # Remove json language tag if present
-            if text.startswith("json\n"):
-                text = text[5:]
-            text = text.strip()
-
-        # Try to extract JSON object if there's extra text after it
+        return parse_json_response(response.text, self.provider.value, _is_structured(config))
+
+    def _record_call(
+        self,
+        started: float,
+        response: Optional[LLMResponse] = None,
+        error: Optional[Exception] = None,
+        retries: int = 0,
+        cache_hit: bool = False,
+    ) -> None:
+        """
+        Instrumentation hook: emit one call record (see llm.metrics).
+
+        Providers call this once per generate() - after the final attempt,
+        successful or not.
+
+        Args:
+            started: time.monotonic() when the call started
+            response: Response on success
+            error: Exception on failure
+            retries: Attempts beyond the first
+            cache_hit: Whether the response came from the response cache
+        """
         try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            # Try to find JSON object boundaries
-            start = text.find("{")
-            if start != -1:
-                # Find matching closing brace
-                depth = 0
-                for i, char in enumerate(text[start:], start):
-                    if char == "{":
-                        depth += 1
-                    elif char == "}":
-                        depth -= 1
-                        if depth == 0:
-                            try:
-                                return json.loads(text[start : i + 1])
-                            except json.JSONDecodeError:
-                                break
-            raise ValueError(
-                f"Invalid JSON response from {self.provider.value}: {text[:200]}"
-            )
+            emit(LLMCallRecord(
+                model=self.model_id,
+                provider=self.provider.value,
+                caller=get_caller(),
+                latency_ms=round((time.monotonic() - started) * 1000, 1),
+                input_tokens=response.input_tokens if response else None,
+                output_tokens=response.output_tokens if response else None,
+                cache_read_tokens=response.cache_read_tokens if response else None,
+                cache_write_tokens=response.cache_write_tokens if response else None,
+                retries=retries,
+                cache_hit=cache_hit,
+                finish_reason=response.finish_reason if response else None,
+                error=f"{type(error).__name__}: {error}" if error else None,
+            ))
+        except Exception as e:
+            logger.debug(f"Failed to record LLM call: {e}")
+
+    async def agenerate(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        """
+        Generate text from a prompt without blocking the event loop.
+
+        Concurrent calls are bounded by the per-model semaphore
+        (see get_model_semaphore).
+
+        Args:
+            prompt: User prompt
+            config: Generation configuration (uses defaults if None)
+            system_prompt: Optional system prompt
+
+        Returns:
+            LLMResponse with generated text and metadata
+        """
+        async with get_model_semaphore(self.model_id):
+            return await self._agenerate(prompt, config, system_prompt)
+
+    async def _agenerate(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        """
+        Provider async implementation.
+
+        Providers override this with their async SDK path; the default runs
+        the blocking generate() in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate, prompt, config, system_prompt)
+
+    async def agenerate_json(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_json().
+
+        Args:
+            prompt: User prompt (should request JSON output)
+            config: Generation configuration
+            system_prompt: Optional system prompt
+
+        Returns:
+            Parsed JSON as dictionary
+
+        Raises:
+            ValueError: If response is not valid JSON
+        """
+        response = await self.agenerate(prompt, config, system_prompt)
+        return parse_json_response(response.text, self.provider.value, _is_structured(config))
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(model={self.model_id}, region={self.region})"
@@ -165,16 +165,20 @@ def resolve_model_name(name: str) -> str:
 
 def get_model_info(name: str) -> Optional[ModelInfo]:
     """
-    Get model info by name or alias.
+    Get model info by name, alias or provider model ID.
 
     Args:
-        name: Model name or alias
+        name: Model name, alias or model ID (e.g. "claude-haiku-4-5@20251001")
 
     Returns:
         ModelInfo or None if not found
     """
     resolved = resolve_model_name(name)
-    return MODEL_REGISTRY.get(resolved)
+    if resolved in MODEL_REGISTRY:
+        return MODEL_REGISTRY[resolved]
+    return next(
+        (info for info in MODEL_REGISTRY.values() if info.model_id == name), None
+    )
 
 
 def get_default_model() -> str:
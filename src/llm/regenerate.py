@@ -12,12 +12,18 @@ Usage:
     # Regenerate only old cards (older than 30 days)
     LLM_MODEL=gemini-3 python -m src.llm.regenerate knowledge-cards --older-than 30
 
+    # Regenerate only cards whose chunk content or prompt template changed
+    python -m src.llm.regenerate knowledge-cards --changed
+
     # Regenerate cluster names/descriptions
     LLM_MODEL=claude-haiku python -m src.llm.regenerate clusters --all
 
     # Dry run with cost estimate
     python -m src.llm.regenerate knowledge-cards --all --dry-run
 
+    # Full-KB run as an offline batch job (resumable via the work directory)
+    python -m src.llm.regenerate knowledge-cards --all --batch /tmp/cards-batch
+
     # Compare models (generate with both, show side-by-side)
     python -m src.llm.regenerate compare --sample 5
 """
@@ -31,7 +37,9 @@ from typing import Any, Dict, List, Optional
 
 from google.cloud import firestore
 
-from . import BaseLLMClient, get_client, get_model_info, list_models
+from . import BaseLLMClient, get_batch_backend, get_client, get_model_info, list_models
+from .batch import MANIFEST_FILE
+from .metrics import get_metrics_registry, llm_caller
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -40,7 +48,13 @@ logger = logging.getLogger(__name__)
 
 
 class RegenerationStats:
-    """Track regeneration progress and costs."""
+    """
+    Track regeneration progress and costs.
+
+    Token counts, cost and latency come from the LLM call records emitted
+    during the run (see llm.metrics); dry runs and batch jobs set the
+    token counters directly.
+    """
 
     def __init__(self):
         self.total = 0
@@ -49,13 +63,16 @@ class RegenerationStats:
         self.skipped = 0
         self.input_tokens = 0
         self.output_tokens = 0
+        self.requests = 0
         self.start_time = None
         self.model_id = None
+        self._metrics_mark = None
 
     def start(self, total: int, model_id: str):
         self.total = total
         self.model_id = model_id
         self.start_time = time.time()
+        self._metrics_mark = get_metrics_registry().mark()
         logger.info(f"Starting regeneration: {total} items with {model_id}")
 
     def record_success(self, input_tokens: int = 0, output_tokens: int = 0):
@@ -69,9 +86,13 @@ class RegenerationStats:
     def record_skip(self):
         self.skipped += 1
 
+    def llm_calls(self) -> Dict[str, Any]:
+        """Summary of the LLM calls made since start()."""
+        return get_metrics_registry().summary(since=self._metrics_mark or 0)
+
     def estimate_cost(self) -> Dict[str, float]:
-        """Estimate cost based on model pricing."""
-        model_info = get_model_info(self.model_id)
+        """Estimate cost from the token counters (dry runs and batch jobs)."""
+        model_info = get_model_info(self.model_id) if self.model_id else None
         if not model_info:
             return {"input_cost": 0, "output_cost": 0, "total_cost": 0}
 
@@ -86,7 +107,15 @@ class RegenerationStats:
 
     def summary(self) -> Dict[str, Any]:
         duration = time.time() - self.start_time if self.start_time else 0
-        cost = self.estimate_cost()
+        calls = self.llm_calls()
+        if calls["calls"]:
+            # Measured usage replaces estimates
+            self.input_tokens = calls["input_tokens"]
+            self.output_tokens = calls["output_tokens"]
+            # Priced per model, including prompt-cache reads and writes
+            total_cost = calls["cost_usd"]
+        else:
+            total_cost = self.estimate_cost()["total_cost"]
 
         return {
             "model": self.model_id,
@@ -98,9 +127,21 @@ class RegenerationStats:
             "items_per_second": round(self.processed / duration, 2)
             if duration > 0
             else 0,
+            "llm_requests": calls["calls"] or self.requests,
+            "llm_retries": calls["retries"],
+            "llm_errors": calls["errors"],
+            "cache_hits": calls["cache_hits"],
+            "latency_p50_ms": calls["latency_p50_ms"],
+            "latency_p95_ms": calls["latency_p95_ms"],
+            "measured_usage": bool(calls["calls"]),
             "input_tokens": self.input_tokens,
+            "input_tokens_per_item": round(self.input_tokens / self.processed)
+            if self.processed
+            else 0,
             "output_tokens": self.output_tokens,
-            "estimated_cost_usd": round(cost["total_cost"], 4),
+            "cache_read_tokens": calls["cache_read_tokens"],
+            "cache_write_tokens": calls["cache_write_tokens"],
+            "estimated_cost_usd": round(total_cost, 4),
         }
 
 
@@ -117,33 +158,54 @@ def regenerate_knowledge_cards(
     older_than_days: int = 30,
     limit: Optional[int] = None,
     dry_run: bool = False,
+    max_concurrency: Optional[int] = None,
+    packed: Optional[bool] = None,
+    batch_dir: Optional[str] = None,
+    batch_backend: Optional[str] = None,
 ) -> RegenerationStats:
     """
     Regenerate knowledge cards for KB items.
 
+    Cards are generated by the concurrent knowledge-card engine
+    (process_chunks_batch) and written in Firestore batches as they complete.
+    With batch_dir, they are generated by an offline batch job instead
+    (src/knowledge_cards/batch.py); re-running with the same batch_dir
+    resumes the job.
+
     Args:
         db: Firestore client
         client: LLM client to use
-        filter_mode: 'all', 'missing', 'older_than'
+        filter_mode: 'all', 'missing', 'older_than', or 'changed' (card
+            missing, or built from other content or another prompt version)
         older_than_days: Days threshold for 'older_than' mode
         limit: Max items to process (for testing)
         dry_run: If True, don't write to Firestore
+        max_concurrency: Upper bound for concurrent LLM requests
+            (default: CARD_MAX_CONCURRENCY)
+        packed: Send several chunks per LLM request (default: CARD_PACKED)
+        batch_dir: Work directory for an offline batch job
+        batch_backend: Batch backend name (default: LLM_BATCH_BACKEND)
 
     Returns:
         RegenerationStats with results
     """
-    from src.knowledge_cards.prompt_manager import PromptManager
-    from src.knowledge_cards.schema import validate_knowledge_card_response
-
-    from . import GenerationConfig
+    from src.knowledge_cards.generator import process_chunks_batch
+    from src.knowledge_cards.incremental import CHUNK_FIELDS, load_stale_chunks
 
     stats = RegenerationStats()
-    prompt_manager = PromptManager()
 
     # Build query based on filter mode
     collection = db.collection("kb_items")
 
-    if filter_mode == "missing":
+    resuming = bool(batch_dir) and os.path.exists(os.path.join(batch_dir, MANIFEST_FILE))
+
+    if resuming:
+        # Requests are already rendered, no need to select items again
+        logger.info(f"Resuming batch job in {batch_dir}")
+        query = None
+    elif filter_mode == "changed":
+        query = None
+    elif filter_mode == "missing":
         # Items without knowledge_card
         query = collection.where("knowledge_card", "==", None)
     elif filter_mode == "older_than":
@@ -155,18 +217,24 @@ def regenerate_knowledge_cards(
         # All items with content
         query = collection
 
-    # Load documents
-    docs = list(query.stream())
+    if resuming:
+        items = []
+    elif query is None:
+        # Projected hash scan, then fetch only the stale chunks
+        items = load_stale_chunks(db, "kb_items", limit=limit)
+    else:
+        # Load documents (only the fields card generation needs)
+        docs = list(query.select(CHUNK_FIELDS).stream())
 
-    if limit:
-        docs = docs[:limit]
+        if limit:
+            docs = docs[:limit]
 
-    # Filter to only docs with content
-    items = []
-    for doc in docs:
-        data = doc.to_dict()
-        if data.get("content"):
-            items.append({"id": doc.id, **data})
+        # Filter to only docs with content
+        items = []
+        for doc in docs:
+            data = doc.to_dict()
+            if data.get("content"):
+                items.append({"id": doc.id, **data})
 
     stats.start(len(items), client.model_id)
 
@@ -178,50 +246,53 @@ def regenerate_knowledge_cards(
         stats.processed = len(items)
         return stats
 
-    # Generation config
-    config = GenerationConfig(
-        temperature=0.7, max_output_tokens=2048, top_p=0.95, top_k=40
-    )
+    if batch_dir:
+        from src.knowledge_cards.batch import run_card_batch
+
+        backend = get_batch_backend(batch_backend, model=client.model_id, client=client)
+        summary = run_card_batch(db, items, batch_dir, backend)
+        stats.processed = summary.get("written", 0)
+        stats.failed = sum(summary.get(key, 0) for key in ("invalid", "failed", "unmatched"))
+        stats.input_tokens = summary.get("input_tokens", 0)
+        stats.output_tokens = summary.get("output_tokens", 0)
+        stats.requests = stats.processed + stats.failed
+        return stats
 
     batch = db.batch()
     batch_count = 0
 
-    for i, item in enumerate(items):
-        try:
-            # Build prompt
-            prompt = prompt_manager.format_prompt(
-                title=item.get("title", "Untitled"),
-                author=item.get("author", "Unknown"),
-                content=item.get("content", ""),
-            )
-
-            # Generate
-            response_data = client.generate_json(prompt, config)
+    def write_card(chunk_id, knowledge_card):
+        nonlocal batch, batch_count
 
-            # Validate
-            knowledge_card = validate_knowledge_card_response(response_data)
+        # Update Firestore
+        doc_ref = collection.document(chunk_id)
+        batch.set(doc_ref, {"knowledge_card": knowledge_card.to_dict()}, merge=True)
+        batch_count += 1
 
-            # Update Firestore
-            doc_ref = collection.document(item["id"])
-            batch.set(doc_ref, {"knowledge_card": knowledge_card.to_dict()}, merge=True)
-            batch_count += 1
+        stats.record_success()
 
-            # Track tokens if available
-            # Note: generate_json doesn't return token counts, so we estimate
-            stats.record_success(input_tokens=500, output_tokens=300)
+        # Commit batch
+        if batch_count >= 100:
+            batch.commit()
+            logger.info(
+                f"Progress: {stats.processed}/{len(items)} cards written"
+            )
+            batch = db.batch()
+            batch_count = 0
 
-            # Commit batch
-            if batch_count >= 100:
-                batch.commit()
-                logger.info(
-                    f"Progress: {i + 1}/{len(items)} ({stats.processed} succeeded, {stats.failed} failed)"
-                )
-                batch = db.batch()
-                batch_count = 0
+    with llm_caller("regenerate.knowledge_cards"):
+        results = process_chunks_batch(
+            [{**item, "chunk_id": item["id"]} for item in items],
+            max_concurrency=max_concurrency,
+            client=client,
+            on_card=write_card,
+            packed=packed,
+        )
+    stats.requests = results["usage"]["requests"]
 
-        except Exception as e:
-            logger.warning(f"Failed to regenerate {item['id']}: {e}")
-            stats.record_failure()
+    for chunk_id, error in results["errors"]:
+        logger.warning(f"Failed to regenerate {chunk_id}: {error}")
+        stats.record_failure()
 
     # Final batch
     if batch_count > 0:
@@ -269,7 +340,8 @@ def regenerate_clusters(
         return stats
 
     try:
-        result = generator.generate_all_clusters()
+        with llm_caller("regenerate.clusters"):
+            result = generator.generate_all_clusters()
         stats.processed = result["total_clusters"]
     except Exception as e:
         logger.error(f"Cluster regeneration failed: {e}")
@@ -364,6 +436,9 @@ Examples:
     # Regenerate cards older than 30 days
     LLM_MODEL=gemini-3 python -m src.llm.regenerate knowledge-cards --older-than 30
 
+    # Nightly refresh: only new or changed chunks
+    python -m src.llm.regenerate knowledge-cards --changed
+
     # Regenerate cluster metadata
     LLM_MODEL=claude-haiku python -m src.llm.regenerate clusters
 
@@ -389,6 +464,11 @@ Examples:
     kc_group.add_argument(
         "--missing", action="store_true", help="Only generate missing cards"
     )
+    kc_group.add_argument(
+        "--changed",
+        action="store_true",
+        help="Only cards that are missing or whose content/prompt changed",
+    )
     kc_group.add_argument(
         "--older-than",
         type=int,
@@ -401,6 +481,27 @@ Examples:
     kc_parser.add_argument(
         "--dry-run", action="store_true", help="Estimate cost without writing"
     )
+    kc_parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Maximum concurrent LLM requests (adapts to rate limits)",
+    )
+    kc_parser.add_argument(
+        "--packed",
+        action="store_true",
+        default=None,
+        help="Send several chunks per LLM request to share instruction tokens",
+    )
+    kc_parser.add_argument(
+        "--batch",
+        metavar="DIR",
+        help="Run as an offline batch job in DIR (re-run to resume)",
+    )
+    kc_parser.add_argument(
+        "--batch-backend",
+        choices=["vertex", "local"],
+        help="Batch backend (default: LLM_BATCH_BACKEND or vertex)",
+    )
 
     # clusters command
     cl_parser = subparsers.add_parser(
@@ -458,6 +559,8 @@ Examples:
             filter_mode = "all"
         elif args.missing:
             filter_mode = "missing"
+        elif args.changed:
+            filter_mode = "changed"
         else:
             filter_mode = "older_than"
 
@@ -468,6 +571,10 @@ Examples:
             older_than_days=args.older_than or 30,
             limit=args.limit,
             dry_run=args.dry_run,
+            max_concurrency=args.concurrency,
+            packed=args.packed,
+            batch_dir=args.batch,
+            batch_backend=args.batch_backend,
         )
 
     elif args.command == "clusters":
@@ -489,9 +596,14 @@ Examples:
     print(f"Skipped:           {summary['skipped']}")
     print(f"Duration:          {summary['duration_seconds']}s")
     print(f"Speed:             {summary['items_per_second']} items/sec")
+    label = "Tokens:" if summary["measured_usage"] else "Estimated tokens:"
     print(
-        f"Estimated tokens:  {summary['input_tokens']:,} in / {summary['output_tokens']:,} out"
+        f"{label:<19}{summary['input_tokens']:,} in / {summary['output_tokens']:,} out"
     )
+    print(f"LLM requests:      {summary['llm_requests']} "
+          f"({summary['llm_retries']} retries, {summary['cache_hits']} cache hits)")
+    print(f"Latency:           p50 {summary['latency_p50_ms']:.0f}ms / "
+          f"p95 {summary['latency_p95_ms']:.0f}ms")
     print(f"Estimated cost:    ${summary['estimated_cost_usd']:.4f}")
     print(f"{'=' * 60}")
 
@@ -0,0 +1,180 @@
+"""
+Structured (schema-constrained) JSON output
+
+Callers describe the JSON they expect once, as a JSON Schema derived from
+their dataclass, and put it on GenerationConfig.response_schema. Providers
+then constrain decoding natively instead of relying on prompt wording:
+
+- Gemini: response_mime_type="application/json" plus response_schema
+  (converted to the Vertex AI OpenAPI subset by to_gemini_schema())
+- Claude: a single forced tool whose input_schema is the schema; the tool
+  input is returned as the response text
+
+Free-text output (no schema, or a model that ignores it) still goes through
+extract_json(), which decodes with json.JSONDecoder.raw_decode from each
+candidate "{" instead of re-scanning braces, and tolerates braces inside
+strings, code fences and trailing prose.
+
+Usage:
+    from llm import GenerationConfig, schema_from_dataclass
+
+    schema = schema_from_dataclass(KnowledgeCard, fields=["summary", "takeaways", "tags"])
+    data = client.generate_json(prompt, GenerationConfig(response_schema=schema))
+"""
+
+import dataclasses
+import json
+import typing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+# Keys supported by the Vertex AI response_schema (OpenAPI 3 subset)
+_GEMINI_SCHEMA_KEYS = {
+    "type",
+    "format",
+    "description",
+    "nullable",
+    "enum",
+    "properties",
+    "required",
+    "items",
+    "minItems",
+    "maxItems",
+    "minimum",
+    "maximum",
+}
+
+# Tool name used to force structured output from Claude
+CLAUDE_TOOL_NAME = "respond"
+
+_decoder = json.JSONDecoder()
+
+
+def _type_schema(annotation: Any) -> Dict[str, Any]:
+    """JSON Schema for a type annotation (str, int, float, bool, List, Literal, Optional)."""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Literal:
+        return {"type": "string", "enum": [str(a) for a in args]}
+    if origin is typing.Union:
+        non_null = [a for a in args if a is not type(None)]
+        if len(non_null) == 1:
+            return {**_type_schema(non_null[0]), "nullable": True}
+    if origin in (list, List, Sequence, tuple):
+        return {"type": "array", "items": _type_schema(args[0]) if args else {"type": "string"}}
+    if origin in (dict, Dict):
+        return {"type": "object"}
+    if annotation in _JSON_TYPES:
+        return {"type": _JSON_TYPES[annotation]}
+    raise TypeError(f"No JSON schema mapping for {annotation!r}")
+
+
+def schema_from_dataclass(
+    cls: type,
+    fields: Optional[List[str]] = None,
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Derive a JSON Schema for the LLM-produced part of a dataclass.
+
+    Args:
+        cls: Dataclass (e.g., KnowledgeCard, Relationship)
+        fields: Field names the model must return (default: all fields)
+        overrides: Extra keywords per field, e.g. {"takeaways": {"minItems": 3}}
+
+    Returns:
+        JSON Schema object with the fields as required properties, in
+        declaration order
+    """
+    hints = typing.get_type_hints(cls, include_extras=False)
+    names = fields or [f.name for f in dataclasses.fields(cls)]
+    properties = {}
+    for name in names:
+        prop = _type_schema(hints[name])
+        prop.pop("nullable", None)
+        properties[name] = {**prop, **(overrides or {}).get(name, {})}
+    return {"type": "object", "properties": properties, "required": list(names)}
+
+
+def to_gemini_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a JSON Schema to the Vertex AI response_schema format.
+
+    Type names are upper-cased (OBJECT, STRING, ...) and keywords Vertex AI
+    does not accept (e.g. maxLength, additionalProperties) are dropped.
+    """
+    converted: Dict[str, Any] = {}
+    for key, value in schema.items():
+        if key not in _GEMINI_SCHEMA_KEYS:
+            continue
+        if key == "type":
+            converted[key] = value.upper()
+        elif key == "properties":
+            converted[key] = {name: to_gemini_schema(prop) for name, prop in value.items()}
+        elif key == "items":
+            converted[key] = to_gemini_schema(value)
+        else:
+            converted[key] = value
+    return converted
+
+
+def to_claude_tool(schema: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Build the (tool, tool_choice) pair that forces Claude to answer with schema.
+
+    Returns:
+        Tool definition and a tool_choice selecting it
+    """
+    tool = {
+        "name": CLAUDE_TOOL_NAME,
+        "description": "Return the response as structured JSON.",
+        "input_schema": schema,
+    }
+    return tool, {"type": "tool", "name": CLAUDE_TOOL_NAME}
+
+
+def _strip_code_fence(text: str) -> str:
+    if not text.startswith("```"):
+        return text
+    # Remove opening fence (and language tag), then the closing fence
+    text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+    if text.rstrip().endswith("```"):
+        text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def extract_json(text: str) -> Tuple[Any, bool]:
+    """
+    Decode the JSON object in model output.
+
+    Tries the whole (fence-stripped) text first, then decodes from each "{"
+    with raw_decode, which stops at the end of the first complete value, so
+    trailing prose and braces inside strings are handled in one pass.
+
+    Args:
+        text: Raw response text
+
+    Returns:
+        Tuple of (decoded value, repaired) where repaired is True if the
+        text needed cleanup to decode
+
+    Raises:
+        ValueError: If text contains no JSON object
+    """
+    stripped = text.strip()
+    try:
+        return json.loads(stripped), False
+    except json.JSONDecodeError:
+        pass
+
+    candidate = _strip_code_fence(stripped)
+    start = candidate.find("{")
+    while start != -1:
+        try:
+            value, _ = _decoder.raw_decode(candidate, start)
+            return value, True
+        except json.JSONDecodeError:
+            start = candidate.find("{", start + 1)
+    raise ValueError("No JSON object found")
@@ -23,6 +23,13 @@ from datetime import datetime
 import requests
 from bs4 import BeautifulSoup
 
+try:
+    from src.common import http_client
+    from src.common.html_text import guard_html_size, iter_date_hints
+except ImportError:
+    import http_client
+    from html_text import guard_html_size, iter_date_hints
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -33,6 +40,17 @@ USER_AGENT = (
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 )
 
+# Meta tags carrying a publication date, in priority order
+META_SELECTORS = [
+    ("property", "article:published_time"),
+    ("property", "og:article:published_time"),
+    ("name", "pubdate"),
+    ("name", "publishdate"),
+    ("name", "date"),
+    ("name", "DC.date.issued"),
+    ("itemprop", "datePublished"),
+]
+
 # Month name mappings for text parsing (English and German)
 MONTH_NAMES = {
     # English
@@ -100,39 +118,43 @@ def extract_date_from_html(html: str, use_llm_fallback: bool = False) -> Optiona
         Date string if found, None otherwise
     """
     try:
-        soup = BeautifulSoup(html, "html.parser")
-
-        # 1. JSON-LD Schema.org (most reliable)
-        for script in soup.find_all("script", type="application/ld+json"):
-            try:
-                if not script.string:
+        html = guard_html_size(html)
+
+        # 1-3. Single streaming pass over structured hints. The first JSON-LD
+        # date wins outright, so the parse stops there; meta tags and <time>
+        # are only consulted once the whole document has been scanned.
+        metas = {}
+        time_value = None
+        time_seen = False
+        for kind, value in iter_date_hints(html):
+            if kind == "jsonld":
+                try:
+                    if not value:
+                        continue
+                    date = _extract_date_from_jsonld(json.loads(value))
+                    if date:
+                        return date
+                except (json.JSONDecodeError, TypeError):
                     continue
-                data = json.loads(script.string)
-                date = _extract_date_from_jsonld(data)
-                if date:
-                    return date
-            except (json.JSONDecodeError, TypeError):
-                continue
+            elif kind == "meta":
+                for attr, selector_value in META_SELECTORS:
+                    if (attr, selector_value) not in metas and value.get(attr) == selector_value:
+                        metas[(attr, selector_value)] = value.get("content")
+            elif kind == "time" and not time_seen:
+                time_seen = True
+                time_value = value
 
         # 2. Meta tags
-        meta_selectors = [
-            ("property", "article:published_time"),
-            ("property", "og:article:published_time"),
-            ("name", "pubdate"),
-            ("name", "publishdate"),
-            ("name", "date"),
-            ("name", "DC.date.issued"),
-            ("itemprop", "datePublished"),
-        ]
-        for attr, value in meta_selectors:
-            tag = soup.find("meta", {attr: value})
-            if tag and tag.get("content"):
-                return tag["content"]
+        for selector in META_SELECTORS:
+            if metas.get(selector):
+                return metas[selector]
 
         # 3. <time> element with datetime attribute
-        time_tag = soup.find("time", datetime=True)
-        if time_tag and time_tag.get("datetime"):
-            return time_tag["datetime"]
+        if time_value:
+            return time_value
+
+        # Text and LLM fallbacks need the tree; only built when hints fail
+        soup = BeautifulSoup(html, "html.parser")
 
         # 4. Text pattern matching
         date = _extract_date_from_text(soup)
@@ -363,8 +385,9 @@ def fetch_and_extract_date(
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
         }
-        response = requests.get(
-            url, headers=headers, timeout=timeout, allow_redirects=True
+        # Best-effort lookup: pooled connection, no retries
+        response = http_client.get(
+            url, headers=headers, timeout=timeout, allow_redirects=True, max_retries=1
         )
         response.raise_for_status()
 
@@ -11,17 +11,31 @@ import logging
 from typing import List
 from google.cloud import aiplatform
 from vertexai.preview.language_models import TextEmbeddingModel
-from google.api_core.exceptions import ResourceExhausted, InternalServerError
+from google.api_core.exceptions import ResourceExhausted
+
+# Content-addressed embedding store shared with the document pipeline
+try:
+    from src.embed.embedding_store import cached_embedding
+except ImportError:
+    from embedding_store import cached_embedding
+
+# Quota governor shared with the LLM clients in this process
+try:
+    from src.llm.governor import get_governor
+except ImportError:
+    from llm.governor import get_governor
 
 logger = logging.getLogger(__name__)
 
 # Global Vertex AI model (lazy initialization)
 _vertex_ai_model = None
 
-# Retry configuration
+# Embedding model configuration (must match the document pipeline)
+EMBEDDING_MODEL = "gemini-embedding-001"
+EMBEDDING_DIMENSIONALITY = 768
+
+# Retry configuration (backoff and admission are handled by the governor)
 MAX_RETRIES = 3
-INITIAL_BACKOFF = 1  # seconds
-MAX_BACKOFF = 32  # seconds
 
 
 def get_embedding_model() -> TextEmbeddingModel:
@@ -44,7 +58,7 @@ def get_embedding_model() -> TextEmbeddingModel:
 
         # Load embedding model
         logger.info("Loading gemini-embedding-001 model...")
-        _vertex_ai_model = TextEmbeddingModel.from_pretrained("gemini-embedding-001")
+        _vertex_ai_model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL)
         logger.info("Embedding model loaded successfully")
 
     return _vertex_ai_model
@@ -56,6 +70,7 @@ def generate_query_embedding(text: str) -> List[float]:
 
     Uses the same gemini-embedding-001 model and dimensionality as
     the document embedding pipeline to ensure semantic consistency.
+    Repeated queries are served from the shared embedding store.
 
     Args:
         text: Query text to embed
@@ -66,49 +81,53 @@ def generate_query_embedding(text: str) -> List[float]:
     Raises:
         Exception: If embedding generation fails after retries
     """
-    model = get_embedding_model()
+    return cached_embedding(
+        text,
+        model=EMBEDDING_MODEL,
+        dimensionality=EMBEDDING_DIMENSIONALITY,
+        compute=_generate_query_embedding_uncached,
+    )
 
-    backoff = INITIAL_BACKOFF
+
+def _generate_query_embedding_uncached(text: str) -> List[float]:
+    """Call Vertex AI for a query embedding with retries."""
+    model = get_embedding_model()
+    governor = get_governor("vertex", EMBEDDING_MODEL)
 
     for attempt in range(MAX_RETRIES):
         try:
             logger.info(f"Generating embedding for query (attempt {attempt + 1}/{MAX_RETRIES})")
+            governor.acquire()
 
             # Use output_dimensionality=768 to match document embeddings
             # (gemini-embedding-001 defaults to 3072 dimensions)
-            embeddings = model.get_embeddings([text], output_dimensionality=768)
+            embeddings = model.get_embeddings(
+                [text], output_dimensionality=EMBEDDING_DIMENSIONALITY
+            )
+            governor.record_success()
             embedding_vector = embeddings[0].values
 
             logger.info(f"Generated embedding with {len(embedding_vector)} dimensions")
             return list(embedding_vector)  # Convert to list of floats
 
-        except ResourceExhausted as e:
-            if attempt < MAX_RETRIES - 1:
-                logger.warning(
-                    f"Rate limit exceeded (attempt {attempt + 1}/{MAX_RETRIES}), "
-                    f"retrying after {backoff}s"
-                )
-                time.sleep(backoff)
-                backoff = min(backoff * 2, MAX_BACKOFF)
-            else:
-                logger.error(f"Rate limit exceeded after {MAX_RETRIES} attempts")
-                raise Exception(f"Rate limit exceeded: {e}") from e
-
-        except InternalServerError as e:
+        except Exception as e:
+            # Every outcome goes to the governor, so a failed half-open probe
+            # releases the circuit; it returns None for non-retriable errors
+            retry_in = governor.record_error(e, attempt)
+            if retry_in is None:
+                logger.error(f"Unexpected error generating embedding: {e}")
+                raise Exception(f"Embedding generation failed: {e}") from e
+            label = "Rate limit exceeded" if isinstance(e, ResourceExhausted) else "Server error"
             if attempt < MAX_RETRIES - 1:
                 logger.warning(
-                    f"Server error (attempt {attempt + 1}/{MAX_RETRIES}), "
-                    f"retrying after {backoff}s"
+                    f"{label} (attempt {attempt + 1}/{MAX_RETRIES}), "
+                    f"retrying after {retry_in:.1f}s"
                 )
-                time.sleep(backoff)
-                backoff = min(backoff * 2, MAX_BACKOFF)
+                if retry_in:
+                    time.sleep(retry_in)
             else:
-                logger.error(f"Server error after {MAX_RETRIES} attempts")
-                raise Exception(f"Server error: {e}") from e
-
-        except Exception as e:
-            logger.error(f"Unexpected error generating embedding: {e}")
-            raise Exception(f"Embedding generation failed: {e}") from e
+                logger.error(f"{label} after {attempt + 1} attempts")
+                raise Exception(f"{label}: {e}") from e
 
     # Should never reach here
     raise Exception("Failed to generate embedding after maximum retries")
@@ -14,6 +14,7 @@ Provides:
 - Stochastic sampling with temperature (Story 3.8)
 """
 
+import asyncio
 import logging
 import math
 from collections import defaultdict
@@ -24,6 +25,7 @@ import embeddings
 import firestore_client
 
 from src.llm import BaseLLMClient, get_client
+from src.llm.base import run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -566,39 +568,25 @@ def get_llm_client() -> BaseLLMClient:
         LLM_MODEL: Model name (e.g., "gemini-2.5-flash", "claude-haiku")
         LLM_PROVIDER: Provider preference ("gemini" or "claude")
 
+    Responses are cached: Tavily keeps returning the same URLs, so repeat
+    quality scores come from the LLM response cache (LLM_RESPONSE_CACHE,
+    in-memory LRU if unset).
+
     Returns:
         Initialized LLM client
     """
     global _llm_client
 
     if _llm_client is None:
-        _llm_client = get_client()  # Uses LLM_MODEL env var or default
+        _llm_client = get_client(response_cache=True)  # Uses LLM_MODEL env var or default
         logger.info(f"Initialized LLM client: {_llm_client}")
 
     return _llm_client
 
 
-def score_content_quality(title: str, content: str, url: str, domain: str = "") -> Dict[str, Any]:
-    """
-    Score article quality on two dimensions: depth and authority.
-
-    Args:
-        title: Article title
-        content: Article snippet/content
-        url: Article URL
-        domain: Article domain (e.g., "hbr.org")
-
-    Returns:
-        Dictionary with:
-        - depth_score: 1-5 scale (content depth/detail)
-        - authority_score: 1-5 scale (source/author credibility)
-        - depth_reasoning: Brief explanation
-        - authority_reasoning: Brief explanation
-    """
-    try:
-        client = get_llm_client()
-
-        prompt = f"""Rate this article on TWO dimensions (1-5 scale each):
+def _quality_prompt(title: str, content: str, url: str, domain: str) -> str:
+    """Build the depth + authority scoring prompt."""
+    return f"""Rate this article on TWO dimensions (1-5 scale each):
 
 Title: {title}
 URL: {url}
@@ -625,29 +613,75 @@ Content preview: {content[:500]}
 Respond with ONLY a JSON object:
 {{"depth": <1-5>, "authority": <1-5>, "depth_reasoning": "<1 sentence>", "authority_reasoning": "<1 sentence>"}}"""
 
-        result = client.generate_json(prompt)
 
-        depth = int(result.get("depth", 3))
-        authority = int(result.get("authority", 3))
-        depth = max(1, min(5, depth))
-        authority = max(1, min(5, authority))
+def _quality_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Clamp and rename the LLM quality scores."""
+    depth = int(result.get("depth", 3))
+    authority = int(result.get("authority", 3))
+    depth = max(1, min(5, depth))
+    authority = max(1, min(5, authority))
 
-        return {
-            "depth_score": depth,
-            "authority_score": authority,
-            "depth_reasoning": result.get("depth_reasoning", ""),
-            "authority_reasoning": result.get("authority_reasoning", ""),
-        }
+    return {
+        "depth_score": depth,
+        "authority_score": authority,
+        "depth_reasoning": result.get("depth_reasoning", ""),
+        "authority_reasoning": result.get("authority_reasoning", ""),
+    }
+
+
+def _quality_fallback(error: Exception) -> Dict[str, Any]:
+    logger.warning(f"Failed to score content quality: {error}")
+    return {
+        "depth_score": 3,
+        "authority_score": 3,
+        "depth_reasoning": "Unable to assess",
+        "authority_reasoning": "Unable to assess",
+        "error": str(error),
+    }
+
+
+def score_content_quality(title: str, content: str, url: str, domain: str = "") -> Dict[str, Any]:
+    """
+    Score article quality on two dimensions: depth and authority.
+
+    Args:
+        title: Article title
+        content: Article snippet/content
+        url: Article URL
+        domain: Article domain (e.g., "hbr.org")
+
+    Returns:
+        Dictionary with:
+        - depth_score: 1-5 scale (content depth/detail)
+        - authority_score: 1-5 scale (source/author credibility)
+        - depth_reasoning: Brief explanation
+        - authority_reasoning: Brief explanation
+    """
+    try:
+        client = get_llm_client()
+        result = client.generate_json(_quality_prompt(title, content, url, domain))
+        return _quality_result(result)
 
     except Exception as e:
-        logger.warning(f"Failed to score content quality: {e}")
-        return {
-            "depth_score": 3,
-            "authority_score": 3,
-            "depth_reasoning": "Unable to assess",
-            "authority_reasoning": "Unable to assess",
-            "error": str(e),
-        }
+        return _quality_fallback(e)
+
+
+async def ascore_content_quality(
+    title: str, content: str, url: str, domain: str = ""
+) -> Dict[str, Any]:
+    """
+    Async variant of score_content_quality() for scoring many candidates at once.
+
+    Returns:
+        Same dictionary as score_content_quality()
+    """
+    try:
+        client = get_llm_client()
+        result = await client.agenerate_json(_quality_prompt(title, content, url, domain))
+        return _quality_result(result)
+
+    except Exception as e:
+        return _quality_fallback(e)
 
 
 def score_content_depth(title: str, content: str, url: str) -> Dict[str, Any]:
@@ -923,7 +957,6 @@ def filter_recommendations(
         - filtered_out: Counts of filtered items by reason
     """
     try:
-        from concurrent.futures import ThreadPoolExecutor, as_completed
         from datetime import datetime, timedelta, timezone
 
         logger.info(f"Filtering {len(recommendations)} recommendations")
@@ -1030,13 +1063,13 @@ def filter_recommendations(
         logger.info(f"Pass 1 complete: {len(candidates)} candidates for LLM scoring")
 
         # ============================================================
-        # PASS 2: Parallel LLM scoring (depth + authority)
+        # PASS 2: Concurrent LLM scoring (depth + authority)
         # ============================================================
-        def score_candidate(candidate):
+        async def score_candidate(candidate):
             """Score a single candidate with LLM."""
             return {
                 "candidate": candidate,
-                "quality": score_content_quality(
+                "quality": await ascore_content_quality(
                     candidate["title"],
                     candidate["content"],
                     candidate["url"],
@@ -1044,16 +1077,19 @@ def filter_recommendations(
                 ),
             }
 
+        async def score_candidates():
+            return await asyncio.gather(
+                *(score_candidate(c) for c in candidates), return_exceptions=True
+            )
+
         scored_candidates = []
         if candidates:
-            logger.info(f"Scoring {len(candidates)} candidates in parallel")
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = [executor.submit(score_candidate, c) for c in candidates]
-                for future in as_completed(futures):
-                    try:
-                        scored_candidates.append(future.result())
-                    except Exception as e:
-                        logger.warning(f"LLM scoring failed: {e}")
+            logger.info(f"Scoring {len(candidates)} candidates concurrently")
+            for scored in run_sync(score_candidates()):
+                if isinstance(scored, Exception):
+                    logger.warning(f"LLM scoring failed: {scored}")
+                else:
+                    scored_candidates.append(scored)
 
         logger.info(f"Pass 2 complete: {len(scored_candidates)} scored")
 
@@ -28,12 +28,20 @@ cp "$SRC_DIR/summary/cover_image.py" "$BUILD_DIR/"
 cp "$SRC_DIR/summary/delivery.py" "$BUILD_DIR/"
 cp "$SRC_DIR/summary/data_pipeline.py" "$BUILD_DIR/"
 
+# Copy shared pooled HTTP client
+cp "$SRC_DIR/common/http_client.py" "$BUILD_DIR/"
+
 # Copy LLM abstraction layer
 cp "$SRC_DIR/llm/__init__.py" "$BUILD_DIR/llm/"
 cp "$SRC_DIR/llm/base.py" "$BUILD_DIR/llm/"
+cp "$SRC_DIR/llm/batch.py" "$BUILD_DIR/llm/"
+cp "$SRC_DIR/llm/cache.py" "$BUILD_DIR/llm/"
 cp "$SRC_DIR/llm/config.py" "$BUILD_DIR/llm/"
 cp "$SRC_DIR/llm/gemini.py" "$BUILD_DIR/llm/"
 cp "$SRC_DIR/llm/claude.py" "$BUILD_DIR/llm/"
+cp "$SRC_DIR/llm/governor.py" "$BUILD_DIR/llm/"
+cp "$SRC_DIR/llm/metrics.py" "$BUILD_DIR/llm/"
+cp "$SRC_DIR/llm/structured.py" "$BUILD_DIR/llm/"
 
 echo "Build complete. Contents:"
 find "$BUILD_DIR" -type f | sort
@@ -15,6 +15,11 @@ import os
 import re
 from urllib.parse import quote_plus
 
+try:
+    from src.common import http_client
+except ImportError:
+    import http_client
+
 logger = logging.getLogger(__name__)
 
 GCP_PROJECT = os.getenv("GCP_PROJECT", "kx-hub")
@@ -160,9 +165,8 @@ def _verify_url(url: str) -> bool:
     HEAD requests but are perfectly valid in a browser.
     """
     try:
-        import requests
-        requests.head(
-            url, allow_redirects=True, timeout=4,
+        http_client.head(
+            url, allow_redirects=True, timeout=4, max_retries=1,
             headers={"User-Agent": "Mozilla/5.0"},
         )
         return True  # reachable — even 4xx means server exists
@@ -177,15 +181,16 @@ def _follow_redirect(url: str) -> str:
     Returns original URL on failure.
     """
     try:
-        import requests
         headers = {"User-Agent": "Mozilla/5.0"}
-        resp = requests.head(url, allow_redirects=True, timeout=6, headers=headers)
+        resp = http_client.head(url, allow_redirects=True, timeout=6, max_retries=1, headers=headers)
         final = resp.url
         if final and final != url and "vertexaisearch" not in final:
             logger.info(f"Redirect resolved: {url[:60]}... → {final}")
             return final
         # HEAD didn't redirect — try GET with stream to avoid downloading body
-        resp = requests.get(url, allow_redirects=True, timeout=6, headers=headers, stream=True)
+        resp = http_client.get(
+            url, allow_redirects=True, timeout=6, max_retries=1, headers=headers, stream=True
+        )
         resp.close()
         final = resp.url
         if final and final != url and "vertexaisearch" not in final:
@@ -227,8 +232,9 @@ def _resolve_snipd_url(snipd_url: str, title: str = "") -> str:
     Returns "" if page fetch finds nothing.
     """
     try:
-        import requests
-        resp = requests.get(snipd_url, timeout=8, headers={"User-Agent": "Mozilla/5.0"})
+        resp = http_client.get(
+            snipd_url, timeout=8, max_retries=1, headers={"User-Agent": "Mozilla/5.0"}
+        )
         text = resp.text
         for pattern in [
             r'https://open\.spotify\.com/episode/[a-zA-Z0-9]+',
@@ -16,6 +16,25 @@ Usage:
     # JSON generation with automatic parsing
     data = client.generate_json("Return JSON with keys: summary, tags")
 
+    # Schema-constrained JSON (provider JSON mode / forced tool call)
+    schema = schema_from_dataclass(KnowledgeCard, fields=["summary", "tags"])
+    data = client.generate_json(prompt, GenerationConfig(response_schema=schema))
+    print(parse_stats())  # parsed / repaired / failed, failure_rate
+
+    # Async (bounded per model by LLM_ASYNC_CONCURRENCY)
+    data = await client.agenerate_json("Return JSON with keys: summary, tags")
+
+    # Usage, cost and latency of the calls made since a mark
+    registry = get_metrics_registry()
+    mark = registry.mark()
+    with llm_caller("my_tool"):
+        client.generate_json(prompt)
+    print(registry.summary(since=mark))  # tokens, cost_usd, latency_p50_ms, ...
+
+    # Opt-in response cache (identical model/prompt/config served from cache)
+    client = get_client(response_cache=True)
+    print(cache_stats())
+
     # List available models
     from llm import list_models
     for name, info in list_models().items():
@@ -27,12 +46,35 @@ Environment Variables:
     GCP_PROJECT: GCP project ID
     GCP_REGION: GCP region for Gemini
     CLAUDE_REGION: GCP region for Claude (default: europe-west1)
+    LLM_ASYNC_CONCURRENCY: Max in-flight async requests per model (default: 16)
+    LLM_CALL_LOG: Log every LLM call as a structured JSON line (default: false)
+    LLM_RESPONSE_CACHE: Response cache backend ("memory", "local", "firestore", "off")
+    LLM_RESPONSE_CACHE_TTL: Response cache entry lifetime in seconds
 """
 
 import logging
 from typing import Dict, Optional
 
-from .base import BaseLLMClient, GenerationConfig, LLMProvider, LLMResponse
+from .base import (
+    BaseLLMClient,
+    GenerationConfig,
+    LLMProvider,
+    LLMResponse,
+    get_model_semaphore,
+    run_sync,
+)
+from .batch import BatchRequest, BatchResult, get_batch_backend, run_batch_job
+from .cache import (
+    FirestoreResponseCache,
+    LocalResponseCache,
+    MemoryResponseCache,
+    ResponseCache,
+    cache_stats,
+    get_response_cache,
+    reset_cache_stats,
+    set_response_cache,
+    with_response_cache,
+)
 from .config import (
     MODEL_ALIASES,
     MODEL_REGISTRY,
@@ -43,6 +85,17 @@ from .config import (
     list_available_models,
     resolve_model_name,
 )
+from .metrics import (
+    LLMCallRecord,
+    MetricsRegistry,
+    add_call_hook,
+    get_metrics_registry,
+    llm_caller,
+    parse_stats,
+    remove_call_hook,
+    reset_parse_stats,
+)
+from .structured import extract_json, schema_from_dataclass
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +108,7 @@ def get_client(
     project_id: Optional[str] = None,
     region: Optional[str] = None,
     cache: bool = True,
+    response_cache: Optional[bool] = None,
 ) -> BaseLLMClient:
     """
     Get an LLM client for the specified model.
@@ -65,6 +119,9 @@ def get_client(
         project_id: GCP project ID (uses GCP_PROJECT env var if None)
         region: GCP region (auto-selected based on provider if None)
         cache: Whether to cache and reuse client instances (default: True)
+        response_cache: Whether to serve identical requests from the response
+            cache. None follows LLM_RESPONSE_CACHE; True opts in (in-memory
+            LRU if LLM_RESPONSE_CACHE is off); False never caches.
 
     Returns:
         Configured LLM client
@@ -84,7 +141,7 @@ def get_client(
     # Check cache
     cache_key = f"{model_name}:{project_id}:{region}"
     if cache and cache_key in _client_cache:
-        return _client_cache[cache_key]
+        return _apply_response_cache(_client_cache[cache_key], response_cache)
 
     # Get model info
     model_info = get_model_info(model_name)
@@ -122,7 +179,17 @@ def get_client(
         _client_cache[cache_key] = client
 
     logger.info(f"Created LLM client: {client}")
-    return client
+    return _apply_response_cache(client, response_cache)
+
+
+def _apply_response_cache(client: BaseLLMClient, response_cache: Optional[bool]) -> BaseLLMClient:
+    """Wrap client with the response cache if requested or configured."""
+    if response_cache is False:
+        return client
+    if response_cache is None:
+        configured = get_response_cache()
+        return with_response_cache(client, configured) if configured is not None else client
+    return with_response_cache(client)
 
 
 def list_models() -> Dict[str, ModelInfo]:
@@ -152,6 +219,36 @@ __all__ = [
     "GenerationConfig",
     "LLMResponse",
     "ModelInfo",
+    # Async
+    "get_model_semaphore",
+    "run_sync",
+    # Batch prediction
+    "BatchRequest",
+    "BatchResult",
+    "get_batch_backend",
+    "run_batch_job",
+    # Response cache
+    "ResponseCache",
+    "MemoryResponseCache",
+    "LocalResponseCache",
+    "FirestoreResponseCache",
+    "with_response_cache",
+    "get_response_cache",
+    "set_response_cache",
+    "cache_stats",
+    "reset_cache_stats",
+    # Instrumentation
+    "LLMCallRecord",
+    "MetricsRegistry",
+    "get_metrics_registry",
+    "llm_caller",
+    "add_call_hook",
+    "remove_call_hook",
+    "parse_stats",
+    "reset_parse_stats",
+    # Structured output
+    "schema_from_dataclass",
+    "extract_json",
     # Config utilities
     "list_models",
     "get_model_info",
@@ -0,0 +1,713 @@
+"""
+LLM Batch Prediction
+
+Offline (batch) execution of bulk LLM work. Online calls are limited by
+request quotas; batch prediction accepts a whole request file, runs it
+asynchronously at a lower price and much higher throughput, and returns a
+result file.
+
+A batch job has four steps, each resumable from the job's work directory:
+
+1. Render: write requests to sharded JSONL files (write_request_shards)
+2. Submit: hand the shards to a BatchBackend
+3. Parse: stream result JSONL line by line (iter_results)
+4. Handle: validate and persist results, one result file at a time
+
+Request lines use a provider-neutral format:
+
+    {"key": "chunk-1", "prompt": "...", "system_prompt": null,
+     "config": {"temperature": 0.7, ...}, "metadata": {...}}
+
+Result lines (local backend) carry the key and either a response or an error:
+
+    {"key": "chunk-1", "response": {"text": "...", "input_tokens": 812,
+     "output_tokens": 143}}
+    {"key": "chunk-2", "error": "..."}
+
+Backends:
+    LocalBatchBackend: Runs requests through an online client (or a plain
+        callable) and writes result files to disk. Used in tests and for
+        small runs.
+    VertexBatchBackend: Vertex AI batch prediction for Gemini models
+        (requests staged in Cloud Storage).
+
+Usage:
+    from llm.batch import get_batch_backend, run_batch_job
+
+    backend = get_batch_backend("vertex", model="gemini-2.5-flash")
+    summary = run_batch_job(work_dir, render, backend, handle_results)
+
+Environment Variables:
+    LLM_BATCH_BACKEND: Default backend ("vertex" or "local", default: vertex)
+    LLM_BATCH_GCS_URI: Cloud Storage prefix for Vertex batch input/output
+        (e.g. gs://kx-hub-batch/llm)
+    LLM_BATCH_SHARD_SIZE: Requests per request file (default: 1000)
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .base import BaseLLMClient, GenerationConfig, LLMResponse
+from .structured import to_gemini_schema
+
+logger = logging.getLogger(__name__)
+
+SHARD_SIZE = int(os.environ.get("LLM_BATCH_SHARD_SIZE", "1000"))
+DEFAULT_POLL_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 24 * 3600  # Vertex batch jobs may queue for hours
+
+MANIFEST_FILE = "manifest.json"
+REQUESTS_DIR = "requests"
+RESULTS_DIR = "results"
+
+# Job states reported by backends
+STATE_RUNNING = "running"
+STATE_SUCCEEDED = "succeeded"
+STATE_FAILED = "failed"
+
+
+@dataclass
+class BatchRequest:
+    """One request of a batch job."""
+
+    key: str
+    prompt: str
+    config: Optional[GenerationConfig] = None
+    system_prompt: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    def to_line(self) -> Dict[str, Any]:
+        """Return the provider-neutral JSONL representation."""
+        return {
+            "key": self.key,
+            "prompt": self.prompt,
+            "system_prompt": self.system_prompt,
+            "config": asdict(self.config or GenerationConfig()),
+            "metadata": self.metadata or {},
+        }
+
+    @classmethod
+    def from_line(cls, line: Dict[str, Any]) -> "BatchRequest":
+        """Create a request from its JSONL representation."""
+        return cls(
+            key=line["key"],
+            prompt=line["prompt"],
+            config=GenerationConfig(**(line.get("config") or {})),
+            system_prompt=line.get("system_prompt"),
+            metadata=line.get("metadata") or {},
+        )
+
+
+@dataclass
+class BatchResult:
+    """One parsed result line; exactly one of text and error is set."""
+
+    key: Optional[str]
+    text: Optional[str] = None
+    error: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    """Short hash used to match results that come back without a key."""
+    return hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# Request files
+# ============================================================================
+
+
+def write_request_shards(
+    requests: Iterable[BatchRequest],
+    output_dir: str,
+    shard_size: Optional[int] = None,
+) -> List[str]:
+    """
+    Stream requests into sharded JSONL files.
+
+    Args:
+        requests: Requests to write (consumed lazily)
+        output_dir: Directory for the shard files
+        shard_size: Requests per file (default: LLM_BATCH_SHARD_SIZE)
+
+    Returns:
+        Paths of the written shard files, in order
+    """
+    shard_size = shard_size or SHARD_SIZE
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths: List[str] = []
+    handle = None
+    count = 0
+    try:
+        for request in requests:
+            if count % shard_size == 0:
+                if handle is not None:
+                    handle.close()
+                path = os.path.join(output_dir, f"requests-{len(paths):05d}.jsonl")
+                handle = open(path, "w", encoding="utf-8")
+                paths.append(path)
+            handle.write(json.dumps(request.to_line(), ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if handle is not None:
+            handle.close()
+
+    logger.info(f"Wrote {count} batch requests to {len(paths)} shard(s) in {output_dir}")
+    return paths
+
+
+def iter_requests(paths: Iterable[str]) -> Iterator[BatchRequest]:
+    """Stream requests back from shard files."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield BatchRequest.from_line(json.loads(line))
+
+
+def index_requests(paths: Iterable[str]):
+    """
+    Index request files for result handling.
+
+    Returns:
+        Tuple of (metadata by key, key by prompt fingerprint)
+    """
+    metadata_by_key: Dict[str, Dict[str, Any]] = {}
+    keys_by_fingerprint: Dict[str, str] = {}
+    for request in iter_requests(paths):
+        metadata_by_key[request.key] = request.metadata or {}
+        keys_by_fingerprint[prompt_fingerprint(request.prompt)] = request.key
+    return metadata_by_key, keys_by_fingerprint
+
+
+# ============================================================================
+# Result files
+# ============================================================================
+
+
+def _parse_gemini_response(response: Dict[str, Any]) -> BatchResult:
+    """Parse a Vertex AI GenerateContentResponse dict."""
+    usage = response.get("usageMetadata") or {}
+    candidates = response.get("candidates") or []
+    parts = ((candidates[0].get("content") or {}).get("parts") or []) if candidates else []
+    text = "".join(part.get("text", "") for part in parts)
+    result = BatchResult(
+        key=None,
+        input_tokens=usage.get("promptTokenCount"),
+        output_tokens=usage.get("candidatesTokenCount"),
+    )
+    if text.strip():
+        result.text = text
+    else:
+        finish_reason = candidates[0].get("finishReason") if candidates else None
+        result.error = f"Empty response (finish_reason={finish_reason})"
+    return result
+
+
+def parse_result_line(
+    line: Dict[str, Any], keys_by_fingerprint: Optional[Dict[str, str]] = None
+) -> BatchResult:
+    """
+    Parse one result line from any backend.
+
+    Understands the neutral format written by LocalBatchBackend and Vertex
+    AI batch prediction output ({"request": ..., "response": ..., "status": ...}).
+
+    Args:
+        line: Decoded JSON result line
+        keys_by_fingerprint: Optional prompt fingerprint -> key mapping for
+            results that do not carry their key
+
+    Returns:
+        BatchResult (key is None if it cannot be determined)
+    """
+    response = line.get("response")
+    error = line.get("error") or line.get("status") or None
+
+    if isinstance(response, dict) and "candidates" in response:
+        result = _parse_gemini_response(response)
+    elif isinstance(response, dict):
+        result = BatchResult(
+            key=None,
+            text=response.get("text"),
+            input_tokens=response.get("input_tokens"),
+            output_tokens=response.get("output_tokens"),
+        )
+        if not result.text:
+            result.error = "Empty response"
+    else:
+        result = BatchResult(key=None, error="No response")
+
+    if error:
+        result.text = None
+        result.error = str(error)
+
+    result.key = line.get("key")
+    if result.key is None and keys_by_fingerprint:
+        request = line.get("request") or {}
+        contents = request.get("contents") or []
+        parts = (contents[0].get("parts") or []) if contents else []
+        prompt = "".join(part.get("text", "") for part in parts)
+        result.key = keys_by_fingerprint.get(prompt_fingerprint(prompt))
+
+    return result
+
+
+def iter_results(
+    paths: Iterable[str], keys_by_fingerprint: Optional[Dict[str, str]] = None
+) -> Iterator[BatchResult]:
+    """
+    Stream-parse result JSONL files without loading them into memory.
+
+    Malformed lines are reported as results with key None and an error.
+
+    Args:
+        paths: Result file paths
+        keys_by_fingerprint: Optional mapping for results without a key
+
+    Yields:
+        BatchResult per result line
+    """
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Malformed result line {path}:{line_number}: {e}")
+                    yield BatchResult(key=None, error=f"Malformed result line: {e}")
+                    continue
+                yield parse_result_line(data, keys_by_fingerprint)
+
+
+# ============================================================================
+# Backends
+# ============================================================================
+
+
+class BatchBackend(ABC):
+    """A service that runs request files and produces result files."""
+
+    name = "base"
+
+    @abstractmethod
+    def submit(self, request_files: List[str], output_dir: str) -> str:
+        """
+        Submit request files as one batch job.
+
+        Args:
+            request_files: Neutral-format request shard paths
+            output_dir: Local directory for result files
+
+        Returns:
+            Job ID (persisted in the manifest for resume)
+        """
+
+    @abstractmethod
+    def status(self, job_id: str) -> str:
+        """Return STATE_RUNNING, STATE_SUCCEEDED or STATE_FAILED."""
+
+    @abstractmethod
+    def result_files(self, job_id: str, output_dir: str) -> List[str]:
+        """Return local paths of the job's result files."""
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    File-based stand-in for a batch service.
+
+    Runs every request synchronously during submit() through an online
+    client (or any callable returning an LLMResponse or text) and writes one
+    result file per request file. The job ID is the job's result directory,
+    so a resumed run finds the results of an earlier submit.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        client: Optional[BaseLLMClient] = None,
+        responder: Optional[Callable[[BatchRequest], Any]] = None,
+    ):
+        """
+        Initialize local backend.
+
+        Args:
+            client: LLM client used for requests
+            responder: Alternative to client: callable(request) returning an
+                LLMResponse or response text (tests)
+        """
+        if client is None and responder is None:
+            raise ValueError("LocalBatchBackend needs a client or a responder")
+        self.client = client
+        self.responder = responder
+
+    def _respond(self, request: BatchRequest) -> Dict[str, Any]:
+        try:
+            if self.responder is not None:
+                response = self.responder(request)
+            else:
+                response = self.client.generate(
+                    request.prompt, request.config, request.system_prompt
+                )
+        except Exception as e:
+            return {"key": request.key, "error": str(e)}
+
+        if isinstance(response, LLMResponse):
+            return {
+                "key": request.key,
+                "response": {
+                    "text": response.text,
+                    "input_tokens": response.input_tokens,
+                    "output_tokens": response.output_tokens,
+                },
+            }
+        return {"key": request.key, "response": {"text": str(response)}}
+
+    def submit(self, request_files: List[str], output_dir: str) -> str:
+        # The job ID is the job directory, so state survives a restart
+        run_name = f"local-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')}"
+        job_dir = os.path.abspath(os.path.join(output_dir, run_name))
+        os.makedirs(job_dir, exist_ok=True)
+
+        for index, path in enumerate(request_files):
+            result_path = os.path.join(job_dir, f"results-{index:05d}.jsonl")
+            with open(result_path, "w", encoding="utf-8") as out:
+                for request in iter_requests([path]):
+                    out.write(json.dumps(self._respond(request), ensure_ascii=False) + "\n")
+
+        # Marker written last: a crash mid-job leaves the job unfinished
+        with open(os.path.join(job_dir, "_SUCCESS"), "w") as f:
+            f.write(run_name)
+        return job_dir
+
+    def status(self, job_id: str) -> str:
+        if os.path.exists(os.path.join(job_id, "_SUCCESS")):
+            return STATE_SUCCEEDED
+        return STATE_FAILED
+
+    def result_files(self, job_id: str, output_dir: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(job_id, "results-*.jsonl")))
+
+
+def to_gemini_request(request: BatchRequest, model_id: str) -> Dict[str, Any]:
+    """
+    Convert a neutral request to a Vertex AI Gemini batch input line.
+
+    Mirrors GeminiClient.generate() (thinking disabled on flash models, JSON
+    mode when the config has a response schema).
+    """
+    config = request.config or GenerationConfig()
+    generation_config = {
+        "temperature": config.temperature,
+        "maxOutputTokens": config.max_output_tokens,
+        "topP": config.top_p,
+        "topK": config.top_k,
+        "candidateCount": 1,
+    }
+    if not config.enable_thinking and "flash" in model_id.lower():
+        generation_config["thinkingConfig"] = {"thinkingBudget": 0}
+    if config.response_schema:
+        generation_config["responseMimeType"] = "application/json"
+        generation_config["responseSchema"] = to_gemini_schema(config.response_schema)
+
+    body: Dict[str, Any] = {
+        "contents": [{"role": "user", "parts": [{"text": request.prompt}]}],
+        "generationConfig": generation_config,
+    }
+    if request.system_prompt:
+        body["systemInstruction"] = {"parts": [{"text": request.system_prompt}]}
+    return {"key": request.key, "request": body}
+
+
+class VertexBatchBackend(BatchBackend):
+    """
+    Vertex AI batch prediction for Gemini models.
+
+    Request shards are converted to the Gemini batch format and uploaded to
+    LLM_BATCH_GCS_URI; results are downloaded to the local output directory.
+    Results that come back without their key are matched by prompt
+    fingerprint (see parse_result_line).
+
+    Requires: google-cloud-aiplatform, google-cloud-storage
+    """
+
+    name = "vertex"
+
+    def __init__(
+        self,
+        model_id: str,
+        project_id: Optional[str] = None,
+        region: Optional[str] = None,
+        gcs_uri: Optional[str] = None,
+    ):
+        """
+        Initialize Vertex batch backend.
+
+        Args:
+            model_id: Gemini model ID (e.g., "gemini-2.5-flash")
+            project_id: GCP project ID (uses GCP_PROJECT env var if None)
+            region: GCP region (uses GCP_REGION env var if None)
+            gcs_uri: Cloud Storage prefix (uses LLM_BATCH_GCS_URI if None)
+        """
+        self.model_id = model_id
+        self.project_id = project_id or os.environ.get("GCP_PROJECT", "kx-hub")
+        self.region = region or os.environ.get("GCP_REGION", "europe-west4")
+        self.gcs_uri = (gcs_uri or os.environ.get("LLM_BATCH_GCS_URI", "")).rstrip("/")
+        if not self.gcs_uri.startswith("gs://"):
+            raise ValueError("LLM_BATCH_GCS_URI must be set to a gs:// prefix for Vertex batch jobs")
+        self._initialized = False
+
+    def _ensure_initialized(self) -> None:
+        if not self._initialized:
+            import vertexai
+
+            vertexai.init(project=self.project_id, location=self.region)
+            self._initialized = True
+
+    def _bucket_and_prefix(self, uri: str):
+        from google.cloud import storage
+
+        bucket_name, _, prefix = uri[len("gs://"):].partition("/")
+        return storage.Client(project=self.project_id).bucket(bucket_name), prefix
+
+    def submit(self, request_files: List[str], output_dir: str) -> str:
+        from vertexai.batch_prediction import BatchPredictionJob
+
+        self._ensure_initialized()
+        run_name = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        bucket, prefix = self._bucket_and_prefix(self.gcs_uri)
+
+        input_uris = []
+        for path in request_files:
+            lines = (
+                json.dumps(to_gemini_request(request, self.model_id), ensure_ascii=False)
+                for request in iter_requests([path])
+            )
+            blob_name = f"{prefix}/{run_name}/input/{os.path.basename(path)}".lstrip("/")
+            bucket.blob(blob_name).upload_from_string(
+                "\n".join(lines) + "\n", content_type="application/jsonl"
+            )
+            input_uris.append(f"gs://{bucket.name}/{blob_name}")
+
+        job = BatchPredictionJob.submit(
+            source_model=self.model_id,
+            input_dataset=input_uris,
+            output_uri_prefix=f"{self.gcs_uri}/{run_name}/output",
+        )
+        logger.info(f"Submitted Vertex batch job {job.resource_name} ({len(input_uris)} files)")
+        return job.resource_name
+
+    def status(self, job_id: str) -> str:
+        from vertexai.batch_prediction import BatchPredictionJob
+
+        self._ensure_initialized()
+        job = BatchPredictionJob(job_id)
+        if not job.has_ended:
+            return STATE_RUNNING
+        return STATE_SUCCEEDED if job.has_succeeded else STATE_FAILED
+
+    def result_files(self, job_id: str, output_dir: str) -> List[str]:
+        from vertexai.batch_prediction import BatchPredictionJob
+
+        self._ensure_initialized()
+        job = BatchPredictionJob(job_id)
+        bucket, prefix = self._bucket_and_prefix(job.output_location)
+
+        local_dir = os.path.join(output_dir, job_id.rsplit("/", 1)[-1])
+        os.makedirs(local_dir, exist_ok=True)
+        paths = []
+        for blob in bucket.list_blobs(prefix=prefix):
+            if not blob.name.endswith(".jsonl"):
+                continue
+            local_path = os.path.join(local_dir, blob.name.replace("/", "_"))
+            if not os.path.exists(local_path):
+                blob.download_to_filename(local_path)
+            paths.append(local_path)
+        return sorted(paths)
+
+
+def get_batch_backend(
+    name: Optional[str] = None,
+    model: Optional[str] = None,
+    client: Optional[BaseLLMClient] = None,
+) -> BatchBackend:
+    """
+    Create a batch backend.
+
+    Args:
+        name: "vertex" or "local" (uses LLM_BATCH_BACKEND env var if None)
+        model: Model name or alias (default model if None)
+        client: Online client for the local backend (created if None)
+
+    Returns:
+        Configured BatchBackend
+
+    Raises:
+        ValueError: For unknown backends or models without batch support
+    """
+    from . import get_client
+    from .base import LLMProvider
+    from .config import get_default_model, get_model_info, resolve_model_name
+
+    name = (name or os.environ.get("LLM_BATCH_BACKEND", "vertex")).lower()
+
+    if name == "local":
+        return LocalBatchBackend(client=client or get_client(model))
+
+    if name == "vertex":
+        model_name = resolve_model_name(model) if model else get_default_model()
+        model_info = get_model_info(model_name)
+        if not model_info or model_info.provider != LLMProvider.GEMINI:
+            raise ValueError(f"Vertex batch prediction supports Gemini models only, got {model_name}")
+        return VertexBatchBackend(model_id=model_info.model_id)
+
+    raise ValueError(f"Unknown batch backend: {name}")
+
+
+# ============================================================================
+# Job runner (resumable)
+# ============================================================================
+
+
+def _load_manifest(work_dir: str) -> Dict[str, Any]:
+    path = os.path.join(work_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_manifest(work_dir: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(work_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def wait_for_job(
+    backend: BatchBackend,
+    job_id: str,
+    poll_seconds: float = DEFAULT_POLL_SECONDS,
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    sleep: Callable[[float], None] = time.sleep,
+) -> str:
+    """
+    Poll a batch job until it ends.
+
+    Returns:
+        Final state (STATE_SUCCEEDED or STATE_FAILED)
+
+    Raises:
+        TimeoutError: If the job is still running after timeout_seconds
+    """
+    waited = 0.0
+    while True:
+        state = backend.status(job_id)
+        if state != STATE_RUNNING:
+            return state
+        if waited >= timeout_seconds:
+            raise TimeoutError(f"Batch job {job_id} still running after {waited:.0f}s")
+        logger.info(f"Batch job {job_id} running, next check in {poll_seconds:.0f}s")
+        sleep(poll_seconds)
+        waited += poll_seconds
+
+
+def run_batch_job(
+    work_dir: str,
+    render: Callable[[str], List[str]],
+    backend: BatchBackend,
+    handle_results: Callable[[Iterator[BatchResult], Dict[str, Dict[str, Any]]], Dict[str, int]],
+    poll_seconds: float = DEFAULT_POLL_SECONDS,
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+) -> Dict[str, Any]:
+    """
+    Run (or resume) a batch job in work_dir.
+
+    Progress is recorded in work_dir/manifest.json after every step: the
+    rendered request files, the submitted job ID and each fully handled
+    result file. Re-running with the same work_dir skips finished steps, so
+    an interrupted run never re-renders, re-submits or re-writes a
+    completed result file.
+
+    Args:
+        work_dir: Job directory (created if missing)
+        render: Callable(requests_dir) writing request shards, returning paths
+        backend: Batch backend
+        handle_results: Callable(results, metadata_by_key) persisting the
+            results of one result file, returning counters
+            (e.g. {"written": 10, "failed": 1})
+        poll_seconds: Status polling interval
+        timeout_seconds: Maximum wait for the job
+
+    Returns:
+        Dictionary with job_id, state, request_files, result_files and the
+        summed handle_results counters
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    manifest = _load_manifest(work_dir)
+
+    if "request_files" not in manifest:
+        manifest["request_files"] = render(os.path.join(work_dir, REQUESTS_DIR))
+        manifest["created_at"] = datetime.now(timezone.utc).isoformat()
+        _save_manifest(work_dir, manifest)
+    else:
+        logger.info(f"Resuming batch job in {work_dir}")
+
+    summary: Dict[str, Any] = {"request_files": len(manifest["request_files"])}
+    if not manifest["request_files"]:
+        logger.info("No batch requests to submit")
+        return {**summary, "job_id": None, "state": STATE_SUCCEEDED, "result_files": 0}
+
+    results_dir = os.path.join(work_dir, RESULTS_DIR)
+    if not manifest.get("job_id"):
+        manifest["job_id"] = backend.submit(manifest["request_files"], results_dir)
+        manifest["backend"] = backend.name
+        _save_manifest(work_dir, manifest)
+
+    job_id = manifest["job_id"]
+    state = wait_for_job(backend, job_id, poll_seconds, timeout_seconds)
+    manifest["state"] = state
+    _save_manifest(work_dir, manifest)
+    summary.update({"job_id": job_id, "state": state})
+    if state != STATE_SUCCEEDED:
+        logger.error(f"Batch job {job_id} ended in state {state}")
+        return {**summary, "result_files": 0}
+
+    handled = manifest.setdefault("handled_result_files", {})
+    result_files = backend.result_files(job_id, results_dir)
+    metadata_by_key, keys_by_fingerprint = index_requests(manifest["request_files"])
+    for path in result_files:
+        name = os.path.basename(path)
+        if name in handled:
+            counts = handled[name]
+        else:
+            counts = handle_results(
+                iter_results([path], keys_by_fingerprint), metadata_by_key
+            )
+            handled[name] = counts
+            _save_manifest(work_dir, manifest)
+            logger.info(f"Handled batch result file {name}: {counts}")
+        for key, value in counts.items():
+            summary[key] = summary.get(key, 0) + value
+
+    summary["result_files"] = len(result_files)
+    return summary
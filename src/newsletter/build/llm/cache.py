@@ -0,0 +1,535 @@
+"""
+LLM Response Cache
+
+Opt-in cache for LLM responses, keyed by sha256(model_id, prompt,
+system_prompt, GenerationConfig). A byte-identical request with the same
+model and configuration is answered from the cache instead of the provider:
+retries after downstream failures, re-runs of batch tools and recurring
+inputs (e.g. the same Tavily URL scored again) cost nothing.
+
+Backends:
+- MemoryResponseCache: in-process LRU (long-running servers)
+- LocalResponseCache: one JSON file per key on local disk (CLI tools)
+- FirestoreResponseCache: one document per key (shared across instances)
+
+Entries expire after a TTL. Like the embedding store, a failing backend
+never raises: lookups degrade to misses and writes are dropped.
+
+Configuration (read lazily on first use):
+    LLM_RESPONSE_CACHE: "memory", "local", "firestore" or "off" (default: off)
+    LLM_RESPONSE_CACHE_TTL: Entry lifetime in seconds, 0 = no expiry
+        (default: 604800 = 7 days)
+    LLM_RESPONSE_CACHE_SIZE: Entries kept by the memory backend (default: 1024)
+    LLM_RESPONSE_CACHE_PATH: Directory for the local backend
+        (default: ~/.cache/kx-hub/llm-responses)
+    LLM_RESPONSE_CACHE_COLLECTION: Firestore collection
+        (default: llm_response_cache)
+
+Usage:
+    from llm import get_client, with_response_cache, cache_stats
+
+    client = with_response_cache(get_client())      # explicit opt-in
+    client = get_client(response_cache=True)        # same, via the factory
+
+    client.generate_json(prompt)
+    print(cache_stats())  # {"hits": 3, "misses": 10, ...}
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .base import BaseLLMClient, GenerationConfig, LLMProvider, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MEMORY_SIZE = 1024
+DEFAULT_LOCAL_PATH = os.path.join("~", ".cache", "kx-hub", "llm-responses")
+DEFAULT_COLLECTION = "llm_response_cache"
+
+_cache: Optional["ResponseCache"] = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+_stats = {"hits": 0, "misses": 0, "writes": 0, "expired": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, value: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += value
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Return process-wide response cache statistics.
+
+    Returns:
+        Dictionary with hits, misses, writes, expired, evictions and hit_rate
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats() -> None:
+    """Reset the response cache statistics."""
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def response_cache_key(
+    model_id: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    config: Optional[GenerationConfig] = None,
+) -> str:
+    """
+    Compute the cache key for a generation request.
+
+    Args:
+        model_id: Provider model ID
+        prompt: User prompt
+        system_prompt: Optional system prompt
+        config: Generation configuration (defaults if None)
+
+    Returns:
+        Hex sha256 digest
+    """
+    config_json = json.dumps(
+        asdict(config or GenerationConfig()), sort_keys=True, default=str
+    )
+    hasher = hashlib.sha256()
+    for part in (model_id, system_prompt or "", config_json, prompt):
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+def _to_entry(response: LLMResponse, ttl_seconds: int) -> Dict[str, Any]:
+    return {
+        "text": response.text,
+        "model": response.model,
+        "provider": response.provider.value,
+        "input_tokens": response.input_tokens,
+        "output_tokens": response.output_tokens,
+        "cache_read_tokens": response.cache_read_tokens,
+        "cache_write_tokens": response.cache_write_tokens,
+        "finish_reason": response.finish_reason,
+        "expires_at": time.time() + ttl_seconds if ttl_seconds else None,
+    }
+
+
+def _from_entry(entry: Dict[str, Any]) -> LLMResponse:
+    return LLMResponse(
+        text=entry["text"],
+        model=entry["model"],
+        provider=LLMProvider(entry["provider"]),
+        input_tokens=entry.get("input_tokens"),
+        output_tokens=entry.get("output_tokens"),
+        cache_read_tokens=entry.get("cache_read_tokens"),
+        cache_write_tokens=entry.get("cache_write_tokens"),
+        finish_reason=entry.get("finish_reason"),
+    )
+
+
+def _is_expired(entry: Dict[str, Any]) -> bool:
+    expires_at = entry.get("expires_at")
+    return expires_at is not None and expires_at <= time.time()
+
+
+class ResponseCache(ABC):
+    """
+    Abstract key/value store for LLM responses.
+
+    Implementations must never raise on lookup or write failures - a broken
+    cache degrades to a miss so generation still proceeds.
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Initialize cache.
+
+        Args:
+            ttl_seconds: Entry lifetime, 0 for no expiry
+        """
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the raw entry for key, or None."""
+
+    @abstractmethod
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store a raw entry."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """Return the cached response for key, or None on miss or expiry."""
+        try:
+            entry = self._read(key)
+        except Exception as e:
+            logger.warning(f"LLM response cache lookup failed: {e}")
+            return None
+        if entry is None:
+            return None
+        if _is_expired(entry):
+            _count("expired")
+            self.delete(key)
+            return None
+        return _from_entry(entry)
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """Store a response with the cache's TTL."""
+        try:
+            self._write(key, _to_entry(response, self.ttl_seconds))
+            _count("writes")
+        except Exception as e:
+            logger.warning(f"LLM response cache write failed: {e}")
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache."""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_SIZE, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Initialize memory cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl_seconds: Entry lifetime, 0 for no expiry
+        """
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                _count("evictions")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LocalResponseCache(ResponseCache):
+    """Cache backed by one JSON file per key (256 subdirectories by key prefix)."""
+
+    def __init__(self, path: str = DEFAULT_LOCAL_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Initialize local cache.
+
+        Args:
+            path: Cache directory (created if missing)
+            ttl_seconds: Entry lifetime, 0 for no expiry
+        """
+        super().__init__(ttl_seconds)
+        self.path = Path(os.path.expanduser(path))
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        entry_file = self._file(key)
+        if not entry_file.exists():
+            return None
+        with open(entry_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        entry_file = self._file(key)
+        entry_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = entry_file.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_file, entry_file)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._file(key).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"LLM response cache delete failed: {e}")
+
+
+class FirestoreResponseCache(ResponseCache):
+    """
+    Cache backed by a Firestore collection, one document per key.
+
+    Documents carry an expire_time timestamp, so a Firestore TTL policy on
+    that field can purge expired entries server-side.
+    """
+
+    def __init__(self, client=None, collection: str = DEFAULT_COLLECTION, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Initialize Firestore cache.
+
+        Args:
+            client: Firestore client (created lazily from GCP_PROJECT if None)
+            collection: Collection name holding cache documents
+            ttl_seconds: Entry lifetime, 0 for no expiry
+        """
+        super().__init__(ttl_seconds)
+        self._client = client
+        self.collection = collection
+
+    def _get_client(self):
+        if self._client is None:
+            from google.cloud import firestore
+
+            self._client = firestore.Client(project=os.environ.get("GCP_PROJECT"))
+        return self._client
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        snapshot = self._get_client().collection(self.collection).document(key).get()
+        if not snapshot.exists:
+            return None
+        return snapshot.to_dict()
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        from datetime import datetime, timezone
+
+        data = dict(entry)
+        if entry["expires_at"] is not None:
+            data["expire_time"] = datetime.fromtimestamp(entry["expires_at"], tz=timezone.utc)
+        self._get_client().collection(self.collection).document(key).set(data)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._get_client().collection(self.collection).document(key).delete()
+        except Exception as e:
+            logger.warning(f"LLM response cache delete failed: {e}")
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the process-wide response cache configured via LLM_RESPONSE_CACHE.
+
+    Returns:
+        Configured cache, or None if caching is off
+    """
+    global _cache, _cache_configured
+
+    if _cache_configured:
+        return _cache
+
+    with _cache_lock:
+        if not _cache_configured:
+            backend = os.environ.get("LLM_RESPONSE_CACHE", "off").strip().lower()
+            ttl = int(os.environ.get("LLM_RESPONSE_CACHE_TTL", str(DEFAULT_TTL_SECONDS)))
+            if backend == "memory":
+                _cache = MemoryResponseCache(
+                    int(os.environ.get("LLM_RESPONSE_CACHE_SIZE", str(DEFAULT_MEMORY_SIZE))), ttl
+                )
+            elif backend == "local":
+                _cache = LocalResponseCache(
+                    os.environ.get("LLM_RESPONSE_CACHE_PATH", DEFAULT_LOCAL_PATH), ttl
+                )
+            elif backend == "firestore":
+                _cache = FirestoreResponseCache(
+                    collection=os.environ.get("LLM_RESPONSE_CACHE_COLLECTION", DEFAULT_COLLECTION),
+                    ttl_seconds=ttl,
+                )
+            elif backend not in ("", "off", "none"):
+                logger.warning(f"Unknown LLM_RESPONSE_CACHE backend '{backend}', disabled")
+            if _cache is not None:
+                logger.info(f"Using LLM response cache: {_cache.__class__.__name__}")
+            _cache_configured = True
+
+    return _cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Override the process-wide response cache (None disables it)."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = cache
+        _cache_configured = True
+
+
+def reset_response_cache() -> None:
+    """Forget the configured cache so LLM_RESPONSE_CACHE is re-read on next use."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = None
+        _cache_configured = False
+
+
+class CachedLLMClient(BaseLLMClient):
+    """
+    Decorator adding a response cache to any LLM client.
+
+    generate() consults the cache first; generate_json() goes through
+    generate(), and drops the cached entry when its text is not valid JSON
+    so a retry reaches the provider again.
+    """
+
+    def __init__(self, client: BaseLLMClient, cache: ResponseCache):
+        """
+        Wrap a client.
+
+        Args:
+            client: Client answering cache misses
+            cache: Response cache
+        """
+        super().__init__(client.model_id, client.project_id, client.region)
+        self.client = client
+        self.cache = cache
+        self._initialized = True
+
+    @property
+    def provider(self) -> LLMProvider:
+        return self.client.provider
+
+    def _initialize(self) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        # Provider-specific attributes (e.g. ClaudeClient.backend)
+        client = self.__dict__.get("client")
+        if client is None:
+            raise AttributeError(name)
+        return getattr(client, name)
+
+    def _lookup(self, key: str) -> Optional[LLMResponse]:
+        started = time.monotonic()
+        cached = self.cache.get(key)
+        if cached is not None:
+            _count("hits")
+            self._record_call(started, cached, cache_hit=True)
+            logger.debug(f"LLM response cache hit for {key[:12]}")
+        else:
+            _count("misses")
+        return cached
+
+    def _store(self, key: str, response: LLMResponse) -> None:
+        if response.text and response.text.strip():
+            self.cache.put(key, response)
+
+    def generate(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        key = response_cache_key(self.model_id, prompt, system_prompt, config)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        response = self.client.generate(prompt, config, system_prompt)
+        self._store(key, response)
+        return response
+
+    def generate_json(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        try:
+            return super().generate_json(prompt, config, system_prompt)
+        except ValueError:
+            self.cache.delete(response_cache_key(self.model_id, prompt, system_prompt, config))
+            raise
+
+    async def agenerate(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        # Backends may do blocking I/O (disk, Firestore)
+        key = response_cache_key(self.model_id, prompt, system_prompt, config)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return cached
+
+        response = await self.client.agenerate(prompt, config, system_prompt)
+        await asyncio.to_thread(self._store, key, response)
+        return response
+
+    async def agenerate_json(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        try:
+            return await super().agenerate_json(prompt, config, system_prompt)
+        except ValueError:
+            key = response_cache_key(self.model_id, prompt, system_prompt, config)
+            await asyncio.to_thread(self.cache.delete, key)
+            raise
+
+    def __repr__(self) -> str:
+        return f"CachedLLMClient({self.client!r}, cache={self.cache.__class__.__name__})"
+
+
+def with_response_cache(
+    client: BaseLLMClient, cache: Optional[ResponseCache] = None
+) -> BaseLLMClient:
+    """
+    Opt a client into response caching.
+
+    Args:
+        client: Client to wrap
+        cache: Cache to use (default: the LLM_RESPONSE_CACHE cache, or a
+            process-wide in-memory LRU if that is off)
+
+    Returns:
+        Caching client (the client itself if it already caches)
+    """
+    if isinstance(client, CachedLLMClient):
+        return client
+    if cache is None:
+        cache = get_response_cache()
+    if cache is None:
+        cache = _default_memory_cache()
+    return CachedLLMClient(client, cache)
+
+
+_memory_cache: Optional[MemoryResponseCache] = None
+
+
+def _default_memory_cache() -> MemoryResponseCache:
+    global _memory_cache
+    with _cache_lock:
+        if _memory_cache is None:
+            _memory_cache = MemoryResponseCache(
+                int(os.environ.get("LLM_RESPONSE_CACHE_SIZE", str(DEFAULT_MEMORY_SIZE))),
+                int(os.environ.get("LLM_RESPONSE_CACHE_TTL", str(DEFAULT_TTL_SECONDS))),
+            )
+        return _memory_cache
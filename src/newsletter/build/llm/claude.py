@@ -11,24 +11,46 @@ Configuration:
     CLAUDE_REGION: GCP region for Vertex AI (default: europe-west1)
 """
 
+import asyncio
+import json
 import logging
 import os
 import time
-from typing import Optional
+import weakref
+from typing import Any, Dict, Optional
 
-from .base import BaseLLMClient, GenerationConfig, LLMProvider, LLMResponse
+from .base import BaseLLMClient, GenerationConfig, LLMProvider, LLMResponse, loop_local
+from .governor import get_governor
+from .structured import to_claude_tool
 
 logger = logging.getLogger(__name__)
 
-# Retry configuration
+# Retry configuration (backoff and admission are handled by the governor)
 MAX_RETRIES = 3
-INITIAL_BACKOFF = 1.0
-MAX_BACKOFF = 30.0
 
 # Backend options
 BACKEND_VERTEX = "vertex"
 BACKEND_ANTHROPIC = "anthropic"
 
+# Shortest prompt prefix (tokens) Claude caches, by model family (first match);
+# shorter prefixes are processed normally and cache_control has no effect
+MIN_CACHEABLE_TOKENS = {"haiku-4-5": 4096, "opus-4-5": 4096, "haiku": 2048}
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+
+def _usage_count(usage, name: str) -> Optional[int]:
+    """Read an optional usage counter (absent on older API versions)."""
+    value = getattr(usage, name, None) if usage else None
+    return value if isinstance(value, int) else None
+
+
+def min_cacheable_tokens(model_id: str) -> int:
+    """Return the minimum cacheable prompt prefix for a Claude model, in tokens."""
+    for family, tokens in MIN_CACHEABLE_TOKENS.items():
+        if family in model_id:
+            return tokens
+    return DEFAULT_MIN_CACHEABLE_TOKENS
+
 
 def get_anthropic_api_key() -> Optional[str]:
     """
@@ -104,6 +126,9 @@ class ClaudeClient(BaseLLMClient):
 
         super().__init__(model_id, project_id, region)
         self._client = None
+        # Event loop -> async client; httpx clients are bound to their loop
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._uncacheable_logged = False
 
     @property
     def provider(self) -> LLMProvider:
@@ -178,6 +203,112 @@ class ClaudeClient(BaseLLMClient):
         self._client = AnthropicVertex(project_id=self.project_id, region=self.region)
         logger.info(f"Claude client initialized (vertex): {self.model_id}")
 
+    def _create_async_client(self):
+        """Create an async Anthropic client (direct or Vertex AI)."""
+        if self._backend == BACKEND_ANTHROPIC:
+            from anthropic import AsyncAnthropic
+
+            return AsyncAnthropic(api_key=get_anthropic_api_key())
+
+        from anthropic import AsyncAnthropicVertex
+
+        return AsyncAnthropicVertex(project_id=self.project_id, region=self.region)
+
+    def _get_async_client(self):
+        """Get the async client for the running event loop (created on first use)."""
+        return loop_local(self._async_clients, self._create_async_client)
+
+    def _build_request(
+        self, prompt: str, config: Optional[GenerationConfig], system_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build messages.create() kwargs for a request."""
+        config = config or GenerationConfig()
+
+        kwargs = {
+            "model": self._get_model_id_for_api(),
+            "max_tokens": config.max_output_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": config.temperature,
+            "top_p": config.top_p,
+        }
+
+        # Add top_k if supported (Claude specific)
+        if config.top_k:
+            kwargs["top_k"] = config.top_k
+
+        # Structured output: force a single tool call whose input is the schema
+        if config.response_schema:
+            tool, tool_choice = to_claude_tool(config.response_schema)
+            kwargs["tools"] = [tool]
+            kwargs["tool_choice"] = tool_choice
+
+        # Add system prompt if provided; a static prefix is marked cacheable
+        # (covers the tool definitions too, which precede it in the prompt)
+        if (
+            system_prompt
+            and config.cache_system_prompt
+            and self._prefix_is_cacheable(system_prompt, kwargs.get("tools"))
+        ):
+            kwargs["system"] = [
+                {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+            ]
+        elif system_prompt:
+            kwargs["system"] = system_prompt
+
+        return kwargs
+
+    def _prefix_is_cacheable(self, system_prompt: str, tools: Optional[list]) -> bool:
+        """Check whether tools + system prompt reach the model's cache minimum."""
+        prefix_chars = len(system_prompt) + (len(json.dumps(tools)) if tools else 0)
+        estimated_tokens = prefix_chars // 4  # Rough estimate
+        minimum = min_cacheable_tokens(self.model_id)
+        if estimated_tokens >= minimum:
+            return True
+        if not self._uncacheable_logged:
+            self._uncacheable_logged = True
+            logger.info(
+                f"System prompt (~{estimated_tokens} tokens) is below the {minimum}-token "
+                f"cache minimum for {self.model_id}; sending it without cache_control"
+            )
+        return False
+
+    def _parse_response(self, response) -> LLMResponse:
+        """Convert a Claude response into an LLMResponse."""
+        # Extract text from response
+        if not response.content or len(response.content) == 0:
+            raise ValueError("No content in Claude response")
+
+        # Claude returns content blocks, concatenate text blocks
+        # (a forced tool call carries the structured output as its input)
+        text_parts = []
+        for block in response.content:
+            if getattr(block, "type", None) == "tool_use":
+                text_parts = [json.dumps(block.input)]
+                break
+            if hasattr(block, "text"):
+                text_parts.append(block.text)
+
+        text = "".join(text_parts)
+
+        if not text.strip():
+            raise ValueError("Empty text from Claude API")
+
+        return LLMResponse(
+            text=text,
+            model=self.model_id,
+            provider=self.provider,
+            input_tokens=response.usage.input_tokens
+            if response.usage
+            else None,
+            output_tokens=response.usage.output_tokens
+            if response.usage
+            else None,
+            cache_read_tokens=_usage_count(response.usage, "cache_read_input_tokens"),
+            cache_write_tokens=_usage_count(response.usage, "cache_creation_input_tokens"),
+            finish_reason=response.stop_reason,
+            raw_response=response,
+        )
+
     def generate(
         self,
         prompt: str,
@@ -196,81 +327,75 @@ class ClaudeClient(BaseLLMClient):
             LLMResponse with generated text
         """
         self._ensure_initialized()
+        kwargs = self._build_request(prompt, config, system_prompt)
 
-        config = config or GenerationConfig()
-        model_id = self._get_model_id_for_api()
-
-        # Build messages
-        messages = [{"role": "user", "content": prompt}]
-
-        backoff = INITIAL_BACKOFF
+        governor = get_governor(self.provider.value, self.model_id)
+        started = time.monotonic()
 
         for attempt in range(MAX_RETRIES):
             try:
-                # Build API call kwargs
-                kwargs = {
-                    "model": model_id,
-                    "max_tokens": config.max_output_tokens,
-                    "messages": messages,
-                    "temperature": config.temperature,
-                    "top_p": config.top_p,
-                }
-
-                # Add system prompt if provided
-                if system_prompt:
-                    kwargs["system"] = system_prompt
-
-                # Add top_k if supported (Claude specific)
-                if config.top_k:
-                    kwargs["top_k"] = config.top_k
-
+                governor.acquire()
                 response = self._client.messages.create(**kwargs)
-
-                # Extract text from response
-                if not response.content or len(response.content) == 0:
-                    raise ValueError("No content in Claude response")
-
-                # Claude returns content blocks, concatenate text blocks
-                text_parts = []
-                for block in response.content:
-                    if hasattr(block, "text"):
-                        text_parts.append(block.text)
-
-                text = "".join(text_parts)
-
-                if not text.strip():
-                    raise ValueError("Empty text from Claude API")
-
-                return LLMResponse(
-                    text=text,
-                    model=self.model_id,
-                    provider=self.provider,
-                    input_tokens=response.usage.input_tokens
-                    if response.usage
-                    else None,
-                    output_tokens=response.usage.output_tokens
-                    if response.usage
-                    else None,
-                    finish_reason=response.stop_reason,
-                    raw_response=response,
-                )
+                llm_response = self._parse_response(response)
+                governor.record_success()
+                self._record_call(started, llm_response, retries=attempt)
+                return llm_response
 
             except Exception as e:
-                error_msg = str(e).lower()
-                is_retriable = any(
-                    x in error_msg
-                    for x in ["rate", "overloaded", "429", "500", "503", "timeout"]
-                )
+                retry_in = governor.record_error(e, attempt)
+                if retry_in is not None and attempt < MAX_RETRIES - 1:
+                    logger.warning(
+                        f"Retriable error (attempt {attempt + 1}/{MAX_RETRIES}): {e}. "
+                        f"Retrying after {retry_in:.1f}s"
+                    )
+                    if retry_in:
+                        time.sleep(retry_in)
+                else:
+                    logger.error(
+                        f"Claude generation failed after {attempt + 1} attempts: {e}"
+                    )
+                    self._record_call(started, error=e, retries=attempt)
+                    raise
+
+    async def _agenerate(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        """Generate text using the async Anthropic client (non-blocking backoff)."""
+        client = self._get_async_client()
+        kwargs = self._build_request(prompt, config, system_prompt)
+
+        governor = get_governor(self.provider.value, self.model_id)
+        started = time.monotonic()
 
-                if is_retriable and attempt < MAX_RETRIES - 1:
+        for attempt in range(MAX_RETRIES):
+            try:
+                await governor.acquire_async()
+                response = await client.messages.create(**kwargs)
+                llm_response = self._parse_response(response)
+                governor.record_success()
+                self._record_call(started, llm_response, retries=attempt)
+                return llm_response
+
+            except Exception as e:
+                retry_in = governor.record_error(e, attempt)
+                if retry_in is not None and attempt < MAX_RETRIES - 1:
                     logger.warning(
                         f"Retriable error (attempt {attempt + 1}/{MAX_RETRIES}): {e}. "
-                        f"Retrying after {backoff}s"
+                        f"Retrying after {retry_in:.1f}s"
                     )
-                    time.sleep(backoff)
-                    backoff = min(backoff * 2, MAX_BACKOFF)
+                    if retry_in:
+                        await asyncio.sleep(retry_in)
                 else:
                     logger.error(
                         f"Claude generation failed after {attempt + 1} attempts: {e}"
                     )
+                    self._record_call(started, error=e, retries=attempt)
                     raise
+
+            except BaseException as e:
+                # Cancelled (or interrupted): release a half-open probe slot
+                governor.record_error(e, attempt)
+                raise
@@ -4,18 +4,20 @@ Gemini LLM Client Implementation
 Uses Vertex AI SDK for Gemini models.
 """
 
+import asyncio
 import logging
 import time
-from typing import Optional
+import weakref
+from typing import Any, Dict, Optional, Tuple
 
-from .base import BaseLLMClient, GenerationConfig, LLMProvider, LLMResponse
+from .base import BaseLLMClient, GenerationConfig, LLMProvider, LLMResponse, loop_local
+from .governor import get_governor
+from .structured import to_gemini_schema
 
 logger = logging.getLogger(__name__)
 
-# Retry configuration
+# Retry configuration (backoff and admission are handled by the governor)
 MAX_RETRIES = 3
-INITIAL_BACKOFF = 1.0
-MAX_BACKOFF = 30.0
 
 
 # Models that require global endpoint (preview models)
@@ -58,6 +60,8 @@ class GeminiClient(BaseLLMClient):
 
         super().__init__(model_id, project_id, region)
         self._model = None
+        # Event loop -> model for async calls; its gRPC aio channel is loop-bound
+        self._async_models: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
     @property
     def provider(self) -> LLMProvider:
@@ -77,25 +81,16 @@ class GeminiClient(BaseLLMClient):
 
         logger.info(f"Gemini model initialized: {self.model_id}")
 
-    def generate(
-        self,
-        prompt: str,
-        config: Optional[GenerationConfig] = None,
-        system_prompt: Optional[str] = None,
-    ) -> LLMResponse:
-        """
-        Generate text using Gemini.
-
-        Args:
-            prompt: User prompt
-            config: Generation configuration
-            system_prompt: Optional system instruction
+    def _create_async_model(self):
+        """Create a model instance for async calls on one event loop."""
+        from vertexai.generative_models import GenerativeModel
 
-        Returns:
-            LLMResponse with generated text
-        """
-        self._ensure_initialized()
+        return GenerativeModel(self.model_id)
 
+    def _build_request(
+        self, prompt: str, config: Optional[GenerationConfig], system_prompt: Optional[str]
+    ) -> Tuple[str, Dict[str, Any], Dict[Any, Any]]:
+        """Build (prompt, generation config, safety settings) for a request."""
         from vertexai.generative_models import HarmBlockThreshold, HarmCategory
 
         config = config or GenerationConfig()
@@ -115,6 +110,11 @@ class GeminiClient(BaseLLMClient):
         if not config.enable_thinking and "flash" in self.model_id.lower():
             gemini_config["thinking_config"] = {"thinking_budget": 0}
 
+        # Native JSON mode constrained to the caller's schema
+        if config.response_schema:
+            gemini_config["response_mime_type"] = "application/json"
+            gemini_config["response_schema"] = to_gemini_schema(config.response_schema)
+
         # Safety settings - permissive for content generation
         safety_settings = {
             HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
@@ -123,85 +123,160 @@ class GeminiClient(BaseLLMClient):
             HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
         }
 
-        # Build content
-        contents = []
         if system_prompt:
             # Gemini uses system instruction differently - prepend to prompt
             full_prompt = f"{system_prompt}\n\n{prompt}"
         else:
             full_prompt = prompt
 
-        backoff = INITIAL_BACKOFF
+        return full_prompt, gemini_config, safety_settings
+
+    def _parse_response(self, response) -> LLMResponse:
+        """Convert a Gemini response into an LLMResponse."""
+        # Extract text from response
+        if not response.candidates or len(response.candidates) == 0:
+            raise ValueError("No response candidates from Gemini API")
+
+        candidate = response.candidates[0]
+        finish_reason = getattr(candidate, "finish_reason", None)
+
+        if not candidate.content or not candidate.content.parts:
+            raise ValueError(
+                f"Empty response from Gemini. Finish reason: {finish_reason}"
+            )
+
+        text = "".join(
+            [
+                part.text
+                for part in candidate.content.parts
+                if hasattr(part, "text")
+            ]
+        )
+
+        if not text.strip():
+            raise ValueError("Empty text from Gemini API")
+
+        # Extract usage if available
+        usage_metadata = getattr(response, "usage_metadata", None)
+        input_tokens = (
+            getattr(usage_metadata, "prompt_token_count", None)
+            if usage_metadata
+            else None
+        )
+        output_tokens = (
+            getattr(usage_metadata, "candidates_token_count", None)
+            if usage_metadata
+            else None
+        )
+
+        return LLMResponse(
+            text=text,
+            model=self.model_id,
+            provider=self.provider,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            finish_reason=str(finish_reason) if finish_reason else None,
+            raw_response=response,
+        )
+
+    def generate(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        """
+        Generate text using Gemini.
+
+        Args:
+            prompt: User prompt
+            config: Generation configuration
+            system_prompt: Optional system instruction
+
+        Returns:
+            LLMResponse with generated text
+        """
+        self._ensure_initialized()
+        full_prompt, gemini_config, safety_settings = self._build_request(
+            prompt, config, system_prompt
+        )
+
+        governor = get_governor(self.provider.value, self.model_id)
+        started = time.monotonic()
 
         for attempt in range(MAX_RETRIES):
             try:
+                governor.acquire()
                 response = self._model.generate_content(
                     full_prompt,
                     generation_config=gemini_config,
                     safety_settings=safety_settings,
                 )
+                llm_response = self._parse_response(response)
+                governor.record_success()
+                self._record_call(started, llm_response, retries=attempt)
+                return llm_response
 
-                # Extract text from response
-                if not response.candidates or len(response.candidates) == 0:
-                    raise ValueError("No response candidates from Gemini API")
-
-                candidate = response.candidates[0]
-                finish_reason = getattr(candidate, "finish_reason", None)
-
-                if not candidate.content or not candidate.content.parts:
-                    raise ValueError(
-                        f"Empty response from Gemini. Finish reason: {finish_reason}"
+            except Exception as e:
+                retry_in = governor.record_error(e, attempt)
+                if retry_in is not None and attempt < MAX_RETRIES - 1:
+                    logger.warning(
+                        f"Retriable error (attempt {attempt + 1}/{MAX_RETRIES}): {e}. Retrying after {retry_in:.1f}s"
                     )
+                    if retry_in:
+                        time.sleep(retry_in)
+                else:
+                    logger.error(
+                        f"Gemini generation failed after {attempt + 1} attempts: {e}"
+                    )
+                    self._record_call(started, error=e, retries=attempt)
+                    raise
 
-                text = "".join(
-                    [
-                        part.text
-                        for part in candidate.content.parts
-                        if hasattr(part, "text")
-                    ]
-                )
-
-                if not text.strip():
-                    raise ValueError("Empty text from Gemini API")
+    async def _agenerate(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+    ) -> LLMResponse:
+        """Generate text using the Vertex AI async API (non-blocking backoff)."""
+        self._ensure_initialized()
+        model = loop_local(self._async_models, self._create_async_model)
+        full_prompt, gemini_config, safety_settings = self._build_request(
+            prompt, config, system_prompt
+        )
 
-                # Extract usage if available
-                usage_metadata = getattr(response, "usage_metadata", None)
-                input_tokens = (
-                    getattr(usage_metadata, "prompt_token_count", None)
-                    if usage_metadata
-                    else None
-                )
-                output_tokens = (
-                    getattr(usage_metadata, "candidates_token_count", None)
-                    if usage_metadata
-                    else None
-                )
+        governor = get_governor(self.provider.value, self.model_id)
+        started = time.monotonic()
 
-                return LLMResponse(
-                    text=text,
-                    model=self.model_id,
-                    provider=self.provider,
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    finish_reason=str(finish_reason) if finish_reason else None,
-                    raw_response=response,
+        for attempt in range(MAX_RETRIES):
+            try:
+                await governor.acquire_async()
+                response = await model.generate_content_async(
+                    full_prompt,
+                    generation_config=gemini_config,
+                    safety_settings=safety_settings,
                 )
+                llm_response = self._parse_response(response)
+                governor.record_success()
+                self._record_call(started, llm_response, retries=attempt)
+                return llm_response
 
             except Exception as e:
-                error_msg = str(e).lower()
-                is_retriable = any(
-                    x in error_msg
-                    for x in ["rate", "quota", "429", "internal", "500", "503"]
-                )
-
-                if is_retriable and attempt < MAX_RETRIES - 1:
+                retry_in = governor.record_error(e, attempt)
+                if retry_in is not None and attempt < MAX_RETRIES - 1:
                     logger.warning(
-                        f"Retriable error (attempt {attempt + 1}/{MAX_RETRIES}): {e}. Retrying after {backoff}s"
+                        f"Retriable error (attempt {attempt + 1}/{MAX_RETRIES}): {e}. Retrying after {retry_in:.1f}s"
                     )
-                    time.sleep(backoff)
-                    backoff = min(backoff * 2, MAX_BACKOFF)
+                    if retry_in:
+                        await asyncio.sleep(retry_in)
                 else:
                     logger.error(
                         f"Gemini generation failed after {attempt + 1} attempts: {e}"
                     )
+                    self._record_call(started, error=e, retries=attempt)
                     raise
+
+            except BaseException as e:
+                # Cancelled (or interrupted): release a half-open probe slot
+                governor.record_error(e, attempt)
+                raise
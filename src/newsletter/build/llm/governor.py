@@ -0,0 +1,428 @@
+"""
+Process-wide adaptive request governor for model provider quotas.
+
+Provider quotas (Vertex AI Gemini, Claude, embeddings) apply per project and
+model, not per client object or thread. When every worker retries on its own
+schedule, a quota error makes all of them back off and return at the same
+moment, and the job oscillates between bursts and stalls. One Governor per
+provider/model is shared by every caller in the process instead:
+
+- Token-bucket admission: requests are spaced at the current rate. Each
+  caller reserves the next free slot and sleeps once, so waiting callers
+  wake up one slot apart instead of all at once
+- Adaptive rate (AIMD): a quota error halves the rate, each success adds
+  back 1% of the maximum
+- Global backoff: a quota error also puts the bucket into debt for the
+  current backoff time (doubling per congestion event, reset on success).
+  That pauses every caller, not only the one that was throttled. Errors
+  from requests that were already in flight count as one event
+- Circuit breaker: after N consecutive server errors the circuit opens and
+  calls fail fast with CircuitOpenError. After a cooldown a single probe is
+  admitted; success closes the circuit, failure reopens it. A probe that is
+  never reported (e.g. a cancelled task) is replaced after another cooldown
+
+Callers must report every exception from an admitted call to record_error(),
+not only the retriable ones, so that a failed probe releases the circuit.
+
+Configuration:
+    GOVERNOR_RATE_PER_MINUTE: Default maximum rate per provider/model
+        (default: 1800)
+    GOVERNOR_LIMITS: Per-key overrides, e.g.
+        "gemini:gemini-2.5-flash=3000,vertex:gemini-embedding-001=600"
+
+Usage:
+    governor = get_governor("gemini", "gemini-2.5-flash")
+
+    for attempt in range(MAX_RETRIES):
+        try:
+            governor.acquire()
+            result = call_api()
+            governor.record_success()
+            return result
+        except Exception as e:
+            delay = governor.record_error(e, attempt)
+            if delay is None or attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(delay)
+
+Deployment copies (keep in sync): src/llm/governor.py, src/embed/governor.py
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_PER_MINUTE = float(os.environ.get("GOVERNOR_RATE_PER_MINUTE", "1800"))
+
+# Error classes
+THROTTLE = "throttle"
+SERVER = "server"
+CLIENT = "client"
+
+# Error text / exception names that identify provider throttling
+_THROTTLE_MARKERS = (
+    "429",
+    "quota",
+    "rate limit",
+    "rate_limit",
+    "resource exhausted",
+    "resource_exhausted",
+    "too many requests",
+    "overloaded",
+)
+_THROTTLE_TYPES = ("ResourceExhausted", "RateLimitError", "TooManyRequests")
+
+# Transient server-side failures
+_SERVER_MARKERS = (
+    "500",
+    "502",
+    "503",
+    "504",
+    "internal",
+    "unavailable",
+    "timeout",
+    "timed out",
+    "deadline",
+)
+_SERVER_TYPES = (
+    "InternalServerError",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "APITimeoutError",
+    "APIConnectionError",
+    "TimeoutError",
+)
+
+# Shared process-wide governors, keyed by "provider:model"
+_governors: Dict[str, "Governor"] = {}
+_registry_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider/model circuit is open and calls fail fast."""
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify an exception raised by a provider call.
+
+    Args:
+        error: Exception from an LLM or embedding API call
+
+    Returns:
+        THROTTLE (429 / quota / overload), SERVER (transient 5xx, timeout)
+        or CLIENT (anything else, not retried)
+    """
+    if isinstance(error, CircuitOpenError) or not isinstance(error, Exception):
+        # Rejected by the governor, or cancelled / interrupted
+        return CLIENT
+    name = type(error).__name__
+    if name in _THROTTLE_TYPES:
+        return THROTTLE
+    if name in _SERVER_TYPES:
+        return SERVER
+    code = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(code, int) and not isinstance(code, bool) and 100 <= code < 600:
+        # An HTTP status is authoritative; the message may quote anything
+        # (e.g. "prompt is too long: 205000 tokens" on a 400)
+        if code == 429:
+            return THROTTLE
+        return SERVER if code >= 500 else CLIENT
+    message = str(error).lower()
+    if any(marker in message for marker in _THROTTLE_MARKERS):
+        return THROTTLE
+    if any(marker in message for marker in _SERVER_MARKERS):
+        return SERVER
+    return CLIENT
+
+
+class Governor:
+    """Thread-safe admission, backoff and circuit breaker for one provider/model."""
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_minute: float = DEFAULT_RATE_PER_MINUTE,
+        min_rate_per_minute: Optional[float] = None,
+        burst_seconds: float = 2.0,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize governor at its maximum rate.
+
+        Args:
+            name: Key for logs ("provider:model")
+            rate_per_minute: Maximum admission rate
+            min_rate_per_minute: Floor for rate decreases (default: 1% of max)
+            burst_seconds: Bucket capacity in seconds of the current rate
+            initial_backoff: First global backoff on a quota error (seconds)
+            max_backoff: Cap for global and server-error backoff (seconds)
+            failure_threshold: Consecutive server errors that open the circuit
+            open_seconds: Time the circuit stays open before a probe
+            clock: Monotonic time source (injectable for tests)
+        """
+        if rate_per_minute <= 0:
+            raise ValueError(f"rate_per_minute must be positive, got {rate_per_minute}")
+
+        self.name = name
+        self.max_rate = float(rate_per_minute)
+        self.min_rate = float(min_rate_per_minute or max(1.0, self.max_rate / 100))
+        self.burst_seconds = burst_seconds
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._rate = self.max_rate
+        self._tokens = self._capacity()
+        self._updated_at = clock()
+        self._backoff = initial_backoff
+        self._paused_until = 0.0
+        self._failures = 0
+        self._state = "closed"
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._stats = {"admitted": 0, "waited_seconds": 0.0, "throttled": 0,
+                       "congestion_events": 0, "server_errors": 0, "circuit_opens": 0,
+                       "rejected": 0}
+
+    @property
+    def rate_per_minute(self) -> float:
+        """Current admission rate."""
+        return self._rate
+
+    @property
+    def state(self) -> str:
+        """Circuit state: closed, open or half_open."""
+        return self._state
+
+    def _capacity(self) -> float:
+        return max(1.0, self._rate / 60.0 * self.burst_seconds)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self._capacity(), self._tokens + elapsed * self._rate / 60.0)
+            self._updated_at = now
+
+    def _reserve(self) -> float:
+        """Admit one request; return the seconds to wait before sending it."""
+        with self._lock:
+            now = self._clock()
+            if self._state == "open":
+                if now < self._open_until:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpenError(
+                        f"Circuit open for {self.name} ({self._open_until - now:.0f}s left)"
+                    )
+                self._state = "half_open"
+            if self._state == "half_open":
+                if self._probe_in_flight:
+                    if now - self._probe_started < self.open_seconds:
+                        self._stats["rejected"] += 1
+                        raise CircuitOpenError(f"Circuit half-open for {self.name}, probe in flight")
+                    # The probe's outcome was never reported; admit a new one
+                    logger.warning(f"Stale probe for {self.name}; admitting another")
+                self._probe_in_flight = True
+                self._probe_started = now
+
+            self._refill(now)
+            self._tokens -= 1
+            self._stats["admitted"] += 1
+            wait = -self._tokens / (self._rate / 60.0) if self._tokens < 0 else 0.0
+            self._stats["waited_seconds"] += wait
+            return wait
+
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """
+        Await until a request may be sent (asyncio variant of acquire()).
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_success(self) -> None:
+        """Report a successful call: close the circuit and raise the rate."""
+        with self._lock:
+            self._failures = 0
+            self._backoff = self.initial_backoff
+            if self._state != "closed":
+                logger.info(f"Circuit closed for {self.name}")
+            self._state = "closed"
+            self._probe_in_flight = False
+            self._rate = min(self.max_rate, self._rate + self.max_rate / 100)
+
+    def record_error(self, error: BaseException, attempt: int = 0) -> Optional[float]:
+        """
+        Report a failed call.
+
+        Args:
+            error: Exception raised by the call
+            attempt: Zero-based attempt number (scales server-error backoff)
+
+        Returns:
+            Seconds the caller should sleep before retrying, or None if the
+            error is not retriable. Quota errors return 0.0: the global
+            backoff is applied by the next acquire()
+        """
+        if isinstance(error, CircuitOpenError):
+            # Rejected by acquire(): the call never reached the provider
+            return None
+
+        if not isinstance(error, Exception):
+            # Cancelled or interrupted: no verdict, let the next caller probe
+            with self._lock:
+                self._probe_in_flight = False
+            return None
+
+        kind = classify_error(error)
+        with self._lock:
+            if self._state == "half_open":
+                self._probe_in_flight = False
+
+            if kind == THROTTLE:
+                self._on_throttle()
+                return 0.0
+
+            if kind == SERVER:
+                self._on_server_error()
+                delay = min(self.initial_backoff * (2 ** attempt), self.max_backoff)
+                # Full jitter keeps failed callers from retrying in lockstep
+                return random.uniform(delay / 2, delay)
+
+            if self._state == "half_open":
+                # Probe failed for a non-server reason; allow another probe
+                self._state = "open"
+                self._open_until = self._clock()
+            return None
+
+    def _on_throttle(self) -> None:
+        self._stats["throttled"] += 1
+        now = self._clock()
+        self._refill(now)
+        if now < self._paused_until:
+            # Already backing off: same congestion event
+            return
+
+        self._stats["congestion_events"] += 1
+        previous = self._rate
+        self._rate = max(self.min_rate, self._rate / 2)
+        pause = self._backoff
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+        self._paused_until = now + pause
+        # Debt: nobody is admitted for `pause` seconds, then requests resume
+        # one slot apart at the reduced rate
+        self._tokens = min(self._tokens, 1.0) - pause * self._rate / 60.0
+        if self._state == "half_open":
+            self._state = "closed"
+        logger.warning(
+            f"Quota exceeded for {self.name}: pausing {pause:.1f}s, "
+            f"rate {previous:.0f} -> {self._rate:.0f}/min"
+        )
+
+    def _on_server_error(self) -> None:
+        self._stats["server_errors"] += 1
+        self._failures += 1
+        if self._state == "half_open" or self._failures >= self.failure_threshold:
+            self._state = "open"
+            self._open_until = self._clock() + self.open_seconds
+            self._stats["circuit_opens"] += 1
+            logger.error(
+                f"Circuit opened for {self.name} after {self._failures} consecutive "
+                f"server errors; failing fast for {self.open_seconds:.0f}s"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return governor statistics (including current rate and state)."""
+        with self._lock:
+            return {
+                **self._stats,
+                "waited_seconds": round(self._stats["waited_seconds"], 3),
+                "rate_per_minute": round(self._rate, 1),
+                "state": self._state,
+            }
+
+
+def _configured_limits() -> Dict[str, float]:
+    limits = {}
+    for item in os.environ.get("GOVERNOR_LIMITS", "").split(","):
+        key, _, value = item.strip().rpartition("=")
+        if key and value:
+            try:
+                limits[key] = float(value)
+            except ValueError:
+                logger.warning(f"Ignoring invalid GOVERNOR_LIMITS entry '{item}'")
+    return limits
+
+
+def get_governor(provider: str, model: str, rate_per_minute: Optional[float] = None) -> Governor:
+    """
+    Get or create the shared governor for a provider/model.
+
+    Args:
+        provider: Provider name (e.g., "gemini", "claude", "vertex")
+        model: Model ID
+        rate_per_minute: Maximum rate on first creation (default:
+            GOVERNOR_LIMITS entry or GOVERNOR_RATE_PER_MINUTE)
+
+    Returns:
+        Governor shared by every caller using the same provider and model
+    """
+    key = f"{provider}:{model}"
+    governor = _governors.get(key)
+    if governor is None:
+        with _registry_lock:
+            governor = _governors.get(key)
+            if governor is None:
+                rate = rate_per_minute or _configured_limits().get(key, DEFAULT_RATE_PER_MINUTE)
+                governor = Governor(key, rate_per_minute=rate)
+                _governors[key] = governor
+    return governor
+
+
+def governor_stats() -> Dict[str, Dict[str, Any]]:
+    """Return statistics for every governor in the process."""
+    with _registry_lock:
+        governors = dict(_governors)
+    return {key: governor.stats() for key, governor in governors.items()}
+
+
+def reset_governors() -> None:
+    """Drop all shared governors (tests)."""
+    with _registry_lock:
+        _governors.clear()
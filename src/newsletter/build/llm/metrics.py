@@ -0,0 +1,331 @@
+"""
+LLM Call Instrumentation
+
+Every provider call (and every response-cache hit) emits one LLMCallRecord:
+model, caller tag, latency, tokens, retries, finish reason and cache hit.
+Records go to a process-wide MetricsRegistry, to any registered hooks and,
+with LLM_CALL_LOG=true, to the log as one structured JSON line per call.
+
+Batch tools take a mark() before their run and report summary(since=mark):
+real token counts, cost from the model registry pricing and p50/p95
+latency per model.
+
+JSON parsing of responses is counted separately (parse_stats()): clean
+parses, parses that needed repair (code fences, surrounding prose) and
+failures, overall and per caller tag, plus how many responses were
+schema-constrained.
+
+Usage:
+    from llm import get_metrics_registry, llm_caller
+
+    registry = get_metrics_registry()
+    mark = registry.mark()
+    with llm_caller("knowledge_cards.regenerate"):
+        client.generate_json(prompt)
+    print(registry.summary(since=mark))
+
+Configuration:
+    LLM_CALL_LOG: Log each call as a JSON line (default: false)
+    LLM_METRICS_MAX_RECORDS: Records kept in memory (default: 100000)
+"""
+
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+call_logger = logging.getLogger("llm.calls")
+
+CALL_LOG = os.environ.get("LLM_CALL_LOG", "false").lower() == "true"
+MAX_RECORDS = int(os.environ.get("LLM_METRICS_MAX_RECORDS", "100000"))
+
+# Prompt-cache pricing relative to the input price (Anthropic: reads 0.1x,
+# 5-minute cache writes 1.25x)
+CACHE_READ_PRICE_FACTOR = 0.1
+CACHE_WRITE_PRICE_FACTOR = 1.25
+
+_caller: contextvars.ContextVar[str] = contextvars.ContextVar("llm_caller", default="unknown")
+
+
+@dataclass
+class LLMCallRecord:
+    """One provider call (or cache hit)."""
+
+    model: str
+    provider: str
+    caller: str
+    latency_ms: float
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
+    retries: int = 0
+    cache_hit: bool = False
+    finish_reason: Optional[str] = None
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_json(self) -> str:
+        """Serialize as a structured log line."""
+        return json.dumps({"event": "llm_call", **asdict(self)}, sort_keys=True)
+
+
+def get_caller() -> str:
+    """Return the caller tag of the current context."""
+    return _caller.get()
+
+
+@contextmanager
+def llm_caller(tag: str) -> Iterator[None]:
+    """
+    Tag LLM calls made in this context (and in tasks it spawns).
+
+    Thread pools don't inherit context variables; submit work with
+    contextvars.copy_context().run to keep the tag.
+
+    Args:
+        tag: Caller tag, e.g. "knowledge_cards.regenerate"
+    """
+    token = _caller.set(tag)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
+    """
+    Cost in USD from the model registry pricing (0 for unknown models).
+
+    Args:
+        model: Model name, alias or provider model ID
+        input_tokens: Billed input tokens (excluding prompt-cache tokens)
+        output_tokens: Billed output tokens
+        cache_read_tokens: Prompt tokens read from the provider cache
+        cache_write_tokens: Prompt tokens written to the provider cache
+    """
+    from .config import get_model_info
+
+    model_info = get_model_info(model)
+    if not model_info:
+        return 0.0
+    cached_input = (
+        cache_read_tokens * CACHE_READ_PRICE_FACTOR + cache_write_tokens * CACHE_WRITE_PRICE_FACTOR
+    )
+    return (
+        (input_tokens + cached_input) / 1_000_000 * model_info.input_cost_per_1m
+        + output_tokens / 1_000_000 * model_info.output_cost_per_1m
+    )
+
+
+class MetricsRegistry:
+    """Thread-safe in-memory store of recent call records."""
+
+    def __init__(self, max_records: int = MAX_RECORDS):
+        """
+        Initialize registry.
+
+        Args:
+            max_records: Records kept; older ones are dropped from summaries
+        """
+        self._records: deque = deque(maxlen=max_records)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def record(self, record: LLMCallRecord) -> None:
+        """Store a call record."""
+        with self._lock:
+            self._seq += 1
+            self._records.append((self._seq, record))
+
+    def mark(self) -> int:
+        """Return a position to summarize from (see summary(since=...))."""
+        with self._lock:
+            return self._seq
+
+    def records(self, since: int = 0, caller: Optional[str] = None) -> List[LLMCallRecord]:
+        """Return records after mark `since`, optionally for one caller."""
+        with self._lock:
+            snapshot = list(self._records)
+        return [
+            record
+            for seq, record in snapshot
+            if seq > since and (caller is None or record.caller == caller)
+        ]
+
+    def summary(self, since: int = 0, caller: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Aggregate records into totals and per-model statistics.
+
+        Cache hits count as calls but not toward tokens, cost or latency.
+
+        Args:
+            since: Only include records after this mark
+            caller: Only include records with this caller tag
+
+        Returns:
+            Dictionary with calls, errors, cache_hits, retries, input_tokens,
+            output_tokens, cache_read_tokens, cache_write_tokens, cost_usd,
+            latency_p50_ms, latency_p95_ms and a per-model breakdown under
+            "models"
+        """
+        by_model: Dict[str, List[LLMCallRecord]] = {}
+        for record in self.records(since, caller):
+            by_model.setdefault(record.model, []).append(record)
+
+        models = {model: _aggregate(records, model) for model, records in by_model.items()}
+        all_records = [record for records in by_model.values() for record in records]
+        totals = _aggregate(all_records, None)
+        totals["cost_usd"] = round(sum(m["cost_usd"] for m in models.values()), 6)
+        totals["models"] = models
+        return totals
+
+    def reset(self) -> None:
+        """Drop all records."""
+        with self._lock:
+            self._records.clear()
+
+
+def _aggregate(records: List[LLMCallRecord], model: Optional[str]) -> Dict[str, Any]:
+    billed = [r for r in records if not r.cache_hit]
+    latencies = [r.latency_ms for r in billed if r.ok]
+    input_tokens = sum(r.input_tokens or 0 for r in billed)
+    output_tokens = sum(r.output_tokens or 0 for r in billed)
+    cache_read = sum(r.cache_read_tokens or 0 for r in billed)
+    cache_write = sum(r.cache_write_tokens or 0 for r in billed)
+    cost = 0.0
+    if model:
+        cost = estimate_cost(model, input_tokens, output_tokens, cache_read, cache_write)
+    return {
+        "calls": len(records),
+        "errors": sum(1 for r in records if not r.ok),
+        "cache_hits": len(records) - len(billed),
+        "retries": sum(r.retries for r in records),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cache_read_tokens": cache_read,
+        "cache_write_tokens": cache_write,
+        "cost_usd": round(cost, 6),
+        "latency_p50_ms": round(percentile(latencies, 50), 1),
+        "latency_p95_ms": round(percentile(latencies, 95), 1),
+    }
+
+
+_registry = MetricsRegistry()
+_hooks: List[Callable[[LLMCallRecord], None]] = []
+
+# JSON parse outcomes: totals and per caller tag
+PARSE_OUTCOMES = ("parsed", "repaired", "failed")
+_parse_stats: Dict[str, Dict[str, int]] = {}
+_parse_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+def add_call_hook(hook: Callable[[LLMCallRecord], None]) -> None:
+    """Register a callable invoked with every call record."""
+    _hooks.append(hook)
+
+
+def remove_call_hook(hook: Callable[[LLMCallRecord], None]) -> None:
+    """Unregister a hook added with add_call_hook()."""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def emit(record: LLMCallRecord) -> None:
+    """Send a record to the registry, the hooks and (optionally) the log."""
+    _registry.record(record)
+    if CALL_LOG:
+        call_logger.info(record.to_json())
+    for hook in list(_hooks):
+        try:
+            hook(record)
+        except Exception as e:
+            logger.warning(f"LLM call hook failed: {e}")
+
+
+def record_parse(outcome: str, structured: bool = False) -> None:
+    """
+    Count one JSON parse of a model response.
+
+    Args:
+        outcome: "parsed" (valid as returned), "repaired" (needed cleanup)
+            or "failed"
+        structured: Whether the response was schema-constrained
+    """
+    caller = get_caller()
+    with _parse_lock:
+        for key in ("total", caller):
+            counts = _parse_stats.setdefault(
+                key, {**{o: 0 for o in PARSE_OUTCOMES}, "structured": 0}
+            )
+            counts[outcome] += 1
+            counts["structured"] += int(structured)
+
+
+def _with_rates(counts: Dict[str, int]) -> Dict[str, Any]:
+    total = sum(counts[o] for o in PARSE_OUTCOMES)
+    return {
+        **counts,
+        "total": total,
+        "failure_rate": round(counts["failed"] / total, 4) if total else 0.0,
+        "repair_rate": round(counts["repaired"] / total, 4) if total else 0.0,
+    }
+
+
+def parse_stats(caller: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Return JSON parse statistics.
+
+    Args:
+        caller: Only this caller tag (default: totals with a "callers" breakdown)
+
+    Returns:
+        Dictionary with parsed, repaired, failed, structured, total,
+        failure_rate and repair_rate
+    """
+    empty = {**{o: 0 for o in PARSE_OUTCOMES}, "structured": 0}
+    with _parse_lock:
+        snapshot = {key: dict(counts) for key, counts in _parse_stats.items()}
+    if caller is not None:
+        return _with_rates(snapshot.get(caller, empty))
+    stats = _with_rates(snapshot.pop("total", empty))
+    stats["callers"] = {key: _with_rates(counts) for key, counts in snapshot.items()}
+    return stats
+
+
+def reset_parse_stats() -> None:
+    """Reset JSON parse statistics."""
+    with _parse_lock:
+        _parse_stats.clear()
@@ -10,8 +10,10 @@ import hashlib
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 from types import SimpleNamespace
 
 from google.api_core.exceptions import NotFound
@@ -67,6 +69,16 @@ CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", "1024"))
 CHUNK_MIN_TOKENS = int(os.environ.get("CHUNK_MIN_SIZE_TOKENS", "100"))
 CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "75"))
 
+# Concurrency configuration
+NORMALIZE_MAX_WORKERS = int(
+    os.environ.get("NORMALIZE_MAX_WORKERS", str(min(32, (os.cpu_count() or 1) * 4)))
+)
+NORMALIZE_UPLOAD_WORKERS = int(os.environ.get("NORMALIZE_UPLOAD_WORKERS", "16"))
+FIRESTORE_BATCH_LIMIT = 500  # Firestore max writes per batch
+
+# Per-worker state (one chunker per thread, reused across manifest items)
+_worker_state = threading.local()
+
 # Lazy client initialization pattern (for testability)
 storage_client = None
 firestore_client = None
@@ -153,12 +165,192 @@ def _increment_retry(existing: Dict[str, Any]) -> Any:
     return existing.get("retry_count", 0) + 1
 
 
+def _get_chunker() -> DocumentChunker:
+    """Get the chunker for the current worker thread (created once per worker)."""
+    chunker = getattr(_worker_state, "chunker", None)
+    if chunker is None:
+        chunker = DocumentChunker(config=ChunkConfig(
+            target_tokens=CHUNK_TARGET_TOKENS,
+            max_tokens=CHUNK_MAX_TOKENS,
+            min_tokens=CHUNK_MIN_TOKENS,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS
+        ))
+        _worker_state.chunker = chunker
+    return chunker
+
+
+def _commit_writes(firestore_client, writes: List[Tuple[Any, Dict[str, Any]]]) -> None:
+    """Commit merge-writes in Firestore batches of at most FIRESTORE_BATCH_LIMIT."""
+    for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+        batch = firestore_client.batch()
+        for doc_ref, data in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+            batch.set(doc_ref, data, merge=True)
+        batch.commit()
+
+
+def _upload_chunk(markdown_bucket, output_filename: str, chunk_markdown: str, markdown_hash: str):
+    """Upload a chunk markdown file, recording its hash as object metadata."""
+    output_blob = markdown_bucket.blob(output_filename)
+    # Record the hash on the object so embed can verify it without a download
+    output_blob.metadata = {"content_hash": markdown_hash}
+    output_blob.upload_from_string(
+        chunk_markdown,
+        content_type="text/markdown; charset=utf-8"
+    )
+    return output_blob
+
+
+def _normalize_item(item: Dict[str, Any], context: Dict[str, Any]) -> str:
+    """
+    Normalize a single manifest item into chunk markdown files.
+
+    Runs on a worker thread: downloads the raw JSON, chunks it with the
+    worker's chunker, uploads chunks concurrently and writes the chunk
+    pipeline_items entries in batched commits.
+
+    Args:
+        item: Manifest entry (id, raw_uri, raw_checksum, updated_at)
+        context: Shared clients and executors for this run
+
+    Returns:
+        Stats key for the outcome: "processed", "skipped" or "failed"
+    """
+    run_id = context["run_id"]
+    pipeline_collection = context["pipeline_collection"]
+    markdown_bucket = context["markdown_bucket"]
+
+    item_id = str(item.get("id", "")).strip()
+    raw_uri = item.get("raw_uri")
+    raw_checksum = item.get("raw_checksum")
+
+    if not item_id or not raw_uri or not raw_checksum:
+        logger.error(f"Manifest entry missing required fields: {item}")
+        return "failed"
+
+    doc_ref = pipeline_collection.document(item_id)
+    snapshot = doc_ref.get()
+    doc_data = snapshot.to_dict() if snapshot.exists else {}
+
+    should_skip = (
+        doc_data
+        and doc_data.get("normalize_status") == "complete"
+        and doc_data.get("raw_checksum") == raw_checksum
+    )
+
+    if should_skip:
+        logger.info(f"Skipping {item_id}: raw checksum unchanged")
+        doc_ref.set({
+            "manifest_run_id": run_id,
+            "last_transition_at": firestore.SERVER_TIMESTAMP
+        }, merge=True)
+        return "skipped"
+
+    # Mark as processing
+    doc_ref.set({
+        "raw_uri": raw_uri,
+        "raw_updated_at": item.get("updated_at"),
+        "raw_checksum": raw_checksum,
+        "normalize_status": "processing",
+        "manifest_run_id": run_id,
+        "last_transition_at": firestore.SERVER_TIMESTAMP
+    }, merge=True)
+
+    try:
+        uri_parts = _parse_gcs_uri(raw_uri)
+        raw_blob = context["storage_client"].bucket(uri_parts["bucket"]).blob(uri_parts["object"])
+        json_content = raw_blob.download_as_text()
+        book_data = json.loads(json_content)
+
+        user_book_id = book_data["user_book_id"]
+        markdown_content = json_to_markdown(book_data)
+
+        # Stream chunks (chunker reused across this worker's items) and
+        # upload each chunk's markdown as soon as it is generated
+        chunker = _get_chunker()
+        uploads = []
+        for chunk in chunker.iter_chunks(markdown_content, parent_doc_id=user_book_id):
+            chunk_id = chunk.frontmatter['chunk_id']
+            chunk_markdown = chunker.chunk_to_markdown(chunk)
+            output_filename = f"notes/{chunk_id}.md"
+            markdown_hash = _compute_markdown_hash(chunk_markdown)
+            future = context["upload_executor"].submit(
+                _upload_chunk, markdown_bucket, output_filename, chunk_markdown, markdown_hash
+            )
+            # Keep only chunk metadata; text is released once its upload lands
+            uploads.append((pipeline_collection.document(chunk_id), {
+                "item_id": chunk_id,
+                "user_book_id": user_book_id,
+                "chunk_index": chunk.chunk_index,
+                "total_chunks": chunk.total_chunks,
+                "raw_uri": raw_uri,
+                "raw_updated_at": item.get("updated_at"),
+                "raw_checksum": raw_checksum,
+                "markdown_uri": f"gs://{context['markdown_bucket_name']}/{output_filename}",
+                "markdown_size_bytes": len(chunk_markdown.encode('utf-8')),
+                "normalize_status": "complete",
+                "embedding_status": "pending",
+                "content_hash": markdown_hash,
+                "chunk_tokens": chunk.token_count,
+                "chunk_boundaries": {
+                    "start": chunk.char_start,
+                    "end": chunk.char_end
+                },
+                "parent_metadata": {
+                    "title": chunk.frontmatter.get("title", ""),
+                    "author": chunk.frontmatter.get("author", ""),
+                    "source": chunk.frontmatter.get("source", "")
+                },
+                "last_transition_at": firestore.SERVER_TIMESTAMP,
+                "last_error": None,
+                "retry_count": 0,
+                "max_retries": 3,
+                "manifest_run_id": run_id,
+                "created_at": firestore.SERVER_TIMESTAMP,
+                "updated_at": firestore.SERVER_TIMESTAMP
+            }, future))
+
+        total_chunks = len(uploads)
+        logger.info(f"Split {item_id} into {total_chunks} chunks")
+
+        # Create or update pipeline_items entries once uploads have landed
+        chunk_writes = []
+        for chunk_ref, chunk_data, future in uploads:
+            chunk_data["markdown_generation"] = future.result().generation
+            chunk_writes.append((chunk_ref, chunk_data))
+
+        _commit_writes(context["firestore_client"], chunk_writes)
+
+        # Update original document entry to mark complete
+        doc_ref.set({
+            "normalize_status": "complete",
+            "total_chunks": total_chunks,
+            "last_transition_at": firestore.SERVER_TIMESTAMP,
+            "manifest_run_id": run_id
+        }, merge=True)
+
+        logger.info(f"Normalized item {item_id} → {total_chunks} chunks")
+        return "processed"
+
+    except Exception as exc:  # pragma: no cover - complex integration logic
+        logger.error(f"Error processing item {item_id}: {exc}")
+        doc_ref.set({
+            "normalize_status": "failed",
+            "last_error": str(exc),
+            "last_transition_at": firestore.SERVER_TIMESTAMP,
+            "retry_count": _increment_retry(doc_data),
+            "manifest_run_id": run_id
+        }, merge=True)
+        return "failed"
+
+
 def normalize_handler(request):
     """
     Cloud Function entry point for normalization.
 
     Reads all JSON files from raw-json bucket, transforms them to Markdown,
-    and writes to markdown-normalized bucket.
+    and writes to markdown-normalized bucket. Manifest items are processed on
+    a thread pool (NORMALIZE_MAX_WORKERS) with chunk uploads overlapped on a
+    separate pool (NORMALIZE_UPLOAD_WORKERS).
 
     Args:
         request: Flask request object (not used, triggered by workflow)
@@ -198,138 +390,26 @@ def normalize_handler(request):
         "failed": 0
     }
 
-    for item in manifest.get("items", []):
-        item_id = str(item.get("id", "")).strip()
-        raw_uri = item.get("raw_uri")
-        raw_checksum = item.get("raw_checksum")
-
-        if not item_id or not raw_uri or not raw_checksum:
-            logger.error(f"Manifest entry missing required fields: {item}")
-            stats["failed"] += 1
-            continue
-
-        doc_ref = pipeline_collection.document(item_id)
-        snapshot = doc_ref.get()
-        doc_data = snapshot.to_dict() if snapshot.exists else {}
-
-        should_skip = (
-            doc_data
-            and doc_data.get("normalize_status") == "complete"
-            and doc_data.get("raw_checksum") == raw_checksum
-        )
-
-        if should_skip:
-            logger.info(f"Skipping {item_id}: raw checksum unchanged")
-            doc_ref.set({
-                "manifest_run_id": run_id,
-                "last_transition_at": firestore.SERVER_TIMESTAMP
-            }, merge=True)
-            stats["skipped"] += 1
-            continue
-
-        # Mark as processing
-        doc_ref.set({
-            "raw_uri": raw_uri,
-            "raw_updated_at": item.get("updated_at"),
-            "raw_checksum": raw_checksum,
-            "normalize_status": "processing",
-            "manifest_run_id": run_id,
-            "last_transition_at": firestore.SERVER_TIMESTAMP
-        }, merge=True)
-
-        try:
-            uri_parts = _parse_gcs_uri(raw_uri)
-            raw_blob = storage_client.bucket(uri_parts["bucket"]).blob(uri_parts["object"])
-            json_content = raw_blob.download_as_text()
-            book_data = json.loads(json_content)
-
-            user_book_id = book_data["user_book_id"]
-            markdown_content = json_to_markdown(book_data)
-
-            # Initialize chunker with configuration
-            chunker_config = ChunkConfig(
-                target_tokens=CHUNK_TARGET_TOKENS,
-                max_tokens=CHUNK_MAX_TOKENS,
-                min_tokens=CHUNK_MIN_TOKENS,
-                overlap_tokens=CHUNK_OVERLAP_TOKENS
-            )
-            chunker = DocumentChunker(config=chunker_config)
-
-            # Split document into chunks
-            chunks = chunker.split_into_chunks(markdown_content, parent_doc_id=user_book_id)
-
-            logger.info(f"Split {item_id} into {len(chunks)} chunks")
-
-            # Process each chunk
-            for chunk in chunks:
-                chunk_id = chunk.frontmatter['chunk_id']
-                chunk_markdown = chunker.chunk_to_markdown(chunk)
-
-                # Upload chunk markdown to GCS
-                output_filename = f"notes/{chunk_id}.md"
-                output_blob = markdown_bucket.blob(output_filename)
-                output_blob.upload_from_string(
-                    chunk_markdown,
-                    content_type="text/markdown; charset=utf-8"
-                )
-
-                # Create or update pipeline_items entry for this chunk
-                chunk_doc_ref = pipeline_collection.document(chunk_id)
-                chunk_doc_ref.set({
-                    "item_id": chunk_id,
-                    "user_book_id": user_book_id,
-                    "chunk_index": chunk.chunk_index,
-                    "total_chunks": chunk.total_chunks,
-                    "raw_uri": raw_uri,
-                    "raw_updated_at": item.get("updated_at"),
-                    "raw_checksum": raw_checksum,
-                    "markdown_uri": f"gs://{bucket_names['markdown']}/{output_filename}",
-                    "markdown_size_bytes": len(chunk_markdown.encode('utf-8')),
-                    "normalize_status": "complete",
-                    "embedding_status": "pending",
-                    "content_hash": chunk.content_hash,
-                    "chunk_tokens": chunk.token_count,
-                    "chunk_boundaries": {
-                        "start": chunk.char_start,
-                        "end": chunk.char_end
-                    },
-                    "parent_metadata": {
-                        "title": chunk.frontmatter.get("title", ""),
-                        "author": chunk.frontmatter.get("author", ""),
-                        "source": chunk.frontmatter.get("source", "")
-                    },
-                    "last_transition_at": firestore.SERVER_TIMESTAMP,
-                    "last_error": None,
-                    "retry_count": 0,
-                    "max_retries": 3,
-                    "manifest_run_id": run_id,
-                    "created_at": firestore.SERVER_TIMESTAMP,
-                    "updated_at": firestore.SERVER_TIMESTAMP
-                }, merge=True)
-
-                logger.info(f"Processed chunk {chunk_id} ({chunk.token_count} tokens)")
-
-            # Update original document entry to mark complete
-            doc_ref.set({
-                "normalize_status": "complete",
-                "total_chunks": len(chunks),
-                "last_transition_at": firestore.SERVER_TIMESTAMP,
-                "manifest_run_id": run_id
-            }, merge=True)
-
-            stats["processed"] += 1
-            logger.info(f"Normalized item {item_id} → {len(chunks)} chunks")
+    context = {
+        "run_id": run_id,
+        "storage_client": storage_client,
+        "firestore_client": firestore_client,
+        "markdown_bucket": markdown_bucket,
+        "markdown_bucket_name": bucket_names["markdown"],
+        "pipeline_collection": pipeline_collection,
+    }
 
-        except Exception as exc:  # pragma: no cover - complex integration logic
-            logger.error(f"Error processing item {item_id}: {exc}")
-            doc_ref.set({
-                "normalize_status": "failed",
-                "last_error": str(exc),
-                "last_transition_at": firestore.SERVER_TIMESTAMP,
-                "retry_count": _increment_retry(doc_data),
-                "manifest_run_id": run_id
-            }, merge=True)
-            stats["failed"] += 1
+    # Books are normalized concurrently; chunk uploads go to a separate pool so
+    # they overlap with other books' downloads and chunking.
+    with ThreadPoolExecutor(max_workers=NORMALIZE_UPLOAD_WORKERS) as upload_executor:
+        context["upload_executor"] = upload_executor
+        with ThreadPoolExecutor(max_workers=NORMALIZE_MAX_WORKERS) as item_executor:
+            futures = [
+                item_executor.submit(_normalize_item, item, context)
+                for item in manifest.get("items", [])
+            ]
+            for future in as_completed(futures):
+                stats[future.result()] += 1
 
     return json.dumps(stats), 200
 
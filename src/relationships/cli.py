@@ -19,13 +19,15 @@ import asyncio
 import logging
 import os
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from itertools import combinations
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from src.llm.base import run_sync
+from src.llm.metrics import get_metrics_registry, llm_caller
+
 from .extractor import RelationshipExtractor
 from .schema import Relationship
 
@@ -274,40 +276,71 @@ def process_pairs_sequential(
     return relationships
 
 
-def process_pairs_parallel(
+async def aprocess_pair(
+    extractor: RelationshipExtractor,
+    chunk_a: Dict[str, Any],
+    chunk_b: Dict[str, Any],
+    pair_index: int,
+    total_pairs: int,
+) -> Optional[Relationship]:
+    """Async variant of process_pair()."""
+    try:
+        source_a = chunk_a.get("source_id", "unknown")
+        source_b = chunk_b.get("source_id", "unknown")
+        context = f"{source_a}--{source_b}"
+
+        rel = await extractor.aextract_relationship(chunk_a, chunk_b, context)
+
+        if rel:
+            logger.debug(
+                f"[{pair_index}/{total_pairs}] Found: {rel.type} "
+                f"(confidence: {rel.confidence:.2f})"
+            )
+
+        return rel
+
+    except Exception as e:
+        logger.warning(f"[{pair_index}/{total_pairs}] Error: {e}")
+        return None
+
+
+async def _process_pairs_async(
     extractor: RelationshipExtractor,
     pairs: List[Tuple[Dict[str, Any], Dict[str, Any], float]],
-    max_workers: int = DEFAULT_PARALLEL,
+    max_concurrent: int,
 ) -> List[Relationship]:
-    """Process pairs in parallel using ThreadPoolExecutor."""
-    relationships = []
     total = len(pairs)
     completed = 0
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run(i: int, chunk_a: Dict[str, Any], chunk_b: Dict[str, Any]):
+        nonlocal completed
+        async with semaphore:
+            rel = await aprocess_pair(extractor, chunk_a, chunk_b, i + 1, total)
+        completed += 1
+        if completed % 20 == 0:
+            logger.info(f"Completed {completed}/{total} pairs...")
+        return rel
 
-    logger.info(f"Processing {total} pairs with {max_workers} parallel workers...")
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        futures = {
-            executor.submit(process_pair, extractor, chunk_a, chunk_b, i + 1, total): i
-            for i, (chunk_a, chunk_b, sim) in enumerate(pairs)
-        }
-
-        # Collect results as they complete
-        for future in as_completed(futures):
-            completed += 1
+    results = await asyncio.gather(
+        *(run(i, chunk_a, chunk_b) for i, (chunk_a, chunk_b, sim) in enumerate(pairs))
+    )
+    return [rel for rel in results if rel]
 
-            if completed % 20 == 0:
-                logger.info(f"Completed {completed}/{total} pairs...")
 
-            try:
-                rel = future.result()
-                if rel:
-                    relationships.append(rel)
-            except Exception as e:
-                logger.warning(f"Future failed: {e}")
+def process_pairs_parallel(
+    extractor: RelationshipExtractor,
+    pairs: List[Tuple[Dict[str, Any], Dict[str, Any], float]],
+    max_workers: int = DEFAULT_PARALLEL,
+) -> List[Relationship]:
+    """
+    Process pairs concurrently on one event loop.
 
-    return relationships
+    max_workers caps in-flight LLM requests (the per-model limit,
+    LLM_ASYNC_CONCURRENCY, applies on top).
+    """
+    logger.info(f"Processing {len(pairs)} pairs with {max_workers} concurrent requests...")
+    return run_sync(_process_pairs_async(extractor, pairs, max_workers))
 
 
 def run_extraction(
@@ -379,10 +412,14 @@ def run_extraction(
     )
 
     # Process pairs
-    if parallel > 0:
-        relationships = process_pairs_parallel(extractor, pairs, parallel)
-    else:
-        relationships = process_pairs_sequential(extractor, pairs)
+    metrics = get_metrics_registry()
+    metrics_mark = metrics.mark()
+    with llm_caller("relationships.cli"):
+        if parallel > 0:
+            relationships = process_pairs_parallel(extractor, pairs, parallel)
+        else:
+            relationships = process_pairs_sequential(extractor, pairs)
+    llm = metrics.summary(since=metrics_mark)
 
     # Save relationships
     save_result = save_relationships(relationships, dry_run)
@@ -400,6 +437,11 @@ def run_extraction(
     logger.info(f"Duration: {duration:.1f}s")
     if len(pairs) > 0:
         logger.info(f"Avg time per pair: {duration / len(pairs):.2f}s")
+    logger.info(
+        f"LLM: {llm['calls']} calls, {llm['retries']} retries, "
+        f"{llm['input_tokens']:,} in / {llm['output_tokens']:,} out tokens, ${llm['cost_usd']:.4f}"
+    )
+    logger.info(f"Latency p50/p95: {llm['latency_p50_ms']:.0f}/{llm['latency_p95_ms']:.0f}ms")
     logger.info("=" * 70)
 
     return {
@@ -409,6 +451,10 @@ def run_extraction(
         "saved": save_result["saved"],
         "failed": save_result["failed"],
         "duration": duration,
+        "llm_calls": llm["calls"],
+        "cost_usd": llm["cost_usd"],
+        "latency_p50_ms": llm["latency_p50_ms"],
+        "latency_p95_ms": llm["latency_p95_ms"],
     }
 
 
@@ -18,6 +18,17 @@ from .schema import Relationship, validate_llm_response
 logger = logging.getLogger(__name__)
 
 
+def relationship_response_schema() -> Dict[str, Any]:
+    """JSON Schema of the LLM verdict for a pair, derived from Relationship."""
+    from src.llm.structured import schema_from_dataclass
+
+    return schema_from_dataclass(
+        Relationship,
+        fields=["type", "confidence", "explanation"],
+        overrides={"confidence": {"minimum": 0.0, "maximum": 1.0}},
+    )
+
+
 class RelationshipExtractor:
     """
     Extracts semantic relationships between chunks using LLM.
@@ -151,6 +162,59 @@ class RelationshipExtractor:
             content = content[:500] + "..."
         return content
 
+    def _build_request(
+        self, chunk_a: Dict[str, Any], chunk_b: Dict[str, Any]
+    ) -> Optional[Tuple[str, str, str]]:
+        """Return (source_id, target_id, prompt) for a pair, or None if IDs are missing."""
+        source_id = chunk_a.get("id") or chunk_a.get("chunk_id")
+        target_id = chunk_b.get("id") or chunk_b.get("chunk_id")
+
+        if not source_id or not target_id:
+            logger.warning("Chunk missing ID, skipping")
+            return None
+
+        prompt = self._prompt_manager.format_prompt(
+            source_title=chunk_a.get("title", "Unknown"),
+            source_summary=self._get_chunk_summary(chunk_a),
+            target_title=chunk_b.get("title", "Unknown"),
+            target_summary=self._get_chunk_summary(chunk_b),
+        )
+        return source_id, target_id, prompt
+
+    @staticmethod
+    def _generation_config():
+        from src.llm.base import GenerationConfig
+
+        return GenerationConfig(
+            temperature=0.3,  # Lower for consistent classification
+            enable_thinking=True,  # Enable reasoning for relationship analysis
+            response_schema=relationship_response_schema(),
+        )
+
+    def _to_relationship(
+        self,
+        response: Dict[str, Any],
+        source_id: str,
+        target_id: str,
+        source_context: str,
+    ) -> Optional[Relationship]:
+        """Validate an LLM response and apply the confidence threshold."""
+        relationship = validate_llm_response(
+            response=response,
+            source_chunk_id=source_id,
+            target_chunk_id=target_id,
+            source_context=source_context,
+        )
+
+        if relationship and relationship.confidence >= self.confidence_threshold:
+            logger.debug(
+                f"Found relationship: {source_id} --[{relationship.type}]--> {target_id} "
+                f"(confidence: {relationship.confidence:.2f})"
+            )
+            return relationship
+
+        return None
+
     def extract_relationship(
         self,
         chunk_a: Dict[str, Any],
@@ -168,49 +232,47 @@ class RelationshipExtractor:
         Returns:
             Relationship if found and above confidence threshold, None otherwise
         """
-        # Get chunk IDs
-        source_id = chunk_a.get("id") or chunk_a.get("chunk_id")
-        target_id = chunk_b.get("id") or chunk_b.get("chunk_id")
-
-        if not source_id or not target_id:
-            logger.warning("Chunk missing ID, skipping")
+        request = self._build_request(chunk_a, chunk_b)
+        if request is None:
             return None
-
-        # Build prompt
-        prompt = self._prompt_manager.format_prompt(
-            source_title=chunk_a.get("title", "Unknown"),
-            source_summary=self._get_chunk_summary(chunk_a),
-            target_title=chunk_b.get("title", "Unknown"),
-            target_summary=self._get_chunk_summary(chunk_b),
-        )
+        source_id, target_id, prompt = request
 
         try:
             # Call LLM with thinking enabled for better reasoning
-            from src.llm.base import GenerationConfig
+            response = self.llm_client.generate_json(prompt, config=self._generation_config())
+            return self._to_relationship(response, source_id, target_id, source_context)
 
-            config = GenerationConfig(
-                temperature=0.3,  # Lower for consistent classification
-                enable_thinking=True,  # Enable reasoning for relationship analysis
-            )
-            response = self.llm_client.generate_json(prompt, config=config)
-
-            # Validate and convert response
-            relationship = validate_llm_response(
-                response=response,
-                source_chunk_id=source_id,
-                target_chunk_id=target_id,
-                source_context=source_context,
-            )
+        except Exception as e:
+            logger.warning(f"Failed to extract relationship: {e}")
+            return None
+
+    async def aextract_relationship(
+        self,
+        chunk_a: Dict[str, Any],
+        chunk_b: Dict[str, Any],
+        source_context: str = "",
+    ) -> Optional[Relationship]:
+        """
+        Async variant of extract_relationship() for many concurrent pairs.
 
-            # Filter by confidence threshold
-            if relationship and relationship.confidence >= self.confidence_threshold:
-                logger.debug(
-                    f"Found relationship: {source_id} --[{relationship.type}]--> {target_id} "
-                    f"(confidence: {relationship.confidence:.2f})"
-                )
-                return relationship
+        Args:
+            chunk_a: Source chunk dictionary
+            chunk_b: Target chunk dictionary
+            source_context: Context info (e.g., "source_a--source_b")
 
+        Returns:
+            Relationship if found and above confidence threshold, None otherwise
+        """
+        request = self._build_request(chunk_a, chunk_b)
+        if request is None:
             return None
+        source_id, target_id, prompt = request
+
+        try:
+            response = await self.llm_client.agenerate_json(
+                prompt, config=self._generation_config()
+            )
+            return self._to_relationship(response, source_id, target_id, source_context)
 
         except Exception as e:
             logger.warning(f"Failed to extract relationship: {e}")
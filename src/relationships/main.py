@@ -18,7 +18,6 @@ Environment Variables:
 import json
 import logging
 import os
-import re
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, List, Optional
@@ -52,6 +51,18 @@ RELATIONSHIP_TYPES = [
     "none",
 ]
 
+# Vertex AI response schema for JSON mode (mirrors the Relationship fields the
+# model fills in; see relationships.extractor.relationship_response_schema)
+RELATIONSHIP_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "type": {"type": "STRING", "enum": RELATIONSHIP_TYPES},
+        "confidence": {"type": "NUMBER", "minimum": 0.0, "maximum": 1.0},
+        "explanation": {"type": "STRING"},
+    },
+    "required": ["type", "confidence", "explanation"],
+}
+
 # Embedded prompt template
 RELATIONSHIP_PROMPT = """Analyze the relationship between these two knowledge chunks from my personal knowledge base.
 
@@ -260,28 +271,27 @@ def get_chunk_summary(chunk: Dict[str, Any]) -> str:
 
 
 def extract_json_from_response(text: str) -> Optional[Dict[str, Any]]:
-    """Extract JSON from LLM response text."""
-    # Try direct JSON parse
+    """
+    Extract JSON from LLM response text.
+
+    JSON mode normally returns a bare object; otherwise decode from each "{"
+    (handles code fences, surrounding prose and braces inside strings).
+    """
     try:
         return json.loads(text)
     except json.JSONDecodeError:
         pass
 
-    # Try to find JSON in markdown code block
-    json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
-    if json_match:
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
         try:
-            return json.loads(json_match.group(1))
-        except json.JSONDecodeError:
-            pass
-
-    # Try to find raw JSON object
-    json_match = re.search(r'\{[^{}]*"type"[^{}]*\}', text, re.DOTALL)
-    if json_match:
-        try:
-            return json.loads(json_match.group(0))
+            result, _ = decoder.raw_decode(text, start)
+            if isinstance(result, dict):
+                return result
         except json.JSONDecodeError:
             pass
+        start = text.find("{", start + 1)
 
     return None
 
@@ -308,7 +318,13 @@ def extract_relationship(
 
     try:
         model = get_vertex_model()
-        response = model.generate_content(prompt)
+        response = model.generate_content(
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": RELATIONSHIP_RESPONSE_SCHEMA,
+            },
+        )
 
         if not response or not response.text:
             logger.warning("Empty LLM response")
@@ -111,7 +111,8 @@ resource "google_cloudfunctions2_function" "auto_snippets" {
     service_account_email          = google_service_account.auto_snippets_sa.email
     all_traffic_on_latest_revision = true
     environment_variables = {
-      GCP_PROJECT = var.project_id
+      GCP_PROJECT     = var.project_id
+      EMBEDDING_STORE = "firestore"
     }
   }
 
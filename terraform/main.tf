@@ -81,6 +81,13 @@ resource "google_project_iam_member" "ingest_sa_pubsub_publisher" {
   member  = "serviceAccount:${google_service_account.ingest_function_sa.email}"
 }
 
+# Grant Firestore access for the incremental export watermark
+resource "google_project_iam_member" "ingest_sa_datastore_user" {
+  project = var.project_id
+  role    = "roles/datastore.user"
+  member  = "serviceAccount:${google_service_account.ingest_function_sa.email}"
+}
+
 # Archive the source code for the Cloud Function
 data "archive_file" "ingest_source" {
   type        = "zip"
@@ -150,6 +157,7 @@ resource "google_cloudfunctions2_function" "ingest_function" {
     google_project_iam_member.ingest_sa_secret_accessor,
     google_storage_bucket_iam_member.ingest_sa_raw_bucket_admin,
     google_project_iam_member.ingest_sa_pubsub_publisher,
+    google_project_iam_member.ingest_sa_datastore_user,
     google_storage_bucket_iam_member.ingest_sa_pipeline_bucket_admin
   ]
 }
@@ -566,6 +574,7 @@ resource "google_cloudfunctions2_function" "embed_function" {
       EMBED_STALE_TIMEOUT_SECONDS = "900" // 15 minutes
       CHUNK_TARGET_TOKENS         = "512"
       CHUNK_MAX_TOKENS            = "1024"
+      EMBEDDING_STORE             = "firestore" // content-addressed embedding reuse
     }
   }
 
@@ -0,0 +1,70 @@
+"""
+Shared fakes for tests that exercise the LLM layer.
+
+Provides a canned knowledge-card response and mocked Claude clients/responses
+so provider tests don't each rebuild the same MagicMock wiring.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+from src.llm.claude import ClaudeClient
+
+CLAUDE_MODEL = "claude-haiku-4-5@20251001"
+
+# Valid knowledge-card JSON as returned by the model
+CARD_RESPONSE = {
+    "summary": "Feature flags need governance to avoid debt.",
+    "takeaways": ["Expire flags", "Review flags monthly", "Own every flag"],
+    "tags": ["feature flags"],
+}
+
+
+def claude_response(text="{}", input_tokens=100, output_tokens=20, usage=None, content=None):
+    """
+    Build a fake Anthropic Messages response.
+
+    Args:
+        text: Text of the single content block
+        input_tokens: Usage input tokens
+        output_tokens: Usage output tokens
+        usage: Usage object to use instead (e.g. with cache token counts)
+        content: Content blocks to use instead of one text block
+    """
+    response = MagicMock(stop_reason="end_turn")
+    response.content = content if content is not None else [MagicMock(text=text)]
+    response.usage = usage or MagicMock(input_tokens=input_tokens, output_tokens=output_tokens)
+    return response
+
+
+def claude_client(responses=None, client_class=ClaudeClient):
+    """
+    Build a ClaudeClient whose sync SDK client is mocked.
+
+    Args:
+        responses: side_effect for messages.create (responses/exceptions in call order)
+        client_class: ClaudeClient or a subclass
+
+    Returns:
+        Initialized client; the SDK mock is available as client._client
+    """
+    client = client_class(model_id=CLAUDE_MODEL, project_id="p", backend="vertex")
+    client._initialized = True
+    client._client = MagicMock()
+    if responses is not None:
+        client._client.messages.create.side_effect = responses
+    return client
+
+
+def async_claude_sdk(side_effect):
+    """
+    Build a mocked async Anthropic SDK client.
+
+    Args:
+        side_effect: Response, exception or list of them for messages.create
+    """
+    sdk = MagicMock()
+    if isinstance(side_effect, (list, BaseException)):
+        sdk.messages.create = AsyncMock(side_effect=side_effect)
+    else:
+        sdk.messages.create = AsyncMock(return_value=side_effect)
+    return sdk
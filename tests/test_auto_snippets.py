@@ -27,6 +27,7 @@ from auto_snippets.main import (
     auto_snippets,
     is_already_processed,
     load_config,
+    prefetch_processed_ids,
     store_job_report,
     update_tags,
 )
@@ -92,7 +93,8 @@ class TestConfig:
         assert config["tag"] == "kx-auto"
         assert config["processed_tag"] == "kx-processed"
         assert config["write_to_readwise"] is True
-        assert config["max_documents_per_run"] == 20
+        assert config["max_documents_per_run"] == 50
+        assert config["max_concurrency"] == 4
 
     def test_load_config_from_firestore(self):
         """Test 2: Firestore config overrides defaults."""
@@ -170,6 +172,34 @@ class TestIdempotency:
             "auto_snippet_my_doc_id_0"
         )
 
+    def test_prefetched_set_skips_firestore(self):
+        """Membership check uses the prefetched set without a read."""
+        mock_db = MagicMock()
+
+        assert is_already_processed(mock_db, "doc_a", {"doc_a"}) is True
+        assert is_already_processed(mock_db, "doc_b", {"doc_a"}) is False
+        mock_db.collection.assert_not_called()
+
+    def test_prefetch_batches_get_all(self):
+        """Prefetch reads first-chunk IDs with get_all, 100 refs per call."""
+        mock_db = MagicMock()
+        mock_db.collection.return_value.document.side_effect = lambda cid: cid
+
+        def get_all(refs, field_paths=None):
+            assert field_paths == ["chunk_id"]
+            for ref in refs:
+                snapshot = MagicMock()
+                snapshot.id = ref
+                snapshot.exists = ref in ("auto_snippet_doc_3_0", "auto_snippet_doc_150_0")
+                yield snapshot
+
+        mock_db.get_all.side_effect = get_all
+
+        processed = prefetch_processed_ids(mock_db, [f"doc_{i}" for i in range(250)])
+
+        assert processed == {"doc_3", "doc_150"}
+        assert mock_db.get_all.call_count == 3
+
 
 # ============================================================================
 # Test 7-9: Tag Update Flow
@@ -339,11 +369,14 @@ class TestFullPipeline:
             _make_raw_doc("doc_2"),
             _make_raw_doc("doc_3"),
         ]
-        mock_reader.extract_document_content.side_effect = [
-            _mock_reader_doc(),
-            Exception("Parse error"),
-            _mock_reader_doc(),
-        ]
+
+        def extract(raw_doc):
+            if raw_doc["id"] == "doc_2":
+                raise Exception("Parse error")
+            return _mock_reader_doc()
+
+        # Keyed by document: documents are processed concurrently
+        mock_reader.extract_document_content.side_effect = extract
 
         mock_idempotent.return_value = False
         mock_process.side_effect = [
@@ -1077,3 +1110,150 @@ class TestOverflowTag:
         mock_update_tags.assert_called_once()
         call_kwargs = mock_update_tags.call_args[1]
         assert call_kwargs.get("extra_tags") is None
+
+
+# ============================================================================
+# Concurrent Document Pipeline
+# ============================================================================
+
+
+class TestConcurrency:
+    """Tests for bounded-concurrency document processing."""
+
+    def _run(self, mocks, docs, process, max_concurrency, already_processed=False):
+        (mock_get_db, mock_load_config, mock_get_secret, mock_reader_cls,
+         mock_idempotent, mock_process, mock_update_tags, mock_report) = mocks
+        mock_get_db.return_value = MagicMock()
+        mock_load_config.return_value = {
+            "enabled": True,
+            "tag": "kx-auto",
+            "processed_tag": "kx-processed",
+            "write_to_readwise": True,
+            "max_documents_per_run": 20,
+            "max_concurrency": max_concurrency,
+        }
+        mock_get_secret.return_value = "key"
+
+        mock_reader = MagicMock()
+        mock_reader_cls.return_value = mock_reader
+        mock_reader.fetch_tagged_documents.return_value = docs
+        reader_docs = {}
+        for raw in docs:
+            reader_docs[raw["id"]] = _mock_reader_doc()
+            reader_docs[raw["id"]].doc_id = raw["id"]
+        mock_reader.extract_document_content.side_effect = lambda raw: reader_docs[raw["id"]]
+
+        mock_idempotent.return_value = already_processed
+        mock_process.side_effect = lambda reader_doc, **kwargs: process(reader_doc.doc_id)
+        mock_update_tags.return_value = True
+        mock_report.return_value = "report_concurrent"
+
+        auto_snippets(event={}, context=None)
+        return mock_report.call_args[1]
+
+    @patch("auto_snippets.main.store_job_report")
+    @patch("auto_snippets.main.update_tags")
+    @patch("auto_snippets.main.process_document")
+    @patch("auto_snippets.main.is_already_processed")
+    @patch("auto_snippets.main.ReadwiseReaderClient")
+    @patch("auto_snippets.main.get_secret")
+    @patch("auto_snippets.main.load_config")
+    @patch("auto_snippets.main.get_firestore_client")
+    def test_documents_processed_in_parallel(self, *mocks):
+        """Documents run concurrently up to max_concurrency."""
+        import threading
+
+        # Every worker must be inside process_document at the same time
+        barrier = threading.Barrier(3, timeout=5)
+
+        def process(doc_id):
+            barrier.wait()
+            return {"snippets_extracted": 1, "chunks_embedded": 1}
+
+        docs = [_make_raw_doc(f"doc_{i}") for i in range(1, 4)]
+        report = self._run(mocks, docs, process, max_concurrency=3)
+
+        assert report["processed"] == ["doc_1", "doc_2", "doc_3"]
+        assert report["failed"] == []
+
+    @patch("auto_snippets.main.store_job_report")
+    @patch("auto_snippets.main.update_tags")
+    @patch("auto_snippets.main.process_document")
+    @patch("auto_snippets.main.is_already_processed")
+    @patch("auto_snippets.main.ReadwiseReaderClient")
+    @patch("auto_snippets.main.get_secret")
+    @patch("auto_snippets.main.load_config")
+    @patch("auto_snippets.main.get_firestore_client")
+    def test_concurrency_bounded_and_order_preserved(self, *mocks):
+        """No more than max_concurrency documents run at once; report keeps input order."""
+        import threading
+
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def process(doc_id):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            # Earlier documents finish last
+            time.sleep(0.05 if doc_id == "doc_1" else 0.01)
+            with lock:
+                state["active"] -= 1
+            if doc_id == "doc_4":
+                raise Exception("LLM timeout")
+            return {"snippets_extracted": 1, "chunks_embedded": 1}
+
+        docs = [_make_raw_doc(f"doc_{i}") for i in range(1, 7)]
+        report = self._run(mocks, docs, process, max_concurrency=2)
+
+        assert state["peak"] <= 2
+        assert report["processed"] == ["doc_1", "doc_2", "doc_3", "doc_5", "doc_6"]
+        assert report["failed"] == ["doc_4"]
+        assert report["metrics"]["total_snippets"] == 5
+
+    @patch("auto_snippets.main.store_job_report")
+    @patch("auto_snippets.main.update_tags")
+    @patch("auto_snippets.main.process_document")
+    @patch("auto_snippets.main.prefetch_processed_ids")
+    @patch("auto_snippets.main.ReadwiseReaderClient")
+    @patch("auto_snippets.main.get_secret")
+    @patch("auto_snippets.main.load_config")
+    @patch("auto_snippets.main.get_firestore_client")
+    def test_prefetched_ids_skip_without_per_document_reads(self, *mocks):
+        """Idempotency comes from one prefetch, not a read per document."""
+        mock_prefetch = mocks[4]
+
+        docs = [_make_raw_doc(f"doc_{i}") for i in range(1, 4)]
+        report = self._run(
+            mocks, docs, lambda doc_id: {"snippets_extracted": 1, "chunks_embedded": 1},
+            max_concurrency=2, already_processed={"doc_2"},
+        )
+
+        mock_prefetch.assert_called_once()
+        assert mock_prefetch.call_args[0][1] == ["doc_1", "doc_2", "doc_3"]
+        assert report["processed"] == ["doc_1", "doc_3"]
+        assert report["skipped"] == ["doc_2"]
+        mocks[0].return_value.collection.return_value.document.return_value.get.assert_not_called()
+
+    @patch("auto_snippets.main.store_job_report")
+    @patch("auto_snippets.main.update_tags")
+    @patch("auto_snippets.main.process_document")
+    @patch("auto_snippets.main.prefetch_processed_ids")
+    @patch("auto_snippets.main.ReadwiseReaderClient")
+    @patch("auto_snippets.main.get_secret")
+    @patch("auto_snippets.main.load_config")
+    @patch("auto_snippets.main.get_firestore_client")
+    def test_prefetch_failure_falls_back_to_per_document_check(self, *mocks):
+        """A failed prefetch degrades to per-document reads."""
+        mocks[4].side_effect = Exception("Firestore unavailable")
+
+        docs = [_make_raw_doc("doc_1")]
+        with patch("auto_snippets.main.is_already_processed", return_value=True) as mock_check:
+            report = self._run(
+                mocks, docs, lambda doc_id: {"snippets_extracted": 1, "chunks_embedded": 1},
+                max_concurrency=2,
+            )
+
+        mock_check.assert_called_once()
+        assert mock_check.call_args[0][2] is None
+        assert report["skipped"] == ["doc_1"]
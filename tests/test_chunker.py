@@ -10,6 +10,7 @@ from src.common.chunker import (
     DocumentChunker,
     ChunkConfig,
     ChunkBoundary,
+    BoundaryCursor,
     chunk_document,
     calculate_tokens
 )
@@ -297,6 +298,158 @@ Content to convert.
         self.assertIn('Content to convert', output_markdown)
 
 
+class TestTokenOffsets(unittest.TestCase):
+    """Test single-pass token offset chunking."""
+
+    def setUp(self):
+        self.config = ChunkConfig(
+            target_tokens=100,
+            max_tokens=200,
+            min_tokens=20,
+            overlap_tokens=20
+        )
+        self.chunker = DocumentChunker(config=self.config)
+
+    def test_token_offsets_ascending_from_zero(self):
+        """Test offsets start at zero and never decrease."""
+        text = "This has émojis 🎉 and spëcial çharacters. " * 20
+        offsets = self.chunker.token_offsets(text)
+
+        self.assertEqual(offsets[0], 0)
+        self.assertTrue(all(a <= b for a, b in zip(offsets, offsets[1:])))
+        self.assertLess(offsets[-1], len(text))
+        self.assertEqual(
+            self.chunker.count_tokens_between(offsets, 0, len(text)),
+            len(offsets)
+        )
+
+    def test_token_offsets_empty(self):
+        """Test empty text has no tokens."""
+        self.assertEqual(len(self.chunker.token_offsets("")), 0)
+
+    def test_chunk_token_counts_from_offsets(self):
+        """Test chunk token counts match the document tokenization."""
+        content = "".join(f"Sentence number {i} talks about things. " for i in range(300))
+        markdown = f"---\ntitle: Offsets\nauthor: Test Author\n---\n\n{content}"
+        chunks = self.chunker.split_into_chunks(markdown, parent_doc_id="offsets")
+
+        _, body = self.chunker.parse_frontmatter(markdown)
+        offsets = self.chunker.token_offsets(body)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertEqual(chunk.content, body[chunk.char_start:chunk.char_end])
+            self.assertEqual(
+                chunk.token_count,
+                self.chunker.count_tokens_between(offsets, chunk.char_start, chunk.char_end)
+            )
+            # Core span (without overlaps) stays within the max token budget
+            core_tokens = self.chunker.count_tokens_between(
+                offsets,
+                chunk.char_start + chunk.overlap_start,
+                chunk.char_end - chunk.overlap_end
+            )
+            self.assertLessEqual(core_tokens, self.config.max_tokens)
+
+    def test_chunks_cover_content_without_gaps(self):
+        """Test consecutive core spans are contiguous."""
+        content = "Word " * 3000
+        markdown = f"---\ntitle: Cover\nauthor: Test Author\n---\n\n{content}"
+        chunks = self.chunker.split_into_chunks(markdown, parent_doc_id="cover")
+
+        for prev, nxt in zip(chunks, chunks[1:]):
+            self.assertEqual(
+                prev.char_end - prev.overlap_end,
+                nxt.char_start + nxt.overlap_start
+            )
+            # Overlap spans overlap_tokens tokens on each side
+            offsets = self.chunker.token_offsets(content.strip())
+            split = nxt.char_start + nxt.overlap_start
+            self.assertEqual(
+                self.chunker.count_tokens_between(offsets, nxt.char_start, split),
+                self.config.overlap_tokens
+            )
+
+
+class TestStreamingChunks(unittest.TestCase):
+    """Test lazy chunk generation and boundary scanning."""
+
+    def setUp(self):
+        self.config = ChunkConfig(
+            target_tokens=100,
+            max_tokens=200,
+            min_tokens=20,
+            overlap_tokens=20
+        )
+        self.chunker = DocumentChunker(config=self.config)
+
+    def test_iter_chunks_matches_split_into_chunks(self):
+        """Test generator yields the same chunks as the list API."""
+        paragraphs = [
+            f"> Highlight {i}. It has Two sentences.\n\nNote {i} follows here."
+            for i in range(200)
+        ]
+        markdown = "---\ntitle: Stream\n---\n\n" + "\n\n".join(paragraphs)
+
+        streamed = list(self.chunker.iter_chunks(markdown, parent_doc_id="stream"))
+        listed = self.chunker.split_into_chunks(markdown, parent_doc_id="stream")
+
+        self.assertGreater(len(streamed), 1)
+        self.assertEqual(streamed, listed)
+
+    def test_iter_chunks_is_lazy(self):
+        """Test chunks are produced on demand."""
+        markdown = "---\ntitle: Lazy\n---\n\n" + "Sentence here. " * 5000
+        iterator = self.chunker.iter_chunks(markdown, parent_doc_id="lazy")
+
+        first = next(iterator)
+        self.assertEqual(first.chunk_index, 0)
+        self.assertGreater(first.total_chunks, 1)
+
+    def test_iter_semantic_boundaries_sorted(self):
+        """Test merged boundary stream matches position/priority order."""
+        text = "> Quote. Next sentence.\n\n> Another quote.\n\nPlain. End."
+        boundaries = list(self.chunker.iter_semantic_boundaries(text))
+
+        self.assertEqual(
+            boundaries,
+            sorted(boundaries, key=lambda b: (b.position, b.priority))
+        )
+        self.assertEqual(len(boundaries), 7)
+
+    def test_boundary_cursor_advances_forward(self):
+        """Test cursor returns highest-priority boundaries around targets."""
+        cursor = BoundaryCursor(iter([
+            ChunkBoundary(position=10, boundary_type='highlight', priority=1),
+            ChunkBoundary(position=10, boundary_type='paragraph', priority=2),
+            ChunkBoundary(position=30, boundary_type='sentence', priority=3),
+            ChunkBoundary(position=50, boundary_type='paragraph', priority=2),
+        ]))
+
+        before, after = cursor.around(0, 20)
+        self.assertEqual(before.boundary_type, 'highlight')
+        self.assertEqual(after.position, 30)
+
+        before, after = cursor.around(10, 40)
+        self.assertEqual(before.position, 30)
+        self.assertEqual(after.position, 50)
+
+        before, after = cursor.around(50, 60)
+        self.assertIsNone(before)
+        self.assertIsNone(after)
+
+    def test_zero_overlap(self):
+        """Test chunks tile the content exactly when overlap is disabled."""
+        chunker = DocumentChunker(config=ChunkConfig(
+            target_tokens=50, max_tokens=100, min_tokens=10, overlap_tokens=0
+        ))
+        content = "Word " * 1000
+        chunks = chunker.split_into_chunks(f"---\ntitle: T\n---\n\n{content}", "zero")
+
+        self.assertEqual("".join(c.content for c in chunks), content.strip())
+        self.assertTrue(all(c.overlap_start == 0 and c.overlap_end == 0 for c in chunks))
+
+
 class TestChunkConfig(unittest.TestCase):
     """Test chunk configuration handling."""
 
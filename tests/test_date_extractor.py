@@ -147,7 +147,7 @@ class TestExtractDateFromHTML(unittest.TestCase):
 class TestFetchAndExtractDate(unittest.TestCase):
     """Tests for URL fetching and date extraction."""
 
-    @patch("date_extractor.requests.get")
+    @patch("date_extractor.http_client.get")
     def test_successful_extraction(self, mock_get):
         """Should fetch URL and extract date."""
         mock_response = MagicMock()
@@ -166,7 +166,7 @@ class TestFetchAndExtractDate(unittest.TestCase):
         result = fetch_and_extract_date("https://example.com/article")
         self.assertEqual(result, "2025-01-15")
 
-    @patch("date_extractor.requests.get")
+    @patch("date_extractor.http_client.get")
     def test_timeout_returns_none(self, mock_get):
         """Should return None on timeout."""
         import requests
@@ -176,7 +176,7 @@ class TestFetchAndExtractDate(unittest.TestCase):
         result = fetch_and_extract_date("https://example.com/slow")
         self.assertIsNone(result)
 
-    @patch("date_extractor.requests.get")
+    @patch("date_extractor.http_client.get")
     def test_http_error_returns_none(self, mock_get):
         """Should return None on HTTP error."""
         import requests
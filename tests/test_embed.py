@@ -3,8 +3,8 @@ Unit tests for the embed Cloud Function (Story 1.3+).
 
 Tests cover:
 - Frontmatter parsing (valid, missing fields, malformed)
-- Vertex AI embedding generation
-- Firestore document writes with vector embeddings
+- Vertex AI embedding generation (single and batched)
+- Firestore document writes with vector embeddings (single and batched)
 - API error handling (429 rate limit, 500 server error)
 - Retry logic with exponential backoff
 - Edge cases (empty content, large files, Unicode)
@@ -158,6 +158,11 @@ Content with special chars: äöü ñ 中文 🎉"""
 class TestVertexAIEmbeddings(unittest.TestCase):
     """Test Vertex AI embeddings generation with rate limiting and retries."""
 
+    def setUp(self):
+        from src.embed.governor import reset_governors
+
+        reset_governors()
+
     @patch("src.embed.main.get_vertex_ai_client")
     def test_generate_embedding_success(self, mock_get_client):
         """AC 1: Generate embedding using Vertex AI API."""
@@ -226,6 +231,62 @@ class TestVertexAIEmbeddings(unittest.TestCase):
         self.assertEqual(mock_model.get_embeddings.call_count, 3)
         self.assertEqual(mock_sleep.call_count, 2)  # 2 backoff sleeps
 
+    @patch("src.embed.main.get_vertex_ai_client")
+    def test_generate_embeddings_single_request(self, mock_get_client):
+        """Several texts are embedded with one get_embeddings call."""
+        from src.embed.main import generate_embeddings
+
+        mock_model = MagicMock()
+        mock_model.get_embeddings.side_effect = lambda texts, **kwargs: [
+            MagicMock(values=[float(i)] * 768) for i in range(len(texts))
+        ]
+        mock_get_client.return_value = mock_model
+
+        vectors = generate_embeddings(["a", "b", "c"])
+
+        self.assertEqual([v[0] for v in vectors], [0.0, 1.0, 2.0])
+        mock_model.get_embeddings.assert_called_once_with(
+            ["a", "b", "c"], output_dimensionality=768
+        )
+
+    @patch("src.embed.main.get_vertex_ai_client")
+    def test_generate_embeddings_rejected_batch_falls_back_per_text(self, mock_get_client):
+        """A rejected batch is retried per text so only the bad text fails."""
+        from google.api_core.exceptions import InvalidArgument
+
+        from src.embed.main import generate_embeddings
+
+        def get_embeddings(texts, **kwargs):
+            if len(texts) > 1 or texts == ["bad"]:
+                raise InvalidArgument("Input too long")
+            return [MagicMock(values=[0.5] * 768)]
+
+        mock_model = MagicMock()
+        mock_model.get_embeddings.side_effect = get_embeddings
+        mock_get_client.return_value = mock_model
+
+        vectors = generate_embeddings(["good", "bad", "fine"])
+
+        self.assertEqual(len(vectors[0]), 768)
+        self.assertIsNone(vectors[1])
+        self.assertEqual(len(vectors[2]), 768)
+        self.assertEqual(mock_model.get_embeddings.call_count, 4)
+
+
+    @patch("src.embed.main.get_vertex_ai_client")
+    def test_generate_embeddings_open_circuit_fails_whole_batch(self, mock_get_client):
+        """An open circuit fails the batch without per-text retries."""
+        from src.embed.governor import get_governor
+        from src.embed.main import EMBEDDING_MODEL, generate_embeddings
+
+        governor = get_governor("vertex", EMBEDDING_MODEL)
+        for _ in range(governor.failure_threshold):
+            governor.record_error(Exception("503 unavailable"))
+
+        vectors = generate_embeddings(["a", "b", "c"])
+
+        self.assertEqual(vectors, [None, None, None])
+        mock_get_client.return_value.get_embeddings.assert_not_called()
 
 # Removed: TestVectorSearchWriter - embeddings now stored directly in Firestore
 
@@ -384,6 +445,67 @@ class TestFirestoreWriter(unittest.TestCase):
         self.assertEqual(doc_data["embedding"], mock_vector_instance)
         self.assertEqual(doc_data["title"], "Test Book")
 
+    @staticmethod
+    def _chunk_items(count):
+        return [
+            {
+                "metadata": {
+                    "id": f"chunk_{i}",
+                    "chunk_id": f"chunk_{i}",
+                    "chunk_index": i,
+                    "title": "Test Book",
+                    "author": "Test Author",
+                },
+                "content": f"Content {i}",
+                "content_hash": f"sha256:{i}",
+                "embedding_vector": [0.1] * 768,
+            }
+            for i in range(count)
+        ]
+
+    @patch("src.embed.main.get_firestore_client")
+    def test_write_batch_single_commit_and_source_upsert(self, mock_get_client):
+        """Chunks are written with one batch commit and one source upsert."""
+        from src.embed.main import write_batch_to_firestore
+
+        mock_db = MagicMock()
+        mock_db.collection.return_value.document.return_value.get.return_value.exists = False
+        mock_get_client.return_value = mock_db
+
+        results = write_batch_to_firestore(
+            self._chunk_items(3), run_id="run-1", embedding_status="complete"
+        )
+
+        self.assertEqual(results, [True, True, True])
+        batch = mock_db.batch.return_value
+        self.assertEqual(batch.set.call_count, 3)
+        batch.commit.assert_called_once()
+        self.assertEqual(batch.set.call_args[0][1]["source_id"], "test-book")
+
+        # Source read once and created with all chunk IDs
+        source_ref = mock_db.collection.return_value.document.return_value
+        source_ref.get.assert_called_once()
+        source_ref.set.assert_called_once()
+        source_data = source_ref.set.call_args[0][0]
+        self.assertEqual(source_data["chunk_ids"], ["chunk_0", "chunk_1", "chunk_2"])
+        self.assertEqual(source_data["chunk_count"], 3)
+
+    @patch("src.embed.main.get_firestore_client")
+    def test_write_batch_commit_failure_fails_items(self, mock_get_client):
+        """A failed commit marks its items failed and skips the source upsert."""
+        from src.embed.main import write_batch_to_firestore
+
+        mock_db = MagicMock()
+        mock_db.batch.return_value.commit.side_effect = Exception("Firestore error")
+        mock_get_client.return_value = mock_db
+
+        results = write_batch_to_firestore(
+            self._chunk_items(2), run_id="run-1", embedding_status="complete"
+        )
+
+        self.assertEqual(results, [False, False])
+        mock_db.collection.return_value.document.return_value.get.assert_not_called()
+
 
 class TestEmbedHandler(unittest.TestCase):
     """Test the manifest-driven embed handler."""
@@ -478,6 +600,97 @@ Body text here."""
         # args[0] = metadata, args[1] = content, args[2] = content_hash
         self.assertEqual(write_args[2], expected_hash)
 
+    @patch("src.embed.main.write_to_firestore", return_value=True)
+    @patch("src.embed.main.generate_embedding")
+    @patch("src.embed.main.get_pipeline_collection")
+    @patch("src.embed.main.get_storage_client")
+    @patch(
+        "src.embed.main._load_manifest",
+        return_value={"run_id": "run-123", "items": [{"id": "123"}]},
+    )
+    def test_embed_skips_download_when_recorded_hash_embedded(
+        self,
+        mock_manifest,
+        mock_storage,
+        mock_collection,
+        mock_generate_embedding,
+        mock_write,
+    ):
+        from src.embed.main import embed
+
+        mock_blob = MagicMock()
+        mock_blob.generation = 1700000000000001
+        mock_blob.metadata = {"content_hash": "sha256:same"}
+        mock_bucket = MagicMock()
+        mock_bucket.get_blob.return_value = mock_blob
+        mock_storage.return_value.bucket.return_value = mock_bucket
+
+        doc_ref = MagicMock()
+        snapshot = MagicMock()
+        snapshot.id = "123"
+        snapshot.reference = doc_ref
+        snapshot.to_dict.return_value = {
+            "id": "123",
+            "embedding_status": "pending",
+            "markdown_uri": "gs://test-markdown-bucket/notes/123.md",
+            "markdown_generation": 1700000000000001,
+            "content_hash": "sha256:same",
+            "embedded_content_hash": "sha256:same",
+            "manifest_run_id": "run-123",
+        }
+
+        mock_query = MagicMock()
+        mock_query.stream.return_value = [snapshot]
+        mock_collection.return_value.where.return_value = mock_query
+
+        class MockRequest:
+            def get_json(self, silent=False):
+                return {"run_id": "run-123"}
+
+        response, status = embed(MockRequest())
+
+        self.assertEqual(status, 200)
+        self.assertEqual(response["processed"], 1)
+        self.assertEqual(response["unchanged"], 1)
+        self.assertEqual(response["firestore_updates"], 0)
+
+        mock_bucket.get_blob.assert_called_once_with("notes/123.md")
+        mock_bucket.blob.assert_not_called()
+        mock_generate_embedding.assert_not_called()
+        mock_write.assert_not_called()
+
+        # Single metadata-touch write on the pipeline item
+        doc_ref.set.assert_called_once()
+        self.assertEqual(doc_ref.set.call_args.args[0]["embedding_status"], "complete")
+
+    def test_recorded_hash_rejected_when_gcs_object_changed(self):
+        from src.embed.main import _recorded_hash_is_current
+
+        blob = MagicMock()
+        blob.generation = 2
+        blob.metadata = {"content_hash": "sha256:new"}
+        storage_client = MagicMock()
+        storage_client.bucket.return_value.get_blob.return_value = blob
+
+        doc = {
+            "markdown_uri": "gs://bucket/notes/1.md",
+            "markdown_generation": 1,
+            "content_hash": "sha256:old",
+            "embedded_content_hash": "sha256:old",
+        }
+        self.assertFalse(_recorded_hash_is_current(storage_client, doc))
+
+        # Hash not yet embedded: no GCS request needed
+        doc["embedded_content_hash"] = "sha256:older"
+        storage_client.reset_mock()
+        self.assertFalse(_recorded_hash_is_current(storage_client, doc))
+        storage_client.bucket.assert_not_called()
+
+        # Missing object
+        doc["embedded_content_hash"] = "sha256:old"
+        storage_client.bucket.return_value.get_blob.return_value = None
+        self.assertFalse(_recorded_hash_is_current(storage_client, doc))
+
     def test_embed_missing_run_id(self):
         from src.embed.main import embed
 
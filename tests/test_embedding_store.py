@@ -0,0 +1,178 @@
+"""
+Unit tests for the content-addressed embedding store.
+
+Tests cover:
+- Key derivation and float32 packing
+- Local shard persistence across store instances
+- Firestore backend reads/writes with packed bytes
+- Batched lookups computing only the misses
+- Store consultation in embed.generate_embedding
+"""
+
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.embed import embedding_store
+from src.embed.embedding_store import (
+    FirestoreEmbeddingStore,
+    LocalEmbeddingStore,
+    cached_embedding,
+    cached_embeddings,
+    embedding_key,
+    pack_vector,
+    unpack_vector,
+)
+
+
+class TestEmbeddingKey(unittest.TestCase):
+    """Test content addressing."""
+
+    def test_key_is_deterministic(self):
+        key1 = embedding_key("hello", "gemini-embedding-001", 768)
+        key2 = embedding_key("hello", "gemini-embedding-001", 768)
+        self.assertEqual(key1, key2)
+        self.assertEqual(len(key1), 64)
+
+    def test_key_depends_on_model_and_dimensionality(self):
+        base = embedding_key("hello", "gemini-embedding-001", 768)
+        self.assertNotEqual(base, embedding_key("hello", "other-model", 768))
+        self.assertNotEqual(base, embedding_key("hello", "gemini-embedding-001", 3072))
+        self.assertNotEqual(base, embedding_key("hello!", "gemini-embedding-001", 768))
+
+    def test_pack_roundtrip(self):
+        vector = [0.5, -1.25, 3.0, 0.0]
+        packed = pack_vector(vector)
+        self.assertEqual(len(packed), 16)
+        self.assertEqual(unpack_vector(packed), vector)
+
+
+class TestLocalEmbeddingStore(unittest.TestCase):
+    """Test on-disk shard backend."""
+
+    def test_put_and_get_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            key = embedding_key("text", "m", 4)
+            store = LocalEmbeddingStore(tmp)
+            self.assertIsNone(store.get(key))
+
+            store.put(key, [1.0, 2.0, 3.0, 4.0], "m", 4)
+            self.assertEqual(store.get(key), [1.0, 2.0, 3.0, 4.0])
+
+            reopened = LocalEmbeddingStore(tmp)
+            self.assertEqual(reopened.get(key), [1.0, 2.0, 3.0, 4.0])
+
+    def test_get_many_returns_only_hits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = LocalEmbeddingStore(tmp)
+            keys = [embedding_key(f"t{i}", "m", 2) for i in range(5)]
+            store.put_many({k: [float(i), 0.5] for i, k in enumerate(keys[:3])}, "m", 2)
+
+            found = LocalEmbeddingStore(tmp).get_many(keys)
+            self.assertEqual(set(found), set(keys[:3]))
+            self.assertEqual(found[keys[2]], [2.0, 0.5])
+
+
+class TestFirestoreEmbeddingStore(unittest.TestCase):
+    """Test Firestore backend with mocked client."""
+
+    def test_get_many_unpacks_vectors(self):
+        db = MagicMock()
+        hit = MagicMock(exists=True, id="k1")
+        hit.to_dict.return_value = {"vector": pack_vector([0.25, 0.75])}
+        miss = MagicMock(exists=False, id="k2")
+        db.get_all.return_value = [hit, miss]
+
+        store = FirestoreEmbeddingStore(client=db)
+        self.assertEqual(store.get_many(["k1", "k2"]), {"k1": [0.25, 0.75]})
+        db.collection.assert_called_with("embedding_store")
+
+    def test_put_many_uses_single_batch(self):
+        db = MagicMock()
+        store = FirestoreEmbeddingStore(client=db)
+        store.put_many({"k1": [1.0], "k2": [2.0]}, "gemini-embedding-001", 1)
+
+        batch = db.batch.return_value
+        self.assertEqual(batch.set.call_count, 2)
+        batch.commit.assert_called_once()
+        written = batch.set.call_args_list[0].args[1]
+        self.assertEqual(written["vector"], pack_vector([1.0]))
+        self.assertEqual(written["model"], "gemini-embedding-001")
+
+    def test_put_many_splits_batches_at_firestore_limit(self):
+        db = MagicMock()
+        db.batch.side_effect = lambda: MagicMock()
+        store = FirestoreEmbeddingStore(client=db)
+        store.put_many({f"k{i}": [float(i)] for i in range(1201)}, "gemini-embedding-001", 1)
+
+        self.assertEqual(db.batch.call_count, 3)
+
+    def test_failures_degrade_to_miss(self):
+        db = MagicMock()
+        db.get_all.side_effect = Exception("unavailable")
+        store = FirestoreEmbeddingStore(client=db)
+        self.assertIsNone(store.get("k1"))
+
+
+class TestCachedEmbedding(unittest.TestCase):
+    """Test store consultation before computing."""
+
+    def tearDown(self):
+        embedding_store.reset_embedding_store()
+
+    def test_disabled_store_always_computes(self):
+        embedding_store.set_embedding_store(None)
+        compute = MagicMock(return_value=[0.1, 0.2])
+        self.assertEqual(cached_embedding("t", "m", 2, compute), [0.1, 0.2])
+        compute.assert_called_once_with("t")
+
+    def test_second_call_is_served_from_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            embedding_store.set_embedding_store(LocalEmbeddingStore(tmp))
+            compute = MagicMock(return_value=[0.5, 0.25])
+
+            first = cached_embedding("t", "m", 2, compute)
+            second = cached_embedding("t", "m", 2, compute)
+
+            self.assertEqual(first, second)
+            compute.assert_called_once()
+
+    def test_batched_lookup_computes_only_misses(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            embedding_store.set_embedding_store(LocalEmbeddingStore(tmp))
+            cached_embedding("a", "m", 2, lambda t: [1.0, 1.0])
+            compute_many = MagicMock(side_effect=lambda texts: [[2.0, 2.0] for _ in texts])
+
+            vectors = cached_embeddings(["a", "b", "b"], "m", 2, compute_many)
+
+        self.assertEqual(vectors, [[1.0, 1.0], [2.0, 2.0], [2.0, 2.0]])
+        compute_many.assert_called_once_with(["b"])
+
+    def test_batched_failures_are_not_stored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            embedding_store.set_embedding_store(LocalEmbeddingStore(tmp))
+            first = cached_embeddings(["x"], "m", 2, lambda texts: [None])
+            second = cached_embeddings(["x"], "m", 2, lambda texts: [[3.0, 3.0]])
+
+        self.assertEqual(first, [None])
+        self.assertEqual(second, [[3.0, 3.0]])
+
+    @patch("src.embed.main.get_vertex_ai_client")
+    def test_generate_embedding_consults_store(self, mock_get_client):
+        from src.embed.main import generate_embedding
+
+        mock_embedding = MagicMock()
+        mock_embedding.values = [0.5] * 768
+        mock_get_client.return_value.get_embeddings.return_value = [mock_embedding]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            embedding_store.set_embedding_store(LocalEmbeddingStore(tmp))
+            generate_embedding("same text")
+            result = generate_embedding("same text")
+
+        self.assertEqual(len(result), 768)
+        mock_get_client.return_value.get_embeddings.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
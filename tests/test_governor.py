@@ -0,0 +1,368 @@
+"""
+Unit tests for the process-wide provider quota governor.
+
+Tests cover:
+- Token-bucket admission with one sleep per caller
+- Quota errors: global pause, rate halving, coalesced congestion events
+- Additive rate recovery on success
+- Circuit breaker: open, fail fast, half-open probe, close
+- Error classification and the shared registry
+- LLM clients and embedding calls going through the governor
+"""
+
+import asyncio
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.common.governor import (
+    CLIENT,
+    SERVER,
+    THROTTLE,
+    CircuitOpenError,
+    Governor,
+    classify_error,
+    get_governor,
+    governor_stats,
+    reset_governors,
+)
+from tests.llm_fakes import CLAUDE_MODEL, claude_client, claude_response
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.now += seconds
+
+
+class GovernorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        # 60/min = one request per second, two seconds of burst
+        self.governor = Governor(
+            "test:model", rate_per_minute=60, open_seconds=30, failure_threshold=3, clock=self.clock
+        )
+        patcher = patch("time.sleep", side_effect=self.clock.sleep)
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestAdmission(GovernorTestCase):
+    """Test token-bucket admission."""
+
+    def test_burst_then_paced(self):
+        waits = [self.governor.acquire() for _ in range(4)]
+
+        self.assertEqual(waits, [0.0, 0.0, 1.0, 1.0])
+        self.assertEqual(self.mock_sleep.call_count, 2)
+
+    def test_waiting_callers_get_distinct_slots(self):
+        # Reservations are made before sleeping, so queued callers wake one slot apart
+        self.governor.acquire()
+        self.governor.acquire()
+        waits = [self.governor._reserve() for _ in range(3)]
+
+        self.assertEqual(waits, [1.0, 2.0, 3.0])
+
+    def test_acquire_async(self):
+        self.governor.acquire()
+        self.governor.acquire()
+
+        with patch("asyncio.sleep", side_effect=self.clock.async_sleep):
+            waited = asyncio.run(self.governor.acquire_async())
+
+        self.assertEqual(waited, 1.0)
+        self.assertEqual(self.clock.now, 1.0)
+
+
+class TestQuotaBackoff(GovernorTestCase):
+    """Test adaptive rate and global backoff on quota errors."""
+
+    def test_throttle_pauses_everyone_and_halves_rate(self):
+        delay = self.governor.record_error(Exception("429 Resource exhausted"))
+
+        self.assertEqual(delay, 0.0)
+        self.assertEqual(self.governor.rate_per_minute, 30)
+        # The next caller waits out the 1s pause; the one after that is paced at 30/min
+        self.assertAlmostEqual(self.governor._reserve(), 1.0)
+        self.assertAlmostEqual(self.governor._reserve(), 3.0)
+
+    def test_in_flight_errors_count_as_one_event(self):
+        for _ in range(3):
+            self.governor.record_error(Exception("quota exceeded"))
+
+        stats = self.governor.stats()
+        self.assertEqual((stats["throttled"], stats["congestion_events"]), (3, 1))
+        self.assertEqual(self.governor.rate_per_minute, 30)
+
+    def test_backoff_escalates_then_resets_on_success(self):
+        self.governor.record_error(Exception("429"))
+        self.clock.now = 1.0
+        self.governor.record_error(Exception("429"))
+        self.assertEqual(self.governor._paused_until, 3.0)
+
+        self.governor.record_success()
+        self.clock.now = 10.0
+        self.governor.record_error(Exception("429"))
+        self.assertEqual(self.governor._paused_until, 11.0)
+
+    def test_success_raises_rate_additively(self):
+        self.governor.record_error(Exception("429"))
+        for _ in range(10):
+            self.governor.record_success()
+
+        self.assertAlmostEqual(self.governor.rate_per_minute, 36)
+
+        for _ in range(100):
+            self.governor.record_success()
+        self.assertEqual(self.governor.rate_per_minute, 60)
+
+    def test_rate_floor(self):
+        for i in range(20):
+            self.clock.now = i * 1000.0
+            self.governor.record_error(Exception("429"))
+
+        self.assertEqual(self.governor.rate_per_minute, self.governor.min_rate)
+
+
+class TestCircuitBreaker(GovernorTestCase):
+    """Test fail-fast behavior on sustained server errors."""
+
+    def _fail(self, times):
+        for attempt in range(times):
+            self.governor.record_error(Exception("503 Service Unavailable"), attempt)
+
+    def test_server_error_backoff_is_jittered_exponential(self):
+        with patch("src.common.governor.random.uniform", side_effect=lambda a, b: b):
+            delays = [self.governor.record_error(Exception("500 internal"), a) for a in range(2)]
+
+        self.assertEqual(delays, [1.0, 2.0])
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail(3)
+
+        self.assertEqual(self.governor.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            self.governor.acquire()
+        self.assertEqual(self.governor.stats()["rejected"], 1)
+
+    def test_success_resets_failure_count(self):
+        self._fail(2)
+        self.governor.record_success()
+        self._fail(2)
+
+        self.assertEqual(self.governor.state, "closed")
+
+    def test_half_open_admits_single_probe(self):
+        self._fail(3)
+        self.clock.now = 31.0
+
+        self.governor.acquire()
+        self.assertEqual(self.governor.state, "half_open")
+        with self.assertRaises(CircuitOpenError):
+            self.governor.acquire()
+
+        self.governor.record_success()
+        self.assertEqual(self.governor.state, "closed")
+        self.governor.acquire()
+
+    def test_failed_probe_reopens(self):
+        self._fail(3)
+        self.clock.now = 31.0
+        self.governor.acquire()
+
+        self._fail(1)
+
+        self.assertEqual(self.governor.state, "open")
+        self.assertEqual(self.governor.stats()["circuit_opens"], 2)
+
+    def test_rejection_does_not_release_probe(self):
+        self._fail(3)
+        self.clock.now = 31.0
+        self.governor.acquire()
+
+        try:
+            self.governor.acquire()
+        except CircuitOpenError as e:
+            self.assertIsNone(self.governor.record_error(e))
+
+        with self.assertRaises(CircuitOpenError):
+            self.governor.acquire()
+
+    def test_stale_probe_is_replaced(self):
+        self._fail(3)
+        self.clock.now = 31.0
+        self.governor.acquire()  # probe whose outcome is never reported
+
+        self.clock.now = 45.0
+        with self.assertRaises(CircuitOpenError):
+            self.governor.acquire()
+        self.clock.now = 62.0
+        self.governor.acquire()
+
+        self.assertEqual(self.governor.state, "half_open")
+
+    def test_cancelled_probe_releases_circuit(self):
+        self._fail(3)
+        self.clock.now = 31.0
+        self.governor.acquire()
+
+        self.assertIsNone(self.governor.record_error(asyncio.CancelledError()))
+
+        self.governor.acquire()
+        self.assertEqual(self.governor.stats()["server_errors"], 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.assertIsNone(self.governor.record_error(ValueError("bad request")))
+        self.assertEqual(self.governor.stats()["server_errors"], 0)
+
+
+class TestClassification(unittest.TestCase):
+    """Test error classification and the registry."""
+
+    def test_classify_error(self):
+        class ResourceExhausted(Exception):
+            pass
+
+        class APIStatusError(Exception):
+            status_code = 502
+
+        self.assertEqual(classify_error(ResourceExhausted("")), THROTTLE)
+        self.assertEqual(classify_error(Exception("Error 529: overloaded")), THROTTLE)
+        self.assertEqual(classify_error(APIStatusError("")), SERVER)
+        self.assertEqual(classify_error(TimeoutError()), SERVER)
+        self.assertEqual(classify_error(ValueError("invalid JSON")), CLIENT)
+
+    def test_status_code_overrides_message(self):
+        class BadRequestError(Exception):
+            status_code = 400
+
+        error = BadRequestError("prompt is too long: 205000 tokens > 200000 (internal limit)")
+        self.assertEqual(classify_error(error), CLIENT)
+        self.assertEqual(classify_error(asyncio.CancelledError()), CLIENT)
+
+    def test_google_api_core_exceptions(self):
+        from google.api_core.exceptions import InternalServerError, NotFound, ResourceExhausted
+
+        self.assertEqual(classify_error(ResourceExhausted("slow down")), THROTTLE)
+        self.assertEqual(classify_error(InternalServerError("boom")), SERVER)
+        self.assertEqual(classify_error(NotFound("missing")), CLIENT)
+
+    def test_registry_shares_governors(self):
+        reset_governors()
+        with patch.dict("os.environ", {"GOVERNOR_LIMITS": "gemini:fast=120, bad"}):
+            governor = get_governor("gemini", "fast")
+
+        self.assertIs(get_governor("gemini", "fast"), governor)
+        self.assertEqual(governor.max_rate, 120)
+        self.assertIn("gemini:fast", governor_stats())
+        reset_governors()
+
+    def test_deployment_copies_match(self):
+        canonical = (SRC_DIR / "common" / "governor.py").read_text()
+        for copy_path in ["llm/governor.py", "embed/governor.py"]:
+            self.assertEqual((SRC_DIR / copy_path).read_text(), canonical, copy_path)
+
+
+class TestCallerIntegration(unittest.TestCase):
+    """Test that provider callers share one governor per model."""
+
+    def setUp(self):
+        from src.embed.governor import reset_governors as reset_embed_governors
+        from src.llm.governor import reset_governors as reset_llm_governors
+
+        reset_llm_governors()
+        reset_embed_governors()
+
+    @patch("time.sleep")
+    def test_llm_client_throttle_slows_other_callers(self, mock_sleep):
+        from src.llm.governor import get_governor as llm_governor
+
+        response = claude_response("ok", 1, 1)
+        claude_client([Exception("429 rate limited"), response]).generate("a")
+        mock_sleep.reset_mock()
+
+        # A different client instance for the same model is still paced
+        governor = llm_governor("claude", CLAUDE_MODEL)
+        governor._paused_until = float("inf")
+        governor._tokens = -10.0
+        claude_client([response]).generate("b")
+
+        mock_sleep.assert_called_once()
+        self.assertEqual(governor.stats()["congestion_events"], 1)
+
+    def test_llm_client_fails_fast_when_circuit_open(self):
+        from src.llm.gemini import GeminiClient
+        from src.llm.governor import CircuitOpenError as LLMCircuitOpenError
+        from src.llm.governor import get_governor as llm_governor
+
+        governor = llm_governor("gemini", "gemini-2.5-flash")
+        for _ in range(governor.failure_threshold):
+            governor.record_error(Exception("503 unavailable"))
+        client = GeminiClient(model_id="gemini-2.5-flash", project_id="p")
+        client._initialized = True
+        client._model = MagicMock()
+
+        with patch.object(client, "_build_request", return_value=("hi", {}, {})):
+            with self.assertRaises(LLMCircuitOpenError):
+                client.generate("hi")
+
+        client._model.generate_content.assert_not_called()
+
+    @patch("src.embed.main.get_vertex_ai_client")
+    @patch("time.sleep")
+    def test_embedding_calls_use_governor(self, mock_sleep, mock_get_client):
+        from google.api_core.exceptions import ResourceExhausted
+
+        from src.embed.governor import get_governor as embed_governor
+        from src.embed.main import generate_embedding
+
+        embedding = MagicMock(values=[0.1] * 768)
+        mock_get_client.return_value.get_embeddings.side_effect = [
+            ResourceExhausted("quota"),
+            [embedding],
+        ]
+
+        generate_embedding("text")
+
+        stats = embed_governor("vertex", "gemini-embedding-001").stats()
+        self.assertEqual((stats["admitted"], stats["throttled"]), (2, 1))
+
+    @patch("src.embed.main.get_vertex_ai_client")
+    @patch("time.sleep")
+    def test_embedding_probe_failure_reopens_circuit(self, mock_sleep, mock_get_client):
+        from google.api_core.exceptions import ServiceUnavailable
+
+        from src.embed.governor import CircuitOpenError as EmbedCircuitOpenError
+        from src.embed.governor import get_governor as embed_governor
+        from src.embed.main import _get_embeddings_with_retry
+
+        governor = embed_governor("vertex", "gemini-embedding-001")
+        for _ in range(governor.failure_threshold):
+            governor.record_error(Exception("503 unavailable"))
+        governor._open_until = 0.0
+        mock_get_client.return_value.get_embeddings.side_effect = ServiceUnavailable("down")
+
+        # The 503 probe is reported, so the retry fails fast on the reopened
+        # circuit instead of the circuit wedging half-open
+        with self.assertRaises(EmbedCircuitOpenError):
+            _get_embeddings_with_retry(["text"])
+
+        self.assertEqual(governor.state, "open")
+        self.assertFalse(governor._probe_in_flight)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Unit tests for the pluggable HTML-to-text engines.
+
+Tests cover:
+- Streaming engines match the BeautifulSoup reference output
+- Boilerplate removal and unclosed/badly nested elements
+- Date hints in document order and lazy (early-stopping) parsing
+- Input size guard and engine selection
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+from src.common import html_text
+from src.common.html_text import (
+    LxmlEngine,
+    SoupEngine,
+    StreamingEngine,
+    create_engine,
+    guard_html_size,
+    lxml_available,
+)
+
+ARTICLE_HTML = """<!DOCTYPE html>
+<html><head>
+<title>Feature Flags in Practice</title>
+<meta charset="utf-8">
+<meta property="article:published_time" content="2024-03-01T08:00:00Z">
+<script type="application/ld+json">{"@type": "Article", "datePublished": "2024-02-28"}</script>
+<style>body { color: #333; }</style>
+<script>window.analytics = "<p>not text</p>";</script>
+</head><body>
+<header><a href="/">Blog</a></header>
+<nav><ul><li>Home</li><li>About</li></ul></nav>
+<article>
+  <h1>Feature Flags in Practice</h1>
+  <p>Flags decouple <b>deploy</b> from <i>release</i> &amp; reduce risk.</p>
+  <p>Use&nbsp;short-lived flags.<br>Remove them &mdash; quickly.</p>
+  <!-- tracking pixel -->
+  <time datetime="2024-02-27">Feb 27</time>
+</article>
+<aside>Related posts</aside>
+<iframe src="https://ads.example.com"></iframe>
+<footer>&copy; 2024</footer>
+</body></html>
+"""
+
+MALFORMED_HTML = [
+    "<div>unclosed <nav>hidden <p>still hidden",
+    "<header><nav>menu</header>visible after header",
+    "<p>x</p></nav>stray end tag",
+    "<b><aside>side</aside>kept</b>tail",
+    "a<!-- c -->b<br>c<br/>d",
+    "<ul><li>one<li>two</ul><table><tr><td>c1<td>c2</table>",
+    "plain text only",
+]
+
+
+def _streaming_engines():
+    engines = [StreamingEngine()]
+    if lxml_available():
+        engines.append(LxmlEngine())
+    return engines
+
+
+class TestTextExtraction(unittest.TestCase):
+    """Test that every engine produces the reference text."""
+
+    def test_article_matches_reference(self):
+        expected = SoupEngine().to_text(ARTICLE_HTML)
+
+        self.assertIn("Flags decouple deploy from release & reduce risk.", expected)
+        self.assertNotIn("Related posts", expected)
+        self.assertNotIn("analytics", expected)
+        for engine in _streaming_engines():
+            with self.subTest(engine=engine.name):
+                self.assertEqual(engine.to_text(ARTICLE_HTML), expected)
+
+    def test_stdlib_matches_soup_on_malformed_markup(self):
+        soup, stream = SoupEngine(), StreamingEngine()
+        for html in MALFORMED_HTML:
+            with self.subTest(html=html):
+                self.assertEqual(stream.to_text(html), soup.to_text(html))
+
+    def test_text_node_split_across_feed_chunks(self):
+        html = "<p>" + "word " * 30000 + "</p>"  # > FEED_CHUNK_CHARS
+
+        for engine in _streaming_engines():
+            with self.subTest(engine=engine.name):
+                text = engine.to_text(html)
+                self.assertEqual(text.split(), ["word"] * 30000)
+
+    def test_empty_input(self):
+        for engine in [SoupEngine()] + _streaming_engines():
+            self.assertEqual(engine.to_text(""), "")
+            self.assertEqual(list(engine.iter_date_hints("")), [])
+
+
+class TestDateHints(unittest.TestCase):
+    """Test structured date hint scanning."""
+
+    def test_hints_match_reference_in_document_order(self):
+        expected = list(SoupEngine().iter_date_hints(ARTICLE_HTML))
+
+        self.assertEqual([kind for kind, _ in expected], ["meta", "meta", "jsonld", "time"])
+        for engine in _streaming_engines():
+            with self.subTest(engine=engine.name):
+                self.assertEqual(list(engine.iter_date_hints(ARTICLE_HTML)), expected)
+
+    def test_streaming_scan_stops_when_caller_stops(self):
+        jsonld = '<script type="application/ld+json">{"datePublished": "2024-01-01"}</script>'
+        html = "<html><head>" + jsonld + "</head><body>" + "<p>filler</p>" * 50000 + "</body></html>"
+
+        for engine in _streaming_engines():
+            with self.subTest(engine=engine.name):
+                fed = []
+                original = engine._parser
+
+                def tracking_parser(sink, original=original):
+                    parser = original(sink)
+
+                    class Tracker:
+                        def feed(self, chunk):
+                            fed.append(len(chunk))
+                            parser.feed(chunk)
+
+                        def close(self):
+                            return parser.close()
+
+                    return Tracker()
+
+                with patch.object(engine, "_parser", tracking_parser):
+                    hints = engine.iter_date_hints(html)
+                    kind, value = next(hints)
+
+                self.assertEqual(kind, "jsonld")
+                self.assertEqual(len(fed), 1)
+                self.assertLess(sum(fed), len(html))
+
+
+class TestGuardsAndSelection(unittest.TestCase):
+    """Test size guard and engine configuration."""
+
+    def tearDown(self):
+        html_text.set_engine(None)
+
+    def test_guard_truncates_oversized_input(self):
+        self.assertEqual(guard_html_size("abcdef", max_chars=4), "abcd")
+        self.assertEqual(guard_html_size("abc", max_chars=4), "abc")
+
+    @patch.dict(os.environ, {"HTML_MAX_CHARS": "11"})
+    def test_engines_apply_env_cap(self):
+        html = "<p>kept</p>" + "<p>dropped</p>" * 10
+
+        self.assertEqual(StreamingEngine().to_text(html), "kept")
+
+    def test_create_engine(self):
+        self.assertIsInstance(create_engine("stdlib"), StreamingEngine)
+        self.assertIsInstance(create_engine("bs4"), SoupEngine)
+        expected = LxmlEngine if lxml_available() else StreamingEngine
+        self.assertIsInstance(create_engine("auto"), expected)
+        with self.assertRaises(ValueError):
+            create_engine("regex")
+
+    @patch.dict(os.environ, {"HTML_TEXT_ENGINE": "regex"})
+    def test_unknown_configured_engine_falls_back_to_stdlib(self):
+        html_text.set_engine(None)
+
+        self.assertIsInstance(html_text.get_engine(), StreamingEngine)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Unit tests for the shared pooled HTTP client.
+
+Tests cover:
+- Connection pool sharing between sessions
+- Retry/backoff on 429/5xx and transport errors, honoring Retry-After
+- Per-host request metrics
+- Deployment copies staying in sync
+"""
+
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from src.common import http_client
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+
+def _response(status, headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.headers = headers or {}
+    return response
+
+
+class TestSessions(unittest.TestCase):
+    """Test pooled session creation."""
+
+    def test_sessions_share_adapter(self):
+        first = http_client.create_session({"Authorization": "Token a"})
+        second = http_client.create_session({"Authorization": "Token b"})
+
+        self.assertIs(first.get_adapter("https://readwise.io"), second.get_adapter("https://readwise.io"))
+        self.assertEqual(first.headers["Authorization"], "Token a")
+        self.assertEqual(second.headers["Authorization"], "Token b")
+
+    def test_default_session_is_cached(self):
+        self.assertIs(http_client.get_session(), http_client.get_session())
+
+
+class TestRequestRetries(unittest.TestCase):
+    """Test unified retry behavior."""
+
+    def setUp(self):
+        http_client.reset_metrics()
+        self.session = MagicMock()
+
+    @patch("time.sleep")
+    def test_retry_after_honored_on_429(self, mock_sleep):
+        self.session.request.side_effect = [
+            _response(429, {"Retry-After": "7"}),
+            _response(200),
+        ]
+
+        response = http_client.request("GET", "https://api.test/x", session=self.session)
+
+        self.assertEqual(response.status_code, 200)
+        mock_sleep.assert_called_once_with(7)
+
+    def test_retry_after_is_capped(self):
+        seconds = _response(429, {"Retry-After": "3600"})
+        date = _response(429, {"Retry-After": "Wed, 21 Oct 2099 07:28:00 GMT"})
+
+        self.assertEqual(http_client.retry_after_seconds(seconds, 1), http_client.MAX_BACKOFF)
+        self.assertEqual(http_client.retry_after_seconds(date, 1), http_client.MAX_BACKOFF)
+
+    @patch("time.sleep")
+    def test_server_error_uses_backoff(self, mock_sleep):
+        self.session.request.side_effect = [_response(503), _response(502), _response(200)]
+
+        http_client.request("GET", "https://api.test/x", session=self.session)
+
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [1, 2])
+
+    @patch("time.sleep")
+    def test_client_error_not_retried(self, mock_sleep):
+        self.session.request.return_value = _response(404)
+
+        response = http_client.request("GET", "https://api.test/x", session=self.session)
+
+        self.assertEqual(response.status_code, 404)
+        self.session.request.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch("time.sleep")
+    def test_last_retryable_response_returned(self, mock_sleep):
+        self.session.request.return_value = _response(429, {"Retry-After": "1"})
+
+        response = http_client.request(
+            "GET", "https://api.test/x", session=self.session, max_retries=2
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.session.request.call_count, 2)
+
+    @patch("time.sleep")
+    def test_timeout_raises_after_max_retries(self, mock_sleep):
+        self.session.request.side_effect = requests.exceptions.Timeout("slow")
+
+        with self.assertRaises(requests.exceptions.Timeout):
+            http_client.request("GET", "https://api.test/x", session=self.session)
+
+        self.assertEqual(self.session.request.call_count, 3)
+
+    def test_before_attempt_hook_and_timeout(self):
+        self.session.request.return_value = _response(200)
+        hook = MagicMock()
+
+        http_client.request(
+            "POST", "https://api.test/x", session=self.session,
+            before_attempt=hook, timeout=5, json={"a": 1},
+        )
+
+        hook.assert_called_once()
+        self.session.request.assert_called_once_with(
+            "POST", "https://api.test/x", timeout=5, json={"a": 1}
+        )
+
+    @patch("time.sleep")
+    def test_metrics_per_host(self, mock_sleep):
+        self.session.request.side_effect = [_response(500), _response(200)]
+
+        http_client.request("GET", "https://api.test/x", session=self.session)
+
+        stats = http_client.get_metrics()["api.test"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["status"], {500: 1, 200: 1})
+
+
+class TestDeploymentCopies(unittest.TestCase):
+    """Functions deployed from their own directory ship a copy."""
+
+    def test_copies_match_common_module(self):
+        canonical = (SRC_DIR / "common" / "http_client.py").read_text()
+        for copy_path in ["ingest/http_client.py", "batch_recommendations/http_client.py"]:
+            self.assertEqual((SRC_DIR / copy_path).read_text(), canonical, copy_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
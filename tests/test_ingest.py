@@ -1,3 +1,5 @@
+import base64
+import hashlib
 import json
 import unittest
 from unittest.mock import patch, MagicMock
@@ -15,10 +17,14 @@ class TestIngestFunction(unittest.TestCase):
     @patch('src.ingest.main.PIPELINE_BUCKET', 'test-project-pipeline')
     @patch('src.ingest.main.PROJECT_ID', 'test-project')
     @patch('src.ingest.main.generate_run_id', return_value='2025-10-20T02-00-00Z-test1234')
+    @patch('src.ingest.main._get_firestore_client')
     @patch('src.ingest.main._get_pubsub_publisher')
     @patch('src.ingest.main._get_storage_client')
     @patch('src.ingest.main._get_secret_client')
-    def test_handler_success(self, mock_get_secret, mock_get_storage, mock_get_pubsub, mock_run_id):
+    def test_handler_success(self, mock_get_secret, mock_get_storage, mock_get_pubsub, mock_get_firestore, mock_run_id):
+        # No persisted ingest state yet
+        mock_get_firestore.return_value.collection.return_value.document.return_value.get.return_value.exists = False
+
         # Setup mocks returned by lazy getters
         mock_secret_client = MagicMock()
         mock_storage_client = MagicMock()
@@ -32,7 +38,7 @@ class TestIngestFunction(unittest.TestCase):
         mock_secret_client.access_secret_version.return_value.payload.data = b'fake-api-key'
 
         # Mock Readwise API response (returns books with nested highlights)
-        with patch('src.ingest.main.requests.get') as mock_requests_get:
+        with patch('src.ingest.main.http_client.request') as mock_requests_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.raise_for_status.return_value = None
@@ -90,10 +96,14 @@ class TestIngestFunction(unittest.TestCase):
             self.assertEqual(manifest_body["item_count"], 1)
             self.assertEqual(manifest_body["items"][0]["id"], '123')
 
+    @patch('src.ingest.main.PIPELINE_BUCKET', 'test-project-pipeline')
     @patch('src.ingest.main.PROJECT_ID', 'test-project')
+    @patch('src.ingest.main._get_firestore_client')
     @patch('src.ingest.main._get_secret_client')
-    @patch('src.ingest.main.requests.get')
-    def test_handler_api_failure(self, mock_requests_get, mock_get_secret):
+    @patch('src.ingest.main.http_client.request')
+    def test_handler_api_failure(self, mock_requests_get, mock_get_secret, mock_get_firestore):
+        mock_get_firestore.return_value.collection.return_value.document.return_value.get.return_value.exists = False
+
         # Setup mock
         mock_secret_client = MagicMock()
         mock_get_secret.return_value = mock_secret_client
@@ -108,5 +118,196 @@ class TestIngestFunction(unittest.TestCase):
         with self.assertRaises(requests.exceptions.RequestException):
             main.handler(event={}, context={})
 
+
+class TestIncrementalIngest(unittest.TestCase):
+    """Test persisted watermark, resumable pagination and backfills."""
+
+    def setUp(self):
+        patchers = [
+            patch('src.ingest.main.PROJECT_ID', 'test-project'),
+            patch('src.ingest.main.PIPELINE_BUCKET', 'test-project-pipeline'),
+            patch('src.ingest.main.PIPELINE_MANIFEST_PREFIX', 'manifests'),
+            patch('src.ingest.main.generate_run_id', return_value='run-new'),
+            patch('src.ingest.main.get_secret', return_value='fake-api-key'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.firestore = MagicMock()
+        self.state_ref = self.firestore.collection.return_value.document.return_value
+        self.state_ref.get.return_value.exists = False
+
+        self.storage = MagicMock()
+        self.blobs = {}
+
+        def blob_for(path):
+            return self.blobs.setdefault(path, MagicMock(name=path))
+
+        self.storage.bucket.return_value.blob.side_effect = blob_for
+        self.publisher = MagicMock()
+
+        for target, value in [
+            ('src.ingest.main._get_firestore_client', self.firestore),
+            ('src.ingest.main._get_storage_client', self.storage),
+            ('src.ingest.main._get_pubsub_publisher', self.publisher),
+        ]:
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        requests_patcher = patch('src.ingest.main.http_client.request')
+        self.requests_get = requests_patcher.start()
+        self.addCleanup(requests_patcher.stop)
+
+    def _pages(self, *pages):
+        responses = []
+        for books, cursor in pages:
+            response = MagicMock(status_code=200)
+            response.json.return_value = {'results': books, 'nextPageCursor': cursor}
+            responses.append(response)
+        self.requests_get.side_effect = responses
+
+    def _state_writes(self):
+        return [c.args[0] for c in self.state_ref.set.call_args_list]
+
+    def _manifest(self, path='manifests/run-new.json'):
+        return json.loads(self.blobs[path].upload_from_string.call_args.kwargs['data'])
+
+    def test_watermark_advances_to_latest_updated(self):
+        self.state_ref.get.return_value.exists = True
+        self.state_ref.get.return_value.to_dict.return_value = {
+            'last_updated_at': '2025-01-01T00:00:00Z'
+        }
+        self._pages(([
+            {'user_book_id': 1, 'updated': '2025-01-03T10:00:00Z'},
+            {'user_book_id': 2, 'updated': '2025-01-02T10:00:00Z'},
+        ], None))
+
+        main.handler(event={}, context={})
+
+        params = self.requests_get.call_args.kwargs['params']
+        self.assertEqual(params['updated__gt'], '2025-01-01T00:00:00Z')
+        final_state = self._state_writes()[-1]
+        self.assertIsNone(final_state['in_flight'])
+        self.assertEqual(final_state['last_updated_at'], '2025-01-03T10:00:00Z')
+        self.assertEqual(final_state['last_manifest_uri'], 'gs://test-project-pipeline/manifests/run-new.json')
+
+    def test_watermark_unchanged_when_nothing_exported(self):
+        self.state_ref.get.return_value.exists = True
+        self.state_ref.get.return_value.to_dict.return_value = {
+            'last_updated_at': '2025-01-01T00:00:00Z'
+        }
+        self._pages(([], None))
+
+        main.handler(event={}, context={})
+
+        self.assertEqual(self._state_writes()[-1]['last_updated_at'], '2025-01-01T00:00:00Z')
+
+    def test_watermark_not_advanced_when_publish_fails(self):
+        self._pages(([{'user_book_id': 1, 'updated': '2025-01-03T10:00:00Z'}], None))
+        self.publisher.publish.return_value.result.side_effect = Exception('publish failed')
+
+        with self.assertRaises(Exception):
+            main.handler(event={}, context={})
+
+        self.assertTrue(all('last_updated_at' not in state for state in self._state_writes()))
+
+    def test_multi_page_export_checkpoints_cursor(self):
+        self._pages(
+            ([{'user_book_id': 1, 'updated': '2025-01-02T00:00:00Z'}], 'cursor-2'),
+            ([{'user_book_id': 2, 'updated': '2025-01-03T00:00:00Z'}], None),
+        )
+
+        main.handler(event={}, context={})
+
+        checkpoints = [s['in_flight'] for s in self._state_writes() if s.get('in_flight')]
+        self.assertEqual(checkpoints[-1]['page_cursor'], 'cursor-2')
+        partial = self._manifest('manifests/run-new.partial.json')
+        self.assertEqual([item['id'] for item in partial['items']], ['1'])
+        self.assertEqual(self._manifest()['item_count'], 2)
+        self.blobs['manifests/run-new.partial.json'].delete.assert_called_once()
+
+    def test_interrupted_run_resumes_from_cursor(self):
+        self.state_ref.get.return_value.exists = True
+        self.state_ref.get.return_value.to_dict.return_value = {
+            'last_updated_at': '2025-01-01T00:00:00Z',
+            'in_flight': {
+                'run_id': 'run-old',
+                'since': '2025-01-01T00:00:00Z',
+                'until': None,
+                'page_cursor': 'cursor-2',
+                'max_updated_at': '2025-01-02T00:00:00Z',
+            },
+        }
+        partial = self.storage.bucket.return_value.blob('manifests/run-old.partial.json')
+        partial.exists.return_value = True
+        partial.download_as_text.return_value = json.dumps({
+            'items': [{'id': '1', 'raw_uri': 'gs://x/readwise-book-1.json'}]
+        })
+        self._pages(([{'user_book_id': 2, 'updated': '2025-01-03T00:00:00Z'}], None))
+
+        main.handler(event={}, context={})
+
+        params = self.requests_get.call_args.kwargs['params']
+        self.assertEqual(params['pageCursor'], 'cursor-2')
+        self.assertEqual(params['updated__gt'], '2025-01-01T00:00:00Z')
+        manifest = self._manifest('manifests/run-old.json')
+        self.assertEqual([item['id'] for item in manifest['items']], ['1', '2'])
+        self.assertEqual(self._state_writes()[-1]['last_updated_at'], '2025-01-03T00:00:00Z')
+
+    def test_backfill_range_leaves_watermark(self):
+        payload = {'since': '2024-01-01T00:00:00Z', 'until': '2024-02-01T00:00:00Z'}
+        event = {'data': base64.b64encode(json.dumps(payload).encode()).decode()}
+        self._pages(([
+            {'user_book_id': 1, 'updated': '2024-01-15T00:00:00Z'},
+            {'user_book_id': 2, 'updated': '2024-03-01T00:00:00Z'},
+        ], None))
+
+        main.handler(event=event, context={})
+
+        self.firestore.collection.return_value.document.assert_called_with('readwise_export_backfill')
+        self.assertEqual(self.requests_get.call_args.kwargs['params']['updated__gt'], '2024-01-01T00:00:00Z')
+        self.assertEqual([item['id'] for item in self._manifest()['items']], ['1'])
+        self.assertTrue(all('last_updated_at' not in state for state in self._state_writes()))
+
+    def test_unchanged_books_skip_upload(self):
+        unchanged = {'user_book_id': 1, 'updated': '2025-01-02T00:00:00Z', 'title': 'Same'}
+        payload = json.dumps(unchanged, indent=2, sort_keys=True)
+        checksum = 'sha256:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+        self.state_ref.get.return_value.exists = True
+        self.state_ref.get.return_value.to_dict.return_value = {
+            'last_updated_at': '2025-01-01T00:00:00Z',
+            'last_manifest_uri': 'gs://test-project-pipeline/manifests/run-prev.json',
+        }
+        previous = self.storage.bucket.return_value.blob('manifests/run-prev.json')
+        previous.download_as_text.return_value = json.dumps({
+            'items': [{'id': '2', 'raw_checksum': 'sha256:old'}],
+            'unchanged_items': [{'id': '1', 'raw_checksum': checksum}],
+        })
+        self._pages(([unchanged, {'user_book_id': 2, 'updated': '2025-01-03T00:00:00Z'}], None))
+
+        main.handler(event={}, context={})
+
+        self.assertNotIn('readwise-book-1.json', self.blobs)
+        self.blobs['readwise-book-2.json'].upload_from_string.assert_called_once()
+        manifest = self._manifest()
+        self.assertEqual([item['id'] for item in manifest['items']], ['2'])
+        self.assertEqual(manifest['unchanged_items'], [{'id': '1', 'raw_checksum': checksum}])
+        self.assertEqual(manifest['skipped_unchanged'], 1)
+        # Skipped books still move the watermark
+        self.assertEqual(self._state_writes()[-1]['last_updated_at'], '2025-01-03T00:00:00Z')
+
+    def test_parse_run_options(self):
+        scheduler_event = {'data': base64.b64encode(b'Go!').decode()}
+        self.assertEqual(main.parse_run_options(scheduler_event), {'since': None, 'until': None})
+        self.assertEqual(main.parse_run_options({}), {'since': None, 'until': None})
+
+        bad = {'data': base64.b64encode(b'{"since": "yesterday"}').decode()}
+        with self.assertRaises(ValueError):
+            main.parse_run_options(bad)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -15,6 +15,7 @@ from src.knowledge_cards.cli import (
     update_firestore_with_cards,
 )
 from src.knowledge_cards.generator import generate_knowledge_card, process_chunks_batch
+from src.knowledge_cards.incremental import CHUNK_FIELDS
 from src.knowledge_cards.schema import KnowledgeCard
 
 
@@ -203,7 +204,7 @@ class TestFirestoreIntegration(unittest.TestCase):
             "content": "Content 2",
         }
 
-        mock_collection.stream.return_value = [mock_doc1, mock_doc2]
+        mock_collection.select.return_value.stream.return_value = [mock_doc1, mock_doc2]
 
         # Load chunks
         chunks = load_all_chunks()
@@ -213,6 +214,9 @@ class TestFirestoreIntegration(unittest.TestCase):
         self.assertEqual(chunks[0]["id"], "chunk-1")
         self.assertEqual(chunks[1]["id"], "chunk-2")
 
+        # Only the fields card generation needs are read (no embeddings)
+        mock_collection.select.assert_called_once_with(CHUNK_FIELDS)
+
     @patch("src.knowledge_cards.cli.get_firestore_client")
     def test_update_firestore_with_cards(self, mock_get_client):
         """Test updating Firestore with knowledge cards (AC #6)"""
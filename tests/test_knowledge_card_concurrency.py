@@ -0,0 +1,356 @@
+"""
+Unit tests for concurrent knowledge-card generation.
+
+Tests cover:
+- Slot outcome classification (shared with the LLM governor)
+- AIMD limit changes (additive increase, multiplicative decrease, cooldown)
+- Concurrent engine: parallelism, result order, re-queueing on 429
+- Packed mode: chunk packing, one request per pack, individual re-requests
+"""
+
+import json
+import re
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from src.knowledge_cards.concurrency import THROTTLE, AdaptiveConcurrency, _Slot
+from src.knowledge_cards.generator import pack_chunks, process_chunks_batch
+from tests.llm_fakes import CARD_RESPONSE, claude_client, claude_response
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chunks(count):
+    return [
+        {"chunk_id": f"chunk-{i}", "title": "T", "author": "A", "content": f"Content {i}"}
+        for i in range(count)
+    ]
+
+
+class TestSlotOutcome(unittest.TestCase):
+    """Test failure classification of a slot."""
+
+    def _throttled(self, error):
+        slot = _Slot()
+        slot.failed(error)
+        return slot.throttled
+
+    def test_detects_throttling(self):
+        class ResourceExhausted(Exception):
+            pass
+
+        self.assertTrue(self._throttled(ResourceExhausted("slow down")))
+        self.assertTrue(self._throttled(Exception("429 Too Many Requests")))
+        self.assertTrue(self._throttled(Exception("Quota exceeded for model")))
+        self.assertTrue(self._throttled(Exception("Overloaded")))
+
+    def test_other_errors_are_not_throttling(self):
+        self.assertFalse(self._throttled(ValueError("Invalid JSON response")))
+        self.assertFalse(self._throttled(Exception("500 Internal error")))
+
+    def test_status_code_overrides_message(self):
+        error = Exception("prompt is too long: quota of 200000 tokens")
+        error.status_code = 400
+
+        self.assertFalse(self._throttled(error))
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    """Test the AIMD controller."""
+
+    def test_additive_increase_after_full_window(self):
+        controller = AdaptiveConcurrency(initial=2, maximum=4)
+
+        for _ in range(2):
+            controller.acquire()
+            controller.release()
+        self.assertEqual(controller.limit, 3)
+
+        for _ in range(3):
+            controller.acquire()
+            controller.release()
+        self.assertEqual(controller.limit, 4)
+
+        for _ in range(10):
+            controller.acquire()
+            controller.release()
+        self.assertEqual(controller.limit, 4)  # Capped at maximum
+
+    def test_multiplicative_decrease_once_per_cooldown(self):
+        clock = FakeClock()
+        controller = AdaptiveConcurrency(initial=8, maximum=8, cooldown_seconds=5, clock=clock)
+
+        for _ in range(3):
+            controller.acquire()
+        for _ in range(3):
+            controller.release(THROTTLE)
+        self.assertEqual(controller.limit, 4)
+
+        clock.now += 10
+        controller.acquire()
+        controller.release(THROTTLE)
+        self.assertEqual(controller.limit, 2)
+
+        stats = controller.stats()
+        self.assertEqual(stats["decreases"], 2)
+        self.assertEqual(stats["throttled"], 4)
+
+    def test_limit_never_below_minimum(self):
+        controller = AdaptiveConcurrency(initial=1, cooldown_seconds=0)
+
+        controller.acquire()
+        controller.release(THROTTLE)
+
+        self.assertEqual(controller.limit, 1)
+
+    def test_slot_reports_throttling(self):
+        controller = AdaptiveConcurrency(initial=4, maximum=4)
+
+        with self.assertRaises(Exception):
+            with controller.slot() as slot:
+                error = Exception("429 rate limit")
+                slot.failed(error)
+                raise error
+
+        self.assertEqual(controller.limit, 2)
+        self.assertEqual(controller.in_flight, 0)
+
+    def test_other_failures_leave_limit_unchanged(self):
+        controller = AdaptiveConcurrency(initial=2, maximum=4)
+
+        for error in [TimeoutError("deadline"), Exception("503 unavailable"), ValueError("bad JSON")]:
+            with self.assertRaises(Exception):
+                with controller.slot():
+                    raise error
+
+        self.assertEqual(controller.limit, 2)
+        self.assertEqual(controller.stats()["decreases"], 0)
+
+        # Failures don't count toward the next increase either
+        for _ in range(2):
+            with controller.slot():
+                pass
+        self.assertEqual(controller.limit, 3)
+
+    def test_unreported_throttle_is_classified(self):
+        controller = AdaptiveConcurrency(initial=4, maximum=4)
+
+        with self.assertRaises(Exception):
+            with controller.slot():
+                raise Exception("429 rate limit")
+
+        self.assertEqual(controller.limit, 2)
+
+    def test_in_flight_never_exceeds_limit(self):
+        controller = AdaptiveConcurrency(initial=3, maximum=3)
+        peak = [0]
+        lock = threading.Lock()
+
+        def worker():
+            with controller.slot():
+                with lock:
+                    peak[0] = max(peak[0], controller.in_flight)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=worker) for _ in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(peak[0], 3)
+
+
+class TestConcurrentCardEngine(unittest.TestCase):
+    """Test process_chunks_batch on the concurrent engine."""
+
+    def _client(self, generate_json):
+        client = Mock()
+        client.model_id = "test-model"
+        client.generate_json.side_effect = generate_json
+        return client
+
+    def test_requests_run_in_parallel(self):
+        barrier = threading.Barrier(4, timeout=5)
+
+        def generate_json(prompt, config):
+            barrier.wait()  # Deadlocks unless 4 requests are in flight together
+            return CARD_RESPONSE
+
+        results = process_chunks_batch(
+            _chunks(4), client=self._client(generate_json),
+            initial_concurrency=4, max_concurrency=4,
+        )
+
+        self.assertEqual(results["processed"], 4)
+        self.assertEqual(results["failed"], 0)
+
+    def test_results_keep_input_order_and_contract(self):
+        def generate_json(prompt, config):
+            time.sleep(0.001 * (hash(prompt) % 5))
+            return CARD_RESPONSE
+
+        chunks = _chunks(12)
+        chunks[3]["content"] = ""
+        written = []
+
+        results = process_chunks_batch(
+            chunks, client=self._client(generate_json),
+            on_card=lambda chunk_id, card: written.append(chunk_id),
+        )
+
+        expected = [c["chunk_id"] for c in chunks if c["content"]]
+        self.assertEqual([chunk_id for chunk_id, _ in results["cards"]], expected)
+        self.assertEqual(sorted(written), sorted(expected))
+        self.assertEqual(results["errors"], [("chunk-3", "No content available")])
+        for key in ["processed", "failed", "cards", "errors", "chunks_per_second", "concurrency"]:
+            self.assertIn(key, results)
+
+    @patch("src.knowledge_cards.generator.THROTTLE_RETRIES", 2)
+    def test_rate_limited_chunks_are_requeued_and_limit_backs_off(self):
+        calls = {"count": 0}
+        lock = threading.Lock()
+
+        def generate_json(prompt, config):
+            with lock:
+                calls["count"] += 1
+                first_calls = calls["count"] <= 2
+            if first_calls:
+                raise Exception("429 Resource exhausted: quota")
+            return CARD_RESPONSE
+
+        results = process_chunks_batch(
+            _chunks(6), client=self._client(generate_json),
+            initial_concurrency=4, max_concurrency=8,
+        )
+
+        self.assertEqual(results["processed"], 6)
+        self.assertEqual(results["failed"], 0)
+        self.assertGreaterEqual(results["concurrency"]["decreases"], 1)
+        self.assertEqual(results["concurrency"]["throttled"], 2)
+
+    @patch("src.knowledge_cards.generator.THROTTLE_RETRIES", 1)
+    def test_persistent_rate_limit_fails_chunk(self):
+        def generate_json(prompt, config):
+            raise Exception("429 quota exceeded")
+
+        results = process_chunks_batch(
+            _chunks(1), client=self._client(generate_json), initial_concurrency=1,
+        )
+
+        self.assertEqual(results["failed"], 1)
+        self.assertIn("429", results["errors"][0][1])
+
+
+def _packed_response(prompt, skip=(), invalid=()):
+    """Answer a packed prompt with one card per excerpt chunk_id."""
+    cards = []
+    for chunk_id in re.findall(r'<excerpt chunk_id="([^"]+)">', prompt):
+        if chunk_id in skip:
+            continue
+        card = dict(CARD_RESPONSE, chunk_id=chunk_id)
+        if chunk_id in invalid:
+            card["takeaways"] = []
+        cards.append(card)
+    return {"cards": cards}
+
+
+class TestPackedCardEngine(unittest.TestCase):
+    """Test process_chunks_batch in packed mode."""
+
+    def _client(self, generate_json):
+        client = Mock()
+        client.model_id = "test-model"
+        client.generate_json.side_effect = generate_json
+        return client
+
+    def test_pack_chunks_respects_budget_and_size(self):
+        chunks = [{"chunk_id": str(i), "content": "x" * 400} for i in range(5)]  # ~100 tokens
+
+        self.assertEqual([len(p) for p in pack_chunks(chunks, token_budget=250, max_chunks=8)], [2, 2, 1])
+        self.assertEqual([len(p) for p in pack_chunks(chunks, token_budget=10_000, max_chunks=3)], [3, 2])
+        self.assertEqual([len(p) for p in pack_chunks(chunks, token_budget=10, max_chunks=8)], [1] * 5)
+
+    @patch("src.knowledge_cards.generator.PACK_MAX_CHUNKS", 4)
+    def test_one_request_per_pack(self):
+        client = self._client(lambda prompt, config: _packed_response(prompt))
+
+        results = process_chunks_batch(_chunks(8), client=client, packed=True)
+
+        self.assertEqual(results["processed"], 8)
+        self.assertEqual(client.generate_json.call_count, 2)
+        self.assertEqual(results["usage"]["requests"], 2)
+        self.assertEqual(results["usage"]["packed_requests"], 2)
+        self.assertEqual(
+            [chunk_id for chunk_id, _ in results["cards"]], [f"chunk-{i}" for i in range(8)]
+        )
+
+    @patch("src.knowledge_cards.generator.PACK_MAX_CHUNKS", 4)
+    def test_missing_and_invalid_cards_are_rerequested_individually(self):
+        def generate_json(prompt, config):
+            if "<excerpt" in prompt:
+                return _packed_response(prompt, skip={"chunk-1"}, invalid={"chunk-2"})
+            return CARD_RESPONSE
+
+        client = self._client(generate_json)
+        results = process_chunks_batch(_chunks(4), client=client, packed=True)
+
+        self.assertEqual(results["processed"], 4)
+        self.assertEqual(client.generate_json.call_count, 3)  # 1 pack + 2 re-requests
+        self.assertEqual(results["usage"]["pack_fallbacks"], 2)
+
+    @patch("src.knowledge_cards.generator.PACK_MAX_CHUNKS", 4)
+    def test_failed_pack_falls_back_to_single_requests(self):
+        def generate_json(prompt, config):
+            if "<excerpt" in prompt:
+                raise json.JSONDecodeError("Expecting value", "", 0)
+            return CARD_RESPONSE
+
+        results = process_chunks_batch(_chunks(4), client=self._client(generate_json), packed=True)
+
+        self.assertEqual(results["processed"], 4)
+        self.assertEqual(results["usage"]["requests"], 5)
+
+    def _claude(self, respond):
+        """ClaudeClient fake billing one input token per 4 prompt chars."""
+        # The generator uses the flat-imported llm package (as deployed)
+        from llm.claude import ClaudeClient as FlatClaudeClient
+
+        def create(**kwargs):
+            prompt = kwargs["messages"][0]["content"]
+            return claude_response(json.dumps(respond(prompt)), input_tokens=len(prompt) // 4)
+
+        return claude_client(create, FlatClaudeClient)
+
+    @patch("src.knowledge_cards.generator.PACK_MAX_CHUNKS", 8)
+    def test_packing_reduces_input_tokens_per_card(self):
+        from llm.governor import reset_governors
+
+        reset_governors()
+        single = process_chunks_batch(
+            _chunks(8), client=self._claude(lambda prompt: CARD_RESPONSE), packed=False
+        )
+        packed = process_chunks_batch(
+            _chunks(8), client=self._claude(_packed_response), packed=True
+        )
+
+        self.assertEqual(single["usage"]["requests"], 8)
+        self.assertEqual(packed["usage"]["requests"], 1)
+        # Token counts come from the measured calls, not a re-formatted prompt
+        self.assertEqual(single["usage"]["input_tokens"], single["llm"]["input_tokens"])
+        self.assertGreater(single["usage"]["input_tokens"], 0)
+        self.assertLess(
+            packed["usage"]["input_tokens_per_card"],
+            single["usage"]["input_tokens_per_card"] / 3,
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Unit tests for incremental knowledge-card regeneration.
+
+Tests cover:
+- Staleness rule (missing card, changed content_hash, changed prompt version)
+- Missing-only selection for the scheduled function
+- Projected selection query and get_all() field projection
+- Generated cards record content_hash and prompt_version
+"""
+
+import unittest
+from unittest.mock import MagicMock, Mock
+
+from src.knowledge_cards.generator import process_chunks_batch
+from src.knowledge_cards.incremental import (
+    CHUNK_FIELDS,
+    SELECTION_FIELDS,
+    card_is_current,
+    find_stale_chunk_ids,
+    load_stale_chunks,
+)
+from src.knowledge_cards.prompt_manager import PromptManager
+from tests.llm_fakes import CARD_RESPONSE
+
+def _snapshot(doc_id, data, exists=True):
+    snapshot = MagicMock()
+    snapshot.id = doc_id
+    snapshot.exists = exists
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+def _db(selection_docs, full_docs):
+    """Fake Firestore: selection_docs for the projected scan, full_docs for get_all."""
+    db = MagicMock()
+    collection = db.collection.return_value
+    collection.select.return_value.stream.return_value = [
+        _snapshot(doc_id, data) for doc_id, data in selection_docs.items()
+    ]
+    collection.document.side_effect = lambda doc_id: doc_id
+
+    def get_all(refs, field_paths=None):
+        assert field_paths == CHUNK_FIELDS
+        for ref in refs:
+            yield _snapshot(ref, dict(full_docs.get(ref, {})), exists=ref in full_docs)
+
+    db.get_all.side_effect = get_all
+    return db
+
+
+class TestCardIsCurrent(unittest.TestCase):
+    """Test the staleness rule."""
+
+    def test_current_card(self):
+        data = {
+            "content_hash": "sha256:a",
+            "knowledge_card": {"content_hash": "sha256:a", "prompt_version": "v1"},
+        }
+
+        self.assertTrue(card_is_current(data, "v1"))
+
+    def test_stale_cards(self):
+        self.assertFalse(card_is_current({"content_hash": "sha256:a"}, "v1"))
+        self.assertFalse(card_is_current({"content_hash": "sha256:a", "knowledge_card": None}, "v1"))
+        # Content changed since the card was built
+        self.assertFalse(card_is_current(
+            {"content_hash": "sha256:b",
+             "knowledge_card": {"content_hash": "sha256:a", "prompt_version": "v1"}},
+            "v1",
+        ))
+        # Prompt template changed
+        self.assertFalse(card_is_current(
+            {"content_hash": "sha256:a",
+             "knowledge_card": {"content_hash": "sha256:a", "prompt_version": "v0"}},
+            "v1",
+        ))
+        # Legacy card without hashes
+        self.assertFalse(card_is_current(
+            {"content_hash": "sha256:a", "knowledge_card": {"summary": "..."}}, "v1"
+        ))
+
+
+class TestStaleSelection(unittest.TestCase):
+    """Test projected selection and loading."""
+
+    def setUp(self):
+        current = {"content_hash": "h1", "prompt_version": "v1"}
+        self.selection = {
+            "fresh": {"content_hash": "h1", "knowledge_card": current},
+            "new": {"content_hash": "h2"},
+            "edited": {"content_hash": "h3", "knowledge_card": current},
+            "old-prompt": {"content_hash": "h1", "knowledge_card": {**current, "prompt_version": "v0"}},
+        }
+        self.full = {
+            "new": {"title": "T", "author": "A", "content": "New text", "content_hash": "h2"},
+            "edited": {"title": "T", "author": "A", "content": "Edited text", "content_hash": "h3"},
+            "old-prompt": {"title": "T", "author": "A", "content": "", "content_hash": "h1"},
+        }
+
+    def test_scan_reads_only_hash_fields(self):
+        db = _db(self.selection, self.full)
+
+        stale = find_stale_chunk_ids(db, "kb_items", prompt_version="v1")
+
+        self.assertEqual(stale, ["new", "edited", "old-prompt"])
+        db.collection.return_value.select.assert_called_once_with(SELECTION_FIELDS)
+
+    def test_scan_stops_at_limit(self):
+        db = _db(self.selection, self.full)
+
+        self.assertEqual(find_stale_chunk_ids(db, "kb_items", prompt_version="v1", limit=1), ["new"])
+
+    def test_missing_only_selection(self):
+        # A legacy card without hash fields counts as present
+        legacy = {"content_hash": "h4", "knowledge_card": {"summary": "S"}}
+        db = _db({**self.selection, "legacy": legacy}, self.full)
+
+        stale = find_stale_chunk_ids(db, "kb_items", prompt_version="v1", changed=False)
+
+        self.assertEqual(stale, ["new"])
+
+    def test_load_fetches_only_stale_chunks(self):
+        db = _db(self.selection, self.full)
+
+        chunks = load_stale_chunks(db, "kb_items", prompt_version="v1")
+
+        # old-prompt has no content and is skipped
+        self.assertEqual([c["id"] for c in chunks], ["new", "edited"])
+        self.assertEqual(chunks[1]["content"], "Edited text")
+        refs = [ref for call in db.get_all.call_args_list for ref in call.args[0]]
+        self.assertNotIn("fresh", refs)
+
+
+class TestCardVersionStamp(unittest.TestCase):
+    """Test that generated cards record what they were built from."""
+
+    def _client(self):
+        client = Mock()
+        client.model_id = "test-model"
+        client.generate_json.return_value = CARD_RESPONSE
+        return client
+
+    def test_cards_record_content_hash_and_prompt_version(self):
+        chunks = [
+            {"chunk_id": "c1", "title": "T", "author": "A", "content": "Text", "content_hash": "sha256:abc"}
+        ]
+
+        results = process_chunks_batch(chunks, client=self._client())
+
+        card = results["cards"][0][1]
+        self.assertEqual(card.content_hash, "sha256:abc")
+        self.assertEqual(card.prompt_version, PromptManager().get_prompt_version())
+        self.assertTrue(card_is_current(
+            {"content_hash": "sha256:abc", "knowledge_card": card.to_dict()},
+            PromptManager().get_prompt_version(),
+        ))
+
+
+if __name__ == "__main__":
+    unittest.main()
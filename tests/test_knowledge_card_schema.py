@@ -127,6 +127,19 @@ class TestKnowledgeCardSchema(unittest.TestCase):
         self.assertEqual(card.takeaways, card_dict["takeaways"])
         self.assertEqual(card.tags, card_dict["tags"])
         self.assertEqual(card.generated_at, card_dict["generated_at"])
+        self.assertIsNone(card.content_hash)
+        self.assertIsNone(card.prompt_version)
+
+    def test_version_fields_round_trip(self):
+        """content_hash and prompt_version survive a Firestore round trip"""
+        card = KnowledgeCard(
+            **self.valid_card_data, content_hash="sha256:abc", prompt_version="sha256:v1"
+        )
+
+        restored = KnowledgeCard.from_dict(card.to_dict())
+
+        self.assertEqual(restored.content_hash, "sha256:abc")
+        self.assertEqual(restored.prompt_version, "sha256:v1")
 
     def test_to_json_from_json(self):
         """Test JSON serialization/deserialization"""
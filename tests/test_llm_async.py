@@ -0,0 +1,173 @@
+"""
+Unit tests for the async LLM client API.
+
+Tests cover:
+- agenerate()/agenerate_json() and the per-model semaphore
+- Provider async paths with non-blocking retry backoff
+- run_sync() from plain code and from inside a running event loop
+- Async SDK clients cached per event loop
+- Response cache on the async path
+"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.llm import base
+from src.llm.base import BaseLLMClient, LLMProvider, LLMResponse, run_sync
+from src.llm.cache import MemoryResponseCache, cache_stats, reset_cache_stats, with_response_cache
+from src.llm.gemini import GeminiClient
+from src.llm.governor import reset_governors
+from tests.llm_fakes import async_claude_sdk, claude_client, claude_response
+
+
+class SlowClient(BaseLLMClient):
+    """Async client recording peak concurrency."""
+
+    def __init__(self):
+        super().__init__("slow-model", "project")
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def provider(self) -> LLMProvider:
+        return LLMProvider.GEMINI
+
+    def _initialize(self) -> None:
+        pass
+
+    def generate(self, prompt, config=None, system_prompt=None):
+        return LLMResponse(text='{"sync": true}', model=self.model_id, provider=self.provider)
+
+    async def _agenerate(self, prompt, config=None, system_prompt=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return LLMResponse(text=f'{{"prompt": "{prompt}"}}', model=self.model_id, provider=self.provider)
+
+
+class TestAsyncGenerate(unittest.TestCase):
+    """Test the base async API."""
+
+    def test_semaphore_bounds_concurrency(self):
+        client = SlowClient()
+
+        async def run():
+            return await asyncio.gather(*(client.agenerate_json(str(i)) for i in range(10)))
+
+        with patch.object(base, "ASYNC_CONCURRENCY", 3):
+            results = asyncio.run(run())
+
+        self.assertEqual([r["prompt"] for r in results], [str(i) for i in range(10)])
+        self.assertEqual(client.peak, 3)
+
+    def test_default_runs_sync_generate_in_thread(self):
+        client = SlowClient()
+
+        result = asyncio.run(BaseLLMClient._agenerate(client, "p"))
+
+        self.assertEqual(result.text, '{"sync": true}')
+
+    def test_run_sync_inside_running_loop(self):
+        async def inner():
+            await asyncio.sleep(0)
+            return 42
+
+        async def outer():
+            # Sync code called from an async handler
+            return run_sync(inner())
+
+        self.assertEqual(run_sync(inner()), 42)
+        self.assertEqual(asyncio.run(outer()), 42)
+
+    def test_cached_client_async_path(self):
+        reset_cache_stats()
+        inner = SlowClient()
+        client = with_response_cache(inner, MemoryResponseCache())
+
+        async def run():
+            first = await client.agenerate_json("p")
+            second = await client.agenerate_json("p")
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        self.assertEqual(first, second)
+        self.assertEqual((cache_stats()["hits"], cache_stats()["misses"]), (1, 1))
+
+
+class TestProviderAsync(unittest.TestCase):
+    """Test provider async paths."""
+
+    def setUp(self):
+        reset_governors()
+
+    @patch("src.llm.gemini.asyncio.sleep", new_callable=AsyncMock)
+    @patch("src.llm.gemini.time.sleep")
+    def test_gemini_retries_without_blocking(self, mock_time_sleep, mock_sleep):
+        client = GeminiClient(model_id="gemini-2.5-flash", project_id="p")
+        client._initialized = True
+        part = MagicMock(text="hello")
+        response = MagicMock()
+        response.candidates = [MagicMock(content=MagicMock(parts=[part]))]
+        response.usage_metadata = MagicMock(prompt_token_count=7, candidates_token_count=2)
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(
+            side_effect=[Exception("429 Resource exhausted"), response]
+        )
+
+        with patch.object(client, "_build_request", return_value=("hi", {}, {})), \
+                patch.object(client, "_create_async_model", return_value=model):
+            result = asyncio.run(client.agenerate("hi"))
+
+        self.assertEqual((result.text, result.input_tokens), ("hello", 7))
+        # The quota pause is served by the governor on the next admission
+        mock_sleep.assert_awaited_once()
+        self.assertAlmostEqual(mock_sleep.await_args.args[0], 1.0, places=1)
+        mock_time_sleep.assert_not_called()
+
+    def test_claude_uses_async_client(self):
+        client = claude_client()
+        async_client = async_claude_sdk(claude_response("{}", 5, 1))
+
+        with patch.object(client, "_create_async_client", return_value=async_client):
+            result = asyncio.run(client.agenerate("hi", system_prompt="sys"))
+
+        self.assertEqual(result.text, "{}")
+        kwargs = async_client.messages.create.await_args.kwargs
+        self.assertEqual(kwargs["system"], "sys")
+        self.assertEqual(kwargs["messages"], [{"role": "user", "content": "hi"}])
+
+    def test_non_retriable_error_raises(self):
+        client = claude_client()
+        async_client = async_claude_sdk(ValueError("bad request"))
+
+        with patch.object(client, "_create_async_client", return_value=async_client):
+            with self.assertRaises(ValueError):
+                asyncio.run(client.agenerate("hi"))
+        self.assertEqual(async_client.messages.create.await_count, 1)
+
+    def test_async_client_per_event_loop(self):
+        client = claude_client()
+        created = []
+
+        def create():
+            created.append(MagicMock())
+            return created[-1]
+
+        async def get_twice():
+            return client._get_async_client(), client._get_async_client()
+
+        with patch.object(client, "_create_async_client", side_effect=create):
+            first = asyncio.run(get_twice())
+            second = asyncio.run(get_twice())
+
+        # Cached within a loop, recreated for a new loop (run_sync uses one per call)
+        self.assertIs(first[0], first[1])
+        self.assertIsNot(first[0], second[0])
+        self.assertEqual(len(created), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
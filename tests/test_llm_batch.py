@@ -0,0 +1,246 @@
+"""
+Unit tests for LLM batch prediction.
+
+Tests cover:
+- Sharded request rendering
+- Stream parsing of local and Vertex AI result lines
+- Local file-based backend
+- Resumable job runner (no re-render, re-submit or re-write)
+- Knowledge-card batch job: validation, bulk Firestore writes and the
+  prompt version recorded at render time
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.knowledge_cards.batch import build_card_requests, run_card_batch
+from src.llm.base import GenerationConfig, LLMProvider, LLMResponse
+from src.llm.batch import (
+    STATE_RUNNING,
+    STATE_SUCCEEDED,
+    BatchRequest,
+    LocalBatchBackend,
+    iter_requests,
+    iter_results,
+    parse_result_line,
+    prompt_fingerprint,
+    run_batch_job,
+    to_gemini_request,
+    wait_for_job,
+    write_request_shards,
+)
+from tests.llm_fakes import CARD_RESPONSE
+
+
+def _requests(count):
+    return [BatchRequest(key=f"k{i}", prompt=f"Prompt {i}", metadata={"n": i}) for i in range(count)]
+
+
+class TestRequestFiles(unittest.TestCase):
+    """Test request rendering."""
+
+    def test_shards_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_request_shards(iter(_requests(5)), tmp, shard_size=2)
+
+            self.assertEqual([os.path.basename(p) for p in paths],
+                             ["requests-00000.jsonl", "requests-00001.jsonl", "requests-00002.jsonl"])
+            requests = list(iter_requests(paths))
+
+        self.assertEqual([r.key for r in requests], ["k0", "k1", "k2", "k3", "k4"])
+        self.assertEqual(requests[3].metadata, {"n": 3})
+        self.assertIsInstance(requests[0].config, GenerationConfig)
+
+    def test_no_requests_no_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(write_request_shards(iter([]), tmp), [])
+
+    def test_gemini_request_format(self):
+        request = BatchRequest(key="k", prompt="Hi", system_prompt="Be brief",
+                               config=GenerationConfig(max_output_tokens=100))
+
+        line = to_gemini_request(request, "gemini-2.5-flash")
+
+        self.assertEqual(line["request"]["contents"][0]["parts"][0]["text"], "Hi")
+        self.assertEqual(line["request"]["generationConfig"]["maxOutputTokens"], 100)
+        self.assertEqual(line["request"]["generationConfig"]["thinkingConfig"], {"thinkingBudget": 0})
+        self.assertEqual(line["request"]["systemInstruction"]["parts"][0]["text"], "Be brief")
+
+
+class TestResultParsing(unittest.TestCase):
+    """Test result line parsing."""
+
+    def test_local_format(self):
+        result = parse_result_line({"key": "k", "response": {"text": "{}", "input_tokens": 5}})
+        self.assertTrue(result.ok)
+        self.assertEqual((result.key, result.text, result.input_tokens), ("k", "{}", 5))
+
+        error = parse_result_line({"key": "k", "error": "quota"})
+        self.assertFalse(error.ok)
+        self.assertEqual(error.error, "quota")
+
+    def test_vertex_format_matched_by_fingerprint(self):
+        line = {
+            "status": "",
+            "request": {"contents": [{"role": "user", "parts": [{"text": "Prompt 1"}]}]},
+            "response": {
+                "candidates": [{"content": {"parts": [{"text": '{"a": '}, {"text": "1}"}]}}],
+                "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": 3},
+            },
+        }
+
+        result = parse_result_line(line, {prompt_fingerprint("Prompt 1"): "k1"})
+
+        self.assertEqual(result.key, "k1")
+        self.assertEqual(result.text, '{"a": 1}')
+        self.assertEqual((result.input_tokens, result.output_tokens), (12, 3))
+
+    def test_vertex_error_status(self):
+        result = parse_result_line({"key": "k", "status": "Bad request", "response": {}})
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error, "Bad request")
+
+    def test_malformed_lines_are_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.jsonl")
+            with open(path, "w") as f:
+                f.write('{"key": "a", "response": {"text": "x"}}\n{not json\n\n')
+
+            results = list(iter_results([path]))
+
+        self.assertEqual(len(results), 2)
+        self.assertTrue(results[0].ok)
+        self.assertIsNone(results[1].key)
+        self.assertIn("Malformed", results[1].error)
+
+
+class TestBatchJobRunner(unittest.TestCase):
+    """Test the local backend and resumable runner."""
+
+    def test_local_backend_and_resume(self):
+        calls = []
+
+        def responder(request):
+            calls.append(request.key)
+            if request.key == "k1":
+                raise Exception("boom")
+            return LLMResponse(text=f"answer {request.key}", model="m",
+                               provider=LLMProvider.GEMINI, input_tokens=10, output_tokens=2)
+
+        backend = LocalBatchBackend(responder=responder)
+        handled = []
+
+        def handle(results, metadata_by_key):
+            results = list(results)
+            handled.extend(r.key for r in results)
+            return {"ok": sum(r.ok for r in results), "input_tokens": sum(r.input_tokens or 0 for r in results)}
+
+        render = lambda d: write_request_shards(iter(_requests(3)), d, shard_size=2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            first = run_batch_job(tmp, render, backend, handle)
+            second = run_batch_job(tmp, lambda d: self.fail("re-rendered"), backend, handle)
+
+        self.assertEqual(first["state"], STATE_SUCCEEDED)
+        self.assertEqual(first["result_files"], 2)
+        self.assertEqual(first["ok"], 2)
+        self.assertEqual(first["input_tokens"], 20)
+        self.assertEqual(calls, ["k0", "k1", "k2"])  # Not re-submitted
+        self.assertEqual(handled, ["k0", "k1", "k2"])  # Not re-handled
+        self.assertEqual(second["job_id"], first["job_id"])
+        self.assertEqual(second["ok"], 2)
+
+    def test_failed_handler_resumes_from_unhandled_file(self):
+        backend = LocalBatchBackend(responder=lambda request: "text")
+        seen = []
+
+        def flaky_handle(results, metadata_by_key):
+            keys = [r.key for r in results]
+            seen.append(keys)
+            if len(seen) == 2:
+                raise RuntimeError("Firestore unavailable")
+            return {"ok": len(keys)}
+
+        render = lambda d: write_request_shards(iter(_requests(4)), d, shard_size=2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(RuntimeError):
+                run_batch_job(tmp, render, backend, flaky_handle)
+            summary = run_batch_job(tmp, render, backend, flaky_handle)
+
+        self.assertEqual(seen, [["k0", "k1"], ["k2", "k3"], ["k2", "k3"]])
+        self.assertEqual(summary["ok"], 4)
+
+    def test_wait_for_job_times_out(self):
+        backend = MagicMock()
+        backend.status.return_value = STATE_RUNNING
+
+        with self.assertRaises(TimeoutError):
+            wait_for_job(backend, "job", poll_seconds=10, timeout_seconds=30, sleep=lambda s: None)
+        self.assertEqual(backend.status.call_count, 4)
+
+
+class TestKnowledgeCardBatch(unittest.TestCase):
+    """Test the knowledge-card batch job."""
+
+    def test_cards_are_validated_and_bulk_written(self):
+        chunks = [
+            {"chunk_id": "good", "title": "T", "author": "A", "content": "Good text", "content_hash": "sha256:g"},
+            {"chunk_id": "bad", "title": "T", "author": "A", "content": "Bad text"},
+            {"chunk_id": "empty", "title": "T", "author": "A", "content": ""},
+        ]
+
+        def responder(request):
+            if request.key == "bad":
+                return '{"summary": "Too few", "takeaways": [], "tags": ["x"]}'
+            return "```json\n" + json.dumps(CARD_RESPONSE) + "\n```"
+
+        db = MagicMock()
+        with tempfile.TemporaryDirectory() as tmp:
+            summary = run_card_batch(db, chunks, tmp, LocalBatchBackend(responder=responder))
+
+        self.assertEqual(summary["written"], 1)
+        self.assertEqual(summary["invalid"], 1)
+        batch = db.batch.return_value
+        batch.set.assert_called_once()
+        self.assertEqual(batch.commit.call_count, 1)
+        card = batch.set.call_args.args[1]["knowledge_card"]
+        self.assertEqual(card["content_hash"], "sha256:g")
+        self.assertTrue(card["prompt_version"].startswith("sha256:"))
+
+    def test_resumed_job_keeps_rendered_prompt_version(self):
+        chunks = [{"chunk_id": "c1", "title": "T", "author": "A", "content": "Text"}]
+        backend = LocalBatchBackend(responder=lambda request: json.dumps(CARD_RESPONSE))
+        failing_db, db = MagicMock(), MagicMock()
+        failing_db.batch.return_value.commit.side_effect = RuntimeError("Firestore unavailable")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch("src.knowledge_cards.batch.PromptManager.get_prompt_version",
+                       return_value="sha256:old"):
+                with self.assertRaises(RuntimeError):
+                    run_card_batch(failing_db, chunks, tmp, backend)
+            # Resumed after the prompt changed; the requests are not re-rendered
+            summary = run_card_batch(db, [], tmp, backend)
+
+        self.assertEqual(summary["written"], 1)
+        card = db.batch.return_value.set.call_args.args[1]["knowledge_card"]
+        self.assertEqual(card["prompt_version"], "sha256:old")
+
+    def test_requests_match_online_prompt(self):
+        from src.knowledge_cards.prompt_manager import PromptManager
+
+        requests = list(build_card_requests(
+            [{"id": "c1", "title": "T", "author": "A", "content": "Text"}]
+        ))
+
+        self.assertEqual(requests[0].key, "c1")
+        self.assertEqual(requests[0].prompt, PromptManager().format_prompt("T", "A", "Text"))
+        self.assertFalse(requests[0].config.enable_thinking)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+Unit tests for the LLM response cache.
+
+Tests cover:
+- Cache key sensitivity (model, prompt, system prompt, config)
+- Memory LRU eviction and TTL expiry
+- Local disk persistence
+- CachedLLMClient hits, misses and stats
+- Invalid JSON responses are evicted
+- get_client() opt-in
+"""
+
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.llm import get_client
+from src.llm.base import BaseLLMClient, GenerationConfig, LLMProvider, LLMResponse
+from src.llm.cache import (
+    CachedLLMClient,
+    LocalResponseCache,
+    MemoryResponseCache,
+    cache_stats,
+    reset_cache_stats,
+    reset_response_cache,
+    response_cache_key,
+    set_response_cache,
+    with_response_cache,
+)
+
+
+class FakeClient(BaseLLMClient):
+    """Client returning queued texts and counting provider calls."""
+
+    def __init__(self, texts):
+        super().__init__("fake-model", "project")
+        self.texts = list(texts)
+        self.calls = 0
+
+    @property
+    def provider(self) -> LLMProvider:
+        return LLMProvider.GEMINI
+
+    def _initialize(self) -> None:
+        pass
+
+    def generate(self, prompt, config=None, system_prompt=None):
+        self.calls += 1
+        return LLMResponse(text=self.texts.pop(0), model=self.model_id,
+                           provider=self.provider, input_tokens=10, output_tokens=5)
+
+
+def _response(text="hello"):
+    return LLMResponse(text=text, model="m", provider=LLMProvider.CLAUDE)
+
+
+class TestResponseCacheKey(unittest.TestCase):
+    """Test cache key derivation."""
+
+    def test_key_depends_on_every_input(self):
+        base = response_cache_key("m", "p", None, GenerationConfig())
+
+        self.assertEqual(base, response_cache_key("m", "p"))
+        self.assertNotEqual(base, response_cache_key("m2", "p"))
+        self.assertNotEqual(base, response_cache_key("m", "p2"))
+        self.assertNotEqual(base, response_cache_key("m", "p", "system"))
+        self.assertNotEqual(base, response_cache_key("m", "p", None, GenerationConfig(temperature=0.1)))
+        self.assertNotEqual(base, response_cache_key("m", "p", None, GenerationConfig(extra={"a": 1})))
+
+
+class TestBackends(unittest.TestCase):
+    """Test cache backends."""
+
+    def setUp(self):
+        reset_cache_stats()
+
+    def test_memory_lru_eviction(self):
+        cache = MemoryResponseCache(max_entries=2)
+        cache.put("a", _response("A"))
+        cache.put("b", _response("B"))
+        cache.get("a")  # a is now most recently used
+        cache.put("c", _response("C"))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a").text, "A")
+        self.assertEqual(cache.get("c").text, "C")
+        self.assertEqual(cache_stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        cache = MemoryResponseCache(ttl_seconds=60)
+        with patch("src.llm.cache.time.time", return_value=1000.0):
+            cache.put("a", _response())
+        with patch("src.llm.cache.time.time", return_value=1059.0):
+            self.assertIsNotNone(cache.get("a"))
+        with patch("src.llm.cache.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("a"))
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache_stats()["expired"], 1)
+
+    def test_local_cache_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            LocalResponseCache(tmp).put("abcdef", LLMResponse(
+                text="{}", model="m", provider=LLMProvider.GEMINI, input_tokens=3
+            ))
+
+            cached = LocalResponseCache(tmp).get("abcdef")
+
+        self.assertEqual(cached.text, "{}")
+        self.assertEqual(cached.provider, LLMProvider.GEMINI)
+        self.assertEqual(cached.input_tokens, 3)
+
+    def test_broken_backend_degrades_to_miss(self):
+        cache = MemoryResponseCache()
+        cache._read = MagicMock(side_effect=RuntimeError("unavailable"))
+
+        self.assertIsNone(cache.get("a"))
+
+
+class TestCachedLLMClient(unittest.TestCase):
+    """Test the caching client decorator."""
+
+    def setUp(self):
+        reset_cache_stats()
+
+    def test_identical_requests_hit_cache(self):
+        client = with_response_cache(FakeClient(['{"a": 1}', '{"a": 2}']), MemoryResponseCache())
+
+        first = client.generate_json("prompt")
+        second = client.generate_json("prompt")
+        other = client.generate_json("prompt", GenerationConfig(temperature=0.0))
+
+        self.assertEqual((first, second, other), ({"a": 1}, {"a": 1}, {"a": 2}))
+        self.assertEqual(client.client.calls, 2)
+        stats = cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["writes"]), (1, 2, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+
+    def test_invalid_json_is_not_served_again(self):
+        client = with_response_cache(FakeClient(["not json", '{"ok": true}']), MemoryResponseCache())
+
+        with self.assertRaises(ValueError):
+            client.generate_json("prompt")
+
+        self.assertEqual(client.generate_json("prompt"), {"ok": True})
+        self.assertEqual(client.client.calls, 2)
+
+    def test_empty_responses_are_not_cached(self):
+        client = with_response_cache(FakeClient(["", "text"]), MemoryResponseCache())
+
+        client.generate("prompt")
+
+        self.assertEqual(client.generate("prompt").text, "text")
+
+    def test_wrapper_delegates_client_attributes(self):
+        inner = FakeClient([])
+        client = with_response_cache(inner, MemoryResponseCache())
+
+        self.assertEqual(client.model_id, "fake-model")
+        self.assertEqual(client.provider, LLMProvider.GEMINI)
+        self.assertEqual(client.texts, [])
+        self.assertIs(with_response_cache(client), client)
+
+
+class TestGetClientOptIn(unittest.TestCase):
+    """Test response cache opt-in via get_client()."""
+
+    def tearDown(self):
+        reset_response_cache()
+
+    @patch("src.llm.gemini.GeminiClient._initialize")
+    def test_opt_in(self, mock_init):
+        set_response_cache(None)
+
+        self.assertNotIsInstance(get_client("gemini-2.5-flash", cache=False), CachedLLMClient)
+        self.assertIsInstance(
+            get_client("gemini-2.5-flash", cache=False, response_cache=True), CachedLLMClient
+        )
+
+        set_response_cache(MemoryResponseCache())
+        self.assertIsInstance(get_client("gemini-2.5-flash", cache=False), CachedLLMClient)
+        self.assertNotIsInstance(
+            get_client("gemini-2.5-flash", cache=False, response_cache=False), CachedLLMClient
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
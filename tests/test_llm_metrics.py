@@ -0,0 +1,188 @@
+"""
+Unit tests for LLM call instrumentation.
+
+Tests cover:
+- Provider calls emit one record with tokens, retries and latency
+- Failed calls and response-cache hits are recorded
+- Caller tags, including across generator worker threads
+- Registry summaries: marks, cost from model pricing, p50/p95 latency
+"""
+
+import json
+import unittest
+from unittest.mock import patch
+
+from src.llm.cache import MemoryResponseCache, with_response_cache
+from src.llm.governor import reset_governors
+from src.llm.metrics import (
+    LLMCallRecord,
+    MetricsRegistry,
+    add_call_hook,
+    get_metrics_registry,
+    llm_caller,
+    percentile,
+    remove_call_hook,
+)
+from tests.llm_fakes import CARD_RESPONSE, CLAUDE_MODEL, claude_client, claude_response
+
+def _record(model="m", latency_ms=10.0, **kwargs):
+    return LLMCallRecord(model=model, provider="gemini", caller="test", latency_ms=latency_ms, **kwargs)
+
+
+class TestCallRecords(unittest.TestCase):
+    """Test records emitted by clients."""
+
+    def setUp(self):
+        reset_governors()
+        self.registry = get_metrics_registry()
+        self.mark = self.registry.mark()
+
+    @patch("src.llm.claude.time.sleep")
+    def test_success_after_retry(self, mock_sleep):
+        client = claude_client([Exception("429 rate limited"), claude_response()])
+
+        with llm_caller("unit-test"):
+            self.assertEqual(client.generate_json("hi"), {})
+
+        records = self.registry.records(since=self.mark)
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual((record.model, record.caller), ("claude-haiku-4-5@20251001", "unit-test"))
+        self.assertEqual((record.input_tokens, record.output_tokens, record.retries), (100, 20, 1))
+        self.assertTrue(record.ok)
+        self.assertEqual(json.loads(record.to_json())["event"], "llm_call")
+
+    def test_failure_is_recorded(self):
+        client = claude_client([ValueError("bad request")])
+
+        with self.assertRaises(ValueError):
+            client.generate("hi")
+
+        record = self.registry.records(since=self.mark)[0]
+        self.assertFalse(record.ok)
+        self.assertIn("bad request", record.error)
+        self.assertEqual(record.caller, "unknown")
+
+    def test_cache_hits_are_free(self):
+        client = with_response_cache(claude_client([claude_response()]), MemoryResponseCache())
+
+        client.generate("hi")
+        client.generate("hi")
+
+        summary = self.registry.summary(since=self.mark)
+        self.assertEqual((summary["calls"], summary["cache_hits"]), (2, 1))
+        self.assertEqual(summary["input_tokens"], 100)
+
+    def test_hooks_receive_records(self):
+        seen = []
+        add_call_hook(seen.append)
+        try:
+            claude_client([claude_response()]).generate("hi")
+        finally:
+            remove_call_hook(seen.append)
+
+        self.assertEqual(len(seen), 1)
+
+    def test_caller_tag_reaches_generator_workers(self):
+        from src.knowledge_cards.generator import process_chunks_batch
+
+        # The generator uses the flat-imported llm package (as deployed)
+        from llm.claude import ClaudeClient as FlatClaudeClient
+        from llm.metrics import get_metrics_registry as flat_registry
+        from llm.metrics import llm_caller as flat_llm_caller
+
+        client = claude_client(
+            [claude_response(json.dumps(CARD_RESPONSE)) for _ in range(3)], FlatClaudeClient
+        )
+        chunks = [
+            {"chunk_id": f"c{i}", "title": "T", "author": "A", "content": "Text"} for i in range(3)
+        ]
+        mark = flat_registry().mark()
+
+        with flat_llm_caller("cards"):
+            results = process_chunks_batch(chunks, max_concurrency=3, client=client)
+
+        self.assertEqual(results["processed"], 3)
+        self.assertEqual([r.caller for r in flat_registry().records(since=mark)], ["cards"] * 3)
+        self.assertEqual(results["llm"]["input_tokens"], 300)
+        self.assertGreater(results["llm"]["cost_usd"], 0)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test aggregation."""
+
+    def test_summary_since_mark_and_by_model(self):
+        registry = MetricsRegistry()
+        registry.record(_record(latency_ms=999))
+        mark = registry.mark()
+        for latency in range(1, 101):
+            registry.record(_record(model="gemini-2.5-flash", latency_ms=float(latency),
+                                    input_tokens=1_000_000, output_tokens=0))
+        registry.record(_record(model="other", error="boom", retries=2))
+
+        summary = registry.summary(since=mark)
+
+        self.assertEqual((summary["calls"], summary["errors"], summary["retries"]), (101, 1, 2))
+        gemini = summary["models"]["gemini-2.5-flash"]
+        self.assertEqual((gemini["latency_p50_ms"], gemini["latency_p95_ms"]), (50.0, 95.0))
+        # 100M input tokens at $0.075 per 1M
+        self.assertAlmostEqual(gemini["cost_usd"], 7.5)
+        self.assertAlmostEqual(summary["cost_usd"], 7.5)
+        self.assertEqual(summary["models"]["other"]["cost_usd"], 0.0)
+
+    def test_bounded_history(self):
+        registry = MetricsRegistry(max_records=2)
+        for _ in range(5):
+            registry.record(_record())
+
+        self.assertEqual(len(registry.records()), 2)
+        self.assertEqual(registry.mark(), 5)
+
+    def test_percentile(self):
+        self.assertEqual(percentile([], 95), 0.0)
+        self.assertEqual(percentile([3.0, 1.0, 2.0], 50), 2.0)
+        self.assertEqual(percentile([1.0, 2.0], 95), 2.0)
+
+
+class TestRegenerationStats(unittest.TestCase):
+    """Test that the regeneration summary reports measured usage."""
+
+    def test_summary_uses_measured_calls(self):
+        try:
+            from src.llm.regenerate import RegenerationStats
+        except ImportError as e:
+            self.skipTest(f"regenerate dependencies unavailable: {e}")
+
+        stats = RegenerationStats()
+        stats.start(1, "gemini-2.5-flash")
+        get_metrics_registry().record(_record(model="gemini-2.5-flash", latency_ms=40.0,
+                                              input_tokens=1000, output_tokens=200))
+        stats.record_success()
+
+        summary = stats.summary()
+
+        self.assertTrue(summary["measured_usage"])
+        self.assertEqual((summary["input_tokens"], summary["output_tokens"]), (1000, 200))
+        self.assertEqual(summary["latency_p95_ms"], 40.0)
+        self.assertEqual(summary["llm_requests"], 1)
+
+    def test_summary_cost_includes_prompt_cache(self):
+        try:
+            from src.llm.regenerate import RegenerationStats
+        except ImportError as e:
+            self.skipTest(f"regenerate dependencies unavailable: {e}")
+
+        stats = RegenerationStats()
+        stats.start(1, CLAUDE_MODEL)
+        get_metrics_registry().record(_record(model=CLAUDE_MODEL, input_tokens=100, output_tokens=0,
+                                              cache_write_tokens=1_000_000))
+
+        summary = stats.summary()
+
+        # Cache writes are billed at 1.25x input ($1.00/1M for Haiku 4.5)
+        self.assertEqual(summary["cache_write_tokens"], 1_000_000)
+        self.assertAlmostEqual(summary["estimated_cost_usd"], 1.25, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for prompt-prefix caching.
+
+Tests cover:
+- Claude marks the system prompt with cache_control only when asked and
+  long enough for the model's cache minimum
+- Cache read/write tokens flow into LLMResponse, call records and cost
+"""
+
+import unittest
+from unittest.mock import MagicMock
+
+from src.knowledge_cards.prompt_manager import PromptManager as CardPromptManager
+from src.llm.base import GenerationConfig
+from src.llm.claude import min_cacheable_tokens
+from src.llm.governor import reset_governors
+from src.llm.metrics import LLMCallRecord, MetricsRegistry, estimate_cost
+from tests.llm_fakes import CLAUDE_MODEL, claude_client, claude_response
+
+
+def _claude(usage):
+    return claude_client([claude_response("ok", usage=usage)])
+
+
+class TestClaudePromptCache(unittest.TestCase):
+    """Test cache_control requests and cache usage parsing."""
+
+    def setUp(self):
+        reset_governors()
+
+    def test_system_prompt_marked_for_caching(self):
+        client = _claude(MagicMock(input_tokens=10, output_tokens=5))
+        rules = "Follow these rules. " * 1000  # ~5000 tokens
+
+        client.generate("payload", GenerationConfig(cache_system_prompt=True), system_prompt=rules)
+
+        system = client._client.messages.create.call_args.kwargs["system"]
+        self.assertEqual(
+            system, [{"type": "text", "text": rules, "cache_control": {"type": "ephemeral"}}]
+        )
+
+    def test_short_prefix_sent_uncached(self):
+        client = _claude(MagicMock(input_tokens=10, output_tokens=5))
+        instructions = CardPromptManager().get_instructions()
+
+        with self.assertLogs("src.llm.claude", level="INFO"):
+            client.generate("payload", GenerationConfig(cache_system_prompt=True), instructions)
+
+        # The card instructions are below the Haiku 4.5 minimum
+        self.assertEqual(client._client.messages.create.call_args.kwargs["system"], instructions)
+
+    def test_min_cacheable_tokens(self):
+        self.assertEqual(min_cacheable_tokens(CLAUDE_MODEL), 4096)
+        self.assertEqual(min_cacheable_tokens("claude-3-5-haiku@20241022"), 2048)
+        self.assertEqual(min_cacheable_tokens("claude-sonnet-4-5@20250929"), 1024)
+
+    def test_plain_system_prompt_by_default(self):
+        client = _claude(MagicMock(input_tokens=10, output_tokens=5))
+
+        client.generate("payload", GenerationConfig(), system_prompt="rules")
+
+        self.assertEqual(client._client.messages.create.call_args.kwargs["system"], "rules")
+
+    def test_cache_usage_parsed(self):
+        usage = MagicMock(
+            input_tokens=50, output_tokens=5, cache_read_input_tokens=2000, cache_creation_input_tokens=0
+        )
+
+        response = _claude(usage).generate("payload", GenerationConfig(cache_system_prompt=True), "rules")
+
+        self.assertEqual((response.cache_read_tokens, response.cache_write_tokens), (2000, 0))
+
+    def test_missing_cache_usage_is_none(self):
+        usage = MagicMock(spec=["input_tokens", "output_tokens"], input_tokens=50, output_tokens=5)
+
+        response = _claude(usage).generate("payload")
+
+        self.assertIsNone(response.cache_read_tokens)
+        self.assertIsNone(response.cache_write_tokens)
+
+
+class TestCacheCost(unittest.TestCase):
+    """Test cost accounting for cached prompt tokens."""
+
+    def test_estimate_cost_discounts_cache_reads(self):
+        uncached = estimate_cost(CLAUDE_MODEL, 1_000_000, 0)
+        cached = estimate_cost(CLAUDE_MODEL, 0, 0, cache_read_tokens=1_000_000)
+        written = estimate_cost(CLAUDE_MODEL, 0, 0, cache_write_tokens=1_000_000)
+
+        self.assertAlmostEqual(cached, uncached * 0.1)
+        self.assertAlmostEqual(written, uncached * 1.25)
+
+    def test_summary_reports_cache_tokens(self):
+        registry = MetricsRegistry()
+        for read, write in ((0, 1000), (1000, 0), (1000, 0)):
+            registry.record(LLMCallRecord(
+                model=CLAUDE_MODEL, provider="claude", caller="cards", latency_ms=10.0,
+                input_tokens=100, output_tokens=10,
+                cache_read_tokens=read, cache_write_tokens=write,
+            ))
+
+        summary = registry.summary()
+
+        self.assertEqual((summary["cache_read_tokens"], summary["cache_write_tokens"]), (2000, 1000))
+        self.assertAlmostEqual(
+            summary["cost_usd"], round(estimate_cost(CLAUDE_MODEL, 300, 30, 2000, 1000), 6)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
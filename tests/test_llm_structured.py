@@ -0,0 +1,165 @@
+"""
+Unit tests for schema-constrained JSON output.
+
+Tests cover:
+- JSON Schema derivation from KnowledgeCard / Relationship dataclasses
+- Provider requests: Gemini JSON mode, Claude forced tool call, batch lines
+- Fallback extraction from free text (fences, prose, braces in strings)
+- Parse statistics per caller
+"""
+
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from src.llm.base import GenerationConfig, parse_json_response
+from src.llm.batch import BatchRequest, to_gemini_request
+from src.llm.gemini import GeminiClient
+from src.llm.metrics import llm_caller, parse_stats, reset_parse_stats
+from src.llm.structured import extract_json, schema_from_dataclass, to_gemini_schema
+from src.relationships.extractor import relationship_response_schema
+from tests.llm_fakes import claude_client, claude_response
+
+CARD = {"summary": "S", "takeaways": ["a", "b", "c"], "tags": ["t"]}
+
+
+class TestSchemas(unittest.TestCase):
+    """Test schema derivation and conversion."""
+
+    def test_knowledge_card_schema(self):
+        from src.knowledge_cards.generator import card_generation_config, packed_response_schema
+
+        schema = card_generation_config().response_schema
+
+        self.assertEqual(schema["required"], ["summary", "takeaways", "tags"])
+        self.assertEqual(
+            schema["properties"]["takeaways"],
+            {"type": "array", "items": {"type": "string"}, "minItems": 3, "maxItems": 5},
+        )
+        packed_item = packed_response_schema()["properties"]["cards"]["items"]
+        self.assertEqual(packed_item["required"][0], "chunk_id")
+
+    def test_relationship_schema_uses_literal_types(self):
+        schema = relationship_response_schema()
+
+        self.assertIn("contradicts", schema["properties"]["type"]["enum"])
+        self.assertEqual(schema["properties"]["confidence"]["maximum"], 1.0)
+
+    def test_optional_fields(self):
+        from dataclasses import dataclass
+        from typing import List, Optional
+
+        @dataclass
+        class Item:
+            name: str
+            score: Optional[float]
+            labels: List[int]
+
+        schema = schema_from_dataclass(Item)
+
+        self.assertEqual(schema["properties"]["score"], {"type": "number"})
+        self.assertEqual(schema["properties"]["labels"]["items"], {"type": "integer"})
+
+    def test_gemini_schema_conversion(self):
+        schema = {
+            "type": "object",
+            "properties": {"tags": {"type": "array", "items": {"type": "string", "maxLength": 20}}},
+            "required": ["tags"],
+            "additionalProperties": False,
+        }
+
+        self.assertEqual(
+            to_gemini_schema(schema),
+            {
+                "type": "OBJECT",
+                "properties": {"tags": {"type": "ARRAY", "items": {"type": "STRING"}}},
+                "required": ["tags"],
+            },
+        )
+
+
+class TestProviderRequests(unittest.TestCase):
+    """Test that providers request structured output natively."""
+
+    def setUp(self):
+        self.schema = {
+            "type": "object",
+            "properties": {"summary": {"type": "string"}},
+            "required": ["summary"],
+        }
+        self.config = GenerationConfig(response_schema=self.schema)
+
+    def test_gemini_json_mode(self):
+        client = GeminiClient(model_id="gemini-2.5-flash", project_id="p")
+
+        _, gemini_config, _ = client._build_request("hi", self.config, None)
+
+        self.assertEqual(gemini_config["response_mime_type"], "application/json")
+        self.assertEqual(gemini_config["response_schema"]["type"], "OBJECT")
+
+    def test_gemini_plain_request_unchanged(self):
+        client = GeminiClient(model_id="gemini-2.5-flash", project_id="p")
+
+        _, gemini_config, _ = client._build_request("hi", GenerationConfig(), None)
+
+        self.assertNotIn("response_mime_type", gemini_config)
+
+    def test_claude_forced_tool(self):
+        response = claude_response(content=[MagicMock(type="tool_use", input=CARD)])
+        response.stop_reason = "tool_use"
+        client = claude_client([response])
+
+        data = client.generate_json("hi", self.config)
+
+        self.assertEqual(data, CARD)
+        kwargs = client._client.messages.create.call_args.kwargs
+        self.assertEqual(kwargs["tools"][0]["input_schema"], self.schema)
+        self.assertEqual(kwargs["tool_choice"], {"type": "tool", "name": "respond"})
+
+    def test_batch_request_line(self):
+        request = BatchRequest(key="k", prompt="p", config=self.config)
+
+        line = to_gemini_request(request, "gemini-2.5-flash")
+
+        generation_config = line["request"]["generationConfig"]
+        self.assertEqual(generation_config["responseMimeType"], "application/json")
+        # Schema survives the JSONL round trip of the neutral request
+        restored = BatchRequest.from_line(json.loads(json.dumps(request.to_line())))
+        self.assertEqual(restored.config.response_schema, self.schema)
+
+
+class TestJsonExtraction(unittest.TestCase):
+    """Test the free-text fallback parser and parse statistics."""
+
+    def setUp(self):
+        reset_parse_stats()
+
+    def test_extract_json(self):
+        self.assertEqual(extract_json('{"a": 1}'), ({"a": 1}, False))
+        self.assertEqual(extract_json('```json\n{"a": 1}\n```'), ({"a": 1}, True))
+        self.assertEqual(
+            extract_json('Here: {"a": "} not the end {", "b": [1]} Done. {"c": 2}'),
+            ({"a": "} not the end {", "b": [1]}, True),
+        )
+        self.assertEqual(extract_json('{broken {"a": 1}'), ({"a": 1}, True))
+        with self.assertRaises(ValueError):
+            extract_json("no json here")
+
+    def test_parse_stats(self):
+        with llm_caller("cards"):
+            parse_json_response('{"a": 1}', structured=True)
+            parse_json_response('```\n{"a": 1}\n```')
+            with self.assertRaises(ValueError):
+                parse_json_response("oops", "gemini")
+
+        stats = parse_stats()
+        self.assertEqual(
+            (stats["parsed"], stats["repaired"], stats["failed"], stats["structured"]), (1, 1, 1, 1)
+        )
+        self.assertAlmostEqual(stats["failure_rate"], 0.3333)
+        self.assertEqual(parse_stats("cards")["total"], 3)
+        self.assertEqual(parse_stats("other")["total"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
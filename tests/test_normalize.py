@@ -320,15 +320,52 @@ class TestNormalizeCloudFunction(unittest.TestCase):
         markdown_blob.upload_from_string.assert_called_once()
         self.assertEqual(markdown_blob.upload_from_string.call_args.kwargs['content_type'], 'text/markdown; charset=utf-8')
 
+        # Markdown hash recorded on the object for embed's download-free check
+        uploaded_markdown = markdown_blob.upload_from_string.call_args.args[0]
+        expected_hash = self.module._compute_markdown_hash(uploaded_markdown)
+        self.assertEqual(markdown_blob.metadata, {'content_hash': expected_hash})
+
+        # Chunk pipeline_items entries are written in one batched commit
+        batch = firestore_client.batch.return_value
+        batch.commit.assert_called_once()
+        chunk_update = batch.set.call_args.args[1]
+        self.assertEqual(chunk_update['content_hash'], expected_hash)
+        self.assertEqual(chunk_update['embedding_status'], 'pending')
+
         # Firestore updated - check that chunks were created
         # The last call is to the original document marking it complete
         final_update = doc_ref.set.call_args_list[-1].args[0]
         self.assertEqual(final_update['normalize_status'], 'complete')
         self.assertIn('total_chunks', final_update)
 
-        # Verify chunk documents were created (there should be multiple set calls for chunks)
+        # Processing mark, then completion mark after the chunk batch
         self.assertGreater(len(doc_ref.set.call_args_list), 1)
 
+    def test_chunker_reused_per_worker(self):
+        import threading
+        from normalize.main import _get_chunker
+
+        first = _get_chunker()
+        self.assertIs(_get_chunker(), first)
+
+        other = []
+        worker = threading.Thread(target=lambda: other.append(_get_chunker()))
+        worker.start()
+        worker.join()
+        self.assertIsNot(other[0], first)
+
+    def test_commit_writes_respects_batch_limit(self):
+        from normalize.main import FIRESTORE_BATCH_LIMIT, _commit_writes
+
+        firestore_client = MagicMock()
+        writes = [(MagicMock(), {'n': i}) for i in range(FIRESTORE_BATCH_LIMIT + 1)]
+        _commit_writes(firestore_client, writes)
+
+        self.assertEqual(firestore_client.batch.call_count, 2)
+        batch = firestore_client.batch.return_value
+        self.assertEqual(batch.set.call_count, FIRESTORE_BATCH_LIMIT + 1)
+        self.assertEqual(batch.commit.call_count, 2)
+
     @patch('normalize.main.PROJECT_ID', 'test-project')
     @patch('normalize.main._get_firestore_client')
     @patch('normalize.main._get_storage_client')
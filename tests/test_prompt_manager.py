@@ -10,6 +10,7 @@ import tempfile
 import os
 from pathlib import Path
 from src.knowledge_cards.prompt_manager import (
+    EXCERPT_MARKER,
     PromptManager,
     create_knowledge_card_prompt,
     estimate_cost,
@@ -196,5 +197,57 @@ class TestPromptCustomization(unittest.TestCase):
             self.assertEqual(prompt, 'Custom prompt: {title}')
 
 
+class TestPromptVersion(unittest.TestCase):
+    """Test prompt template versioning"""
+
+    def test_version_is_stable_and_tracks_template(self):
+        """Same template gives the same version, edits change it"""
+        pm = PromptManager()
+
+        version = pm.get_prompt_version()
+
+        self.assertTrue(version.startswith('sha256:'))
+        self.assertEqual(version, PromptManager().get_prompt_version())
+        self.assertNotEqual(version, pm.get_prompt_version(pm.load_prompt() + ' '))
+
+
+class TestPackedPrompt(unittest.TestCase):
+    """Test multi-chunk (packed) prompt formatting"""
+
+    def setUp(self):
+        self.pm = PromptManager()
+
+    def test_get_instructions_strips_excerpt_section(self):
+        """Instructions stop before the per-excerpt placeholders"""
+        instructions = self.pm.get_instructions()
+
+        self.assertNotIn(EXCERPT_MARKER, instructions)
+        self.assertNotIn('{content}', instructions)
+        self.assertGreater(len(instructions), 100)
+
+    def test_get_instructions_requires_marker(self):
+        """Templates without the excerpt marker cannot be packed"""
+        with self.assertRaises(ValueError):
+            self.pm.get_instructions('Summarize: {content}')
+
+    def test_format_packed_prompt_sends_instructions_once(self):
+        """All excerpts share one copy of the instructions"""
+        chunks = [
+            {'chunk_id': f'chunk-{i}', 'title': f'Book {i}', 'author': None, 'content': f'Text {i}'}
+            for i in range(3)
+        ]
+
+        prompt = self.pm.format_packed_prompt(chunks)
+        single = self.pm.format_prompt('Book 0', 'Author', 'Text 0')
+
+        self.assertEqual(prompt.count(self.pm.get_instructions()), 1)
+        for i in range(3):
+            self.assertIn(f'<excerpt chunk_id="chunk-{i}">', prompt)
+            self.assertIn(f'Text {i}', prompt)
+        self.assertIn('Author: Unknown', prompt)
+        self.assertIn('"cards"', prompt)
+        self.assertLess(len(prompt), 3 * len(single))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,177 @@
+"""
+Unit tests for the shared sliding-window rate limiter.
+
+Tests cover:
+- Non-blocking try_acquire and window expiry
+- No rolling 60s window exceeding rate_per_minute
+- Blocking and async acquire
+- Thread safety under concurrent callers
+- Per-endpoint classes and the shared registry
+"""
+
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.common import rate_limiter
+from src.common.rate_limiter import (
+    READWISE_RATE_LIMITS,
+    RateLimiter,
+    SlidingWindow,
+    get_limiter,
+)
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.now += seconds
+
+
+class TestSlidingWindow(unittest.TestCase):
+    """Test SlidingWindow."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.window = SlidingWindow(60, clock=self.clock)
+
+    def test_burst_up_to_limit(self):
+        for _ in range(60):
+            self.assertEqual(self.window.try_acquire(), 0.0)
+
+        self.assertAlmostEqual(self.window.try_acquire(), 60.0)
+
+    def test_try_acquire_does_not_record_when_full(self):
+        for _ in range(60):
+            self.window.try_acquire()
+
+        self.clock.now += 30
+        self.window.try_acquire()
+        self.clock.now += 30
+
+        # The failed attempt recorded nothing, so the whole window is free
+        self.assertEqual(self.window.available, 60)
+
+    def test_requests_expire_individually(self):
+        self.window.try_acquire()
+        self.clock.now += 30
+        self.window.try_acquire()
+        self.clock.now += 30
+
+        self.assertEqual(self.window.available, 59)
+
+    def test_no_rolling_window_exceeds_rate(self):
+        window = SlidingWindow(20, clock=self.clock)
+        sent = []
+
+        with patch("time.sleep", side_effect=self.clock.sleep):
+            while self.clock.now < 300:
+                window.acquire()
+                sent.append(self.clock.now)
+                self.clock.now += 0.75  # Callers ask faster than the limit
+
+        for start in sent:
+            in_window = [t for t in sent if start <= t < start + 60]
+            self.assertLessEqual(len(in_window), 20, f"window starting at {start}")
+        self.assertEqual(len([t for t in sent if t < 60]), 20)
+
+    def test_acquire_sleeps_until_oldest_expires(self):
+        window = SlidingWindow(20, clock=self.clock)
+        for _ in range(20):
+            window.acquire()
+            self.clock.now += 1
+
+        with patch("time.sleep", side_effect=self.clock.sleep) as mock_sleep:
+            waited = window.acquire()
+
+        self.assertAlmostEqual(waited, 40.0)
+        mock_sleep.assert_called_once()
+
+    def test_acquire_async(self):
+        for _ in range(60):
+            self.window.try_acquire()
+
+        with patch("asyncio.sleep", side_effect=self.clock.async_sleep):
+            waited = asyncio.run(self.window.acquire_async())
+
+        self.assertAlmostEqual(waited, 60.0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            SlidingWindow(0)
+
+    def test_concurrent_callers_never_overdraw(self):
+        window = SlidingWindow(100, clock=lambda: 0.0)  # Nothing expires
+        granted = []
+
+        def worker():
+            for _ in range(50):
+                if window.try_acquire() == 0.0:
+                    granted.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(granted), 100)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test per-endpoint classes and the shared registry."""
+
+    def setUp(self):
+        rate_limiter.reset_limiters()
+
+    def tearDown(self):
+        rate_limiter.reset_limiters()
+
+    def test_endpoint_classes_are_independent(self):
+        clock = FakeClock()
+        limiter = RateLimiter(READWISE_RATE_LIMITS, clock=clock)
+
+        for _ in range(20):
+            self.assertEqual(limiter.try_acquire("general"), 0.0)
+
+        self.assertGreater(limiter.try_acquire("general"), 0)
+        self.assertEqual(limiter.try_acquire("list"), 0.0)
+
+    def test_unknown_class_uses_default(self):
+        limiter = RateLimiter({"general": 20})
+
+        self.assertIs(limiter.window("update"), limiter.window("general"))
+
+    def test_get_limiter_is_shared(self):
+        self.assertIs(get_limiter("readwise"), get_limiter("readwise"))
+        self.assertEqual(get_limiter().window("list").rate_per_minute, 50)
+
+    def test_get_limiter_unknown_name_requires_limits(self):
+        with self.assertRaises(ValueError):
+            get_limiter("unknown-api")
+
+        limiter = get_limiter("unknown-api", {"general": 5})
+        self.assertEqual(limiter.window("general").rate_per_minute, 5)
+
+    def test_deployment_copies_match(self):
+        canonical = (SRC_DIR / "common" / "rate_limiter.py").read_text()
+        for copy_path in ["ingest/rate_limiter.py", "batch_recommendations/rate_limiter.py"]:
+            self.assertEqual((SRC_DIR / copy_path).read_text(), canonical, copy_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
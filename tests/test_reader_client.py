@@ -11,12 +11,12 @@ Tests:
 """
 
 import pytest
-import time
 from unittest.mock import Mock, MagicMock, patch
 from src.ingest.reader_client import (
     ReadwiseReaderClient,
     ReaderDocument,
 )
+from src.common.rate_limiter import READWISE_RATE_LIMITS, RateLimiter
 
 
 class TestReaderDocument:
@@ -257,31 +257,43 @@ class TestReadwiseReaderClient:
         with pytest.raises(ValueError, match="storage_client not configured"):
             client.store_raw_document("bucket", doc)
 
-    def test_rate_limit_enforcement(self, client):
+    def test_rate_limit_enforcement(self):
         """Test rate limiting delays requests appropriately."""
-        # Simulate hitting the rate limit
+        now = [0.0]
+        limiter = RateLimiter(READWISE_RATE_LIMITS, clock=lambda: now[0])
+        client = ReadwiseReaderClient(api_key="test_api_key", rate_limiter=limiter)
+
+        # Fill the general window (20/min)
         for _ in range(20):
-            client._general_request_times.append(time.time())
+            client._rate_limit("general")
 
-        start = time.time()
-        client._rate_limit("general")
-        elapsed = time.time() - start
+        with patch("time.sleep", side_effect=lambda s: now.__setitem__(0, now[0] + s)) as mock_sleep:
+            client._rate_limit("general")
 
-        # Should have waited because we hit the limit
-        assert elapsed > 0
+        # Should have waited for the first request to leave the window
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args[0][0] == pytest.approx(60.0)
 
-    def test_rate_limit_allows_under_limit(self, client):
+    def test_rate_limit_allows_under_limit(self):
         """Test rate limiting doesn't delay when under limit."""
-        # Only 5 requests in the last minute
-        for _ in range(5):
-            client._general_request_times.append(time.time())
+        limiter = RateLimiter(READWISE_RATE_LIMITS)
+        client = ReadwiseReaderClient(api_key="test_api_key", rate_limiter=limiter)
+
+        with patch("time.sleep") as mock_sleep:
+            for _ in range(5):
+                client._rate_limit("general")
+            # List endpoint has its own budget
+            for _ in range(50):
+                client._rate_limit("list")
+
+        mock_sleep.assert_not_called()
 
-        start = time.time()
-        client._rate_limit("general")
-        elapsed = time.time() - start
+    def test_clients_share_default_limiter(self):
+        """Test Readwise clients draw from one process-wide limiter."""
+        first = ReadwiseReaderClient(api_key="a")
+        second = ReadwiseReaderClient(api_key="b")
 
-        # Should not wait
-        assert elapsed < 0.1
+        assert first.rate_limiter is second.rate_limiter
 
     @patch.object(ReadwiseReaderClient, "_make_request")
     @patch.object(ReadwiseReaderClient, "store_raw_document")
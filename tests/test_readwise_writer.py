@@ -33,6 +33,19 @@ from knowledge_cards.snippet_extractor import ExtractedSnippet
 # ============================================================================
 
 
+def _fake_embeddings(texts):
+    return [[0.1] * 768 for _ in texts]
+
+
+def _fake_write(items, run_id, embedding_status):
+    return [True] * len(items)
+
+
+def _written(mock_write):
+    """Items passed to the (single) write_batch_to_firestore call."""
+    return mock_write.call_args[0][0]
+
+
 def _make_snippet(
     text="Teams adopting feature flags without governance create debt.",
     context="Key finding about feature flag management.",
@@ -163,14 +176,15 @@ class TestReadwiseHighlightWriter:
         mock_response.status_code = 200
         mock_response.json.return_value = [{"id": 1}]
         mock_response.raise_for_status = Mock()
-        writer.session.post = Mock(return_value=mock_response)
+        writer.session.request = Mock(return_value=mock_response)
 
         result = writer._post_highlights({"highlights": [{"text": "test"}]})
         assert result == [{"id": 1}]
 
-        writer.session.post.assert_called_once()
-        call_kwargs = writer.session.post.call_args
-        assert "highlights/" in call_kwargs[0][0] or "highlights/" in call_kwargs[1].get("url", call_kwargs[0][0])
+        writer.session.request.assert_called_once()
+        method, url = writer.session.request.call_args[0]
+        assert method == "POST"
+        assert "highlights/" in url
 
     @patch("time.sleep")
     def test_post_highlights_rate_limit_retry(self, mock_sleep):
@@ -186,7 +200,7 @@ class TestReadwiseHighlightWriter:
         success_response.json.return_value = [{"id": 2}]
         success_response.raise_for_status = Mock()
 
-        writer.session.post = Mock(
+        writer.session.request = Mock(
             side_effect=[rate_limited_response, success_response]
         )
 
@@ -206,7 +220,7 @@ class TestReadwiseHighlightWriter:
 
         import requests as req
 
-        writer.session.post = Mock(
+        writer.session.request = Mock(
             side_effect=[req.exceptions.Timeout("timeout"), success_response]
         )
 
@@ -240,13 +254,12 @@ class TestReadwiseHighlightWriter:
 class TestEmbedSnippets:
     """Tests for embed_snippets function."""
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_single_snippet(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_single_snippet(self, mock_embed, mock_write):
         """Test 8: Single snippet embedding with correct metadata."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         snippets = [_make_snippet()]
         result = embed_snippets(
@@ -263,27 +276,26 @@ class TestEmbedSnippets:
 
         # Verify embedding call
         mock_embed.assert_called_once()
-        embed_text = mock_embed.call_args[0][0]
+        embed_text = mock_embed.call_args[0][0][0]
         assert "Feature Flags" in embed_text
         assert "Teams adopting feature flags" in embed_text
 
-        # Verify write_to_firestore call
+        # Verify batched write call
         mock_write.assert_called_once()
-        call_kwargs = mock_write.call_args[1]
-        metadata = call_kwargs["metadata"]
+        assert len(_written(mock_write)) == 1
+        metadata = _written(mock_write)[0]["metadata"]
         assert metadata["chunk_id"] == "auto_snippet_doc_123_0"
         assert metadata["parent_doc_id"] == "doc_123"
         assert metadata["source"] == "reader"
         assert metadata["source_type"] == "auto-snippet"
         assert "auto-snippet" in metadata["tags"]
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_multiple_snippets(self, mock_embed, mock_write, mock_source):
-        """Test 9: Multiple snippets get sequential chunk IDs."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_multiple_snippets(self, mock_embed, mock_write):
+        """Test 9: Multiple snippets get sequential chunk IDs in one batch."""
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         snippets = _make_snippets(5)
         result = embed_snippets(
@@ -299,13 +311,15 @@ class TestEmbedSnippets:
         assert result["chunk_ids"][0] == "auto_snippet_doc_456_0"
         assert result["chunk_ids"][4] == "auto_snippet_doc_456_4"
 
-        assert mock_embed.call_count == 5
-        assert mock_write.call_count == 5
+        # One batched embedding request and one batched write
+        mock_embed.assert_called_once()
+        assert len(mock_embed.call_args[0][0]) == 5
+        mock_write.assert_called_once()
+        assert len(_written(mock_write)) == 5
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_empty_snippets(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_empty_snippets(self, mock_embed, mock_write):
         """Test 10: Empty snippets list returns zeros."""
         result = embed_snippets(
             snippets=[],
@@ -319,13 +333,12 @@ class TestEmbedSnippets:
         mock_embed.assert_not_called()
         mock_write.assert_not_called()
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_with_custom_tags(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_with_custom_tags(self, mock_embed, mock_write):
         """Test 11: Custom tags are included alongside auto-snippet tag."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         snippets = [_make_snippet()]
         result = embed_snippets(
@@ -337,18 +350,17 @@ class TestEmbedSnippets:
             tags=["kx-auto", "tech"],
         )
 
-        metadata = mock_write.call_args[1]["metadata"]
+        metadata = _written(mock_write)[0]["metadata"]
         assert "kx-auto" in metadata["tags"]
         assert "tech" in metadata["tags"]
         assert "auto-snippet" in metadata["tags"]
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_content_format(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_content_format(self, mock_embed, mock_write):
         """Test 12: Content is formatted as markdown blockquote."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         snippet = _make_snippet(
             text="The insight text.",
@@ -362,20 +374,15 @@ class TestEmbedSnippets:
             reader_doc_id="doc_123",
         )
 
-        content = mock_write.call_args[1]["content"]
+        content = _written(mock_write)[0]["content"]
         assert content == "> The insight text.\n\n**Context:** It explains something important."
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_one_fails_others_continue(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_one_fails_others_continue(self, mock_embed, mock_write):
         """Test 13: If one embedding fails, continue with the rest."""
-        mock_embed.side_effect = [
-            [0.1] * 768,
-            Exception("Embedding API error"),
-            [0.3] * 768,
-        ]
-        mock_write.return_value = True
+        mock_embed.return_value = [[0.1] * 768, None, [0.3] * 768]
+        mock_write.side_effect = _fake_write
 
         snippets = _make_snippets(3)
         result = embed_snippets(
@@ -390,14 +397,15 @@ class TestEmbedSnippets:
         assert len(result["chunk_ids"]) == 2
         assert "auto_snippet_doc_123_0" in result["chunk_ids"]
         assert "auto_snippet_doc_123_2" in result["chunk_ids"]
+        written_ids = [item["metadata"]["chunk_id"] for item in _written(mock_write)]
+        assert "auto_snippet_doc_123_1" not in written_ids
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_firestore_write_fails(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_firestore_write_fails(self, mock_embed, mock_write):
         """Test 14: Firestore write failure skips that snippet."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.side_effect = [True, False, True]
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.return_value = [True, False, True]
 
         snippets = _make_snippets(3)
         result = embed_snippets(
@@ -411,13 +419,12 @@ class TestEmbedSnippets:
         assert result["embedded"] == 2
         assert len(result["chunk_ids"]) == 2
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_content_hash(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_content_hash(self, mock_embed, mock_write):
         """Test 15: Content hash is computed correctly."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         snippet = _make_snippet(text="Test text", context="Context")
         embed_snippets(
@@ -430,7 +437,7 @@ class TestEmbedSnippets:
 
         content = "> Test text\n\n**Context:** Context"
         expected_hash = f"sha256:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
-        actual_hash = mock_write.call_args[1]["content_hash"]
+        actual_hash = _written(mock_write)[0]["content_hash"]
         assert actual_hash == expected_hash
 
 
@@ -599,13 +606,12 @@ class TestEdgeCases:
         mock_writer_cls.assert_not_called()
         assert result["chunks_embedded"] == 1
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_auto_snippet_tag_not_duplicated(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_auto_snippet_tag_not_duplicated(self, mock_embed, mock_write):
         """Test 23: auto-snippet tag is not duplicated when already present."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         embed_snippets(
             snippets=[_make_snippet()],
@@ -616,17 +622,16 @@ class TestEdgeCases:
             tags=["auto-snippet", "other"],
         )
 
-        metadata = mock_write.call_args[1]["metadata"]
+        metadata = _written(mock_write)[0]["metadata"]
         tag_count = metadata["tags"].count("auto-snippet")
         assert tag_count == 1
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_run_id_format(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_run_id_format(self, mock_embed, mock_write):
         """Test 24: Run ID follows expected format."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         embed_snippets(
             snippets=[_make_snippet()],
@@ -661,13 +666,12 @@ class TestEdgeCases:
         assert result["chunks_embedded"] == 2
         assert result["problem_matches"] == 0
 
-    @patch("ingest.readwise_writer._ensure_source_exists")
-    @patch("ingest.readwise_writer.write_to_firestore")
-    @patch("ingest.readwise_writer.generate_embedding")
-    def test_embed_no_tags(self, mock_embed, mock_write, mock_source):
+    @patch("ingest.readwise_writer.write_batch_to_firestore")
+    @patch("ingest.readwise_writer.generate_embeddings")
+    def test_embed_no_tags(self, mock_embed, mock_write):
         """Test: tags=None still adds auto-snippet tag."""
-        mock_embed.return_value = [0.1] * 768
-        mock_write.return_value = True
+        mock_embed.side_effect = _fake_embeddings
+        mock_write.side_effect = _fake_write
 
         embed_snippets(
             snippets=[_make_snippet()],
@@ -678,7 +682,7 @@ class TestEdgeCases:
             tags=None,
         )
 
-        metadata = mock_write.call_args[1]["metadata"]
+        metadata = _written(mock_write)[0]["metadata"]
         assert metadata["tags"] == ["auto-snippet"]
 
     @patch("time.sleep")
@@ -688,14 +692,14 @@ class TestEdgeCases:
 
         import requests as req
 
-        writer.session.post = Mock(
+        writer.session.request = Mock(
             side_effect=req.exceptions.Timeout("timeout")
         )
 
         with pytest.raises(req.exceptions.Timeout):
             writer._post_highlights({"highlights": [{"text": "test"}]})
 
-        assert writer.session.post.call_count == 3
+        assert writer.session.request.call_count == 3
 
     @patch("ingest.readwise_writer.match_chunks_to_problems")
     @patch("ingest.readwise_writer.embed_snippets")
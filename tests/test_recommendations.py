@@ -282,7 +282,7 @@ class TestRecommendationFilter(unittest.TestCase):
         # Title similarity check may flag this
         self.assertIn("similarity_score", result)
 
-    @patch("mcp_server.recommendation_filter.score_content_quality")
+    @patch("mcp_server.recommendation_filter.ascore_content_quality")
     def test_trusted_source_boosts_credibility(self, mock_quality):
         """Trusted sources should boost credibility even if not in KB."""
         from mcp_server import recommendation_filter
@@ -5,6 +5,7 @@ Tests cover:
 - Data classes and error types
 - LLM extraction with retry logic
 - Overflow threshold and truncation
+- Segmented (map-reduce) extraction of overflow articles
 - Integration: extract_snippets pipeline
 """
 
@@ -21,6 +22,8 @@ from knowledge_cards.snippet_extractor import (
     ExtractedSnippet,
     SnippetExtractionError,
     _extract_snippets_llm,
+    _merge_window_snippets,
+    _split_into_windows,
     extract_snippets,
     OVERFLOW_THRESHOLD,
 )
@@ -124,23 +127,21 @@ class TestExtractSnippetsLLM(unittest.TestCase):
         self.assertEqual(snippets[1].position, "middle")
 
     @patch("knowledge_cards.snippet_extractor._get_llm_client")
-    def test_json_parse_error_retry(self, mock_get_client):
-        """Retry on JSON parse error, succeed on second attempt."""
+    def test_json_parse_error_not_retried(self, mock_get_client):
+        """Schema-constrained output: a JSON parse error fails without a second call."""
         mock_client = MagicMock()
-        mock_client.generate_json.side_effect = [
-            ValueError("Invalid JSON"),
-            {
-                "snippets": [
-                    {"text": "Valid snippet", "context": "Context", "position": "middle"},
-                ]
-            },
-        ]
+        mock_client.generate_json.side_effect = ValueError("Invalid JSON")
         mock_get_client.return_value = mock_client
 
-        snippets = _extract_snippets_llm(SAMPLE_ARTICLE, SAMPLE_TITLE, SAMPLE_AUTHOR)
+        with self.assertRaises(SnippetExtractionError):
+            _extract_snippets_llm(SAMPLE_ARTICLE, SAMPLE_TITLE, SAMPLE_AUTHOR)
 
-        self.assertEqual(len(snippets), 1)
-        self.assertEqual(mock_client.generate_json.call_count, 2)
+        self.assertEqual(mock_client.generate_json.call_count, 1)
+        config = mock_client.generate_json.call_args.kwargs["config"]
+        self.assertEqual(
+            config.response_schema["properties"]["snippets"]["items"]["required"],
+            ["text", "context", "position"],
+        )
 
     @patch("knowledge_cards.snippet_extractor._get_llm_client")
     def test_persistent_failure_raises_error(self, mock_get_client):
@@ -384,5 +385,142 @@ class TestOverflowThreshold(unittest.TestCase):
         self.assertEqual(truncation_lines, [])
 
 
+
+# ============================================================================
+# Tests: Segmented Extraction
+# ============================================================================
+
+
+def _paragraph_article(count=12):
+    return "\n\n".join(
+        f"Paragraph {i} makes claim number {i}. It backs claim {i} with evidence."
+        for i in range(count)
+    )
+
+
+class TestSplitIntoWindows(unittest.TestCase):
+    """Tests for _split_into_windows()."""
+
+    def test_short_text_is_one_window(self):
+        self.assertEqual(_split_into_windows("short", 100), ["short"])
+
+    def test_windows_cover_text_at_paragraph_boundaries(self):
+        text = _paragraph_article()
+
+        windows = _split_into_windows(text, 300)
+
+        self.assertGreater(len(windows), 1)
+        self.assertEqual("".join(windows), text)
+        for window in windows:
+            self.assertLessEqual(len(window), 300)
+        for window in windows[:-1]:
+            self.assertTrue(window.endswith("\n\n"))
+
+    def test_text_without_boundaries_is_cut_hard(self):
+        windows = _split_into_windows("x" * 2500, 1000)
+
+        self.assertEqual("".join(windows), "x" * 2500)
+        self.assertTrue(all(len(w) <= 1000 for w in windows))
+
+
+class TestMergeWindowSnippets(unittest.TestCase):
+    """Tests for _merge_window_snippets()."""
+
+    def test_merge_dedupes_and_checks_verbatim(self):
+        text = _paragraph_article()
+        merged = _merge_window_snippets(
+            [
+                [
+                    ExtractedSnippet("Paragraph 10 makes claim number 10.", "c", "intro"),
+                    ExtractedSnippet("A paraphrase not in the article.", "c", "intro"),
+                ],
+                [
+                    ExtractedSnippet("Paragraph 1 makes claim number 1.", "c", "middle"),
+                    ExtractedSnippet("Paragraph 1 makes  claim\nnumber 1.", "c", "middle"),
+                    ExtractedSnippet("claim number 1.", "c", "middle"),
+                ],
+            ],
+            text,
+        )
+
+        self.assertEqual(
+            [s.text for s in merged],
+            ["Paragraph 1 makes claim number 1.", "Paragraph 10 makes claim number 10."],
+        )
+        # Positions come from the article offset, not the window
+        self.assertEqual([s.position for s in merged], ["intro", "conclusion"])
+
+
+class TestSegmentedExtraction(unittest.TestCase):
+    """Tests for segmented extraction of overflow articles."""
+
+    def _client_quoting_first_sentence(self, fail_window=None):
+        """Mock client returning the first sentence of each window."""
+
+        def generate_json(prompt, config=None):
+            window = prompt.split("<article>\n", 1)[1].split("\n</article>", 1)[0]
+            if fail_window and fail_window in window:
+                raise RuntimeError("LLM unavailable")
+            first_sentence = window.strip().split(". ")[0] + "."
+            return {"snippets": [{"text": first_sentence, "context": "ctx", "position": "intro"}]}
+
+        client = MagicMock()
+        client.generate_json.side_effect = generate_json
+        return client
+
+    @patch("knowledge_cards.snippet_extractor.OVERFLOW_THRESHOLD", 300)
+    @patch("knowledge_cards.snippet_extractor._get_llm_client")
+    def test_overflow_article_extracted_in_windows(self, mock_get_client):
+        """Every window is sent to the LLM, so late sections are not lost."""
+        mock_client = self._client_quoting_first_sentence()
+        mock_get_client.return_value = mock_client
+        text = _paragraph_article()
+
+        snippets = extract_snippets(text, "Long", "A", word_count=200)
+
+        windows = _split_into_windows(text, 300)
+        self.assertEqual(mock_client.generate_json.call_count, len(windows))
+        self.assertEqual(len(snippets), len(windows))
+        self.assertIn("Paragraph 0 makes claim number 0.", [s.text for s in snippets])
+        prompts = [c[0][0] for c in mock_client.generate_json.call_args_list]
+        self.assertTrue(any("Paragraph 11" in p for p in prompts))
+        self.assertTrue(all("TRUNCATED" not in p for p in prompts))
+
+    @patch("knowledge_cards.snippet_extractor.OVERFLOW_THRESHOLD", 300)
+    @patch("knowledge_cards.snippet_extractor._get_llm_client")
+    def test_failed_window_loses_only_its_snippets(self, mock_get_client):
+        mock_get_client.return_value = self._client_quoting_first_sentence(
+            fail_window="Paragraph 0 "
+        )
+        text = _paragraph_article()
+
+        snippets = extract_snippets(text, "Long", "A", word_count=200)
+
+        texts = [s.text for s in snippets]
+        self.assertNotIn("Paragraph 0 makes claim number 0.", texts)
+        self.assertEqual(len(snippets), len(_split_into_windows(text, 300)) - 1)
+
+    @patch("knowledge_cards.snippet_extractor.OVERFLOW_THRESHOLD", 300)
+    @patch("knowledge_cards.snippet_extractor._get_llm_client")
+    def test_all_windows_failing_raises(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_client.generate_json.side_effect = RuntimeError("LLM unavailable")
+        mock_get_client.return_value = mock_client
+
+        with self.assertRaises(SnippetExtractionError):
+            extract_snippets(_paragraph_article(), "Long", "A", word_count=200)
+
+    @patch("knowledge_cards.snippet_extractor.SEGMENTED_EXTRACTION", False)
+    @patch("knowledge_cards.snippet_extractor.OVERFLOW_THRESHOLD", 300)
+    @patch("knowledge_cards.snippet_extractor._get_llm_client")
+    def test_disabled_segmentation_truncates(self, mock_get_client):
+        mock_client = self._client_quoting_first_sentence()
+        mock_get_client.return_value = mock_client
+
+        extract_snippets(_paragraph_article(), "Long", "A", word_count=200)
+
+        mock_client.generate_json.assert_called_once()
+
+
 if __name__ == "__main__":
     unittest.main()